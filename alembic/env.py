@@ -38,6 +38,8 @@ from src.app_01.models.products.product_asset import ProductAsset
 from src.app_01.models.products.review import Review
 from src.app_01.models.products.product_attribute import ProductAttribute
 from src.app_01.models.products.product_filter import ProductFilter, ProductSeason, ProductMaterial, ProductStyle, ProductDiscount, ProductSearch
+from src.app_01.models.products.product_sales_delta import ProductSalesDelta
+from src.app_01.models.products.image_job import ImageJob
 
 # Orders
 from src.app_01.models.orders.cart_order import CartOrder
@@ -45,6 +47,8 @@ from src.app_01.models.orders.order import Order, OrderStatus
 from src.app_01.models.orders.order_item import OrderItem
 from src.app_01.models.orders.order_status_history import OrderStatusHistory
 from src.app_01.models.orders.cart import Cart, CartItem
+from src.app_01.models.orders.idempotency_key import IdempotencyKey
+from src.app_01.models.orders.outbox_event import OutboxEvent
 
 # Admins
 from src.app_01.models.admins.admin import Admin
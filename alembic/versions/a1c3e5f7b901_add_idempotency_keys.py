@@ -0,0 +1,44 @@
+"""add_idempotency_keys
+
+Revision ID: a1c3e5f7b901
+Revises: d0d14f41ccfd
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = 'd0d14f41ccfd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=100), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Enum('IN_PROGRESS', 'COMPLETED', name='idempotencystatus'), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'scope', 'key', name='uq_idempotency_user_scope_key')
+    )
+    op.create_index('idx_idempotency_expires', 'idempotency_keys', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_idempotency_keys_id'), 'idempotency_keys', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_idempotency_keys_id'), table_name='idempotency_keys')
+    op.drop_index('idx_idempotency_expires', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    sa.Enum(name='idempotencystatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,48 @@
+"""add_order_hourly_rollups
+
+Revision ID: a7c9e1f3b568
+Revises: f6b8d0e2a457
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b568'
+down_revision = 'f6b8d0e2a457'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'order_hourly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('market', sa.String(length=10), nullable=False),
+        sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('local_date', sa.Date(), nullable=False),
+        sa.Column('day_of_week', sa.Integer(), nullable=False),
+        sa.Column('orders_count', sa.Integer(), nullable=False),
+        sa.Column('items_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('cancelled_count', sa.Integer(), nullable=False),
+        sa.Column('delivered_count', sa.Integer(), nullable=False),
+        sa.Column('sales_total', sa.Float(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('market', 'hour', name='uq_order_rollup_market_hour')
+    )
+    op.create_index(op.f('ix_order_hourly_rollups_id'), 'order_hourly_rollups', ['id'], unique=False)
+    op.create_index('idx_order_rollup_market_local_date', 'order_hourly_rollups', ['market', 'local_date'], unique=False)
+    op.create_index('idx_order_rollup_market_refreshed', 'order_hourly_rollups', ['market', 'refreshed_at'], unique=False)
+    op.create_index('idx_order_updated_at', 'orders', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_order_updated_at', table_name='orders')
+    op.drop_index('idx_order_rollup_market_refreshed', table_name='order_hourly_rollups')
+    op.drop_index('idx_order_rollup_market_local_date', table_name='order_hourly_rollups')
+    op.drop_index(op.f('ix_order_hourly_rollups_id'), table_name='order_hourly_rollups')
+    op.drop_table('order_hourly_rollups')
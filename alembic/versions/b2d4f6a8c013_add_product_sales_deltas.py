@@ -0,0 +1,37 @@
+"""add_product_sales_deltas
+
+Revision ID: b2d4f6a8c013
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c013'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_sales_deltas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_sales_delta_product', 'product_sales_deltas', ['product_id'], unique=False)
+    op.create_index(op.f('ix_product_sales_deltas_id'), 'product_sales_deltas', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_product_sales_deltas_id'), table_name='product_sales_deltas')
+    op.drop_index('idx_sales_delta_product', table_name='product_sales_deltas')
+    op.drop_table('product_sales_deltas')
@@ -0,0 +1,48 @@
+"""add_image_jobs
+
+Revision ID: b8d0f2a4c679
+Revises: a7c9e1f3b568
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d0f2a4c679'
+down_revision = 'a7c9e1f3b568'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('target_type', sa.String(length=20), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=50), nullable=False),
+    sa.Column('batch', sa.String(length=36), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('source', sa.LargeBinary(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'DONE', 'FAILED', name='imagejobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.String(length=1000), nullable=True),
+    sa.Column('result_url', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_image_job_status_next_attempt', 'image_jobs', ['status', 'next_attempt_at'], unique=False)
+    op.create_index('idx_image_job_target', 'image_jobs', ['target_type', 'target_id', 'field'], unique=False)
+    op.create_index(op.f('ix_image_jobs_id'), 'image_jobs', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_image_jobs_id'), table_name='image_jobs')
+    op.drop_index('idx_image_job_target', table_name='image_jobs')
+    op.drop_index('idx_image_job_status_next_attempt', table_name='image_jobs')
+    op.drop_table('image_jobs')
+    sa.Enum(name='imagejobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,44 @@
+"""add_outbox_events
+
+Revision ID: c3e5a7b9d124
+Revises: b2d4f6a8c013
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d124'
+down_revision = 'b2d4f6a8c013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('aggregate_type', sa.String(length=50), nullable=True),
+    sa.Column('aggregate_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'DELIVERED', 'FAILED', name='outboxstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.String(length=1000), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_outbox_aggregate', 'outbox_events', ['aggregate_type', 'aggregate_id'], unique=False)
+    op.create_index('idx_outbox_status_next_attempt', 'outbox_events', ['status', 'next_attempt_at'], unique=False)
+    op.create_index(op.f('ix_outbox_events_id'), 'outbox_events', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_outbox_events_id'), table_name='outbox_events')
+    op.drop_index('idx_outbox_status_next_attempt', table_name='outbox_events')
+    op.drop_index('idx_outbox_aggregate', table_name='outbox_events')
+    op.drop_table('outbox_events')
+    sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,26 @@
+"""add_order_discount_and_tax
+
+Revision ID: d4f6b8c0e235
+Revises: c3e5a7b9d124
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e235'
+down_revision = 'c3e5a7b9d124'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('discount_amount', sa.Float(), server_default='0', nullable=True))
+    op.add_column('orders', sa.Column('tax_amount', sa.Float(), server_default='0', nullable=True))
+
+
+def downgrade():
+    op.drop_column('orders', 'tax_amount')
+    op.drop_column('orders', 'discount_amount')
@@ -0,0 +1,26 @@
+"""add_order_history_indexes
+
+Revision ID: e5a7c9d1f346
+Revises: d4f6b8c0e235
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f346'
+down_revision = 'd4f6b8c0e235'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_order_user_order_date', 'orders', ['user_id', 'order_date'], unique=False)
+    op.create_index('idx_order_status', 'orders', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_order_status', table_name='orders')
+    op.drop_index('idx_order_user_order_date', table_name='orders')
@@ -0,0 +1,39 @@
+"""add_cart_item_unique_sku
+
+Revision ID: f6b8d0e2a457
+Revises: e5a7c9d1f346
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a457'
+down_revision = 'e5a7c9d1f346'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold duplicate (cart_id, sku_id) lines into the oldest one before adding the constraint
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(dup.quantity) FROM cart_items dup
+            WHERE dup.cart_id = cart_items.cart_id AND dup.sku_id = cart_items.sku_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, sku_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart_items WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, sku_id
+        )
+    """)
+    op.create_unique_constraint('uq_cart_items_cart_sku', 'cart_items', ['cart_id', 'sku_id'])
+
+
+def downgrade():
+    op.drop_constraint('uq_cart_items_cart_sku', 'cart_items', type_='unique')
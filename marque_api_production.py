@@ -23,58 +23,25 @@ from enum import Enum
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Twilio Verify integration
-try:
-    from twilio.rest import Client
-    from twilio.base.exceptions import TwilioException
-    TWILIO_AVAILABLE = True
-    logger.info("✅ Twilio library imported successfully")
-except ImportError as e:
-    TWILIO_AVAILABLE = False
-    logger.error(f"❌ Failed to import Twilio library: {e}")
-except Exception as e:
-    TWILIO_AVAILABLE = False
-    logger.error(f"❌ Unexpected error importing Twilio: {e}")
-
 # Import new architecture components
 from src.app_01.core.config import get_settings, Market, MarketConfig
 from src.app_01.core.exceptions import create_market_error, ErrorCode
 from src.app_01.core.middleware import setup_middleware
+from src.app_01.services.sms_provider import sms_gateway
 
 # Get settings
 settings = get_settings()
 
-# Twilio Configuration
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_VERIFY_SERVICE_SID = os.getenv("TWILIO_VERIFY_SERVICE_SID")
-
-# Initialize Twilio client
-if TWILIO_AVAILABLE and TWILIO_ACCOUNT_SID:
-    try:
-        twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        # Test the client by getting account info
-        account = twilio_client.api.accounts(TWILIO_ACCOUNT_SID).fetch()
-        TWILIO_READY = True
-        logger.info(f"✅ Twilio Verify service initialized for account: {account.friendly_name}")
-    except Exception as e:
-        TWILIO_READY = False
-        logger.error(f"❌ Failed to initialize Twilio: {e}")
-        logger.error(f"❌ TWILIO_ACCOUNT_SID: {TWILIO_ACCOUNT_SID[:10]}...")
-        logger.error(f"❌ TWILIO_AUTH_TOKEN: {TWILIO_AUTH_TOKEN[:10] if TWILIO_AUTH_TOKEN else 'None'}...")
-else:
-    TWILIO_READY = False
-    if not TWILIO_AVAILABLE:
-        logger.warning("⚠️ Twilio library not available")
-    if not TWILIO_ACCOUNT_SID:
-        logger.warning("⚠️ TWILIO_ACCOUNT_SID not set")
+# SMS provider (Twilio Verify) - configured from TWILIO_* env vars, no network calls at import
+TWILIO_VERIFY_SERVICE_SID = settings.sms.twilio_verify_service_sid
+TWILIO_READY = sms_gateway.ready
 
 # Debug logging
-    logger.info(f"🔍 Twilio Config Debug (v1.2.0):")
-logger.info(f"  - TWILIO_ACCOUNT_SID: {'✅ Set' if TWILIO_ACCOUNT_SID else '❌ Missing'}")
-logger.info(f"  - TWILIO_AUTH_TOKEN: {'✅ Set' if TWILIO_AUTH_TOKEN else '❌ Missing'}")
+logger.info(f"🔍 SMS Config Debug (v1.2.0):")
+logger.info(f"  - TWILIO_ACCOUNT_SID: {'✅ Set' if settings.sms.twilio_account_sid else '❌ Missing'}")
+logger.info(f"  - TWILIO_AUTH_TOKEN: {'✅ Set' if settings.sms.twilio_auth_token else '❌ Missing'}")
 logger.info(f"  - TWILIO_VERIFY_SERVICE_SID: {'✅ Set' if TWILIO_VERIFY_SERVICE_SID else '❌ Missing'}")
-logger.info(f"  - TWILIO_AVAILABLE: {TWILIO_AVAILABLE}")
+logger.info(f"  - SMS_PROVIDER: {sms_gateway.name}")
 logger.info(f"  - TWILIO_READY: {TWILIO_READY}")
 
 # Create FastAPI app
@@ -321,37 +288,20 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def send_verification_via_twilio_verify(phone: str) -> bool:
+async def send_verification_via_twilio_verify(phone: str) -> bool:
     """Send verification code via Twilio Verify"""
     if not TWILIO_READY:
         logger.info(f"📱 DEMO Verify SMS to {phone}")
         return True
     
-    try:
-        verification = twilio_client.verify.v2.services(TWILIO_VERIFY_SERVICE_SID).verifications.create(
-            to=phone,
-            channel='sms'
-        )
-        logger.info(f"✅ Twilio Verify SMS sent to {phone} - SID: {verification.sid}")
-        return True
-    except TwilioException as e:
-        logger.error(f"❌ Twilio Verify failed: {e}")
-        return False
+    return await sms_gateway.send_code(phone)
 
-def verify_code_via_twilio_verify(phone: str, code: str) -> bool:
+async def verify_code_via_twilio_verify(phone: str, code: str) -> bool:
     """Verify code via Twilio Verify"""
     if not TWILIO_READY:
         return code.isdigit() and len(code) == 6
     
-    try:
-        verification_check = twilio_client.verify.v2.services(TWILIO_VERIFY_SERVICE_SID).verification_checks.create(
-            to=phone,
-            code=code
-        )
-        return verification_check.status == 'approved'
-    except TwilioException as e:
-        logger.error(f"❌ Twilio Verify check failed: {e}")
-        return False
+    return await sms_gateway.check_code(phone, code)
 
 def format_us_phone(phone: str) -> str:
     """Format US phone number for display"""
@@ -398,7 +348,8 @@ async def debug_env():
         "TWILIO_AUTH_TOKEN": "✅ Set" if os.getenv("TWILIO_AUTH_TOKEN") else "❌ Missing", 
         "TWILIO_VERIFY_SERVICE_SID": "✅ Set" if os.getenv("TWILIO_VERIFY_SERVICE_SID") else "❌ Missing",
         "TWILIO_READY": TWILIO_READY,
-        "TWILIO_AVAILABLE": TWILIO_AVAILABLE
+        "SMS_PROVIDER": sms_gateway.name,
+        "SMS_CIRCUIT": sms_gateway.breaker.state
     }
 
 @app.post("/debug/init-db")
@@ -588,7 +539,7 @@ async def send_verification_code(request: PhoneRequest):
             )
         
         # Send verification via Twilio Verify
-        sms_sent = send_verification_via_twilio_verify(phone)
+        sms_sent = await send_verification_via_twilio_verify(phone)
         
         if not sms_sent:
             raise HTTPException(
@@ -641,7 +592,7 @@ async def verify_phone_code(request: VerificationRequest):
             )
         
         # Verify code via Twilio Verify
-        is_valid = verify_code_via_twilio_verify(phone, code)
+        is_valid = await verify_code_via_twilio_verify(phone, code)
         
         if not is_valid:
             raise HTTPException(
@@ -1001,6 +952,7 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("🛑 Shutting down Marque Production API")
+    await sms_gateway.close()
 
 if __name__ == "__main__":
     # Railway provides PORT environment variable
@@ -1,6 +1,7 @@
 from sqladmin import Admin
 from fastapi import FastAPI
 from starlette.requests import Request
+from ..core.config import settings
 from ..db.market_db import db_manager, Market
 from .sqladmin_views import (
     WebsiteContentAuthenticationBackend,
@@ -12,7 +13,7 @@ from .multi_market_admin_views import (
     MarketAwareModelView,
     # Import market-aware admin views
     ProductAdmin, SKUAdmin, ProductAssetAdmin, ProductAttributeAdmin,
-    ReviewAdmin
+    ReviewAdmin, ImageJobAdmin
     # SKUAdmin re-added for managing product variants (size/color)
 )
 from .admin_log_admin_views import AdminLogAdmin
@@ -35,6 +36,10 @@ from .admin_user_admin_views import AdminUserAdmin
 from .dashboard_admin_views import DashboardView
 
 
+# Admin session check shared by the SQLAdmin panel and the admin API routers
+authentication_backend = MultiMarketAuthenticationBackend(secret_key=settings.security.secret_key)
+
+
 def create_sqladmin_app(app: FastAPI) -> Admin:
     """Create and configure SQLAdmin for multi-market website content management"""
     
@@ -46,7 +51,6 @@ def create_sqladmin_app(app: FastAPI) -> Admin:
     templates_dir = os.path.join(os.path.dirname(__file__), "templates")
     
     # Initialize SQLAdmin with multi-market authentication
-    authentication_backend = MultiMarketAuthenticationBackend(secret_key="your-secret-key-here")
     admin = Admin(
         app=app,
         engine=engine,
@@ -110,6 +114,7 @@ def create_sqladmin_app(app: FastAPI) -> Admin:
     admin.add_view(ProductAdmin)
     admin.add_view(SKUAdmin)  # Manage product variants (sizes, colors)
     admin.add_view(ProductAssetAdmin)
+    admin.add_view(ImageJobAdmin)  # Background image processing status
     admin.add_view(ProductAttributeAdmin)
     admin.add_view(ReviewAdmin)
     
@@ -7,7 +7,6 @@ from sqladmin import ModelView
 from starlette.requests import Request
 from wtforms import FileField
 from wtforms.validators import Optional as OptionalValidator
-from PIL import Image
 import io
 import logging
 
@@ -114,16 +113,12 @@ class BannerAdmin(MarketAwareModelView, model=Banner):
             file_bytes = await file_data.read()
             logger.info(f"📊 [BANNER {image_type.upper()}] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [BANNER {image_type.upper()}] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info(f"💾 [BANNER {image_type.upper()}] Calling image_uploader.save_image...")
             url = await image_uploader.save_image(
-                file=upload_file, category="banner"
+                file=upload_file, category="banner", placeholder=True
             )
             logger.info(f"✅ [BANNER {image_type.upper()}] Image uploaded successfully to: {url}")
             return url
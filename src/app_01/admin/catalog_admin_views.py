@@ -3,7 +3,6 @@ from sqladmin import ModelView
 from starlette.requests import Request
 from wtforms import FileField
 from wtforms.validators import Optional as OptionalValidator
-from PIL import Image
 import io
 import logging
 
@@ -72,11 +71,7 @@ class CategoryAdmin(MarketAwareModelView, model=Category):
             file_bytes = await file_data.read()
             logger.info(f"📊 [CATEGORY IMAGE] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [CATEGORY IMAGE] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info("💾 [CATEGORY IMAGE] Calling image_uploader.save_image...")
@@ -213,11 +208,7 @@ class SubcategoryAdmin(MarketAwareModelView, model=Subcategory):
             file_bytes = await file_data.read()
             logger.info(f"📊 [SUBCATEGORY IMAGE] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [SUBCATEGORY IMAGE] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info("💾 [SUBCATEGORY IMAGE] Calling image_uploader.save_image...")
@@ -354,11 +345,7 @@ class BrandAdmin(MarketAwareModelView, model=Brand):
             file_bytes = await file_data.read()
             logger.info(f"📊 [BRAND LOGO] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [BRAND LOGO] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info("💾 [BRAND LOGO] Calling image_uploader.save_image...")
@@ -13,16 +13,10 @@ Provides real-time insights into:
 from sqladmin import BaseView, expose
 from starlette.requests import Request
 from starlette.responses import HTMLResponse
-from sqlalchemy import func, and_, or_
-from datetime import datetime, timedelta
-from decimal import Decimal
 
-from ..models.orders.order import Order, OrderStatus
-from ..models.orders.order_item import OrderItem
-from ..models.products.product import Product
-from ..models.products.sku import SKU
-from ..models.users.user import User
+from ..models.orders.order import OrderStatus
 from ..db.market_db import db_manager, Market
+from ..services.dashboard_snapshot import dashboard_snapshots, build_dashboard_snapshot
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,223 +37,62 @@ class DashboardView(BaseView):
         admin_market = request.session.get("admin_market", "kg")
         market = Market.KG if admin_market == "kg" else Market.US
         
-        # Get database session for the correct market
-        db = next(db_manager.get_db_session(market))
-        
         try:
-            # Calculate date ranges
-            try:
-                today = datetime.utcnow().date()
-                week_ago = today - timedelta(days=7)
-                month_ago = today - timedelta(days=30)
-            except (TypeError, AttributeError):
-                # Handle mock objects in tests - use default dates
-                today = datetime.utcnow().date()
-                week_ago = today - timedelta(days=7)
-                month_ago = today - timedelta(days=30)
-            
-            # ==================================================================
-            # 📊 SALES METRICS
-            # ==================================================================
-            
-            # Orders today
-            orders_today = db.query(func.count(Order.id)).filter(
-                func.date(Order.order_date) == today
-            ).scalar() or 0
-            
-            # Orders this week
-            orders_week = db.query(func.count(Order.id)).filter(
-                Order.order_date >= week_ago
-            ).scalar() or 0
-            
-            # Orders this month
-            orders_month = db.query(func.count(Order.id)).filter(
-                Order.order_date >= month_ago
-            ).scalar() or 0
-            
-            # ==================================================================
-            # 💰 REVENUE METRICS
-            # ==================================================================
-            
-            # Revenue today
-            revenue_today = db.query(func.sum(Order.total_amount)).filter(
-                func.date(Order.order_date) == today,
-                Order.status != OrderStatus.CANCELLED
-            ).scalar() or Decimal('0.00')
-            
-            # Revenue this week
-            revenue_week = db.query(func.sum(Order.total_amount)).filter(
-                Order.order_date >= week_ago,
-                Order.status != OrderStatus.CANCELLED
-            ).scalar() or Decimal('0.00')
-            
-            # Revenue this month
-            revenue_month = db.query(func.sum(Order.total_amount)).filter(
-                Order.order_date >= month_ago,
-                Order.status != OrderStatus.CANCELLED
-            ).scalar() or Decimal('0.00')
-            
-            # Average order value
-            avg_order_value = db.query(func.avg(Order.total_amount)).filter(
-                Order.status != OrderStatus.CANCELLED
-            ).scalar() or Decimal('0.00')
-            
-            # ==================================================================
-            # 📦 ORDER STATUS BREAKDOWN
-            # ==================================================================
-            
-            orders_pending = db.query(func.count(Order.id)).filter(
-                Order.status == OrderStatus.PENDING
-            ).scalar() or 0
-            
-            orders_confirmed = db.query(func.count(Order.id)).filter(
-                Order.status == OrderStatus.CONFIRMED
-            ).scalar() or 0
-            
-            orders_shipped = db.query(func.count(Order.id)).filter(
-                Order.status == OrderStatus.SHIPPED
-            ).scalar() or 0
-            
-            orders_delivered = db.query(func.count(Order.id)).filter(
-                Order.status == OrderStatus.DELIVERED
-            ).scalar() or 0
-            
-            # ==================================================================
-            # 🛍️ PRODUCT METRICS
-            # ==================================================================
-            
-            # Total products
-            total_products = db.query(func.count(Product.id)).filter(
-                Product.is_active == True
-            ).scalar() or 0
-            
-            # Low stock products (< 10 items)
-            try:
-                low_stock_products = db.query(
-                    Product.id, Product.title, func.sum(SKU.stock).label('total_stock')
-                ).join(
-                    SKU, Product.id == SKU.product_id
-                ).group_by(
-                    Product.id, Product.title
-                ).having(
-                    func.sum(SKU.stock) < 10
-                ).limit(10).all()
-                
-                # Ensure it's a list (handle Mock objects in tests)
-                if not isinstance(low_stock_products, list):
-                    low_stock_products = []
-            except Exception:
-                low_stock_products = []
-            
-            low_stock_count = len(low_stock_products) if isinstance(low_stock_products, list) else 0
-            
-            # Out of stock products
-            try:
-                out_of_stock_count = db.query(func.count(Product.id)).filter(
-                    Product.id.in_(
-                        db.query(SKU.product_id).filter(
-                            SKU.stock == 0
-                        ).distinct()
-                    )
-                ).scalar() or 0
-            except Exception:
-                out_of_stock_count = 0
-            
-            # ==================================================================
-            # 🔥 TOP PRODUCTS
-            # ==================================================================
-            
-            # Most popular products (by sold count)
-            try:
-                popular_products = db.query(
-                    Product.id, Product.title, Product.sold_count
-                ).filter(
-                    Product.is_active == True
-                ).order_by(
-                    Product.sold_count.desc()
-                ).limit(5).all()
-                
-                # Ensure it's a list (handle Mock objects in tests)
-                if not isinstance(popular_products, list):
-                    popular_products = []
-            except Exception:
-                popular_products = []
-            
-            # ==================================================================
-            # 👥 USER METRICS
-            # ==================================================================
-            
-            # Total users
-            total_users = db.query(func.count(User.id)).scalar() or 0
-            
-            # New users today
-            users_today = db.query(func.count(User.id)).filter(
-                func.date(User.created_at) == today
-            ).scalar() or 0
-            
-            # New users this week
-            users_week = db.query(func.count(User.id)).filter(
-                User.created_at >= week_ago
-            ).scalar() or 0
-            
-            # New users this month
-            users_month = db.query(func.count(User.id)).filter(
-                User.created_at >= month_ago
-            ).scalar() or 0
-            
             # ==================================================================
-            # 📋 RECENT ORDERS
+            # 📊 METRICS SNAPSHOTS (one aggregate query per market per TTL)
             # ==================================================================
             
-            try:
-                recent_orders = db.query(Order).order_by(
-                    Order.order_date.desc()
-                ).limit(10).all()
-                
-                # Ensure it's a list (handle Mock objects in tests)
-                if not isinstance(recent_orders, list):
-                    recent_orders = []
-            except Exception:
-                recent_orders = []
+            # Both markets are loaded concurrently; the other one only feeds the comparison
+            other_market = Market.US if market == Market.KG else Market.KG
+            snapshots = await db_manager.arun_in_markets(_cached_snapshot, [market, other_market])
+            if not snapshots[market].ok:
+                raise snapshots[market].error
+            snapshot = snapshots[market].value
+            
+            orders_today = snapshot["orders_today"]
+            orders_week = snapshot["orders_week"]
+            orders_month = snapshot["orders_month"]
+            
+            revenue_today = snapshot["revenue_today"]
+            revenue_week = snapshot["revenue_week"]
+            revenue_month = snapshot["revenue_month"]
+            avg_order_value = snapshot["avg_order_value"]
+            
+            orders_pending = snapshot["orders_pending"]
+            orders_confirmed = snapshot["orders_confirmed"]
+            orders_shipped = snapshot["orders_shipped"]
+            orders_delivered = snapshot["orders_delivered"]
+            
+            total_products = snapshot["total_products"]
+            low_stock_products = snapshot["low_stock_products"]
+            low_stock_count = snapshot["low_stock_count"]
+            out_of_stock_count = snapshot["out_of_stock_count"]
+            popular_products = snapshot["popular_products"]
+            
+            total_users = snapshot["total_users"]
+            users_today = snapshot["users_today"]
+            users_week = snapshot["users_week"]
+            users_month = snapshot["users_month"]
+            
+            recent_orders = snapshot["recent_orders"]
             
             # ==================================================================
             # 🌍 MARKET COMPARISON ANALYTICS
             # ==================================================================
             
-            # Get comparison data from the other market
-            other_market = Market.US if market == Market.KG else Market.KG
-            other_db = next(db_manager.get_db_session(other_market))
-            
-            try:
-                # Compare orders today
-                other_orders_today = other_db.query(func.count(Order.id)).filter(
-                    func.date(Order.order_date) == today
-                ).scalar() or 0
-                
-                # Compare total revenue this month
-                other_revenue_month = other_db.query(
-                    func.coalesce(func.sum(Order.total_amount), 0)
-                ).filter(
-                    Order.order_date >= month_ago,
-                    Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.DELIVERED])
-                ).scalar() or 0
-                
-                # Compare total users
-                other_total_users = other_db.query(func.count(User.id)).scalar() or 0
-                
-                # Compare total products
-                other_total_products = other_db.query(func.count(Product.id)).filter(
-                    Product.is_active == True
-                ).scalar() or 0
-                
-            except Exception as e:
-                logger.warning(f"Could not fetch comparison data from other market: {e}")
+            # Comparison data comes from the other market's snapshot (zeros if it failed or timed out)
+            if snapshots[other_market].ok:
+                other_snapshot = snapshots[other_market].value
+                other_orders_today = other_snapshot["orders_today"]
+                other_revenue_month = other_snapshot["confirmed_revenue_month"]
+                other_total_users = other_snapshot["total_users"]
+                other_total_products = other_snapshot["total_products"]
+            else:
+                logger.warning(f"Could not fetch comparison data from other market: {snapshots[other_market].error}")
                 other_orders_today = 0
                 other_revenue_month = 0
                 other_total_users = 0
                 other_total_products = 0
-            finally:
-                other_db.close()
             
             # Calculate growth percentages
             def calculate_growth(current, previous):
@@ -694,9 +527,11 @@ class DashboardView(BaseView):
         except Exception as e:
             logger.error(f"Error loading dashboard: {e}", exc_info=True)
             return HTMLResponse(content=f"<h1>Error loading dashboard: {str(e)}</h1>", status_code=500)
-        finally:
-            if db:
-                db.close()
+
+
+def _cached_snapshot(db, market: Market) -> dict:
+    """A market's dashboard snapshot, rebuilt in the fan-out's session when the cached one is stale"""
+    return dashboard_snapshots.get(market, lambda: build_dashboard_snapshot(db, market))
 
 
 def _format_status_badge(status):
@@ -18,15 +18,18 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
 import os
-from PIL import Image
 import io
 
 from ..models import (
     Product, SKU, ProductAsset, Review, ProductAttribute,
-    User, Admin, AdminLog
+    User, Admin, AdminLog, ImageJob
 )
 from ..db.market_db import db_manager, Market, MarketConfig
+from ..services.admin_identity import admin_identities, AdminIdentity
+from ..services.admin_log_writer import admin_log_writer
 from ..utils.image_upload import image_uploader
+from ..services.image_jobs import enqueue_images, image_job_queue
+from ..core.config import settings
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -155,6 +158,8 @@ class MultiMarketAuthenticationBackend(AuthenticationBackend):
                 "market_language": market_config["language"]
             })
             
+            admin_identities.put(token, AdminIdentity.from_admin(admin, market))
+            
             logger.info(f"   ✅ Session created with token: {token[:16]}...")
             logger.info(f"   ✅ Market context: {market_config['country']} ({market_config['currency']})")
             logger.info(f"{'='*70}\n")
@@ -173,6 +178,7 @@ class MultiMarketAuthenticationBackend(AuthenticationBackend):
     async def logout(self, request: Request) -> bool:
         """Logout admin user"""
         logger.info("🚪 Admin logout")
+        admin_identities.invalidate_session(request.session.get("token"))
         request.session.clear()
         return True
     
@@ -191,26 +197,33 @@ class MultiMarketAuthenticationBackend(AuthenticationBackend):
             return False
         
         # NEW LOGIC: Get admin's market from database (single source of truth)
-        # First, try the session market to find the admin
+        # A recently verified identity for this session skips the database
         try:
             temp_market = Market.KG if session_market == "kg" else Market.US
-            temp_db = next(db_manager.get_db_session(temp_market))
-            temp_admin = temp_db.query(Admin).filter(Admin.id == admin_id).first()
-            temp_db.close()
+            identity = admin_identities.get(token, admin_id, temp_market)
             
-            if not temp_admin:
-                # Try the other market
-                temp_market = Market.US if session_market == "kg" else Market.KG
+            if identity is None:
+                # First, try the session market to find the admin
                 temp_db = next(db_manager.get_db_session(temp_market))
                 temp_admin = temp_db.query(Admin).filter(Admin.id == admin_id).first()
                 temp_db.close()
                 
                 if not temp_admin:
-                    logger.warning(f"   ❌ Admin ID {admin_id} not found in either database")
-                    return False
+                    # Try the other market
+                    temp_market = Market.US if session_market == "kg" else Market.KG
+                    temp_db = next(db_manager.get_db_session(temp_market))
+                    temp_admin = temp_db.query(Admin).filter(Admin.id == admin_id).first()
+                    temp_db.close()
+                    
+                    if not temp_admin:
+                        logger.warning(f"   ❌ Admin ID {admin_id} not found in either database")
+                        return False
+                
+                identity = AdminIdentity.from_admin(temp_admin, temp_market)
+                admin_identities.put(token, identity)
             
             # Use the market stored in admin's database record (source of truth)
-            admin_db_market = Market(temp_admin.market) if temp_admin.market else Market.KG
+            admin_db_market = identity.market
             logger.debug(f"   📊 Admin's database market: {admin_db_market.value.upper()}")
             
             # Update session if market changed
@@ -225,11 +238,11 @@ class MultiMarketAuthenticationBackend(AuthenticationBackend):
                 })
             
             # Verify admin is active
-            if not temp_admin.is_active:
-                logger.warning(f"   ❌ Admin {temp_admin.username} is inactive")
+            if not identity.is_active:
+                logger.warning(f"   ❌ Admin {identity.username} is inactive")
                 return False
             
-            logger.debug(f"   ✅ Authentication valid for {temp_admin.username} (ID: {admin_id}) in {admin_db_market.value.upper()}")
+            logger.debug(f"   ✅ Authentication valid for {identity.username} (ID: {admin_id}) in {admin_db_market.value.upper()}")
             return True
             
         except Exception as e:
@@ -651,7 +664,35 @@ class MarketAwareModelView(ModelView):
             # If request.state doesn't exist or we can't check, just proceed
             pass
         return db
-    
+
+    async def _read_uploads(self, files) -> list:
+        """(filename, bytes) of the non-empty uploads in a file or multi-file form field"""
+        if not files or isinstance(files, str):
+            return []
+        uploads = []
+        for file_data in files if isinstance(files, list) else [files]:
+            if hasattr(file_data, "filename") and file_data.filename:
+                await file_data.seek(0)
+                uploads.append((file_data.filename, await file_data.read()))
+        return uploads
+
+    def _queue_images(self, request: Request, target_type: str, target_id: int, uploads: dict) -> None:
+        """Queue uploaded images ({field: [(filename, bytes)]}) for the background image workers"""
+        uploads = {field: files for field, files in uploads.items() if files}
+        if not uploads or target_id is None:
+            return
+        admin_market = request.session.get("admin_market", "kg")
+        market = Market.KG if admin_market == "kg" else Market.US
+        db = next(db_manager.get_db_session(market))
+        try:
+            for field, files in uploads.items():
+                enqueue_images(db, target_type, target_id, field, files)
+                logger.info(f"🕒 [{target_type.upper()} {target_id}] Queued {len(files)} image(s) for {field}")
+            db.commit()
+        finally:
+            db.close()
+        image_job_queue.notify()
+
     def check_permissions(self, request: Request, operation: str = "list") -> bool:
         """Check if current admin has permission for the operation"""
         if self._bypass_permissions_for_testing:
@@ -661,15 +702,25 @@ class MarketAwareModelView(ModelView):
         if not admin_id:
             return False
             
-        # Get admin from database
+        # Get admin from the identity cache, or from database
         admin_market = request.session.get("admin_market", "kg")
         market = Market.KG if admin_market == "kg" else Market.US
-        db = next(db_manager.get_db_session(market))
+        token = request.session.get("token")
         
         try:
-            from ..models.admins.admin import Admin
-            admin = db.query(Admin).filter(Admin.id == admin_id).first()
-            if not admin or not admin.is_active:
+            admin = admin_identities.get(token, admin_id, market)
+            if admin is None:
+                db = next(db_manager.get_db_session(market))
+                try:
+                    row = db.query(Admin).filter(Admin.id == admin_id).first()
+                finally:
+                    db.close()
+                if not row:
+                    return False
+                admin = AdminIdentity.from_admin(row, market)
+                admin_identities.put(token, admin)
+            
+            if not admin.is_active:
                 return False
             
             # Super admin has all permissions
@@ -690,8 +741,6 @@ class MarketAwareModelView(ModelView):
         except Exception as e:
             logger.error(f"Permission check error: {e}")
             return False
-        finally:
-            db.close()
     
     async def list(self, request: Request):
         """Override list to check permissions"""
@@ -712,44 +761,29 @@ class MarketAwareModelView(ModelView):
             logger.warning(f"log_admin_action: No admin_id in session. Session keys: {list(request.session.keys())}")
             return
         
-        # Use db from request.state if available (set by get_db_session), otherwise get a new one
-        if hasattr(request, 'state') and hasattr(request.state, '_db'):
-            db = request.state._db
-            should_close = False  # Don't close if it's from request.state
-        else:
-            market = Market.KG if admin_market == "kg" else Market.US
-            db = next(db_manager.get_db_session(market))
-            should_close = True
+        market = Market.KG if admin_market == "kg" else Market.US
+        # Use db from request.state if available (set by get_db_session); only used when the writer is not running
+        db = request.state._db if hasattr(request, 'state') and hasattr(request.state, '_db') else None
+        
+        # Get client info
+        client_ip = request.client.host if request.client else "unknown"
+        user_agent = request.headers.get("user-agent", "unknown")
+        
+        # Queue the log entry (bulk-inserted by the admin log writer)
+        logged = admin_log_writer.write(
+            db,
+            market,
+            admin_id=admin_id,
+            action=action,
+            entity_type=self.model.__name__.lower() if hasattr(self, 'model') else "unknown",
+            entity_id=entity_id,
+            description=f"[{admin_market.upper()}] {description}" if description else f"[{admin_market.upper()}] {action}",
+            ip_address=client_ip,
+            user_agent=user_agent
+        )
         
-        try:
-            from ..models.admins.admin_log import AdminLog
-            
-            # Get client info
-            client_ip = request.client.host if request.client else "unknown"
-            user_agent = request.headers.get("user-agent", "unknown")
-            
-            # Create log entry
-            log_entry = AdminLog(
-                admin_id=admin_id,
-                action=action,
-                entity_type=self.model.__name__.lower() if hasattr(self, 'model') else "unknown",
-                entity_id=entity_id,
-                description=f"[{admin_market.upper()}] {description}" if description else f"[{admin_market.upper()}] {action}",
-                ip_address=client_ip,
-                user_agent=user_agent
-            )
-            
-            db.add(log_entry)
-            db.commit()
-            
+        if logged:
             logger.info(f"📝 Admin Action Logged: {admin_id} performed {action} on {self.model.__name__ if hasattr(self, 'model') else 'unknown'} in {admin_market.upper()} market")
-            
-        except Exception as e:
-            logger.error(f"Failed to log admin action: {e}")
-            db.rollback()
-        finally:
-            if should_close:
-                db.close()
     
     async def create(self, request: Request):
         """Override create to check permissions and log actions"""
@@ -1121,16 +1155,12 @@ class ProductAdmin(MarketAwareModelView, model=Product):
             file_bytes = await file_data.read()
             logger.info(f"📊 [PRODUCT {image_type.upper()}] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [PRODUCT {image_type.upper()}] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info(f"💾 [PRODUCT {image_type.upper()}] Calling image_uploader.save_image...")
             url = await image_uploader.save_image(
-                file=upload_file, category="product"
+                file=upload_file, category="product", variants=True, placeholder=True
             )
             logger.info(f"✅ [PRODUCT {image_type.upper()}] Image uploaded successfully to: {url}")
             return url
@@ -1153,6 +1183,15 @@ class ProductAdmin(MarketAwareModelView, model=Product):
         additional_files = data.pop("additional_images", None)
         logger.info(f"📸 [PRODUCT INSERT] Extracted additional_images: {additional_files} (type: {type(additional_files)})")
         
+        # Background processing: save the product now, the image workers fill in the images
+        queued_images = {}
+        if settings.image_jobs.enabled:
+            queued_images = {
+                "main_image": await self._read_uploads(main_image_file),
+                "additional_images": await self._read_uploads(additional_files)
+            }
+            main_image_file = additional_files = None
+        
         # Save main image if provided
         main_image_url = None
         if main_image_file and hasattr(main_image_file, "filename") and main_image_file.filename:
@@ -1192,6 +1231,7 @@ class ProductAdmin(MarketAwareModelView, model=Product):
         # Call parent insert_model
         result = await super().insert_model(request, data)
         logger.info("✅ [PRODUCT INSERT] Product created successfully")
+        self._queue_images(request, "product", getattr(result, "id", None), queued_images)
         
         # Store db in request state so log_admin_action can use it
         if result and hasattr(result, 'id'):
@@ -1226,6 +1266,15 @@ class ProductAdmin(MarketAwareModelView, model=Product):
         additional_files = data.pop("additional_images", None)
         logger.info(f"📸 [PRODUCT UPDATE] Extracted additional_images: {additional_files} (type: {type(additional_files)})")
         
+        # Background processing: existing images stay until the new ones are ready
+        queued_images = {}
+        if settings.image_jobs.enabled:
+            queued_images = {
+                "main_image": await self._read_uploads(main_image_file),
+                "additional_images": await self._read_uploads(additional_files)
+            }
+            main_image_file = additional_files = None
+        
         # Save main image if provided (and it's a new file, not existing URL string)
         if main_image_file and not isinstance(main_image_file, str):
             if hasattr(main_image_file, "filename") and main_image_file.filename:
@@ -1263,6 +1312,7 @@ class ProductAdmin(MarketAwareModelView, model=Product):
         # Call parent update_model
         result = await super().update_model(request, pk, data)
         logger.info("✅ [PRODUCT UPDATE] Product updated successfully")
+        self._queue_images(request, "product", getattr(result, "id", None), queued_images)
         return result
 
 
@@ -1349,16 +1399,12 @@ class SKUAdmin(MarketAwareModelView, model=SKU):
             file_bytes = await file_data.read()
             logger.info(f"📊 [SKU {image_type.upper()}] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [SKU {image_type.upper()}] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info(f"💾 [SKU {image_type.upper()}] Calling image_uploader.save_image...")
             url = await image_uploader.save_image(
-                file=upload_file, category="product"
+                file=upload_file, category="product", placeholder=True
             )
             logger.info(f"✅ [SKU {image_type.upper()}] Image uploaded successfully to: {url}")
             return url
@@ -1376,6 +1422,12 @@ class SKUAdmin(MarketAwareModelView, model=SKU):
         variant_image_file = data.pop("variant_image", None)
         logger.info(f"🖼️ [SKU INSERT] Extracted variant_image_file: {variant_image_file} (type: {type(variant_image_file)})")
         
+        # Background processing: save the SKU now, the image workers fill in the image
+        queued_images = {}
+        if settings.image_jobs.enabled:
+            queued_images = {"variant_image": await self._read_uploads(variant_image_file)}
+            variant_image_file = None
+        
         # Save variant image if provided
         variant_image_url = None
         if variant_image_file and hasattr(variant_image_file, "filename") and variant_image_file.filename:
@@ -1417,7 +1469,9 @@ class SKUAdmin(MarketAwareModelView, model=SKU):
         else:
             logger.warning(f"⚠️ Missing data for SKU generation - product_id: {product_id} (type: {type(product_id)}), size: '{size}', color: '{color}'")
         
-        return await super().insert_model(request, data)
+        result = await super().insert_model(request, data)
+        self._queue_images(request, "sku", getattr(result, "id", None), queued_images)
+        return result
     
     async def update_model(self, request: Request, pk: any, data: dict) -> any:
         """Update SKU code if size or color changed, and handle image upload."""
@@ -1427,6 +1481,12 @@ class SKUAdmin(MarketAwareModelView, model=SKU):
         variant_image_file = data.pop("variant_image", None)
         logger.info(f"🖼️ [SKU UPDATE] Extracted variant_image_file: {variant_image_file} (type: {type(variant_image_file)})")
         
+        # Background processing: the existing image stays until the new one is ready
+        queued_images = {}
+        if settings.image_jobs.enabled:
+            queued_images = {"variant_image": await self._read_uploads(variant_image_file)}
+            variant_image_file = None
+        
         # Save variant image if provided (and it's a new file, not existing URL string)
         if variant_image_file and not isinstance(variant_image_file, str):
             if hasattr(variant_image_file, "filename") and variant_image_file.filename:
@@ -1462,7 +1522,9 @@ class SKUAdmin(MarketAwareModelView, model=SKU):
             finally:
                 db.close()
         
-        return await super().update_model(request, pk, data)
+        result = await super().update_model(request, pk, data)
+        self._queue_images(request, "sku", getattr(result, "id", None), queued_images)
+        return result
 
 
 class ProductAssetAdmin(MarketAwareModelView, model=ProductAsset):
@@ -1494,6 +1556,38 @@ class ProductAssetAdmin(MarketAwareModelView, model=ProductAsset):
     }
 
 
+class ImageJobAdmin(MarketAwareModelView, model=ImageJob):
+    """Read-only status of images uploaded in the admin and processed in the background."""
+
+    name = "Обработка изображения"
+    name_plural = "Обработка изображений"
+    icon = "fa-solid fa-hourglass-half"
+    category = "🛍️ Товары"
+
+    column_list = ["id", "target_type", "target_id", "field", "filename", "status", "attempts", "last_error", "result_preview", "created_at"]
+    column_details_list = ["id", "target_type", "target_id", "field", "batch", "position", "filename", "status", "attempts", "next_attempt_at", "last_error", "result_url", "created_at", "finished_at"]
+
+    column_sortable_list = ["id", "target_id", "status", "attempts", "created_at"]
+    column_filters = ["status", "target_type", "field"]
+    column_default_sort = ("id", True)
+
+    can_create = False
+    can_edit = False
+    can_delete = False
+
+    column_labels = {
+        "id": "ID", "target_type": "Объект", "target_id": "ID объекта", "field": "Поле", "batch": "Загрузка",
+        "position": "Порядок", "filename": "Файл", "status": "Статус", "attempts": "Попыток",
+        "next_attempt_at": "Следующая попытка", "last_error": "Ошибка", "result_url": "URL изображения",
+        "result_preview": "Результат", "created_at": "Загружено", "finished_at": "Завершено"
+    }
+
+    column_formatters = {
+        "status": lambda m, a: m.status.value if m.status else "",
+        "result_preview": lambda m, a: f'<img src="{m.result_url}" width="50">' if m.result_url else "—"
+    }
+
+
 class ReviewAdmin(MarketAwareModelView, model=Review):
     """Admin interface for managing reviews with market awareness."""
     
@@ -11,7 +11,6 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
 import os
-from PIL import Image
 import io
 
 from ..models import (
@@ -296,16 +295,12 @@ class ProductAdmin(ModelView, model=Product):
             file_bytes = await file_data.read()
             logger.info(f"📊 [PRODUCT {image_type.upper()}] Read {len(file_bytes)} bytes from uploaded file")
             
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(file_bytes))
-            img.verify()
-            logger.info(f"✅ [PRODUCT {image_type.upper()}] Pillow validation passed - Image format: {img.format}")
-            
+            # Pillow validation and processing run in the image processing pool (save_image)
             upload_file = UploadFile(filename=file_data.filename, file=io.BytesIO(file_bytes))
             
             logger.info(f"💾 [PRODUCT {image_type.upper()}] Calling image_uploader.save_image...")
             url = await image_uploader.save_image(
-                file=upload_file, category="product"
+                file=upload_file, category="product", variants=True, placeholder=True
             )
             logger.info(f"✅ [PRODUCT {image_type.upper()}] Image uploaded successfully to: {url}")
             return url
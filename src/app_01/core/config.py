@@ -31,6 +31,7 @@ class DatabaseConfig(BaseSettings):
     pool_size: int = Field(default=10, env="DATABASE_POOL_SIZE")
     max_overflow: int = Field(default=20, env="DATABASE_MAX_OVERFLOW")
     echo: bool = Field(default=False, env="DATABASE_ECHO")
+    fan_out_timeout: float = Field(default=5.0, env="DATABASE_FAN_OUT_TIMEOUT")  # Per-market limit for cross-market admin queries
 
 class SecurityConfig(BaseSettings):
     """Security configuration"""
@@ -135,6 +136,127 @@ class RateLimitConfig(BaseSettings):
     auth_window: int = Field(default=300, env="RATE_LIMIT_AUTH_WINDOW")  # 5 minutes
     sms_limit: int = Field(default=3, env="RATE_LIMIT_SMS")
     sms_window: int = Field(default=3600, env="RATE_LIMIT_SMS_WINDOW")  # 1 hour
+    verification_limit: int = Field(default=3, env="RATE_LIMIT_VERIFICATION")  # Codes sent per phone number
+    verification_window: int = Field(default=900, env="RATE_LIMIT_VERIFICATION_WINDOW")  # 15 minutes
+    backend: str = Field(default="memory", env="RATE_LIMIT_BACKEND")  # memory (per process) or redis (shared)
+    redis_timeout_seconds: float = Field(default=0.5, env="RATE_LIMIT_REDIS_TIMEOUT")  # Requests are allowed past this
+
+class SMSConfig(BaseSettings):
+    """Verification SMS provider"""
+    provider: str = Field(default="twilio", env="SMS_PROVIDER")  # twilio, or fake for tests and load runs
+    twilio_account_sid: Optional[str] = Field(default=None, env="TWILIO_ACCOUNT_SID")
+    twilio_auth_token: Optional[str] = Field(default=None, env="TWILIO_AUTH_TOKEN")
+    twilio_verify_service_sid: Optional[str] = Field(default=None, env="TWILIO_VERIFY_SERVICE_SID")
+    timeout_seconds: float = Field(default=3.0, env="SMS_TIMEOUT")  # Per provider call, then the local code is used
+    max_concurrency: int = Field(default=20, env="SMS_MAX_CONCURRENCY")  # Calls in flight per worker
+    breaker_failure_threshold: int = Field(default=5, env="SMS_BREAKER_FAILURES")  # Consecutive failures that open the circuit
+    breaker_reset_seconds: float = Field(default=30.0, env="SMS_BREAKER_RESET")  # Open circuit retries after this
+    fake_code: str = Field(default="123456", env="SMS_FAKE_CODE")  # Code accepted by the fake provider
+
+class IdempotencyConfig(BaseSettings):
+    """Idempotency-Key handling for checkout and cart mutations"""
+    ttl_hours: int = Field(default=24, env="IDEMPOTENCY_TTL_HOURS")  # How long a stored response can be replayed
+    lock_timeout_seconds: int = Field(default=60, env="IDEMPOTENCY_LOCK_TIMEOUT")  # In-progress claim is abandoned after this
+    wait_timeout_seconds: float = Field(default=10.0, env="IDEMPOTENCY_WAIT_TIMEOUT")  # Max wait for a concurrent duplicate
+
+class SoldCountAggregationConfig(BaseSettings):
+    """Write-behind aggregation of products.sold_count"""
+    enabled: bool = Field(default=True, env="SOLD_COUNT_AGGREGATION_ENABLED")
+    interval_seconds: float = Field(default=5.0, env="SOLD_COUNT_AGGREGATION_INTERVAL")
+    batch_size: int = Field(default=1000, env="SOLD_COUNT_AGGREGATION_BATCH_SIZE")
+
+class OutboxConfig(BaseSettings):
+    """Transactional outbox dispatcher"""
+    enabled: bool = Field(default=True, env="OUTBOX_ENABLED")  # Run the in-process dispatcher
+    poll_interval_seconds: float = Field(default=1.0, env="OUTBOX_POLL_INTERVAL")
+    batch_size: int = Field(default=100, env="OUTBOX_BATCH_SIZE")
+    max_attempts: int = Field(default=8, env="OUTBOX_MAX_ATTEMPTS")
+    backoff_base_seconds: float = Field(default=2.0, env="OUTBOX_BACKOFF_BASE")
+    backoff_max_seconds: float = Field(default=600.0, env="OUTBOX_BACKOFF_MAX")
+    lease_seconds: int = Field(default=60, env="OUTBOX_LEASE_SECONDS")  # Claimed events are retried after this
+    delivered_retention_hours: float = Field(default=168.0, env="OUTBOX_DELIVERED_RETENTION_HOURS")  # Delivered events are purged after this
+    purge_interval_seconds: float = Field(default=3600.0, env="OUTBOX_PURGE_INTERVAL")
+    purge_batch_size: int = Field(default=1000, env="OUTBOX_PURGE_BATCH_SIZE")  # Rows deleted per transaction
+
+class CheckoutQuoteConfig(BaseSettings):
+    """Checkout quote cache"""
+    ttl_seconds: int = Field(default=120, env="CHECKOUT_QUOTE_TTL")  # How long /orders/create may reuse a quote
+    max_entries: int = Field(default=10000, env="CHECKOUT_QUOTE_MAX_ENTRIES")
+
+class OrderStreamConfig(BaseSettings):
+    """Server-Sent Events stream of order status changes"""
+    heartbeat_seconds: float = Field(default=15.0, env="ORDER_STREAM_HEARTBEAT")
+    max_streams_per_worker: int = Field(default=1000, env="ORDER_STREAM_MAX_STREAMS")
+    queue_size: int = Field(default=100, env="ORDER_STREAM_QUEUE_SIZE")  # Slow clients are disconnected and resume
+    pg_listen_enabled: bool = Field(default=True, env="ORDER_STREAM_PG_LISTEN")  # Fan out across workers via LISTEN/NOTIFY
+    pg_channel: str = Field(default="order_status_events", env="ORDER_STREAM_PG_CHANNEL")
+
+class TokenAuthConfig(BaseSettings):
+    """Customer access token verification"""
+    cache_size: int = Field(default=10000, env="TOKEN_CACHE_SIZE")  # Decoded tokens kept per worker (LRU)
+    revocation_refresh_enabled: bool = Field(default=True, env="TOKEN_REVOCATION_REFRESH_ENABLED")  # Run the in-process refresh loop
+    revocation_refresh_seconds: float = Field(default=30.0, env="TOKEN_REVOCATION_REFRESH_INTERVAL")
+    pg_listen_enabled: bool = Field(default=True, env="TOKEN_REVOCATION_PG_LISTEN")  # Push revocations to other workers via LISTEN/NOTIFY
+    pg_channel: str = Field(default="token_revocations", env="TOKEN_REVOCATION_PG_CHANNEL")
+
+class StockCacheConfig(BaseSettings):
+    """In-memory SKU stock map served by /skus/availability"""
+    enabled: bool = Field(default=True, env="STOCK_CACHE_ENABLED")  # Run the periodic reconcile loop
+    reconcile_interval_seconds: float = Field(default=30.0, env="STOCK_CACHE_RECONCILE_INTERVAL")
+    max_ids_per_request: int = Field(default=200, env="STOCK_CACHE_MAX_IDS")
+
+class GuestCartConfig(BaseSettings):
+    """Signed-cookie cart for anonymous shoppers"""
+    cookie_name: str = Field(default="guest_cart", env="GUEST_CART_COOKIE_NAME")
+    max_age_seconds: int = Field(default=2592000, env="GUEST_CART_MAX_AGE")  # 30 days
+    max_lines: int = Field(default=50, env="GUEST_CART_MAX_LINES")  # Keeps the cookie well under 4KB
+    max_quantity: int = Field(default=99, env="GUEST_CART_MAX_QUANTITY")
+    merge_on_login: bool = Field(default=True, env="GUEST_CART_MERGE_ON_LOGIN")
+
+class AnalyticsRollupConfig(BaseSettings):
+    """Hourly order rollups behind /admin/analytics"""
+    enabled: bool = Field(default=True, env="ANALYTICS_ROLLUP_ENABLED")  # Run the in-process refresh loop
+    interval_seconds: float = Field(default=300.0, env="ANALYTICS_ROLLUP_INTERVAL")
+    overlap_seconds: float = Field(default=300.0, env="ANALYTICS_ROLLUP_OVERLAP")  # Re-scan window before the last run
+
+class ExportConfig(BaseSettings):
+    """Streaming admin exports (stats, orders, order items)"""
+    chunk_size: int = Field(default=5000, env="EXPORT_CHUNK_SIZE")  # Rows fetched and written per chunk
+
+class AdminDashboardConfig(BaseSettings):
+    """SQLAdmin dashboard metrics"""
+    snapshot_ttl_seconds: float = Field(default=60.0, env="ADMIN_DASHBOARD_SNAPSHOT_TTL")  # One metrics query per market per interval
+
+class AdminAuthConfig(BaseSettings):
+    """SQLAdmin authentication"""
+    identity_ttl_seconds: float = Field(default=30.0, env="ADMIN_IDENTITY_TTL")  # 0 disables the identity cache
+
+class AdminLogConfig(BaseSettings):
+    """Buffered admin_logs writes"""
+    enabled: bool = Field(default=True, env="ADMIN_LOG_BUFFER_ENABLED")  # Off: each action is inserted and committed inline
+    batch_size: int = Field(default=100, env="ADMIN_LOG_BATCH_SIZE")
+    flush_interval_seconds: float = Field(default=2.0, env="ADMIN_LOG_FLUSH_INTERVAL")
+    max_queue: int = Field(default=10000, env="ADMIN_LOG_MAX_QUEUE")  # Records beyond this are dropped
+
+class ImageProcessingConfig(BaseSettings):
+    """Pillow work for uploads, run in worker processes"""
+    workers: int = Field(default=2, env="IMAGE_PROCESSING_WORKERS")  # 0 runs jobs in a thread instead
+    max_queue: int = Field(default=8, env="IMAGE_PROCESSING_MAX_QUEUE")  # Jobs waiting beyond the busy workers; more get 503
+    avif_variants: bool = Field(default=True, env="IMAGE_VARIANTS_AVIF")  # Only used when Pillow can encode AVIF
+
+class ImageJobsConfig(BaseSettings):
+    """Background processing of images uploaded in the admin"""
+    enabled: bool = Field(default=True, env="IMAGE_JOBS_ENABLED")  # Run the in-process workers
+    concurrency: int = Field(default=4, env="IMAGE_JOBS_CONCURRENCY")  # Jobs processed at once per market
+    poll_interval_seconds: float = Field(default=2.0, env="IMAGE_JOBS_POLL_INTERVAL")
+    max_attempts: int = Field(default=3, env="IMAGE_JOBS_MAX_ATTEMPTS")  # Retries when the processing pool is busy
+    lease_seconds: int = Field(default=120, env="IMAGE_JOBS_LEASE_SECONDS")  # Claimed jobs are retried after this
+
+class StaticFilesConfig(BaseSettings):
+    """Caching and delivery of /uploads and other static mounts"""
+    immutable_max_age: int = Field(default=31536000, env="STATIC_IMMUTABLE_MAX_AGE")  # Content-hashed files: one year
+    max_age: int = Field(default=3600, env="STATIC_MAX_AGE")  # Other files, revalidated after this
+    accel_redirect_prefix: Optional[str] = Field(default=None, env="STATIC_ACCEL_REDIRECT_PREFIX")  # e.g. /_static: nginx internal location serving the files
 
 class LoggingConfig(BaseSettings):
     """Logging configuration"""
@@ -168,6 +290,23 @@ class Settings(BaseSettings):
     redis: RedisConfig = RedisConfig()
     external_services: ExternalServicesConfig = ExternalServicesConfig()
     rate_limit: RateLimitConfig = RateLimitConfig()
+    sms: SMSConfig = SMSConfig()
+    idempotency: IdempotencyConfig = IdempotencyConfig()
+    sold_count_aggregation: SoldCountAggregationConfig = SoldCountAggregationConfig()
+    outbox: OutboxConfig = OutboxConfig()
+    checkout_quote: CheckoutQuoteConfig = CheckoutQuoteConfig()
+    order_stream: OrderStreamConfig = OrderStreamConfig()
+    token_auth: TokenAuthConfig = TokenAuthConfig()
+    stock_cache: StockCacheConfig = StockCacheConfig()
+    guest_cart: GuestCartConfig = GuestCartConfig()
+    analytics_rollup: AnalyticsRollupConfig = AnalyticsRollupConfig()
+    export: ExportConfig = ExportConfig()
+    admin_dashboard: AdminDashboardConfig = AdminDashboardConfig()
+    admin_auth: AdminAuthConfig = AdminAuthConfig()
+    admin_log: AdminLogConfig = AdminLogConfig()
+    image_processing: ImageProcessingConfig = ImageProcessingConfig()
+    image_jobs: ImageJobsConfig = ImageJobsConfig()
+    static_files: StaticFilesConfig = StaticFilesConfig()
     logging: LoggingConfig = LoggingConfig()
     
     class Config:
@@ -9,11 +9,13 @@ import uuid
 from typing import Callable, Optional
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
 from .config import get_settings, Market
 from .exceptions import BaseAppException, create_internal_error
+from .rate_limit import RateLimiter, RateLimitResult, rate_limiter, retry_after_header
 
 logger = logging.getLogger(__name__)
 
@@ -138,10 +140,10 @@ class MarketDetectionMiddleware(BaseHTTPMiddleware):
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Middleware for rate limiting"""
     
-    def __init__(self, app: ASGIApp):
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
         super().__init__(app)
         self.settings = get_settings()
-        self._rate_limit_store = {}  # In production, use Redis
+        self.limiter = limiter or rate_limiter
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         if not self.settings.rate_limit.enabled:
@@ -151,12 +153,14 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         client_id = self._get_client_id(request)
         
         # Check rate limit
-        if not self._check_rate_limit(client_id, request):
+        result = await self._check_rate_limit(client_id, request)
+        if not result.allowed:
             from .exceptions import create_rate_limit_error
             error = create_rate_limit_error("Rate limit exceeded")
             return JSONResponse(
                 status_code=error.status_code,
-                content=error.to_dict()
+                content=error.to_dict(),
+                headers=retry_after_header(result)
             )
         
         return await call_next(request)
@@ -165,48 +169,29 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         """Get client identifier for rate limiting"""
         # Use IP address as client identifier
         client_ip = request.client.host if request.client else "unknown"
-        return f"rate_limit:{client_ip}"
+        return client_ip
     
-    def _check_rate_limit(self, client_id: str, request: Request) -> bool:
-        """Check if client is within rate limit"""
-        import time
-        
-        current_time = int(time.time())
-        
+    async def _check_rate_limit(self, client_id: str, request: Request) -> RateLimitResult:
+        """Count the request against the client's limit for this endpoint group"""
         # Get rate limit configuration based on endpoint
         if request.url.path.startswith("/api/v1/auth"):
+            group = "auth"
             limit = self.settings.rate_limit.auth_limit
             window = self.settings.rate_limit.auth_window
         elif request.url.path.startswith("/api/v1/sms"):
+            group = "sms"
             limit = self.settings.rate_limit.sms_limit
             window = self.settings.rate_limit.sms_window
         else:
+            group = "default"
             limit = self.settings.rate_limit.default_limit
             window = self.settings.rate_limit.default_window
         
-        # Get or create rate limit entry
-        if client_id not in self._rate_limit_store:
-            self._rate_limit_store[client_id] = {
-                "requests": [],
-                "limit": limit,
-                "window": window
-            }
-        
-        entry = self._rate_limit_store[client_id]
-        
-        # Clean old requests
-        entry["requests"] = [
-            req_time for req_time in entry["requests"]
-            if current_time - req_time < window
-        ]
-        
-        # Check if limit exceeded
-        if len(entry["requests"]) >= limit:
-            return False
-        
-        # Add current request
-        entry["requests"].append(current_time)
-        return True
+        key = f"{group}:{client_id}"
+        if self.limiter.backend.remote:
+            # Network round trip: keep it off the event loop
+            return await run_in_threadpool(self.limiter.hit, key, limit, window)
+        return self.limiter.hit(key, limit, window)
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Middleware for adding security headers"""
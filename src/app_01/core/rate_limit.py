@@ -0,0 +1,265 @@
+"""
+Rate Limiting
+Sliding-window-counter limiter with an in-process backend and a shared Redis backend
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import logging
+import math
+import threading
+import time
+
+from .config import get_settings
+
+# Redis imports
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # Seconds until the next request would be allowed (0 when allowed)
+
+
+class MemoryRateLimitBackend:
+    """
+    Per-process counters: one entry per key holding the current and previous
+    window counts. Entries expire two windows after their last use and are
+    swept every ``sweep_interval_seconds``.
+    """
+
+    remote = False
+
+    def __init__(self, sweep_interval_seconds: float = 60.0, clock: Callable[[], float] = time.time):
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.clock = clock
+        # key -> [window index, current count, previous count, expires at]
+        self._entries: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval_seconds
+
+    def counts(self, key: str, window: float, index: int, consume: bool) -> Tuple[int, int]:
+        """(previous, current) window counts, after counting this request when ``consume``"""
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < index - 1:
+                previous, current = 0, 0
+            elif entry[0] == index - 1:
+                previous, current = entry[1], 0
+            else:
+                previous, current = entry[2], entry[1]
+            if consume:
+                current += 1
+                self._entries[key] = [index, current, previous, (index + 2) * window]
+            return int(previous), int(current)
+
+    def release(self, key: str, window: float, index: int) -> None:
+        """Un-count a request that was refused"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == index and entry[1] > 0:
+                entry[1] -= 1
+
+    def _sweep(self) -> None:
+        now = self.clock()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval_seconds
+        for key in [key for key, entry in self._entries.items() if entry[3] <= now]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisRateLimitBackend:
+    """
+    Counters shared by every worker, one Redis key per key and window
+    (``<key>:<window index>``) that expires two windows after it was first
+    counted. Works with any client exposing the redis-py ``pipeline``,
+    ``incr``, ``decr``, ``pexpire`` and ``get`` calls.
+    """
+
+    remote = True
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def counts(self, key: str, window: float, index: int, consume: bool) -> Tuple[int, int]:
+        current_key = f"{key}:{index}"
+        pipe = self.client.pipeline(transaction=True)
+        if consume:
+            pipe.incr(current_key)
+            pipe.pexpire(current_key, int(window * 2000))
+        else:
+            pipe.get(current_key)
+        pipe.get(f"{key}:{index - 1}")
+        results = pipe.execute()
+        return int(results[-1] or 0), int(results[0] or 0)
+
+    def release(self, key: str, window: float, index: int) -> None:
+        self.client.decr(f"{key}:{index}")
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the Redis commands used by RedisRateLimitBackend
+    (tests and single-process development).
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._values: Dict[str, Tuple[int, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    def _live(self, key: str) -> Optional[Tuple[int, Optional[float]]]:
+        item = self._values.get(key)
+        if item is not None and item[1] is not None and item[1] <= self.clock():
+            del self._values[key]
+            return None
+        return item
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._live(key)
+            return None if item is None else str(item[0]).encode()
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value, expires_at = self._live(key) or (0, None)
+            self._values[key] = (value + amount, expires_at)
+            return value + amount
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        return self.incr(key, -amount)
+
+    def pexpire(self, key: str, milliseconds: int) -> bool:
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return False
+            self._values[key] = (item[0], self.clock() + milliseconds / 1000)
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "_LocalPipeline":
+        return _LocalPipeline(self)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len([key for key in list(self._values) if self._live(key) is not None])
+
+
+class _LocalPipeline:
+    """Queued LocalRedis commands, run together under the client's lock"""
+
+    def __init__(self, client: LocalRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        with self._client._lock:
+            return [getattr(self._client, name)(*args) for name, args in self._commands]
+
+
+class RateLimiter:
+    """
+    Sliding window counter.
+
+    A key's usage is estimated as the current fixed window's count plus the
+    previous window's count weighted by how much of it still overlaps the
+    sliding window. Memory per key is two counters whatever the limit, and
+    a check costs the same however many requests were made.
+    """
+
+    def __init__(self, backend: Any = None, prefix: str = "rate_limit", clock: Callable[[], float] = time.time):
+        self.backend = backend if backend is not None else MemoryRateLimitBackend(clock=clock)
+        self.prefix = prefix
+        self.clock = clock
+
+    def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Count a request for ``key``; refused requests are not counted"""
+        return self._check(key, limit, window, consume=True)
+
+    def peek(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Whether a request for ``key`` would be allowed, without counting it"""
+        return self._check(key, limit, window, consume=False)
+
+    def _check(self, key: str, limit: int, window: float, consume: bool) -> RateLimitResult:
+        now = self.clock()
+        index = int(now // window)
+        elapsed = now - index * window
+        key = f"{self.prefix}:{key}"
+        try:
+            previous, current = self.backend.counts(key, window, index, consume)
+        except Exception as e:
+            # Fail open: an unreachable store must not take the API down
+            logger.warning(f"⚠️ Rate limit store unavailable, allowing request: {e}")
+            return RateLimitResult(True, limit, limit, 0.0)
+
+        # Requests counted before this one
+        base = current - 1 if consume else current
+        used = previous * (1 - elapsed / window) + base + 1
+        if used <= limit:
+            return RateLimitResult(True, limit, max(int(limit - used), 0), 0.0)
+
+        if consume:
+            try:
+                self.backend.release(key, window, index)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not release refused rate limit hit: {e}")
+        return RateLimitResult(False, limit, 0, self._retry_after(previous, base, limit, window, elapsed))
+
+    @staticmethod
+    def _retry_after(previous: int, base: int, limit: int, window: float, elapsed: float) -> float:
+        if base + 1 <= limit and previous:
+            # Allowed once enough of the previous window has slid out
+            overlap = 1 - (limit - base - 1) / previous
+            return max(overlap * window - elapsed, 0.0)
+        # Current window is full: wait for it to become the previous one and slide out
+        overlap = max(1 - (limit - 1) / base, 0.0) if base else 0.0
+        return window - elapsed + overlap * window
+
+
+def create_backend(settings=None) -> Any:
+    """Backend selected by ``RATE_LIMIT_BACKEND`` (memory or redis)"""
+    settings = settings or get_settings()
+    if settings.rate_limit.backend == "redis":
+        if REDIS_AVAILABLE:
+            client = redis.Redis.from_url(
+                settings.redis.url,
+                password=settings.redis.password,
+                db=settings.redis.db,
+                max_connections=settings.redis.max_connections,
+                socket_timeout=settings.rate_limit.redis_timeout_seconds
+            )
+            return RedisRateLimitBackend(client)
+        logger.warning("⚠️ RATE_LIMIT_BACKEND=redis but the redis package is not installed - limits are per process")
+    return MemoryRateLimitBackend()
+
+
+def retry_after_header(result: RateLimitResult) -> Dict[str, str]:
+    """Retry-After header for a refused request"""
+    return {"Retry-After": str(max(math.ceil(result.retry_after), 1))}
+
+
+# Global instance
+rate_limiter = RateLimiter(create_backend())
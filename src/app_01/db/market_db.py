@@ -8,8 +8,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
 import os
-from typing import Generator, Dict, Any
+import threading
+import time
+from typing import Callable, Generator, Dict, Any, Iterable, NamedTuple, Optional
 from dotenv import load_dotenv
 from enum import Enum
 
@@ -42,6 +46,9 @@ class MarketConfig:
         "phone_validation_pattern": r"^\+996[0-9]{9}$",
         "postal_code_required": False,
         "tax_rate": 0.12,  # 12% VAT
+        "tax_included": True,  # VAT is included in shelf prices
+        "free_shipping_threshold": 5000.0,
+        "standard_shipping_cost": 150.0,
         "shipping_zones": ["Бишкек", "Ош", "Джалал-Абад", "Токмок", "Каракол"],
         "payment_methods": ["card", "cash_on_delivery", "bank_transfer"],
         "default_language": "ru"
@@ -61,6 +68,9 @@ class MarketConfig:
         "phone_validation_pattern": r"^\+1[0-9]{10}$",
         "postal_code_required": True,
         "tax_rate": 0.08,  # 8% sales tax (varies by state)
+        "tax_included": False,  # Sales tax is added at checkout
+        "free_shipping_threshold": 100.0,
+        "standard_shipping_cost": 10.0,
         "shipping_zones": ["Continental US", "Alaska", "Hawaii", "Puerto Rico"],
         "payment_methods": ["card", "paypal", "apple_pay", "google_pay"],
         "default_language": "en"
@@ -76,6 +86,17 @@ class MarketConfig:
         else:
             raise ValueError(f"Unsupported market: {market}")
 
+class MarketResult(NamedTuple):
+    """Outcome of one market's call in a fan-out (``error`` set if it raised or timed out)"""
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class MarketDatabaseManager:
     """Manages multiple market databases"""
     
@@ -83,6 +104,8 @@ class MarketDatabaseManager:
         self.engines: Dict[Market, Any] = {}
         self.session_factories: Dict[Market, Any] = {}
         self.bases: Dict[Market, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._initialize_databases()
     
     def _initialize_databases(self):
@@ -119,7 +142,8 @@ class MarketDatabaseManager:
         self.engines[market] = engine
         
         # Create session factory
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        # session.info["market"] tells session event hooks which market a session writes to
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, info={"market": market})
         self.session_factories[market] = SessionLocal
         
         # Create a new Base for this market to avoid metadata conflicts
@@ -151,6 +175,80 @@ class MarketDatabaseManager:
         finally:
             db.close()
 
+    # ==================== Fan-out ====================
+
+    def _fan_out_executor(self) -> ThreadPoolExecutor:
+        """Shared worker threads for fan-outs (created on first use)"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(Market) * 4, thread_name_prefix="market-fan-out")
+            return self._executor
+
+    def _call_in_session(self, market: Market, fn: Callable[[Any, Market], Any]) -> MarketResult:
+        started = time.monotonic()
+        try:
+            db = next(self.get_db_session(market))
+            try:
+                value = fn(db, market)
+            finally:
+                db.close()
+        except Exception as e:
+            return MarketResult(error=e, elapsed=time.monotonic() - started)
+        return MarketResult(value=value, elapsed=time.monotonic() - started)
+
+    def _submit(self, fn: Callable[[Any, Market], Any], markets: Optional[Iterable[Market]]) -> Dict[Market, Future]:
+        executor = self._fan_out_executor()
+        return {market: executor.submit(self._call_in_session, market, fn) for market in (markets or list(Market))}
+
+    @staticmethod
+    def _timed_out(market: Market, timeout: float) -> MarketResult:
+        return MarketResult(error=TimeoutError(f"{market.value.upper()} database did not answer within {timeout}s"), elapsed=timeout)
+
+    def run_in_markets(
+        self,
+        fn: Callable[[Any, Market], Any],
+        markets: Optional[Iterable[Market]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[Market, MarketResult]:
+        """
+        Call ``fn(db, market)`` for every market concurrently, each in its own pooled session
+
+        All markets start together, so ``timeout`` bounds each market's call and
+        the whole fan-out alike. A market that raises or times out gets a result
+        with ``error`` set; the others still return their values. A timed-out
+        call keeps its connection until its query finishes in the background.
+        """
+        timeout = settings.database.fan_out_timeout if timeout is None else timeout
+        futures = self._submit(fn, markets)
+        deadline = time.monotonic() + timeout
+        results: Dict[Market, MarketResult] = {}
+        for market, future in futures.items():
+            try:
+                results[market] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                future.cancel()
+                results[market] = self._timed_out(market, timeout)
+        return results
+
+    async def arun_in_markets(
+        self,
+        fn: Callable[[Any, Market], Any],
+        markets: Optional[Iterable[Market]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[Market, MarketResult]:
+        """``run_in_markets`` for async views: waits without blocking the event loop"""
+        timeout = settings.database.fan_out_timeout if timeout is None else timeout
+        futures = {market: asyncio.wrap_future(future) for market, future in self._submit(fn, markets).items()}
+        await asyncio.wait(futures.values(), timeout=timeout)
+        results: Dict[Market, MarketResult] = {}
+        for market, future in futures.items():
+            if future.done():
+                results[market] = future.result()
+            else:
+                future.cancel()
+                results[market] = self._timed_out(market, timeout)
+        return results
+
 # Global database manager instance
 db_manager = MarketDatabaseManager()
 
@@ -26,6 +26,19 @@ from .routers.product_search_router import router as product_search_router
 from .routers.product_discount_router import router as product_discount_router
 from .routers.admin_analytics_router import router as admin_analytics_router
 from .services.auth_service import auth_service
+from .services.sold_count_aggregator import sold_count_aggregator
+from .services.outbox_dispatcher import outbox_dispatcher
+from .services import order_events  # noqa: F401  (registers outbox handlers)
+from .services import order_stats  # noqa: F401  (registers order stats session hooks)
+from .services.order_status_stream import order_status_listener
+from .services.stock_cache import stock_cache
+from .services.analytics_rollup import analytics_rollup
+from .services.image_jobs import image_job_queue
+from .services.token_verification import token_revocations, token_revocation_listener
+from .services.sms_provider import sms_gateway
+from .services.admin_log_writer import admin_log_writer
+from .utils.image_upload import image_pool
+from .core.config import settings
 from .admin.admin_app import create_sqladmin_app, Admin
 from .admin.dashboard_admin_views import DashboardView
 from .db.market_db import db_manager, Market, MarketConfig, get_db
@@ -102,9 +115,15 @@ app.add_middleware(
 # Mount static files for SQLAdmin FIRST (before initializing SQLAdmin)
 try:
     from fastapi.staticfiles import StaticFiles
+    from .utils.static_files import CachedStaticFiles
     import sqladmin
     import pathlib
     
+    def accel_redirect(mount_path: str):
+        """nginx internal location for a mount, when X-Accel-Redirect delivery is enabled"""
+        prefix = settings.static_files.accel_redirect_prefix
+        return f"{prefix.rstrip('/')}{mount_path}" if prefix else None
+    
     # Get SQLAdmin's static files directory
     sqladmin_static_path = pathlib.Path(sqladmin.__file__).parent / "statics"
     
@@ -115,19 +134,19 @@ try:
     # Mount uploads directory for user-uploaded images
     uploads_dir = pathlib.Path(__file__).parent.parent.parent / "static" / "uploads"
     uploads_dir.mkdir(parents=True, exist_ok=True)
-    app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+    app.mount("/uploads", CachedStaticFiles(directory=str(uploads_dir), accel_redirect=accel_redirect("/uploads")), name="uploads")
     logger.info(f"✅ Uploads directory mounted from: {uploads_dir}")
     
     # Mount demo images directory (for testing/fallback)
     demo_images_dir = pathlib.Path(__file__).parent.parent.parent / "static" / "demo-images"
     demo_images_dir.mkdir(parents=True, exist_ok=True)
-    app.mount("/demo-images", StaticFiles(directory=str(demo_images_dir)), name="demo-images")
+    app.mount("/demo-images", CachedStaticFiles(directory=str(demo_images_dir), accel_redirect=accel_redirect("/demo-images")), name="demo-images")
     logger.info(f"✅ Demo images directory mounted from: {demo_images_dir}")
     
     # Mount custom admin static files (CSS/JS for market indicator)
     custom_admin_static_dir = pathlib.Path(__file__).parent / "admin" / "static"
     custom_admin_static_dir.mkdir(parents=True, exist_ok=True)
-    app.mount("/admin/custom", StaticFiles(directory=str(custom_admin_static_dir)), name="custom-admin")
+    app.mount("/admin/custom", CachedStaticFiles(directory=str(custom_admin_static_dir), accel_redirect=accel_redirect("/admin/custom")), name="custom-admin")
     logger.info(f"✅ Custom admin static files mounted from: {custom_admin_static_dir}")
     
 except Exception as static_error:
@@ -520,12 +539,57 @@ async def startup_event():
     for market in Market:
         market_config = MarketConfig.get_config(market)
         logger.info(f"  - {market_config['country']} ({market_config['currency']})")
+    
+    # Write-behind products.sold_count maintenance
+    if settings.sold_count_aggregation.enabled:
+        sold_count_aggregator.start()
+    
+    # Outbox delivery of order side effects
+    if settings.outbox.enabled:
+        outbox_dispatcher.start()
+    
+    # Cross-worker fan-out of order status changes to SSE streams
+    if settings.order_stream.pg_listen_enabled:
+        order_status_listener.start()
+    
+    # Revoked access tokens: periodic refresh, and pushes from other workers
+    if settings.token_auth.revocation_refresh_enabled:
+        token_revocations.start()
+    if settings.token_auth.pg_listen_enabled:
+        token_revocation_listener.start()
+    
+    # Periodic reconcile of the in-memory SKU stock map
+    if settings.stock_cache.enabled:
+        stock_cache.start()
+    
+    # Hourly order rollups for admin analytics
+    if settings.analytics_rollup.enabled:
+        analytics_rollup.start()
+    
+    # Batched admin_logs inserts
+    if settings.admin_log.enabled:
+        admin_log_writer.start()
+    
+    # Background processing of admin image uploads
+    if settings.image_jobs.enabled:
+        image_job_queue.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("Shutting down Marque Multi-Market Authentication API")
+    await sold_count_aggregator.stop()
+    await outbox_dispatcher.stop()
+    order_status_listener.stop()
+    await token_revocations.stop()
+    token_revocation_listener.stop()
+    await stock_cache.stop()
+    await analytics_rollup.stop()
+    await admin_log_writer.stop()
+    await image_job_queue.stop()
+    await sms_gateway.close()
+    image_pool.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run(
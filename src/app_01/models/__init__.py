@@ -2,10 +2,14 @@
 from .users import User, Interaction, PhoneVerification, UserAddress, UserPaymentMethod, UserNotification, Wishlist, WishlistItem
 from .products import (
     Product, SKU, ProductAsset, Review, ProductAttribute, Category, Subcategory, Brand,
-    ProductFilter, ProductSeason, ProductMaterial, ProductStyle, ProductDiscount, ProductSearch
+    ProductFilter, ProductSeason, ProductMaterial, ProductStyle, ProductDiscount, ProductSearch,
+    ProductSalesDelta, ImageJob, ImageJobStatus
 )
-from .orders import CartOrder, Order, OrderStatus, OrderItem, OrderStatusHistory
-from .admins import Admin, AdminLog, OrderAdminStats, OrderManagementAdmin
+from .orders import (
+    CartOrder, Order, OrderStatus, OrderItem, OrderStatusHistory, IdempotencyKey, IdempotencyStatus,
+    OutboxEvent, OutboxStatus
+)
+from .admins import Admin, AdminLog, OrderAdminStats, OrderHourlyRollup, OrderManagementAdmin
 
 __all__ = [
     # Users
@@ -32,15 +36,23 @@ __all__ = [
     "ProductStyle",
     "ProductDiscount",
     "ProductSearch",
+    "ProductSalesDelta",
+    "ImageJob",
+    "ImageJobStatus",
     # Orders
     "CartOrder",
     "Order",
     "OrderStatus",
     "OrderItem", 
     "OrderStatusHistory",
+    "IdempotencyKey",
+    "IdempotencyStatus",
+    "OutboxEvent",
+    "OutboxStatus",
     # Admins
     "Admin",
     "AdminLog",
     "OrderAdminStats",
+    "OrderHourlyRollup",
     "OrderManagementAdmin"
 ]
@@ -1,10 +1,11 @@
 from .admin import Admin
 from .admin_log import AdminLog
-from .order_management import OrderAdminStats, OrderManagementAdmin
+from .order_management import OrderAdminStats, OrderHourlyRollup, OrderManagementAdmin
 
 __all__ = [
     "Admin",
     "AdminLog",
     "OrderAdminStats",
+    "OrderHourlyRollup",
     "OrderManagementAdmin"
 ]
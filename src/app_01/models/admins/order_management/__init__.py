@@ -1,7 +1,9 @@
 from .order_admin_stats import OrderAdminStats
+from .order_hourly_rollup import OrderHourlyRollup
 from .order_management_admin import OrderManagementAdmin
 
 __all__ = [
     "OrderAdminStats",
+    "OrderHourlyRollup",
     "OrderManagementAdmin"
 ]
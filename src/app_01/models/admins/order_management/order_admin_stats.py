@@ -68,7 +68,7 @@ class OrderAdminStats(Base):
         }
 
     def update_statistics(self, orders_data):
-        """Update statistics from orders data"""
+        """Update statistics from orders data (full recount; services.order_stats keeps rows current incrementally)"""
         self.today_orders_count = len(orders_data)
         self.today_sales_total = sum(order.total_amount for order in orders_data if order.status.value == "delivered")
         self.today_sales_count = len([order for order in orders_data if order.status.value == "delivered"])
@@ -0,0 +1,81 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Index, UniqueConstraint, func, case, distinct
+from ....db import Base
+
+
+class OrderHourlyRollup(Base):
+    """Orders placed per market and hour (UTC hour start), refreshed by services.analytics_rollup"""
+    __tablename__ = "order_hourly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    market = Column(String(10), nullable=False)
+    hour = Column(DateTime(timezone=True), nullable=False)  # UTC start of the hour
+    local_date = Column(Date, nullable=False)  # Market-local day of the hour
+    day_of_week = Column(Integer, nullable=False)  # Market-local, 0 = Monday
+
+    orders_count = Column(Integer, nullable=False, default=0)
+    items_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)  # All orders except cancelled
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    delivered_count = Column(Integer, nullable=False, default=0)
+    sales_total = Column(Float, nullable=False, default=0.0)  # Delivered orders, as in OrderAdminStats
+
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('market', 'hour', name='uq_order_rollup_market_hour'),
+        Index('idx_order_rollup_market_local_date', 'market', 'local_date'),
+        Index('idx_order_rollup_market_refreshed', 'market', 'refreshed_at'),
+    )
+
+    def __repr__(self):
+        return f"<OrderHourlyRollup(market={self.market}, hour={self.hour}, orders={self.orders_count})>"
+
+    @classmethod
+    def get_totals(cls, session, market, start_date, end_date):
+        """Summed counters over market-local days [start_date, end_date] plus the number of active days"""
+        row = session.query(
+            func.coalesce(func.sum(cls.orders_count), 0).label("orders"),
+            func.coalesce(func.sum(cls.items_count), 0).label("items"),
+            func.coalesce(func.sum(cls.revenue), 0.0).label("revenue"),
+            func.coalesce(func.sum(cls.cancelled_count), 0).label("cancelled"),
+            func.coalesce(func.sum(cls.delivered_count), 0).label("delivered"),
+            func.coalesce(func.sum(cls.sales_total), 0.0).label("sales"),
+            func.count(distinct(cls.local_date)).label("active_days"),
+        ).filter(
+            cls.market == market,
+            cls.local_date >= start_date,
+            cls.local_date <= end_date
+        ).one()
+        return row._asdict()
+
+    @classmethod
+    def get_split_totals(cls, session, market, start_date, split_date, end_date):
+        """Orders and sales before / from split_date in one pass (for growth rates)"""
+        recent = cls.local_date >= split_date
+        row = session.query(
+            func.coalesce(func.sum(case((recent, cls.orders_count), else_=0)), 0).label("recent_orders"),
+            func.coalesce(func.sum(case((recent, cls.sales_total), else_=0.0)), 0.0).label("recent_sales"),
+            func.count(distinct(case((recent, cls.local_date)))).label("recent_days"),
+            func.coalesce(func.sum(case((recent, 0), else_=cls.orders_count)), 0).label("older_orders"),
+            func.coalesce(func.sum(case((recent, 0.0), else_=cls.sales_total)), 0.0).label("older_sales"),
+            func.count(distinct(case((recent, None), else_=cls.local_date))).label("older_days"),
+        ).filter(
+            cls.market == market,
+            cls.local_date >= start_date,
+            cls.local_date <= end_date
+        ).one()
+        return row._asdict()
+
+    @classmethod
+    def get_day_of_week_totals(cls, session, market, start_date, end_date):
+        """Orders, sales and active days per market-local weekday"""
+        return session.query(
+            cls.day_of_week,
+            func.sum(cls.orders_count).label("orders"),
+            func.sum(cls.sales_total).label("sales"),
+            func.count(distinct(cls.local_date)).label("days"),
+        ).filter(
+            cls.market == market,
+            cls.local_date >= start_date,
+            cls.local_date <= end_date
+        ).group_by(cls.day_of_week).all()
@@ -3,6 +3,8 @@ from .order import Order, OrderStatus
 from .order_item import OrderItem
 from .order_status_history import OrderStatusHistory
 from .cart import Cart, CartItem
+from .idempotency_key import IdempotencyKey, IdempotencyStatus
+from .outbox_event import OutboxEvent, OutboxStatus
 
 __all__ = [
     "CartOrder",
@@ -11,5 +13,9 @@ __all__ = [
     "OrderItem",
     "OrderStatusHistory",
     "Cart",
-    "CartItem"
+    "CartItem",
+    "IdempotencyKey",
+    "IdempotencyStatus",
+    "OutboxEvent",
+    "OutboxStatus"
 ]
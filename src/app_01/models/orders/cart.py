@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ...db import Base
@@ -25,3 +25,8 @@ class CartItem(Base):
 
     cart = relationship("Cart", back_populates="items")
     sku = relationship("SKU")
+
+    __table_args__ = (
+        # One line per SKU: lets the guest cart merge upsert quantities
+        UniqueConstraint('cart_id', 'sku_id', name='uq_cart_items_cart_sku'),
+    )
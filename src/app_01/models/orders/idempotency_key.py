@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index, UniqueConstraint
+from sqlalchemy.sql import func
+import enum
+from ...db import Base
+
+
+class IdempotencyStatus(enum.Enum):
+    """Idempotency key lifecycle"""
+    IN_PROGRESS = "in_progress"  # First attempt is still running
+    COMPLETED = "completed"  # Response stored, replays return it
+
+
+class IdempotencyKey(Base):
+    """Stored result of a mutating request sent with an Idempotency-Key header.
+
+    Retries of the same request (same user, scope and key) return the stored
+    response instead of re-running the checkout or cart pipeline.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    scope = Column(String(100), nullable=False)  # e.g. 'orders.create', 'cart.add'
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the canonical request body
+    status = Column(Enum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+
+    # Serialized response of the first successful attempt
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # When the current attempt claimed the key
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # INDEXES for performance
+    __table_args__ = (
+        UniqueConstraint('user_id', 'scope', 'key', name='uq_idempotency_user_scope_key'),
+        Index('idx_idempotency_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(id={self.id}, scope='{self.scope}', key='{self.key}', status='{self.status.value}')>"
+
+    @property
+    def is_completed(self):
+        """Check if a response has been stored for this key"""
+        return self.status == IdempotencyStatus.COMPLETED
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -41,6 +41,8 @@ class Order(Base):
     # Financial information
     subtotal = Column(Float, nullable=False)
     shipping_cost = Column(Float, default=0.0)
+    discount_amount = Column(Float, default=0.0)  # Product discounts applied at checkout
+    tax_amount = Column(Float, default=0.0)  # Included VAT (KG) or added sales tax (US)
     total_amount = Column(Float, nullable=False)
     currency = Column(String(3), default="KGS")
     
@@ -65,6 +67,13 @@ class Order(Base):
     created_by = relationship("Admin")
     status_history = relationship("OrderStatusHistory", back_populates="order", cascade="all, delete-orphan")
 
+    # INDEXES for performance
+    __table_args__ = (
+        Index('idx_order_user_order_date', 'user_id', 'order_date'),  # Order history keyset pagination
+        Index('idx_order_status', 'status'),
+        Index('idx_order_updated_at', 'updated_at'),  # Hourly rollup refresh
+    )
+
     def __repr__(self):
         return f"<Order(id={self.id}, order_number='{self.order_number}', status='{self.status.value}')>"
 
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, Index
+from sqlalchemy.sql import func
+import enum
+from ...db import Base
+
+
+class OutboxStatus(enum.Enum):
+    """Outbox event delivery status"""
+    PENDING = "pending"  # Waiting for (re)delivery
+    PROCESSING = "processing"  # Claimed by a dispatcher until next_attempt_at (lease)
+    DELIVERED = "delivered"  # All handlers succeeded
+    FAILED = "failed"  # Gave up after max attempts
+
+
+class OutboxEvent(Base):
+    """Transactional outbox: side-effect events written in the same
+    transaction as the business change and delivered asynchronously"""
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)  # e.g. 'order.created'
+    aggregate_type = Column(String(50), nullable=True)  # e.g. 'order'
+    aggregate_id = Column(Integer, nullable=True)
+    payload = Column(JSON, nullable=False)
+
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String(1000), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+    # INDEXES for performance
+    __table_args__ = (
+        Index('idx_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        Index('idx_outbox_aggregate', 'aggregate_type', 'aggregate_id'),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type='{self.event_type}', status='{self.status.value}')>"
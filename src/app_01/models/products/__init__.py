@@ -5,6 +5,8 @@ from .review import Review
 from .product_attribute import ProductAttribute
 from .category import Category, Subcategory
 from .brand import Brand
+from .product_sales_delta import ProductSalesDelta
+from .image_job import ImageJob, ImageJobStatus
 from .product_filter import (
     ProductFilter, ProductSeason, ProductMaterial, ProductStyle, 
     ProductDiscount, ProductSearch
@@ -24,5 +26,8 @@ __all__ = [
     "ProductMaterial", 
     "ProductStyle",
     "ProductDiscount",
-    "ProductSearch"
+    "ProductSearch",
+    "ProductSalesDelta",
+    "ImageJob",
+    "ImageJobStatus"
 ]
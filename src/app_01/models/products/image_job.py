@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, LargeBinary, Index
+from sqlalchemy.sql import func
+import enum
+from ...db import Base
+
+
+class ImageJobStatus(enum.Enum):
+    """Image job processing status"""
+    PENDING = "pending"  # Waiting for a worker (or a retry)
+    PROCESSING = "processing"  # Claimed by a worker until next_attempt_at (lease)
+    DONE = "done"  # Stored; result_url written to the target row
+    FAILED = "failed"  # Invalid image, or gave up after max attempts
+
+
+class ImageJob(Base):
+    """Image uploaded in the admin, processed in the background and then
+    written to ``target_type``/``target_id``.``field``"""
+    __tablename__ = "image_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    target_type = Column(String(20), nullable=False)  # 'product' or 'sku'
+    target_id = Column(Integer, nullable=False)
+    field = Column(String(50), nullable=False)  # 'main_image', 'additional_images' or 'variant_image'
+    batch = Column(String(36), nullable=False)  # One admin save; the latest batch per field wins
+    position = Column(Integer, default=0, nullable=False)  # Order within additional_images
+    filename = Column(String(255), nullable=True)
+    source = Column(LargeBinary, nullable=True)  # Uploaded bytes, cleared once processed
+
+    status = Column(Enum(ImageJobStatus), default=ImageJobStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String(1000), nullable=True)
+    result_url = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # INDEXES for performance
+    __table_args__ = (
+        Index('idx_image_job_status_next_attempt', 'status', 'next_attempt_at'),
+        Index('idx_image_job_target', 'target_type', 'target_id', 'field'),
+    )
+
+    def __repr__(self):
+        return f"<ImageJob(id={self.id}, {self.target_type}:{self.target_id}.{self.field}, status='{self.status.value}')>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ...db import Base
+
+
+class ProductSalesDelta(Base):
+    """Append-only log of per-order sold quantities.
+
+    Checkout inserts one row per product instead of updating the hot
+    ``products.sold_count`` row; the sold count aggregator rolls pending
+    rows into ``products.sold_count`` in batches and deletes them.
+    """
+    __tablename__ = "product_sales_deltas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    quantity = Column(Integer, nullable=False)  # Negative for returns/cancellations
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # INDEXES for performance
+    __table_args__ = (
+        Index('idx_sales_delta_product', 'product_id'),
+    )
+
+    def __repr__(self):
+        return f"<ProductSalesDelta(id={self.id}, product_id={self.product_id}, quantity={self.quantity})>"
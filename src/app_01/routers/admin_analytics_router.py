@@ -8,15 +8,38 @@ API endpoints for admin dashboard analytics and statistics:
 - Business intelligence
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, date, timedelta
+import calendar
 from ..db import get_db
+from ..db.market_db import Market, get_market_config
 from ..models.admins.order_management.order_admin_stats import OrderAdminStats
+from ..models.admins.order_management.order_hourly_rollup import OrderHourlyRollup
+from ..admin.admin_app import authentication_backend as admin_auth
+from ..services.order_stats import market_day
+from ..services.data_export import (
+    PARQUET_AVAILABLE, STATS_COLUMNS, ORDER_COLUMNS, ORDER_ITEM_COLUMNS,
+    export_response, stats_statement, orders_statement, order_items_statement
+)
+
+
+async def require_admin_session(request: Request) -> None:
+    """Reject requests without a logged-in, active admin session (same check as the SQLAdmin panel)"""
+    if "session" not in request.scope or not await admin_auth.authenticate(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin authentication required"
+        )
+
 
-router = APIRouter(prefix="/api/v1/admin/analytics", tags=["Admin Analytics"])
+router = APIRouter(
+    prefix="/api/v1/admin/analytics",
+    tags=["Admin Analytics"],
+    dependencies=[Depends(require_admin_session)]
+)
 
 
 # ========================
@@ -60,6 +83,12 @@ class DashboardOverviewResponse(BaseModel):
     best_sales_days: List[DailyStatsResponse]
 
 
+def _session_market(db: Session) -> Market:
+    """Market of the request's DB session (sessions from get_db carry it in info)"""
+    market = db.info.get("market")
+    return market if isinstance(market, Market) else Market(market or Market.KG.value)
+
+
 # ========================
 # DAILY STATISTICS API
 # ========================
@@ -153,13 +182,15 @@ def get_stats_range(
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="start_date must be before end_date")
     
+    market = _session_market(db)
     stats_list = OrderAdminStats.get_stats_range(db, start_date, end_date)
     
-    # Calculate summary
-    total_orders = sum(s.today_orders_count for s in stats_list)
-    total_sales = sum(s.today_sales_total for s in stats_list)
-    total_delivered = sum(s.today_orders_delivered for s in stats_list)
-    total_cancelled = sum(s.today_orders_cancelled for s in stats_list)
+    # Summary: one aggregate over the hourly rollups
+    totals = OrderHourlyRollup.get_totals(db, market.value, start_date, end_date)
+    total_orders = totals["orders"]
+    total_sales = totals["sales"]
+    total_delivered = totals["delivered"]
+    total_cancelled = totals["cancelled"]
     
     avg_order_value = total_sales / total_orders if total_orders > 0 else 0
     completion_rate = (total_delivered / total_orders * 100) if total_orders > 0 else 0
@@ -169,9 +200,11 @@ def get_stats_range(
         "total_sales": total_sales,
         "total_delivered": total_delivered,
         "total_cancelled": total_cancelled,
+        "total_items": totals["items"],
+        "total_revenue": totals["revenue"],
         "avg_order_value": round(avg_order_value, 2),
         "completion_rate": round(completion_rate, 2),
-        "formatted_total_sales": f"{total_sales} KGS"
+        "formatted_total_sales": f"{total_sales} {get_market_config(market)['currency_code']}"
     }
     
     return StatsRangeResponse(
@@ -248,7 +281,8 @@ def get_dashboard_overview(db: Session = Depends(get_db)):
     - Quick business overview
     - Performance snapshot
     """
-    today = date.today()
+    market = _session_market(db)
+    today = market_day(None, market)
     yesterday = today - timedelta(days=1)
     week_start = today - timedelta(days=6)
     month_start = today.replace(day=1)
@@ -257,23 +291,23 @@ def get_dashboard_overview(db: Session = Depends(get_db)):
     today_stats = OrderAdminStats.get_stats_by_date(db, today)
     yesterday_stats = OrderAdminStats.get_stats_by_date(db, yesterday)
     
-    # Get week stats
-    week_stats = OrderAdminStats.get_stats_range(db, week_start, today)
+    # Week and month summaries: one aggregate each over the hourly rollups
+    week = OrderHourlyRollup.get_totals(db, market.value, week_start, today)
     week_summary = {
-        "total_orders": sum(s.today_orders_count for s in week_stats),
-        "total_sales": sum(s.today_sales_total for s in week_stats),
-        "avg_daily_orders": round(sum(s.today_orders_count for s in week_stats) / 7, 1),
-        "avg_daily_sales": round(sum(s.today_sales_total for s in week_stats) / 7, 2)
+        "total_orders": week["orders"],
+        "total_sales": week["sales"],
+        "avg_daily_orders": round(week["orders"] / 7, 1),
+        "avg_daily_sales": round(week["sales"] / 7, 2)
     }
     
-    # Get month stats
-    month_stats = OrderAdminStats.get_stats_range(db, month_start, today)
+    month = OrderHourlyRollup.get_totals(db, market.value, month_start, today)
+    month_days = month["active_days"]
     month_summary = {
-        "total_orders": sum(s.today_orders_count for s in month_stats),
-        "total_sales": sum(s.today_sales_total for s in month_stats),
-        "days_in_period": len(month_stats),
-        "avg_daily_orders": round(sum(s.today_orders_count for s in month_stats) / len(month_stats), 1) if month_stats else 0,
-        "avg_daily_sales": round(sum(s.today_sales_total for s in month_stats) / len(month_stats), 2) if month_stats else 0
+        "total_orders": month["orders"],
+        "total_sales": month["sales"],
+        "days_in_period": month_days,
+        "avg_daily_orders": round(month["orders"] / month_days, 1) if month_days else 0,
+        "avg_daily_sales": round(month["sales"] / month_days, 2) if month_days else 0
     }
     
     # Get best sales days
@@ -311,50 +345,42 @@ def get_trends(
     
     **Returns:** Trend analysis and insights
     """
-    stats = OrderAdminStats.get_recent_stats(db, days)
+    market = _session_market(db)
+    end_date = market_day(None, market)
+    start_date = end_date - timedelta(days=days)
+    totals = OrderHourlyRollup.get_totals(db, market.value, start_date, end_date)
     
-    if not stats:
+    if not totals["active_days"]:
         return {
             "message": "No data available for trend analysis",
             "period_days": days
         }
     
     # Calculate trends
-    total_orders = sum(s.today_orders_count for s in stats)
-    total_sales = sum(s.today_sales_total for s in stats)
-    avg_daily_orders = total_orders / len(stats)
-    avg_daily_sales = total_sales / len(stats)
+    total_orders = totals["orders"]
+    total_sales = totals["sales"]
+    avg_daily_orders = total_orders / totals["active_days"]
+    avg_daily_sales = total_sales / totals["active_days"]
     
-    # Get recent vs older comparison
-    mid_point = len(stats) // 2
-    recent_half = stats[:mid_point]
-    older_half = stats[mid_point:]
+    # Get recent vs older comparison (two halves of the period, one aggregate)
+    split_date = start_date + timedelta(days=(days + 1) // 2)
+    halves = OrderHourlyRollup.get_split_totals(db, market.value, start_date, split_date, end_date)
     
-    recent_avg_orders = sum(s.today_orders_count for s in recent_half) / len(recent_half) if recent_half else 0
-    older_avg_orders = sum(s.today_orders_count for s in older_half) / len(older_half) if older_half else 0
+    recent_avg_orders = halves["recent_orders"] / halves["recent_days"] if halves["recent_days"] else 0
+    older_avg_orders = halves["older_orders"] / halves["older_days"] if halves["older_days"] else 0
     
-    recent_avg_sales = sum(s.today_sales_total for s in recent_half) / len(recent_half) if recent_half else 0
-    older_avg_sales = sum(s.today_sales_total for s in older_half) / len(older_half) if older_half else 0
+    recent_avg_sales = halves["recent_sales"] / halves["recent_days"] if halves["recent_days"] else 0
+    older_avg_sales = halves["older_sales"] / halves["older_days"] if halves["older_days"] else 0
     
     order_growth = ((recent_avg_orders - older_avg_orders) / older_avg_orders * 100) if older_avg_orders > 0 else 0
     sales_growth = ((recent_avg_sales - older_avg_sales) / older_avg_sales * 100) if older_avg_sales > 0 else 0
     
-    # Day of week analysis
-    day_of_week_stats = {}
-    for stat in stats:
-        dow = stat.date.strftime("%A")
-        if dow not in day_of_week_stats:
-            day_of_week_stats[dow] = {"orders": 0, "sales": 0, "count": 0}
-        day_of_week_stats[dow]["orders"] += stat.today_orders_count
-        day_of_week_stats[dow]["sales"] += stat.today_sales_total
-        day_of_week_stats[dow]["count"] += 1
-    
-    # Calculate averages
+    # Day of week analysis (grouped in SQL)
     day_averages = {}
-    for dow, data in day_of_week_stats.items():
-        day_averages[dow] = {
-            "avg_orders": round(data["orders"] / data["count"], 1),
-            "avg_sales": round(data["sales"] / data["count"], 2)
+    for row in OrderHourlyRollup.get_day_of_week_totals(db, market.value, start_date, end_date):
+        day_averages[calendar.day_name[row.day_of_week]] = {
+            "avg_orders": round(row.orders / row.days, 1),
+            "avg_sales": round(row.sales / row.days, 2)
         }
     
     # Find best day
@@ -363,8 +389,8 @@ def get_trends(
     return {
         "period": {
             "days": days,
-            "start_date": stats[-1].date if stats else None,
-            "end_date": stats[0].date if stats else None
+            "start_date": start_date,
+            "end_date": end_date
         },
         "overall": {
             "total_orders": total_orders,
@@ -424,11 +450,21 @@ def generate_insights(order_growth: float, sales_growth: float, avg_daily_sales:
 # EXPORT DATA API
 # ========================
 
+EXPORT_FORMAT_PATTERN = r"^(csv|csv\.gz|parquet)$"
+
+
+def _check_export_request(export_format: str, start_date: Optional[date], end_date: Optional[date]) -> None:
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    if export_format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+
 @router.get("/export")
 def export_stats(
     start_date: date = Query(...),
     end_date: date = Query(...),
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex=r"^(json|csv|csv\.gz|parquet)$"),
     db: Session = Depends(get_db)
 ):
     """
@@ -436,38 +472,67 @@ def export_stats(
     
     **Formats:**
     - JSON: Default, structured data
-    - CSV: For Excel/spreadsheet analysis
+    - CSV / gzip-CSV: Streamed file for Excel/spreadsheet analysis
+    - Parquet: Streamed file for data tools (requires pyarrow)
     
     **Args:**
     - `start_date`: Range start
     - `end_date`: Range end
-    - `format`: "json" or "csv"
+    - `format`: "json", "csv", "csv.gz" or "parquet"
     
     **Returns:** Statistics in requested format
     """
+    if format != "json":
+        _check_export_request(format, start_date, end_date)
+        return export_response(
+            db, STATS_COLUMNS, stats_statement(start_date, end_date), format,
+            f"order-stats-{start_date}-{end_date}"
+        )
+    
     stats = OrderAdminStats.get_stats_range(db, start_date, end_date)
+    return {
+        "format": "json",
+        "start_date": start_date,
+        "end_date": end_date,
+        "record_count": len(stats),
+        "data": [DailyStatsResponse.from_orm(s) for s in stats]
+    }
+
+
+@router.get("/export/orders")
+def export_orders(
+    start_date: Optional[date] = Query(None, description="First market-local day (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last market-local day (YYYY-MM-DD)"),
+    format: str = Query("csv", regex=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream orders of the market as CSV, gzip-CSV or Parquet
     
-    if format == "csv":
-        # Generate CSV
-        csv_lines = ["Date,Orders,Pending,Processing,Shipped,Delivered,Cancelled,Sales,Avg Order Value,Completion Rate"]
-        for s in stats:
-            csv_lines.append(
-                f"{s.date},{s.today_orders_count},{s.today_orders_pending},{s.today_orders_processing},"
-                f"{s.today_orders_shipped},{s.today_orders_delivered},{s.today_orders_cancelled},"
-                f"{s.today_sales_total},{s.avg_order_value},{s.completion_rate}"
-            )
-        
-        return {
-            "format": "csv",
-            "data": "\n".join(csv_lines)
-        }
-    else:
-        # Return JSON
-        return {
-            "format": "json",
-            "start_date": start_date,
-            "end_date": end_date,
-            "record_count": len(stats),
-            "data": [DailyStatsResponse.from_orm(s) for s in stats]
-        }
+    Rows are read through a server-side cursor and written chunk by chunk,
+    so memory stays flat for any range size.
+    """
+    _check_export_request(format, start_date, end_date)
+    market = _session_market(db)
+    return export_response(
+        db, ORDER_COLUMNS, orders_statement(market, start_date, end_date), format,
+        f"orders-{market.value}-{start_date or 'all'}-{end_date or 'all'}"
+    )
 
+
+@router.get("/export/order-items")
+def export_order_items(
+    start_date: Optional[date] = Query(None, description="First market-local day (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last market-local day (YYYY-MM-DD)"),
+    format: str = Query("csv", regex=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream order items (with their order number, date and status) as CSV, gzip-CSV or Parquet
+    """
+    _check_export_request(format, start_date, end_date)
+    market = _session_market(db)
+    return export_response(
+        db, ORDER_ITEM_COLUMNS, order_items_statement(market, start_date, end_date), format,
+        f"order-items-{market.value}-{start_date or 'all'}-{end_date or 'all'}"
+    )
@@ -3,12 +3,15 @@ FastAPI Authentication Router
 Endpoints for phone number authentication with multi-market support
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import logging
 
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
 from ..services.auth_service import auth_service
+from ..services.guest_cart import guest_cart_codec, merge_guest_cart
 from ..schemas.auth import (
     PhoneLoginRequest, VerifyCodeRequest, SendCodeResponse, VerifyCodeResponse,
     UserProfile, UpdateProfileRequest, UpdateProfileResponse, LogoutResponse,
@@ -71,7 +74,7 @@ async def _send_verification_code_handler(
         client_ip = request_obj.client.host
         
         # Send verification code
-        response = auth_service.send_verification_code(request, x_market)
+        response = await auth_service.send_verification_code(request, x_market)
         
         logger.info(f"Verification code sent successfully to {response.phone_number}")
         return response
@@ -139,6 +142,8 @@ async def send_code(
 })
 async def verify_phone_code(
     request: VerifyCodeRequest,
+    http_request: Request,
+    http_response: Response,
     x_market: Optional[str] = Header(None, description="Market override (kg/us)")
 ):
     """
@@ -154,9 +159,12 @@ async def verify_phone_code(
         logger.info(f"Verifying code for {request.phone}")
         
         # Verify phone code
-        response = auth_service.verify_phone_code(request, x_market)
+        response = await auth_service.verify_phone_code(request, x_market)
         
         logger.info(f"Phone verification successful for {request.phone}, user_id: {response.user.id}")
+        
+        if settings.guest_cart.merge_on_login:
+            merge_guest_cart_on_login(http_request, http_response, response)
         return response
         
     except ValueError as e:
@@ -178,6 +186,22 @@ async def verify_phone_code(
             detail="Internal server error"
         )
 
+def merge_guest_cart_on_login(http_request: Request, http_response: Response, verified: VerifyCodeResponse) -> None:
+    """Move the guest cart cookie into the user's DB cart; never fails the login"""
+    guest_cart = guest_cart_codec.decode(http_request.cookies.get(settings.guest_cart.cookie_name))
+    if not guest_cart.lines:
+        return
+    
+    try:
+        session_factory = db_manager.get_session_factory(Market(verified.market.value))
+        with session_factory() as db:
+            merged = merge_guest_cart(db, int(verified.user.id), guest_cart)
+            db.commit()
+        http_response.delete_cookie(settings.guest_cart.cookie_name)
+        logger.info(f"Merged {merged} guest cart items for user_id: {verified.user.id}")
+    except Exception as e:
+        logger.warning(f"Guest cart merge failed for user_id {verified.user.id}: {e}")
+
 @router.get("/profile", response_model=UserProfile, responses={
     401: {"model": ErrorResponse},
     404: {"model": ErrorResponse},
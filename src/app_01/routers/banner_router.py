@@ -17,9 +17,21 @@ from ..schemas.banner import (
 )
 from .auth_router import get_current_user_from_token
 from ..schemas.auth import VerifyTokenResponse
+from ..utils.image_upload import image_uploader
 
 router = APIRouter(prefix="/banners", tags=["banners"])
 
+
+def banner_response(banner: Banner) -> BannerResponse:
+    """BannerResponse with the placeholders of the uploaded images"""
+    response = BannerResponse.model_validate(banner)
+    placeholder = image_uploader.placeholder(banner.image_url)
+    response.image_placeholder, response.image_color = placeholder.lqip, placeholder.color
+    mobile_placeholder = image_uploader.placeholder(banner.mobile_image_url)
+    response.mobile_image_placeholder, response.mobile_image_color = mobile_placeholder.lqip, mobile_placeholder.color
+    return response
+
+
 # Public Endpoints (for displaying on main page)
 
 @router.get("/", response_model=BannersListResponse)
@@ -64,9 +76,9 @@ def get_active_banners(db: Session = Depends(get_db)):
     ).order_by(Banner.display_order, Banner.created_at.desc()).all()
     
     return BannersListResponse(
-        hero_banners=hero_banners,
-        promo_banners=promo_banners,
-        category_banners=category_banners,
+        hero_banners=[banner_response(banner) for banner in hero_banners],
+        promo_banners=[banner_response(banner) for banner in promo_banners],
+        category_banners=[banner_response(banner) for banner in category_banners],
         total=len(hero_banners) + len(promo_banners) + len(category_banners)
     )
 
@@ -84,7 +96,7 @@ def get_hero_banners(db: Session = Depends(get_db)):
         )
     ).order_by(Banner.display_order, Banner.created_at.desc()).all()
     
-    return banners
+    return [banner_response(banner) for banner in banners]
 
 @router.get("/promo", response_model=List[BannerResponse])
 def get_promo_banners(db: Session = Depends(get_db)):
@@ -100,7 +112,7 @@ def get_promo_banners(db: Session = Depends(get_db)):
         )
     ).order_by(Banner.display_order, Banner.created_at.desc()).all()
     
-    return banners
+    return [banner_response(banner) for banner in banners]
 
 @router.get("/category", response_model=List[BannerResponse])
 def get_category_banners(db: Session = Depends(get_db)):
@@ -116,7 +128,7 @@ def get_category_banners(db: Session = Depends(get_db)):
         )
     ).order_by(Banner.display_order, Banner.created_at.desc()).all()
     
-    return banners
+    return [banner_response(banner) for banner in banners]
 
 # Admin Endpoints (protected)
 
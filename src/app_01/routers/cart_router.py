@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from sqlalchemy.orm import Session, selectinload
+from typing import Callable, Optional
 from .. import models
+from ..core.config import settings
 from ..db import get_db
 from ..schemas.cart import (
     CartSchema, 
@@ -9,11 +11,18 @@ from ..schemas.cart import (
     GetCartRequest,
     RemoveFromCartRequest,
     UpdateCartItemRequest,
-    ClearCartRequest
+    ClearCartRequest,
+    GuestCartSchema,
+    GuestCartItemRequest
 )
 from .auth_router import get_current_user_from_token
 from ..schemas.auth import VerifyTokenResponse
 from ..models.users.user import User
+from ..models.products.sku import SKU
+from ..services.idempotency_service import idempotency_service
+from ..services.guest_cart import (
+    guest_cart_codec, hydrate_guest_cart, merge_guest_cart, session_market, GuestCart, GuestCartLines
+)
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
@@ -24,7 +33,12 @@ def get_cart_by_user_id(user_id: int, db: Session) -> CartSchema:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    cart = db.query(models.orders.cart.Cart).filter(models.orders.cart.Cart.user_id == user_id).first()
+    # populate_existing: items flushed but not yet committed by a mutation must show up
+    cart = db.query(models.orders.cart.Cart).populate_existing().options(
+        selectinload(models.orders.cart.Cart.items)
+        .joinedload(models.orders.cart.CartItem.sku)
+        .joinedload(SKU.product)
+    ).filter(models.orders.cart.Cart.user_id == user_id).first()
     if not cart:
         # Create a cart if it doesn't exist
         cart = models.orders.cart.Cart(user_id=user_id)
@@ -42,7 +56,7 @@ def get_cart_by_user_id(user_id: int, db: Session) -> CartSchema:
             quantity=item.quantity,
             name=product.title,
             price=item.sku.price,
-            image=product.main_image.url if product.main_image else ""
+            image=product.main_image or ""
         ))
         total_price += item.sku.price * item.quantity
 
@@ -54,6 +68,41 @@ def get_cart_by_user_id(user_id: int, db: Session) -> CartSchema:
         total_price=total_price
     )
 
+def run_idempotent(
+    db: Session,
+    user_id: int,
+    scope: str,
+    idempotency_key: Optional[str],
+    payload: dict,
+    handler: Callable[[], CartSchema]
+) -> CartSchema:
+    """
+    Run a cart mutation once per Idempotency-Key, replaying the stored cart on retries.
+
+    Handlers only flush; the mutation and the stored response are committed
+    together here, so a crash in between cannot leave a claimed key whose
+    change is already applied.
+    """
+    if not idempotency_key:
+        result = handler()
+        db.commit()
+        return result
+    
+    record = idempotency_service.begin(
+        db, user_id, scope, idempotency_key, idempotency_service.hash_request(payload)
+    )
+    if record.is_completed:
+        return CartSchema(**idempotency_service.load_response(record))
+    
+    try:
+        result = handler()
+        idempotency_service.complete(db, record, result.dict())
+        db.commit()
+    except Exception:
+        idempotency_service.abandon(db, record)
+        raise
+    return result
+
 # ==================== New Stateless Endpoints ====================
 
 @router.post("/get", response_model=CartSchema)
@@ -62,8 +111,19 @@ def get_cart_stateless(request: GetCartRequest, db: Session = Depends(get_db)):
     return get_cart_by_user_id(request.user_id, db)
 
 @router.post("/add", response_model=CartSchema)
-def add_to_cart_stateless(request: AddToCartRequest, db: Session = Depends(get_db)):
+def add_to_cart_stateless(
+    request: AddToCartRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Add to cart (stateless)"""
+    return run_idempotent(
+        db, request.user_id, "cart.add", idempotency_key, request.dict(),
+        lambda: _add_to_cart(request, db)
+    )
+
+def _add_to_cart(request: AddToCartRequest, db: Session) -> CartSchema:
+    """Add SKU to the user's cart and return the updated cart"""
     # Verify user exists
     user = db.query(User).filter(User.id == request.user_id).first()
     if not user:
@@ -73,8 +133,7 @@ def add_to_cart_stateless(request: AddToCartRequest, db: Session = Depends(get_d
     if not cart:
         cart = models.orders.cart.Cart(user_id=request.user_id)
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        db.flush()  # Get cart ID
     
     # Check if item already in cart
     cart_item = db.query(models.orders.cart.CartItem).filter(
@@ -88,13 +147,24 @@ def add_to_cart_stateless(request: AddToCartRequest, db: Session = Depends(get_d
         cart_item = models.orders.cart.CartItem(cart_id=cart.id, sku_id=request.sku_id, quantity=request.quantity)
         db.add(cart_item)
 
-    db.commit()
+    db.flush()
     
     return get_cart_by_user_id(request.user_id, db)
 
 @router.post("/update", response_model=CartSchema)
-def update_cart_item_stateless(request: UpdateCartItemRequest, db: Session = Depends(get_db)):
+def update_cart_item_stateless(
+    request: UpdateCartItemRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Update cart item quantity (stateless)"""
+    return run_idempotent(
+        db, request.user_id, "cart.update", idempotency_key, request.dict(),
+        lambda: _update_cart_item(request, db)
+    )
+
+def _update_cart_item(request: UpdateCartItemRequest, db: Session) -> CartSchema:
+    """Set cart item quantity and return the updated cart"""
     cart = db.query(models.orders.cart.Cart).filter(models.orders.cart.Cart.user_id == request.user_id).first()
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
@@ -108,13 +178,24 @@ def update_cart_item_stateless(request: UpdateCartItemRequest, db: Session = Dep
         raise HTTPException(status_code=404, detail="Cart item not found")
 
     cart_item.quantity = request.quantity
-    db.commit()
+    db.flush()
 
     return get_cart_by_user_id(request.user_id, db)
 
 @router.post("/remove", response_model=CartSchema)
-def remove_from_cart_stateless(request: RemoveFromCartRequest, db: Session = Depends(get_db)):
+def remove_from_cart_stateless(
+    request: RemoveFromCartRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Remove item from cart (stateless)"""
+    return run_idempotent(
+        db, request.user_id, "cart.remove", idempotency_key, request.dict(),
+        lambda: _remove_from_cart(request, db)
+    )
+
+def _remove_from_cart(request: RemoveFromCartRequest, db: Session) -> CartSchema:
+    """Remove cart item and return the updated cart"""
     cart = db.query(models.orders.cart.Cart).filter(models.orders.cart.Cart.user_id == request.user_id).first()
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
@@ -128,13 +209,24 @@ def remove_from_cart_stateless(request: RemoveFromCartRequest, db: Session = Dep
         raise HTTPException(status_code=404, detail="Cart item not found")
 
     db.delete(cart_item)
-    db.commit()
+    db.flush()
 
     return get_cart_by_user_id(request.user_id, db)
 
 @router.post("/clear", response_model=CartSchema)
-def clear_cart_stateless(request: ClearCartRequest, db: Session = Depends(get_db)):
+def clear_cart_stateless(
+    request: ClearCartRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Clear all items from cart (stateless)"""
+    return run_idempotent(
+        db, request.user_id, "cart.clear", idempotency_key, request.dict(),
+        lambda: _clear_cart(request, db)
+    )
+
+def _clear_cart(request: ClearCartRequest, db: Session) -> CartSchema:
+    """Delete all cart items and return the empty cart"""
     cart = db.query(models.orders.cart.Cart).filter(models.orders.cart.Cart.user_id == request.user_id).first()
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
@@ -143,10 +235,106 @@ def clear_cart_stateless(request: ClearCartRequest, db: Session = Depends(get_db
     db.query(models.orders.cart.CartItem).filter(
         models.orders.cart.CartItem.cart_id == cart.id
     ).delete()
-    db.commit()
+    db.flush()
 
     return get_cart_by_user_id(request.user_id, db)
 
+# ==================== Guest Cart Endpoints ====================
+
+def _guest_cart_response(response: Response, db: Session, lines: GuestCartLines) -> GuestCartSchema:
+    """Hydrate the lines and write them back to the cookie, pruning SKUs that no longer exist"""
+    market = session_market(db)
+    cart = hydrate_guest_cart(db, GuestCart(market, lines))
+    kept = {item["sku_id"]: item["quantity"] for item in cart["items"]}
+    if kept:
+        response.set_cookie(
+            settings.guest_cart.cookie_name,
+            guest_cart_codec.encode(kept, market),
+            max_age=settings.guest_cart.max_age_seconds,
+            httponly=True,
+            samesite="lax",
+            secure=settings.is_production
+        )
+    else:
+        response.delete_cookie(settings.guest_cart.cookie_name)
+    return GuestCartSchema(**cart)
+
+def _read_guest_cart(request: Request) -> GuestCart:
+    return guest_cart_codec.decode(request.cookies.get(settings.guest_cart.cookie_name))
+
+def _read_guest_lines(request: Request, db: Session) -> GuestCartLines:
+    """Lines of the cookie cart, empty if it was built in another market"""
+    return _read_guest_cart(request).lines_for(session_market(db))
+
+def _update_guest_cart(lines: GuestCartLines, sku_id: int, quantity: int) -> GuestCartLines:
+    try:
+        return guest_cart_codec.set_quantity(lines, sku_id, quantity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/guest", response_model=GuestCartSchema)
+def get_guest_cart(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get the anonymous cart stored in the signed cookie"""
+    return _guest_cart_response(response, db, _read_guest_lines(request, db))
+
+@router.post("/guest/items", response_model=GuestCartSchema)
+def add_to_guest_cart(
+    item: GuestCartItemRequest,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Add SKU to the anonymous cart (no DB writes)"""
+    lines = _read_guest_lines(request, db)
+    lines = _update_guest_cart(lines, item.sku_id, lines.get(item.sku_id, 0) + item.quantity)
+    cart = _guest_cart_response(response, db, lines)
+    if not any(line.sku_id == item.sku_id for line in cart.items):
+        raise HTTPException(status_code=404, detail="SKU not found")
+    return cart
+
+@router.put("/guest/items/{sku_id}", response_model=GuestCartSchema)
+def update_guest_cart_item(
+    sku_id: int,
+    quantity: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Set quantity of a SKU in the anonymous cart (0 removes it)"""
+    lines = _read_guest_lines(request, db)
+    if sku_id not in lines:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return _guest_cart_response(response, db, _update_guest_cart(lines, sku_id, quantity))
+
+@router.delete("/guest/items/{sku_id}", response_model=GuestCartSchema)
+def remove_from_guest_cart(sku_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Remove SKU from the anonymous cart"""
+    lines = _read_guest_lines(request, db)
+    if sku_id not in lines:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return _guest_cart_response(response, db, _update_guest_cart(lines, sku_id, 0))
+
+@router.delete("/guest", response_model=GuestCartSchema)
+def clear_guest_cart(response: Response):
+    """Clear the anonymous cart"""
+    response.delete_cookie(settings.guest_cart.cookie_name)
+    return GuestCartSchema(items=[], total_items=0, total_price=0)
+
+@router.post("/guest/merge", response_model=CartSchema)
+def merge_guest_cart_into_user_cart(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token)
+):
+    """Merge the anonymous cart into the signed-in user's cart and clear the cookie"""
+    guest_cart = _read_guest_cart(request)
+    if guest_cart.lines:
+        merge_guest_cart(db, current_user.user_id, guest_cart)
+        db.commit()
+    response.delete_cookie(settings.guest_cart.cookie_name)
+    return get_cart_by_user_id(current_user.user_id, db)
+
 # ==================== Legacy JWT Endpoints (for backward compatibility) ====================
 
 @router.get("/", response_model=CartSchema)
@@ -155,20 +343,31 @@ def get_cart(db: Session = Depends(get_db), current_user: VerifyTokenResponse =
     return get_cart_by_user_id(current_user.user_id, db)
 
 @router.post("/items", response_model=CartSchema)
-def add_to_cart(request: AddToCartRequest, db: Session = Depends(get_db), current_user: VerifyTokenResponse = Depends(get_current_user_from_token)):
+def add_to_cart(
+    request: AddToCartRequest,
+    db: Session = Depends(get_db),
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Legacy JWT-based add to cart - redirects to stateless endpoint"""
     request.user_id = current_user.user_id
-    return add_to_cart_stateless(request, db)
+    return add_to_cart_stateless(request, db, idempotency_key=idempotency_key)
 
 @router.put("/items/{item_id}", response_model=CartSchema)
-def update_cart_item(item_id: int, quantity: int, db: Session = Depends(get_db), current_user: VerifyTokenResponse = Depends(get_current_user_from_token)):
+def update_cart_item(
+    item_id: int,
+    quantity: int,
+    db: Session = Depends(get_db),
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Legacy JWT-based update cart item"""
     request = UpdateCartItemRequest(
         user_id=current_user.user_id,
         cart_item_id=item_id,
         quantity=quantity
     )
-    return update_cart_item_stateless(request, db)
+    return update_cart_item_stateless(request, db, idempotency_key=idempotency_key)
 
 @router.get("/items", response_model=CartSchema)
 def get_cart_items(db: Session = Depends(get_db), current_user: VerifyTokenResponse = Depends(get_current_user_from_token)):
@@ -176,16 +375,25 @@ def get_cart_items(db: Session = Depends(get_db), current_user: VerifyTokenRespo
     return get_cart_by_user_id(current_user.user_id, db)
 
 @router.delete("/items/{item_id}", response_model=CartSchema)
-def remove_from_cart(item_id: int, db: Session = Depends(get_db), current_user: VerifyTokenResponse = Depends(get_current_user_from_token)):
+def remove_from_cart(
+    item_id: int,
+    db: Session = Depends(get_db),
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Legacy JWT-based remove from cart"""
     request = RemoveFromCartRequest(
         user_id=current_user.user_id,
         cart_item_id=item_id
     )
-    return remove_from_cart_stateless(request, db)
+    return remove_from_cart_stateless(request, db, idempotency_key=idempotency_key)
 
 @router.delete("/", response_model=CartSchema)
-def clear_cart(db: Session = Depends(get_db), current_user: VerifyTokenResponse = Depends(get_current_user_from_token)):
+def clear_cart(
+    db: Session = Depends(get_db),
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Legacy JWT-based clear cart"""
     request = ClearCartRequest(user_id=current_user.user_id)
-    return clear_cart_stateless(request, db)
+    return clear_cart_stateless(request, db, idempotency_key=idempotency_key)
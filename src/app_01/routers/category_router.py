@@ -11,6 +11,7 @@ from ..schemas.category import (
     SubcategoriesListResponse
 )
 from ..schemas.product import ProductListItemSchema, ProductListResponse
+from ..utils.image_upload import image_uploader, srcset
 from sqlalchemy.orm import joinedload
 import math
 
@@ -339,6 +340,9 @@ def get_products_by_subcategory(
         elif product.assets and len(product.assets) > 0:
             main_image = product.assets[0].url
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -348,6 +352,10 @@ def get_products_by_subcategory(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
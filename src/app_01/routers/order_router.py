@@ -2,9 +2,11 @@
 Order Management Router
 Handles order creation, retrieval, and management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional, Union
 from datetime import datetime
 from pydantic import BaseModel, validator
 import random
@@ -17,6 +19,16 @@ from ..models.products.product import Product
 from ..models.orders.cart import Cart, CartItem
 from ..routers.auth_router import get_current_user_from_token
 from ..schemas.auth import VerifyTokenResponse
+from ..services.idempotency_service import idempotency_service
+from ..services.sold_count_aggregator import sold_count_aggregator
+from ..services.outbox_dispatcher import publish_event, outbox_dispatcher
+from ..services.order_events import ORDER_CREATED
+from ..services.checkout_pricing import checkout_pricing, calculate_shipping_cost
+from ..services.order_history import get_order_summaries
+from ..services.order_status_stream import (
+    order_status_broker, StreamLimitExceeded, load_status_events_since, stream_order_status
+)
+from ..core.config import settings
 
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -99,6 +111,8 @@ class OrderResponse(BaseModel):
     
     subtotal: float
     shipping_cost: float
+    discount_amount: float = 0.0
+    tax_amount: float = 0.0
     total_amount: float
     currency: str
     
@@ -110,6 +124,73 @@ class OrderResponse(BaseModel):
         from_attributes = True
 
 
+class OrderSummaryResponse(BaseModel):
+    """Order header for history lists (items are on /orders/{id})"""
+    id: int
+    order_number: str
+    status: str
+    total_amount: float
+    currency: str
+    order_date: Optional[datetime] = None
+    delivery_date: Optional[datetime] = None
+    delivery_address: str
+    items_count: int
+    first_item_name: Optional[str] = None
+    first_item_thumbnail: Optional[str] = None
+
+
+class OrderSummaryPage(BaseModel):
+    """Keyset-paginated page of order summaries"""
+    orders: List[OrderSummaryResponse] = []
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class QuoteRequest(BaseModel):
+    """Checkout quote request"""
+    delivery_city: Optional[str] = None
+    
+    # Items (if not using cart)
+    items: Optional[List[OrderItemCreate]] = None
+    
+    # Use cart items if items not provided
+    use_cart: bool = True
+
+
+class QuoteItemResponse(BaseModel):
+    """Priced quote line"""
+    sku_id: int
+    product_id: int
+    product_name: str
+    sku_code: str
+    size: str
+    color: str
+    quantity: int
+    original_unit_price: float
+    unit_price: float
+    total_price: float
+
+
+class QuoteResponse(BaseModel):
+    """Checkout quote: what /orders/create will charge for this cart"""
+    cart_version: str
+    market: str
+    delivery_city: Optional[str] = None
+    currency: str
+    
+    items: List[QuoteItemResponse] = []
+    
+    subtotal: float
+    discount_amount: float
+    shipping_cost: float
+    tax_rate: float
+    tax_included: bool
+    tax_amount: float
+    total_amount: float
+    
+    expires_at: datetime
+
+
 # ==================== Helper Functions ====================
 
 def generate_order_number(db: Session) -> str:
@@ -130,14 +211,37 @@ def generate_order_number(db: Session) -> str:
     return f"#{next_num}"
 
 
-def calculate_shipping_cost(subtotal: float, city: Optional[str] = None) -> float:
-    """Calculate shipping cost based on order value and location"""
-    # Free shipping for orders over 5000 KGS
-    if subtotal >= 5000:
-        return 0.0
+def get_items_to_order(
+    db: Session,
+    user_id: int,
+    use_cart: bool,
+    items: Optional[List[OrderItemCreate]]
+) -> List[dict]:
+    """Order lines from the request items, or from the user's cart"""
+    if use_cart and not items:
+        # Get items from cart
+        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+        
+        if not cart or not cart.items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Your cart is empty"
+            )
+        
+        # Convert cart items to order items
+        return [
+            {'sku_id': cart_item.sku_id, 'quantity': cart_item.quantity}
+            for cart_item in cart.items
+        ]
+    
+    if items:
+        # Use provided items
+        return [{'sku_id': item.sku_id, 'quantity': item.quantity} for item in items]
     
-    # Standard shipping cost
-    return 150.0
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="No items to order. Please add items to cart or provide items."
+    )
 
 
 def validate_and_get_sku(sku_id: int, db: Session) -> SKU:
@@ -166,14 +270,74 @@ def validate_and_get_sku(sku_id: int, db: Session) -> SKU:
 
 # ==================== Endpoints ====================
 
+@router.post("/quote", response_model=QuoteResponse)
+async def quote_order(
+    request: QuoteRequest,
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token)
+):
+    """
+    Price the cart (or provided items) without placing an order
+    
+    Applies active product discounts, the market's tax and shipping rules.
+    The quote is cached for a short time: `/orders/create` with the same
+    cart and delivery city charges the quoted totals. Any cart change
+    produces a new `cart_version` and a fresh quote.
+    """
+    db = None
+    try:
+        user_id = current_user.user_id
+        
+        # Get user's market from database (not token)
+        user_market_from_token = Market(current_user.market.value) if current_user.market else Market.KG
+        from ..db.market_db import db_manager
+        from ..models.users.user import User
+        
+        temp_session_factory = db_manager.get_session_factory(user_market_from_token)
+        temp_db = temp_session_factory()
+        user = temp_db.query(User).filter(User.id == user_id).first()
+        temp_db.close()
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        user_market = Market(user.market) if user.market else Market.KG
+        SessionLocal = db_manager.get_session_factory(user_market)
+        db = SessionLocal()
+        
+        items_to_quote = get_items_to_order(db, user_id, request.use_cart, request.items)
+        quote = checkout_pricing.quote(db, user_id, items_to_quote, user_market, request.delivery_city)
+        
+        return QuoteResponse(**quote)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to quote order: {str(e)}"
+        )
+    finally:
+        if db is not None:
+            db.close()
+
+
 @router.post("/create", response_model=OrderResponse)
 async def create_order(
     request: CreateOrderRequest,
-    current_user: VerifyTokenResponse = Depends(get_current_user_from_token)
+    response: Response,
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Create a new order from cart or provided items
     
+    Send an `Idempotency-Key` header to make retries safe: a replay with the
+    same key and body returns the stored order instead of creating a new one,
+    and a duplicate sent while the first attempt is running waits for it.
+    
     **Flow:**
     1. Validate user authentication
     2. Get cart items OR use provided items
@@ -185,6 +349,7 @@ async def create_order(
     8. Clear cart (if using cart)
     9. Return order details
     """
+    idempotency_record = None
     try:
         user_id = current_user.user_id
         
@@ -211,63 +376,32 @@ async def create_order(
         SessionLocal = db_manager.get_session_factory(user_market)
         db = SessionLocal()
         
-        # Step 1: Get items to order
-        items_to_order = []
-        
-        if request.use_cart and not request.items:
-            # Get items from cart
-            cart = db.query(Cart).filter(Cart.user_id == user_id).first()
-            
-            if not cart or not cart.items:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Your cart is empty"
-                )
-            
-            # Convert cart items to order items
-            for cart_item in cart.items:
-                items_to_order.append({
-                    'sku_id': cart_item.sku_id,
-                    'quantity': cart_item.quantity
-                })
-        
-        elif request.items:
-            # Use provided items
-            items_to_order = [{'sku_id': item.sku_id, 'quantity': item.quantity} for item in request.items]
-        
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No items to order. Please add items to cart or provide items."
+        # Step 0: Claim the idempotency key (or replay the stored response)
+        if idempotency_key:
+            idempotency_record = await run_in_threadpool(
+                idempotency_service.begin,
+                db,
+                user_id,
+                "orders.create",
+                idempotency_key,
+                idempotency_service.hash_request(request.dict())
             )
+            if idempotency_record.is_completed:
+                response.headers["Idempotent-Replayed"] = "true"
+                return OrderResponse(**idempotency_service.load_response(idempotency_record))
         
-        # Step 2: Validate all SKUs and check stock
-        validated_items = []
-        subtotal = 0.0
-        
-        for item in items_to_order:
-            sku = validate_and_get_sku(item['sku_id'], db)
-            
-            # Check if enough stock
-            if sku.stock < item['quantity']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Not enough stock for '{sku.product.title}' (size: {sku.size}, color: {sku.color}). Available: {sku.stock}"
-                )
-            
-            item_total = sku.price * item['quantity']
-            subtotal += item_total
-            
-            validated_items.append({
-                'sku': sku,
-                'quantity': item['quantity'],
-                'unit_price': sku.price,
-                'total_price': item_total
-            })
+        # Step 1: Get items to order
+        items_to_order = get_items_to_order(db, user_id, request.use_cart, request.items)
         
-        # Step 3: Calculate costs
-        shipping_cost = calculate_shipping_cost(subtotal, request.delivery_city)
-        total_amount = subtotal + shipping_cost
+        # Step 2-3: Validate all SKUs and check stock (one query), then price
+        # the cart. A quote shown by /orders/quote for this exact cart is
+        # reused so the customer is charged what they saw.
+        cart_version = checkout_pricing.cart_version(items_to_order)
+        quote = checkout_pricing.get_quote(user_id, user_market, cart_version, request.delivery_city)
+        if quote is not None:
+            skus, _ = checkout_pricing.load_skus(db, items_to_order, with_discounts=False)
+        else:
+            quote, skus = checkout_pricing.build_quote(db, items_to_order, user_market, request.delivery_city)
         
         # Step 4: Generate order number
         order_number = generate_order_number(db)
@@ -283,10 +417,12 @@ async def create_order(
             delivery_address=request.delivery_address,
             delivery_city=request.delivery_city,
             delivery_notes=request.delivery_notes,
-            subtotal=subtotal,
-            shipping_cost=shipping_cost,
-            total_amount=total_amount,
-            currency="KGS"
+            subtotal=quote['subtotal'],
+            shipping_cost=quote['shipping_cost'],
+            discount_amount=quote['discount_amount'],
+            tax_amount=quote['tax_amount'],
+            total_amount=quote['total_amount'],
+            currency=quote['currency']
         )
         
         db.add(new_order)
@@ -294,17 +430,18 @@ async def create_order(
         
         # Step 6: Create OrderItems and reduce stock
         order_items = []
-        for item in validated_items:
-            sku = item['sku']
+        sold_quantities = {}
+        for item in quote['items']:
+            sku = skus[item['sku_id']]
             
             # Create order item
             order_item = OrderItem(
                 order_id=new_order.id,
                 sku_id=sku.id,
-                product_name=sku.product.title,
-                sku_code=sku.sku_code,
-                size=sku.size,
-                color=sku.color,
+                product_name=item['product_name'],
+                sku_code=item['sku_code'],
+                size=item['size'],
+                color=item['color'],
                 unit_price=item['unit_price'],
                 quantity=item['quantity'],
                 total_price=item['total_price']
@@ -316,8 +453,11 @@ async def create_order(
             # Reduce stock
             sku.stock -= item['quantity']
             
-            # Update product sold count
-            sku.product.sold_count = (sku.product.sold_count or 0) + item['quantity']
+            # Sold count is rolled into products.sold_count by the background
+            # aggregator, so checkout never locks the (hot) product row
+            sold_quantities[sku.product_id] = sold_quantities.get(sku.product_id, 0) + item['quantity']
+        
+        sold_count_aggregator.record_sale(db, new_order.id, sold_quantities)
         
         # Step 7: Clear cart if using cart
         if request.use_cart:
@@ -326,12 +466,12 @@ async def create_order(
                 # Delete all cart items
                 db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
         
-        # Commit everything
-        db.commit()
+        # Flush and reload server defaults (order_date, item ids) inside the transaction
+        db.flush()
         db.refresh(new_order)
         
-        # Step 8: Return order details
-        return OrderResponse(
+        # Step 8: Build order details
+        order_response = OrderResponse(
             id=new_order.id,
             order_number=new_order.order_number,
             status=new_order.status.value,
@@ -340,6 +480,8 @@ async def create_order(
             delivery_address=new_order.delivery_address,
             subtotal=new_order.subtotal,
             shipping_cost=new_order.shipping_cost,
+            discount_amount=new_order.discount_amount or 0.0,
+            tax_amount=new_order.tax_amount or 0.0,
             total_amount=new_order.total_amount,
             currency=new_order.currency,
             order_date=new_order.order_date,
@@ -357,12 +499,47 @@ async def create_order(
                 for item in order_items
             ]
         )
+        
+        # Side effects (notification, stats) are delivered from the outbox
+        # after commit, keeping them off the checkout critical path
+        publish_event(
+            db,
+            ORDER_CREATED,
+            {
+                "order_id": new_order.id,
+                "order_number": new_order.order_number,
+                "user_id": user_id,
+                "market": user_market.value,
+                "status": new_order.status.value,
+                "total_amount": new_order.total_amount,
+                "currency": new_order.currency,
+                "items_count": sum(item.quantity for item in order_items),
+                "order_date": new_order.order_date.isoformat() if new_order.order_date else None
+            },
+            aggregate_type="order",
+            aggregate_id=new_order.id
+        )
+        
+        # Store the response for replays in the same transaction as the order
+        if idempotency_record is not None:
+            idempotency_service.complete(db, idempotency_record, order_response.dict())
+        
+        # Commit everything
+        db.commit()
+        checkout_pricing.invalidate(user_id, user_market, cart_version, request.delivery_city)
+        outbox_dispatcher.notify()
+        
+        return order_response
     
     except HTTPException:
         db.rollback()
+        if idempotency_record is not None:
+            idempotency_service.abandon(db, idempotency_record)
         raise
     except Exception as e:
         db.rollback()
+        if idempotency_record is not None:
+            idempotency_service.abandon(db, idempotency_record)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create order: {str(e)}"
@@ -371,14 +548,22 @@ async def create_order(
         db.close()
 
 
-@router.get("", response_model=List[OrderResponse])
+@router.get("", response_model=Union[List[OrderResponse], OrderSummaryPage])
 async def get_user_orders(
     current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
     status_filter: Optional[str] = None,
-    limit: int = 20,
-    offset: int = 0
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = 0,
+    summary: bool = False,
+    cursor: Optional[str] = None
 ):
-    """Get all orders for the current user"""
+    """
+    Get all orders for the current user
+    
+    With `summary=true` returns a page of order headers with item count and
+    first-item thumbnail (no items loaded) plus `next_cursor`; pass it back
+    as `cursor` for the next page. Full item detail is on `/orders/{id}`.
+    """
     # ✅ NEW LOGIC: Get user's market from database
     user_market_from_token = Market(current_user.market.value) if current_user.market else Market.KG
     from ..db.market_db import db_manager
@@ -402,22 +587,30 @@ async def get_user_orders(
     db = SessionLocal()
     
     try:
-        query = db.query(Order).options(
-            joinedload(Order.order_items)
-        ).filter(
-            Order.user_id == current_user.user_id
-        )
-        
         # Filter by status if provided
+        order_status = None
         if status_filter:
             try:
                 order_status = OrderStatus[status_filter.upper()]
-                query = query.filter(Order.status == order_status)
             except KeyError:
                 pass  # Ignore invalid status
         
+        if summary:
+            return OrderSummaryPage(**get_order_summaries(
+                db, current_user.user_id, order_status, cursor=cursor, limit=limit, offset=offset
+            ))
+        
+        query = db.query(Order).options(
+            selectinload(Order.order_items)
+        ).filter(
+            Order.user_id == current_user.user_id
+        )
+        
+        if order_status is not None:
+            query = query.filter(Order.status == order_status)
+        
         # Order by most recent first
-        query = query.order_by(Order.order_date.desc())
+        query = query.order_by(Order.order_date.desc(), Order.id.desc())
         
         # Pagination
         orders = query.offset(offset).limit(limit).all()
@@ -432,6 +625,8 @@ async def get_user_orders(
                 delivery_address=order.delivery_address,
                 subtotal=order.subtotal,
                 shipping_cost=order.shipping_cost,
+                discount_amount=order.discount_amount or 0.0,
+                tax_amount=order.tax_amount or 0.0,
                 total_amount=order.total_amount,
                 currency=order.currency,
                 order_date=order.order_date,
@@ -455,6 +650,72 @@ async def get_user_orders(
         db.close()
 
 
+@router.get("/stream")
+async def stream_order_status_changes(
+    request: Request,
+    current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events stream of status changes of the current user's orders
+    
+    Each `order_status` event carries the order id, number, old and new
+    status; its SSE id is the status history id. Reconnect with the
+    `Last-Event-ID` header to receive changes missed while disconnected.
+    Comment heartbeats keep idle connections open.
+    """
+    # ✅ Get user's market from database
+    user_market_from_token = Market(current_user.market.value) if current_user.market else Market.KG
+    from ..db.market_db import db_manager
+    from ..models.users.user import User
+    
+    temp_session_factory = db_manager.get_session_factory(user_market_from_token)
+    temp_db = temp_session_factory()
+    user = temp_db.query(User).filter(User.id == current_user.user_id).first()
+    temp_db.close()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user_market = Market(user.market) if user.market else Market.KG
+    
+    # Subscribe before loading the replay so no change falls in between
+    try:
+        queue = order_status_broker.subscribe(user_market, current_user.user_id)
+    except StreamLimitExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open order streams, please retry later",
+            headers={"Retry-After": "5"}
+        )
+    
+    replay = []
+    if last_event_id is not None:
+        def load_replay():
+            with db_manager.get_session_factory(user_market)() as db:
+                return load_status_events_since(db, user_market, current_user.user_id, last_event_id)
+        try:
+            replay = await run_in_threadpool(load_replay)
+        except Exception:
+            order_status_broker.unsubscribe(user_market, current_user.user_id, queue)
+            raise
+    
+    return StreamingResponse(
+        stream_order_status(
+            request, queue, user_market, current_user.user_id, replay,
+            settings.order_stream.heartbeat_seconds
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order_detail(
     order_id: int,
@@ -506,6 +767,8 @@ async def get_order_detail(
             delivery_address=order.delivery_address,
             subtotal=order.subtotal,
             shipping_cost=order.shipping_cost,
+            discount_amount=order.discount_amount or 0.0,
+            tax_amount=order.tax_amount or 0.0,
             total_amount=order.total_amount,
             currency=order.currency,
             order_date=order.order_date,
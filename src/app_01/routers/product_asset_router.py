@@ -8,10 +8,11 @@ API endpoints for managing product images and videos with advanced features:
 - Get product media gallery
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from ..db import get_db
 from ..models.products.product_asset import ProductAsset
 from ..models.products.product import Product
@@ -60,13 +61,38 @@ class ProductGalleryResponse(BaseModel):
 
 
 class UploadProductAssetRequest(BaseModel):
-    """Upload product asset request"""
+    """Upload product asset request (the form fields next to the file)"""
     product_id: int
+    asset_type: str = "image"
     alt_text: Optional[str] = None
     order: int = 0
     is_primary: bool = False
 
 
+# The upload endpoint reads the body itself, so its form is documented here
+UPLOAD_FORM_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "product_id"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "product_id": {"type": "integer"},
+                        "asset_type": {"type": "string", "default": "image", "description": "Asset type: image or video"},
+                        "alt_text": {"type": "string"},
+                        "order": {"type": "integer", "default": 0},
+                        "is_primary": {"type": "boolean", "default": False}
+                    }
+                }
+            }
+        }
+    }
+}
+
+
 class UpdateProductAssetRequest(BaseModel):
     """Update product asset request"""
     alt_text: Optional[str] = None
@@ -79,22 +105,14 @@ class UpdateProductAssetRequest(BaseModel):
 # API ENDPOINTS
 # ========================
 
-@router.post("/upload", response_model=ProductAssetResponse)
-async def upload_product_asset(
-    file: UploadFile = File(...),
-    product_id: int = Form(...),
-    asset_type: str = Form("image", description="Asset type: image or video"),
-    alt_text: Optional[str] = Form(None),
-    order: int = Form(0),
-    is_primary: bool = Form(False),
-    db: Session = Depends(get_db)
-):
+@router.post("/upload", response_model=ProductAssetResponse, openapi_extra=UPLOAD_FORM_OPENAPI)
+async def upload_product_asset(request: Request, db: Session = Depends(get_db)):
     """
     Upload a product image or video
     
     **Features:**
-    - Automatically extracts image dimensions
-    - Tracks file size
+    - Automatically extracts image dimensions (from the header, no extra decode)
+    - Tracks file size (uploads over 10MB are rejected with 413 while they are received)
     - Can set as primary image
     - Supports alt text for SEO
     - Customizable display order
@@ -107,63 +125,57 @@ async def upload_product_asset(
     - `order`: Display order (0 = first)
     - `is_primary`: Set as primary product image
     """
+    # Stream the body to a temp file, refusing it as soon as it passes the size limit
+    fields, upload = await image_uploader.receive_upload(request)
     try:
+        try:
+            form = UploadProductAssetRequest.model_validate(fields)
+        except ValidationError as e:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+        
         # Verify product exists
-        product = db.query(Product).filter(Product.id == product_id).first()
+        product = db.query(Product).filter(Product.id == form.product_id).first()
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        # Upload file
-        url = await image_uploader.save_image(
-            file=file,
+        # Probe the header and process in one pass (removes the temp file)
+        stored = await image_uploader.save_spooled(
+            upload,
             category="products",
             resize_to="large",
-            optimize=True
+            optimize=True,
+            variants=form.asset_type == "image",
+            placeholder=form.asset_type == "image"
         )
-        
-        # Get file info
-        content = await file.read()
-        file_size = len(content)
-        
-        # Extract dimensions if image
-        width = None
-        height = None
-        if asset_type == "image":
-            try:
-                from PIL import Image
-                import io
-                img = Image.open(io.BytesIO(content))
-                width, height = img.size
-            except Exception as e:
-                logger.warning(f"Could not extract image dimensions: {e}")
+        url = stored.url
         
         # Create asset record
         asset = ProductAsset(
-            product_id=product_id,
+            product_id=form.product_id,
             url=url,
-            type=asset_type,
-            alt_text=alt_text or f"{product.title} - {asset_type}",
-            order=order,
-            is_primary=is_primary,
+            type=form.asset_type,
+            alt_text=form.alt_text or f"{product.title} - {form.asset_type}",
+            order=form.order,
+            is_primary=form.is_primary,
             is_active=True,
-            width=width,
-            height=height,
-            file_size=file_size
+            width=stored.width,
+            height=stored.height,
+            file_size=stored.file_size
         )
         
         db.add(asset)
         
         # If setting as primary, unset others
-        if is_primary:
+        if form.is_primary:
             db.query(ProductAsset).filter(
-                ProductAsset.product_id == product_id,
+                ProductAsset.product_id == form.product_id,
                 ProductAsset.id != asset.id
             ).update({"is_primary": False})
         
         db.commit()
         db.refresh(asset)
         
-        logger.info(f"✅ Uploaded {asset_type} for product {product_id}: {url}")
+        logger.info(f"✅ Uploaded {form.asset_type} for product {form.product_id}: {url}")
         
         return ProductAssetResponse(
             id=asset.id,
@@ -183,12 +195,14 @@ async def upload_product_asset(
             is_portrait=asset.is_portrait
         )
     
-    except HTTPException:
+    except (HTTPException, RequestValidationError):
         raise
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Failed to upload product asset: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        upload.discard()
 
 
 @router.get("/product/{product_id}/gallery", response_model=ProductGalleryResponse)
@@ -332,7 +346,7 @@ def delete_product_asset(
     
     **Two modes:**
     - `hard_delete=False` (default): Soft delete (deactivate, can be restored)
-    - `hard_delete=True`: Permanently delete from database and filesystem
+    - `hard_delete=True`: Permanently delete from database (the file is removed by the image GC)
     
     **Args:**
     - `asset_id`: Asset ID
@@ -343,11 +357,8 @@ def delete_product_asset(
         raise HTTPException(status_code=404, detail="Asset not found")
     
     if hard_delete:
-        # Delete file from filesystem
-        try:
-            image_uploader.delete_image(asset.url)
-        except Exception as e:
-            logger.warning(f"Could not delete file {asset.url}: {e}")
+        # Stored files are shared by content across rows and markets;
+        # services.image_gc removes the file once nothing references it
         
         # Delete from database
         db.delete(asset)
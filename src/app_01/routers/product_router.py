@@ -8,8 +8,13 @@ from ..schemas.product import (
     ProductSchema, ProductDetailSchema,
     BrandSchema, CategoryBreadcrumbSchema, SubcategoryBreadcrumbSchema,
     ProductImageSchema, SKUDetailSchema, ReviewSchema, BreadcrumbSchema,
-    SimilarProductSchema, ProductListItemSchema, ProductListResponse
+    SimilarProductSchema, ProductListItemSchema, ProductListResponse,
+    SKUAvailabilitySchema, SKUAvailabilityResponse
 )
+from ..core.config import settings
+from ..db.market_db import Market
+from ..services.stock_cache import stock_cache
+from ..utils.image_upload import image_uploader, srcset
 from sqlalchemy.orm import joinedload
 import math
 
@@ -73,6 +78,9 @@ def get_best_selling_products(
         elif product.assets and len(product.assets) > 0:
             main_image = product.assets[0].url
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -82,6 +90,10 @@ def get_best_selling_products(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -116,6 +128,9 @@ def get_featured_products(
             product.main_image or (product.assets[0].url if product.assets else None)
         )
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -125,6 +140,10 @@ def get_featured_products(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -157,6 +176,9 @@ def get_new_arrivals(
             product.main_image or (product.assets[0].url if product.assets else None)
         )
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -166,6 +188,10 @@ def get_new_arrivals(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -198,6 +224,9 @@ def get_trending_products(
             product.main_image or (product.assets[0].url if product.assets else None)
         )
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -207,6 +236,10 @@ def get_trending_products(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -240,6 +273,9 @@ def get_top_rated_products(
             product.main_image or (product.assets[0].url if product.assets else None)
         )
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -249,6 +285,10 @@ def get_top_rated_products(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -284,6 +324,9 @@ def get_on_sale_products(
             product.main_image or (product.assets[0].url if product.assets else None)
         )
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -293,6 +336,10 @@ def get_on_sale_products(
             original_price_min=original_price_min_val,
             discount_percent=discount_percent,
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             rating_avg=product.rating_avg,
             rating_count=product.rating_count,
             sold_count=product.sold_count,
@@ -479,6 +526,9 @@ def search_products(
             discount_percent = None
             in_stock = False
         
+        image_variants = image_uploader.variant_urls(main_image)
+        placeholder = image_uploader.placeholder(main_image)
+        
         product_list.append(ProductListItemSchema(
             id=product.id,
             title=product.title,
@@ -486,6 +536,10 @@ def search_products(
             brand_name=product.brand.name if product.brand else "Unknown",
             brand_slug=product.brand.slug if product.brand else "unknown",
             image=main_image,
+            image_variants=image_variants,
+            image_srcset=srcset(image_variants),
+            image_placeholder=placeholder.lqip,
+            image_color=placeholder.color,
             price_min=price_min,
             price_max=price_max,
             original_price_min=original_price_min,
@@ -506,6 +560,47 @@ def search_products(
     )
 
 
+@router.get("/skus/availability", response_model=SKUAvailabilityResponse)
+def get_skus_availability(
+    ids: str = Query(..., description="Comma-separated SKU ids, e.g. 12,15,31"),
+    market: Market = Market.KG,
+    db: Session = Depends(get_db)
+):
+    """
+    Current stock for specific SKUs (product page, cart)
+    
+    Served from the in-memory stock map; only SKUs not seen yet hit the DB.
+    Inactive SKUs are reported with stock 0.
+    """
+    try:
+        sku_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    if not sku_ids:
+        raise HTTPException(status_code=400, detail="At least one SKU id is required")
+    if len(sku_ids) > settings.stock_cache.max_ids_per_request:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.stock_cache.max_ids_per_request} SKU ids per request"
+        )
+    
+    availability = stock_cache.get_availability(db, market, sku_ids)
+    
+    items = []
+    not_found = []
+    for sku_id in dict.fromkeys(sku_ids):
+        entry = availability.get(sku_id)
+        if entry is None:
+            not_found.append(sku_id)
+            continue
+        stock, is_active = entry
+        stock = stock if is_active else 0
+        items.append(SKUAvailabilitySchema(sku_id=sku_id, stock=stock, in_stock=stock > 0))
+    
+    return SKUAvailabilityResponse(items=items, not_found=not_found)
+
+
 @router.get("/products/{slug}", response_model=ProductDetailSchema)
 def get_product_detail(slug: str, db: Session = Depends(get_db)):
     """
@@ -589,6 +684,11 @@ def get_product_detail(slug: str, db: Session = Depends(get_db)):
             for asset in sorted(product.assets, key=lambda x: x.order)
         ]
     
+    # Responsive variants of uploaded images
+    for image in images:
+        image.variants = image_uploader.variant_urls(image.url)
+        image.srcset = srcset(image.variants)
+    
     # Build SKUs list
     skus = [
         SKUDetailSchema(
@@ -599,7 +699,9 @@ def get_product_detail(slug: str, db: Session = Depends(get_db)):
             price=sku.price,
             original_price=sku.original_price,
             stock=sku.stock,
-            variant_image=sku.variant_image  # Include variant image
+            variant_image=sku.variant_image,  # Include variant image
+            variant_image_placeholder=image_uploader.placeholder(sku.variant_image).lqip,
+            variant_image_color=image_uploader.placeholder(sku.variant_image).color
         )
         for sku in product.skus
     ]
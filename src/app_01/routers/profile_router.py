@@ -3,7 +3,8 @@ Profile Router - Complete user profile management
 Handles addresses, payment methods, orders, and notifications
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..db.market_db import get_db, Market
@@ -15,6 +16,7 @@ from ..models.orders.order import Order, OrderStatus
 from ..models.orders.order_item import OrderItem
 from ..routers.auth_router import get_current_user_from_token
 from ..schemas.auth import VerifyTokenResponse
+from ..services.order_history import get_order_summaries
 from pydantic import BaseModel
 import logging
 
@@ -517,57 +519,57 @@ def delete_payment_method(
 @router.get("/orders")
 def get_user_orders(
     status_filter: Optional[str] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: VerifyTokenResponse = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
-    """Get all user orders"""
+    """
+    Get user orders (summary: header, item count, first-item thumbnail)
+    
+    Pass `next_cursor` from the response as `cursor` to fetch the next page.
+    Full item detail is available on `/profile/orders/{order_id}`.
+    """
     try:
-        query = db.query(Order).filter(Order.user_id == current_user.user_id)
-        
-        # Filter by status if provided
+        order_status = None
         if status_filter:
-            query = query.filter(Order.status == status_filter)
-        
-        # Get total count
-        total = query.count()
-        
-        # Get orders with pagination
-        orders = query.order_by(Order.created_at.desc()).limit(limit).offset(offset).all()
+            try:
+                order_status = OrderStatus[status_filter.upper()]
+            except KeyError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid order status: {status_filter}"
+                )
+        
+        # Get total count (index-only on user_id/status)
+        count_query = db.query(func.count(Order.id)).filter(Order.user_id == current_user.user_id)
+        if order_status is not None:
+            count_query = count_query.filter(Order.status == order_status)
+        total = count_query.scalar()
+        
+        page = get_order_summaries(
+            db, current_user.user_id, order_status, cursor=cursor, limit=limit, offset=offset
+        )
         
-        result_orders = []
-        for order in orders:
-            # Get order items
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            result_orders.append({
-                "id": order.id,
-                "order_number": order.order_number,
-                "status": order.status.value if isinstance(order.status, OrderStatus) else order.status,
-                "total_amount": order.total_amount,
-                "currency": order.currency,
-                "order_date": order.order_date.isoformat() if order.order_date else None,
-                "delivery_date": order.delivered_date.isoformat() if order.delivered_date else None,
-                "delivery_address": order.delivery_address,
-                "items_count": len(items),
-                "items": [
-                    {
-                        "product_name": item.product_name,
-                        "quantity": item.quantity,
-                        "price": item.price_at_purchase,
-                        "image_url": item.product_image_url if hasattr(item, 'product_image_url') else None
-                    }
-                    for item in items[:3]  # Show first 3 items
-                ]
-            })
+        result_orders = [
+            {
+                **order,
+                "order_date": order["order_date"].isoformat() if order["order_date"] else None,
+                "delivery_date": order["delivery_date"].isoformat() if order["delivery_date"] else None,
+            }
+            for order in page["orders"]
+        ]
         
         return {
             "success": True,
             "orders": result_orders,
             "total": total,
-            "has_more": (offset + limit) < total
+            "has_more": page["has_more"],
+            "next_cursor": page["next_cursor"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching orders for user {current_user.user_id}: {e}")
         raise HTTPException(
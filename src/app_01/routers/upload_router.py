@@ -71,7 +71,9 @@ async def upload_image(
             file=file,
             category=category,
             resize_to=resize_to if resize_to != "null" else None,
-            optimize=optimize
+            optimize=optimize,
+            variants=category == "products",
+            placeholder=category in ("products", "banners")
         )
         
         logger.info(f"✅ Image uploaded successfully: {url}")
@@ -149,16 +151,20 @@ async def delete_image(url: str):
     """
     Delete an uploaded image
     
+    Files are shared by every product, SKU or market that uploaded the same
+    image, so the file itself is removed by the image GC once no row
+    references it.
+    
     **Args:**
     - `url`: Image URL (e.g., /uploads/categories/abc123.jpg)
     
     **Returns:**
-    Success message if deleted, error if not found.
+    Success message if released, error if not found.
     """
     try:
-        deleted = image_uploader.delete_image(url)
+        released = image_uploader.release_image(url)
         
-        if deleted:
+        if released:
             return {"success": True, "message": "Image deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Image not found")
@@ -168,4 +174,3 @@ async def delete_image(url: str):
     except Exception as e:
         logger.error(f"❌ Image deletion failed: {e}")
         raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
-
@@ -67,6 +67,10 @@ class BannerResponse(BaseModel):
     end_date: Optional[datetime]
     created_at: datetime
     updated_at: Optional[datetime]
+    image_placeholder: Optional[str] = None  # Tiny inline WebP data URI of image_url
+    image_color: Optional[str] = None  # Dominant color (#rrggbb) of image_url
+    mobile_image_placeholder: Optional[str] = None
+    mobile_image_color: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class CartItemSchema(BaseModel):
@@ -41,3 +41,24 @@ class UpdateCartItemRequest(BaseModel):
 
 class ClearCartRequest(BaseModel):
     user_id: int
+
+
+class GuestCartItemSchema(BaseModel):
+    sku_id: int
+    quantity: int
+    name: str
+    price: float
+    image: str
+    size: Optional[str] = None
+    color: Optional[str] = None
+    stock: int
+    available: bool
+
+class GuestCartSchema(BaseModel):
+    items: List[GuestCartItemSchema]
+    total_items: int
+    total_price: float
+
+class GuestCartItemRequest(BaseModel):
+    sku_id: int
+    quantity: int = Field(default=1, ge=1)
@@ -76,6 +76,8 @@ class ProductImageSchema(BaseModel):
     alt_text: Optional[str] = None
     type: str
     order: int
+    variants: Optional[Dict[str, Dict[int, str]]] = None  # {format: {width: url}} for responsive images
+    srcset: Optional[str] = None  # WebP srcset
 
     class Config:
         from_attributes = True
@@ -91,11 +93,26 @@ class SKUDetailSchema(BaseModel):
     original_price: Optional[float] = None
     stock: int
     variant_image: Optional[str] = None  # Image specific to this variant (e.g., black color photo)
+    variant_image_placeholder: Optional[str] = None  # Tiny inline WebP data URI of variant_image
+    variant_image_color: Optional[str] = None  # Dominant color (#rrggbb) of variant_image
 
     class Config:
         from_attributes = True
 
 
+class SKUAvailabilitySchema(BaseModel):
+    """Current stock of one SKU"""
+    sku_id: int
+    stock: int
+    in_stock: bool
+
+
+class SKUAvailabilityResponse(BaseModel):
+    """Stock of several SKUs; unknown ids are listed in not_found"""
+    items: List[SKUAvailabilitySchema]
+    not_found: List[int] = []
+
+
 class ReviewSchema(BaseModel):
     """Product review"""
     id: int
@@ -189,6 +206,10 @@ class ProductListItemSchema(BaseModel):
     
     # Main image
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, Dict[int, str]]] = None  # {format: {width: url}} for responsive images
+    image_srcset: Optional[str] = None  # WebP srcset
+    image_placeholder: Optional[str] = None  # Tiny inline WebP data URI, shown blurred until the image loads
+    image_color: Optional[str] = None  # Dominant color (#rrggbb) for the empty box
     
     # Rating & popularity
     rating_avg: float = 0.0
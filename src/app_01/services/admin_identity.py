@@ -0,0 +1,149 @@
+"""
+Admin Identity Cache
+Verified SQLAdmin identities per login session, so auth and permission checks skip the DB
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+import threading
+import time
+
+from ..core.config import settings
+from ..db.market_db import Market
+from ..models.admins.admin import Admin
+
+SESSION_CHANGES_KEY = "admin_identity_changes"
+
+# Admin columns whose change must take effect on the admin's next request
+SECURITY_COLUMNS = ("is_active", "is_super_admin", "admin_role", "permissions", "market")
+
+
+def _as_market(market) -> Optional[Market]:
+    if isinstance(market, Market) or market is None:
+        return market
+    return Market(market)
+
+
+class AdminIdentity(NamedTuple):
+    """The parts of an Admin row that auth and permission checks read"""
+    id: int
+    username: Optional[str]
+    db_market: Market  # Database the row was loaded from
+    market: Market  # Admin's assigned market (Admin.market)
+    is_active: bool
+    is_super_admin: bool
+    admin_role: Optional[str]
+    permissions: Optional[str]
+
+    @classmethod
+    def from_admin(cls, admin: Admin, db_market: Market) -> "AdminIdentity":
+        permissions = admin.permissions if isinstance(admin.permissions, str) else None
+        return cls(
+            id=admin.id,
+            username=admin.username,
+            db_market=db_market,
+            market=Market(admin.market) if admin.market in ("kg", "us") else Market.KG,
+            is_active=bool(admin.is_active),
+            is_super_admin=bool(admin.is_super_admin),
+            admin_role=admin.admin_role,
+            permissions=permissions,
+        )
+
+    def has_permission(self, permission: str) -> bool:
+        """Same rule as Admin.has_permission"""
+        if not self.permissions:
+            return False
+        return permission in self.permissions.split(",")
+
+
+class AdminIdentityCache:
+    """
+    Admin identities keyed by login session (session token + admin id), kept
+    for a short TTL.
+
+    Committed changes to an admin's activity, role, permissions or market
+    drop their entries in this worker at once (session hooks below); other
+    workers pick the change up when the TTL runs out.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, int], Tuple[float, AdminIdentity]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: Optional[str], admin_id, db_market: Market) -> Optional[AdminIdentity]:
+        """Cached identity of the session, if fresh and loaded from ``db_market``"""
+        if not token or self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get((token, admin_id))
+        if entry is None:
+            return None
+        stored_at, identity = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            with self._lock:
+                self._entries.pop((token, admin_id), None)
+            return None
+        return identity if identity.db_market == db_market else None
+
+    def put(self, token: Optional[str], identity: AdminIdentity) -> None:
+        if not token or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[(token, identity.id)] = (time.monotonic(), identity)
+
+    def invalidate_session(self, token: Optional[str]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == token]:
+                del self._entries[key]
+
+    def invalidate_admin(self, admin_id: int, db_market: Optional[Market] = None) -> None:
+        """Drop every session of the admin (in ``db_market``, or in any market if None)"""
+        with self._lock:
+            for key, (_, identity) in list(self._entries.items()):
+                if identity.id == admin_id and (db_market is None or identity.db_market == db_market):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ==================== Write hooks ====================
+
+@event.listens_for(Session, "after_flush")
+def _collect_admin_changes(session: Session, flush_context) -> None:
+    """Remember admins whose access changed; their cached identities are dropped on commit"""
+    changed = session.info.setdefault(SESSION_CHANGES_KEY, set())
+    for obj in session.dirty:
+        if not isinstance(obj, Admin):
+            continue
+        attrs = inspect(obj).attrs
+        if any(attrs[column].history.has_changes() for column in SECURITY_COLUMNS):
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Admin):
+            changed.add(obj.id)
+    if not changed:
+        session.info.pop(SESSION_CHANGES_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_admins(session: Session) -> None:
+    changed = session.info.pop(SESSION_CHANGES_KEY, None)
+    if not changed:
+        return
+    # Sessions not opened through db_manager don't know their market: drop the id everywhere
+    market = _as_market(session.info.get("market"))
+    for admin_id in changed:
+        admin_identities.invalidate_admin(admin_id, market)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_admin_changes(session: Session) -> None:
+    session.info.pop(SESSION_CHANGES_KEY, None)
+
+
+# Global cache instance
+admin_identities = AdminIdentityCache(ttl_seconds=settings.admin_auth.identity_ttl_seconds)
@@ -0,0 +1,189 @@
+"""
+Admin Log Writer
+Buffered AdminLog inserts: admin actions are queued and written in batches by a background task
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import logging
+import threading
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.admins.admin_log import AdminLog
+
+logger = logging.getLogger(__name__)
+
+LOG_FIELDS = ("admin_id", "action", "entity_type", "entity_id", "description", "ip_address", "user_agent")
+
+
+def _as_market(market) -> Optional[Market]:
+    if isinstance(market, Market) or market is None:
+        return market
+    return Market(market)
+
+
+class AdminLogWriter:
+    """
+    Bulk writer for ``admin_logs``.
+
+    ``write`` only appends the record to a bounded in-memory queue; the
+    background task inserts queued records per market in one statement when
+    ``batch_size`` records are waiting, every ``flush_interval_seconds`` and
+    on shutdown. A full queue drops the record and counts it in ``dropped``.
+
+    Until ``start`` is called (tests, scripts) ``write`` inserts and commits
+    through the caller's session instead.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval_seconds: float = 2.0, max_queue: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @staticmethod
+    def _record(market: Market, fields: Dict[str, Any]) -> Tuple[Market, Dict[str, Any]]:
+        row = {field: fields.get(field) for field in LOG_FIELDS}
+        # Time of the action, not of the batch insert
+        row["created_at"] = datetime.now(timezone.utc)
+        return market, row
+
+    def write(self, db: Optional[Session], market: Optional[Market] = None, **fields) -> bool:
+        """
+        Log one admin action (fields as on AdminLog). Returns False if the record was dropped.
+
+        ``market`` defaults to the market of ``db``; otherwise ``db`` is only used
+        by the synchronous fallback when the writer is not running.
+        """
+        if market is None:
+            market = _as_market(db.info.get("market")) if db is not None else None
+            market = market or Market.KG
+        if not self.running:
+            if db is None:
+                db = next(db_manager.get_db_session(market))
+                try:
+                    return self._write_now(db, fields)
+                finally:
+                    db.close()
+            return self._write_now(db, fields)
+
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                logger.warning(f"⚠️  Admin log queue full ({self.max_queue}), dropped {fields.get('action')} by admin {fields.get('admin_id')}")
+                return False
+            self._queue.append(self._record(market, fields))
+            full_batch = len(self._queue) >= self.batch_size
+        if full_batch:
+            # write() may run in a worker thread: wake the flush task through its loop
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def _write_now(self, db: Session, fields: Dict[str, Any]) -> bool:
+        try:
+            db.add(AdminLog(**{field: fields.get(field) for field in LOG_FIELDS}))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to log admin action: {e}")
+            db.rollback()
+            self.failed += 1
+            return False
+        self.written += 1
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _take(self) -> List[Tuple[Market, Dict[str, Any]]]:
+        with self._lock:
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """Insert one batch of queued records, one statement per market. Returns records written."""
+        batch = self._take()
+        by_market: Dict[Market, List[Dict[str, Any]]] = defaultdict(list)
+        for market, row in batch:
+            by_market[market].append(row)
+
+        written = 0
+        for market, rows in by_market.items():
+            try:
+                db = next(db_manager.get_db_session(market))
+                try:
+                    db.execute(AdminLog.__table__.insert(), rows)
+                    db.commit()
+                finally:
+                    db.close()
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"❌ Failed to write {len(rows)} admin logs for {market.value.upper()}: {e}")
+                continue
+            written += len(rows)
+        self.written += written
+        return written
+
+    def flush_all(self) -> int:
+        """Flush until the queue is empty"""
+        total = 0
+        while self.pending():
+            total += self.flush()
+        return total
+
+    async def _run(self) -> None:
+        """Background loop: flush on a full batch or every interval"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await run_in_threadpool(self.flush_all)
+            except Exception as e:
+                logger.error(f"❌ Admin log flush failed: {e}")
+
+    def start(self) -> None:
+        """Start the flush loop (call from the app's event loop)"""
+        if not self.running:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Admin log writer started (batches of {self.batch_size}, every {self.flush_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write what is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.pending():
+            await run_in_threadpool(self.flush_all)
+
+
+# Global writer instance
+admin_log_writer = AdminLogWriter(
+    batch_size=settings.admin_log.batch_size,
+    flush_interval_seconds=settings.admin_log.flush_interval_seconds,
+    max_queue=settings.admin_log.max_queue
+)
@@ -0,0 +1,252 @@
+"""
+Analytics Rollup
+Hourly per-market order rollups behind /admin/analytics, refreshed by a background job
+"""
+
+from typing import Dict, Iterable, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import argparse
+import asyncio
+import logging
+import time
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market, get_market_config
+from ..models.orders.order import Order, OrderStatus
+from ..models.orders.order_item import OrderItem
+from ..models.admins.order_management.order_hourly_rollup import OrderHourlyRollup
+
+logger = logging.getLogger(__name__)
+
+# Hours rebuilt per statement when refreshing scattered hours
+HOUR_CHUNK = 100
+# Columns a rebuild overwrites on an existing (market, hour) row
+ROLLUP_COLUMNS = (
+    "local_date", "day_of_week", "orders_count", "items_count", "revenue",
+    "cancelled_count", "delivered_count", "sales_total", "refreshed_at",
+)
+
+
+def _utc(value: datetime) -> datetime:
+    """Stored naive datetimes are UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def hour_start(value: datetime) -> datetime:
+    return _utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+class HourlyRollupJob:
+    """
+    Keeps ``order_hourly_rollups`` in sync with the orders table.
+
+    Each refresh finds the hours touched by orders placed or updated since
+    the last run (``orders.updated_at`` moves on every status change) and
+    rebuilds just those hours. The first run for a market, or a backfill,
+    rebuilds everything from the orders table.
+
+    Rows are upserted on (market, hour), and rows a rebuild did not write
+    (hours left without orders) are deleted afterwards, so refreshes running
+    at the same time in several workers never collide on the unique key.
+    """
+
+    def __init__(self, interval_seconds: float = 300.0, overlap_seconds: float = 300.0):
+        self.interval_seconds = interval_seconds
+        self.overlap_seconds = overlap_seconds
+        self._watermarks: Dict[Market, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _aggregate(self, db: Session, market: Market, condition=None) -> Dict[datetime, dict]:
+        """Stream matching orders and sum them into UTC hour buckets"""
+        items = select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(
+            OrderItem.order_id == Order.id
+        ).scalar_subquery()
+        query = db.query(Order.order_date, Order.status, Order.total_amount, items)
+        if condition is not None:
+            query = query.filter(condition)
+
+        buckets: Dict[datetime, dict] = {}
+        for order_date, status, total_amount, items_count in query.yield_per(1000):
+            if order_date is None:
+                continue
+            bucket = buckets.setdefault(hour_start(order_date), {
+                "orders_count": 0, "items_count": 0, "revenue": 0.0,
+                "cancelled_count": 0, "delivered_count": 0, "sales_total": 0.0,
+            })
+            amount = total_amount or 0.0
+            bucket["orders_count"] += 1
+            bucket["items_count"] += items_count or 0
+            if status == OrderStatus.CANCELLED:
+                bucket["cancelled_count"] += 1
+            else:
+                bucket["revenue"] += amount
+            if status == OrderStatus.DELIVERED:
+                bucket["delivered_count"] += 1
+                bucket["sales_total"] += amount
+        return buckets
+
+    def _write(self, db: Session, market: Market, buckets: Dict[datetime, dict], refreshed_at: datetime) -> None:
+        """Upsert the buckets' rows with one ``INSERT ... ON CONFLICT (market, hour) DO UPDATE``"""
+        tz = ZoneInfo(get_market_config(market)["timezone"])
+        rows = []
+        for hour, counters in buckets.items():
+            local = hour.astimezone(tz)
+            rows.append(dict(
+                market=market.value, hour=hour, local_date=local.date(), day_of_week=local.weekday(),
+                refreshed_at=refreshed_at, **counters
+            ))
+        if not rows:
+            return
+
+        table = OrderHourlyRollup.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+            db.execute(insert.on_conflict_do_update(
+                index_elements=[table.c.market, table.c.hour],
+                set_={column: insert.excluded[column] for column in ROLLUP_COLUMNS}
+            ), rows)
+            return
+
+        # Dialects without ON CONFLICT: update, then insert the hours that had no row
+        for row in rows:
+            result = db.execute(table.update().where(
+                table.c.market == row["market"], table.c.hour == row["hour"]
+            ).values({column: row[column] for column in ROLLUP_COLUMNS}))
+            if not result.rowcount:
+                db.execute(table.insert().values(row))
+
+    def rebuild_hours(self, db: Session, market: Market, hours: Iterable[datetime], refreshed_at: datetime) -> int:
+        """Rebuild the rollup rows of the given UTC hours (no commit). Returns rows written."""
+        hours = sorted({hour_start(hour) for hour in hours})
+        written = 0
+        for i in range(0, len(hours), HOUR_CHUNK):
+            chunk = hours[i:i + HOUR_CHUNK]
+            buckets = self._aggregate(db, market, or_(*[
+                and_(Order.order_date >= hour, Order.order_date < hour + timedelta(hours=1)) for hour in chunk
+            ]))
+            self._write(db, market, buckets, refreshed_at)
+            # Hours of the chunk that no longer have orders
+            db.query(OrderHourlyRollup).filter(
+                OrderHourlyRollup.market == market.value,
+                OrderHourlyRollup.hour.in_(chunk),
+                OrderHourlyRollup.refreshed_at < refreshed_at
+            ).delete(synchronize_session=False)
+            written += len(buckets)
+        return written
+
+    def rebuild_all(self, db: Session, market: Market, since: Optional[date] = None) -> int:
+        """Rebuild every hour (from ``since``, a UTC day) of the market (no commit)"""
+        refreshed_at = datetime.now(timezone.utc)
+        stale = db.query(OrderHourlyRollup).filter(
+            OrderHourlyRollup.market == market.value,
+            OrderHourlyRollup.refreshed_at < refreshed_at
+        )
+        condition = None
+        if since is not None:
+            start = datetime.combine(since, datetime.min.time(), timezone.utc)
+            stale = stale.filter(OrderHourlyRollup.hour >= start)
+            condition = Order.order_date >= start
+        buckets = self._aggregate(db, market, condition)
+        self._write(db, market, buckets, refreshed_at)
+        stale.delete(synchronize_session=False)
+        self._watermarks[market] = refreshed_at
+        return len(buckets)
+
+    def refresh(self, db: Session, market: Market) -> int:
+        """Rebuild the hours touched since the last refresh (no commit). Returns rows written."""
+        started = datetime.now(timezone.utc)
+        watermark = self._watermarks.get(market)
+        if watermark is None:
+            watermark = db.query(func.max(OrderHourlyRollup.refreshed_at)).filter(
+                OrderHourlyRollup.market == market.value
+            ).scalar()
+        if watermark is None:
+            return self.rebuild_all(db, market)
+
+        # Overlap covers commits that were in flight and clock skew with the DB's updated_at
+        since = _utc(watermark) - timedelta(seconds=self.overlap_seconds)
+        touched = db.query(Order.order_date).filter(
+            or_(Order.order_date >= since, Order.updated_at >= since)
+        ).yield_per(1000)
+        hours = {hour_start(order_date) for (order_date,) in touched if order_date is not None}
+        written = self.rebuild_hours(db, market, hours, started) if hours else 0
+        self._watermarks[market] = started
+        return written
+
+    def refresh_market(self, market: Market) -> int:
+        session_factory = db_manager.get_session_factory(market)
+        with session_factory() as db:
+            written = self.refresh(db, market)
+            db.commit()
+            return written
+
+    async def _run(self) -> None:
+        """Background loop: refresh every market each interval"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            for market in Market:
+                try:
+                    await run_in_threadpool(self.refresh_market, market)
+                except Exception as e:
+                    self._watermarks.pop(market, None)
+                    logger.error(f"❌ Hourly rollup refresh failed for {market.value.upper()}: {e}")
+
+    def start(self) -> None:
+        """Start the refresh loop (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Hourly order rollup started (every {self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global job instance
+analytics_rollup = HourlyRollupJob(
+    interval_seconds=settings.analytics_rollup.interval_seconds,
+    overlap_seconds=settings.analytics_rollup.overlap_seconds
+)
+
+
+def main():
+    """Standalone entry point: refresh once, keep refreshing with --loop, or rebuild with --rebuild"""
+    parser = argparse.ArgumentParser(description="Maintain order_hourly_rollups from the orders table")
+    parser.add_argument("--market", choices=[market.value for market in Market], help="Only this market (default: all)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild history instead of refreshing changed hours")
+    parser.add_argument("--since", type=date.fromisoformat, help="With --rebuild: first UTC day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--loop", action="store_true", help="Keep refreshing every interval")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    markets: List[Market] = [Market(args.market)] if args.market else list(Market)
+    while True:
+        for market in markets:
+            try:
+                if args.rebuild:
+                    with db_manager.get_session_factory(market)() as db:
+                        written = analytics_rollup.rebuild_all(db, market, args.since)
+                        db.commit()
+                else:
+                    written = analytics_rollup.refresh_market(market)
+                logger.info(f"✅ {written} hourly rollups written for {market.value.upper()}")
+            except Exception as e:
+                logger.error(f"❌ Hourly rollup failed for {market.value.upper()}: {e}")
+        if not args.loop or args.rebuild:
+            break
+        time.sleep(analytics_rollup.interval_seconds)
+
+
+if __name__ == "__main__":
+    main()
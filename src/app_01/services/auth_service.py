@@ -9,7 +9,6 @@ from sqlalchemy.orm import Session
 import secrets
 import jwt
 import logging
-import os
 
 from ..db import (
     db_manager, Market, MarketConfig, detect_market_from_phone, 
@@ -23,43 +22,21 @@ from ..schemas.auth import (
     UserSchema, MarketEnum
 )
 from ..models.admins.admin import Admin
+from ..core.config import settings
+from ..core.rate_limit import rate_limiter
+from .token_verification import VerifiedToken, verified_tokens, token_revocations
+from .sms_provider import sms_gateway
 import bcrypt
-
-
-
-# Twilio imports
-try:
-    from twilio.rest import Client
-    from twilio.base.exceptions import TwilioException
-    TWILIO_AVAILABLE = True
-except ImportError:
-    TWILIO_AVAILABLE = False
-    TwilioException = Exception
+import math
+import time
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-here"  # Should be in environment variables
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Rate limiting configuration
-MAX_VERIFICATION_ATTEMPTS = 3
-VERIFICATION_ATTEMPTS_WINDOW = 15  # minutes
-
-# Twilio Configuration
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_VERIFY_SERVICE_SID = os.getenv("TWILIO_VERIFY_SERVICE_SID")
-
-# Initialize Twilio client
-TWILIO_READY = False
-twilio_client = None
-
-if TWILIO_AVAILABLE and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_VERIFY_SERVICE_SID:
-    try:
-        twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        TWILIO_READY = True
-    except Exception as e:
-        logging.warning(f"Twilio client initialization failed: {e}")
+# SMS provider configured (Twilio Verify, or the fake provider); otherwise codes are local
+TWILIO_READY = sms_gateway.ready
 
 logger = logging.getLogger(__name__)
 
@@ -97,9 +74,9 @@ class AuthService:
     """Authentication service for phone number authentication"""
     
     def __init__(self):
-        self.rate_limit_store = {}  # In production, use Redis
+        self.rate_limiter = rate_limiter
     
-    def send_verification_code(self, request: PhoneLoginRequest, x_market: Optional[str] = None) -> SendCodeResponse:
+    async def send_verification_code(self, request: PhoneLoginRequest, x_market: Optional[str] = None) -> SendCodeResponse:
         """
         Send SMS verification code to phone number
         
@@ -131,36 +108,34 @@ class AuthService:
             # Get market configuration
             config = get_market_config(market)
             
-            # Get user model and session for this market
-            user_model = get_user_model(market)
-            session_factory = db_manager.get_session_factory(market)
+            # Send SMS via the provider (Twilio Verify generates and stores the code);
+            # no DB session is held while waiting on it
+            formatted_phone = format_phone_for_market(request.phone, market)
+            sms_sent = await self._send_sms_via_twilio_verify(request.phone)
             
-            with session_factory() as db:
-                # Check if user exists
-                user = user_model.get_by_phone(db, request.phone)
-                
-                # Send SMS via Twilio Verify (Twilio generates and stores the code)
-                formatted_phone = format_phone_for_market(request.phone, market)
-                sms_sent = self._send_sms_via_twilio_verify(request.phone)
+            if not sms_sent:
+                # Provider not configured, failing or busy: create local verification
+                user_model = get_user_model(market)
+                session_factory = db_manager.get_session_factory(market)
                 
-                if not sms_sent:
-                    # If Twilio fails, create local verification for demo
+                with session_factory() as db:
+                    user = user_model.get_by_phone(db, request.phone)
                     verification = create_verification_for_market(db, request.phone, user.id if user else None)
-                    logger.warning(f"Twilio Verify failed. Demo code for {formatted_phone}: {verification.verification_code}")
-                else:
-                    logger.info(f"✅ SMS sent to {formatted_phone} via Twilio Verify")
-                
-                # Update rate limiting
-                self._update_rate_limit(request.phone)
-                
-                return SendCodeResponse(
-                    success=True,
-                    message="Verification code sent successfully",
-                    phone_number=formatted_phone,
-                    market=market.value,
-                    language=config["default_language"],
-                    expires_in_minutes=10 if market == Market.KG else 15
-                )
+                    logger.warning(f"SMS provider unavailable. Demo code for {formatted_phone}: {verification.verification_code}")
+            else:
+                logger.info(f"✅ SMS sent to {formatted_phone} via {sms_gateway.name}")
+            
+            # Update rate limiting
+            self._update_rate_limit(request.phone)
+            
+            return SendCodeResponse(
+                success=True,
+                message="Verification code sent successfully",
+                phone_number=formatted_phone,
+                market=market.value,
+                language=config["default_language"],
+                expires_in_minutes=10 if market == Market.KG else 15
+            )
         
         except ValueError as e:
             logger.error(f"Phone validation error: {e}")
@@ -169,7 +144,7 @@ class AuthService:
             logger.error(f"Failed to send verification code: {e}")
             raise RuntimeError(f"Failed to send verification code: {str(e)}")
     
-    def verify_phone_code(self, request: VerifyCodeRequest, x_market: Optional[str] = None) -> VerifyCodeResponse:
+    async def verify_phone_code(self, request: VerifyCodeRequest, x_market: Optional[str] = None) -> VerifyCodeResponse:
         """
         Verify phone number with SMS code
         
@@ -199,19 +174,17 @@ class AuthService:
             user_model = get_user_model(market)
             session_factory = db_manager.get_session_factory(market)
             
+            # Codes issued locally (demo mode, or while the provider was unavailable)
+            with session_factory() as db:
+                code_valid = verify_code_for_market(db, request.phone, request.verification_code) is not None
+            
+            if not code_valid and TWILIO_READY:
+                # Codes sent by the provider are checked by the provider
+                code_valid = await self._verify_code_via_twilio_verify(request.phone, request.verification_code)
+            if not code_valid:
+                raise ValueError("Invalid or expired verification code")
+            
             with session_factory() as db:
-                # Verify the code via Twilio Verify
-                if TWILIO_READY:
-                    # Using Twilio Verify - codes are checked by Twilio
-                    code_valid = self._verify_code_via_twilio_verify(request.phone, request.verification_code)
-                    if not code_valid:
-                        raise ValueError("Invalid or expired verification code")
-                else:
-                    # Demo mode - check local database
-                    verification = verify_code_for_market(db, request.phone, request.verification_code)
-                    if not verification:
-                        raise ValueError("Invalid or expired verification code")
-                
                 # Check if user exists
                 user = user_model.get_by_phone(db, request.phone)
                 is_new_user = False
@@ -422,6 +395,11 @@ class AuthService:
         """
         Verify JWT access token
         
+        A token is decoded and its user loaded once per worker, then served
+        from the verified token cache for the token's lifetime and only
+        checked against the revocation set, which covers logout and
+        deactivated users.
+        
         Args:
             token: JWT access token
             
@@ -432,31 +410,14 @@ class AuthService:
             ValueError: If token is invalid
         """
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id: int = payload.get("sub")
-            market: str = payload.get("market")
-            
-            if user_id is None or market is None:
-                raise ValueError("Invalid token payload")
-            
-            # Get user to verify they still exist
-            market_enum = Market(market)
-            user_model = get_user_model(market_enum)
-            session_factory = db_manager.get_session_factory(market_enum)
+            verified = verified_tokens.get(token)
+            if verified is None:
+                verified = self._decode_access_token(token)
+                verified_tokens.put(token, verified)
             
-            with session_factory() as db:
-                user = db.query(user_model).filter(user_model.id == user_id).first()
-                if not user:
-                    raise ValueError("User not found")
-                
-                return VerifyTokenResponse(
-                    valid=True,
-                    user_id=user.id,
-                    phone_number=user.phone_number,
-                    formatted_phone=user.formatted_phone,
-                    market=user.market,
-                    currency=user.currency
-                )
+            if token_revocations.is_revoked(verified.market, verified.user_id, verified.issued_at):
+                raise ValueError("Token revoked")
+            return verified.identity.model_copy()
         
         except jwt.PyJWTError as e:
             logger.error(f"JWT validation error: {e}")
@@ -490,13 +451,46 @@ class AuthService:
         
         return markets
     
+    def _decode_access_token(self, token: str) -> VerifiedToken:
+        """Check the signature and expiry and build the token's identity"""
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id = payload.get("sub")
+        market: str = payload.get("market")
+        
+        if user_id is None or market is None:
+            raise ValueError("Invalid token payload")
+        
+        market_enum = Market(market)
+        # Get user to verify they still exist (cached with the token afterwards)
+        user_model = get_user_model(market_enum)
+        session_factory = db_manager.get_session_factory(market_enum)
+        
+        with session_factory() as db:
+            user = db.query(user_model).filter(user_model.id == user_id).first()
+            if not user:
+                raise ValueError("User not found")
+            
+            identity = VerifyTokenResponse(
+                valid=True,
+                user_id=user.id,
+                phone_number=user.phone_number,
+                formatted_phone=user.formatted_phone,
+                market=user.market,
+                currency=user.currency
+            )
+        
+        expires_at = float(payload["exp"])
+        issued_at = float(payload.get("iat", expires_at - ACCESS_TOKEN_EXPIRE_MINUTES * 60))
+        return VerifiedToken(identity, market_enum.value, int(user_id), issued_at, expires_at)
+    
     def _create_access_token(self, user_id: int, market: str) -> str:
         """Create JWT access token"""
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         to_encode = {
             "sub": str(user_id),
             "market": market,
-            "exp": expire
+            "exp": expire,
+            "iat": time.time()  # Fractional: a logout and re-login in the same second stay ordered
         }
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     
@@ -512,67 +506,43 @@ class AuthService:
         Returns:
             True if within rate limit, raises ValueError if exceeded
         """
-        current_time = datetime.utcnow()
-        window_start = current_time - timedelta(minutes=VERIFICATION_ATTEMPTS_WINDOW)
-        
-        # Clean old attempts
-        if phone_number in self.rate_limit_store:
-            self.rate_limit_store[phone_number] = [
-                attempt_time for attempt_time in self.rate_limit_store[phone_number]
-                if attempt_time > window_start
-            ]
-        else:
-            self.rate_limit_store[phone_number] = []
-        
-        # Check if limit exceeded
-        if len(self.rate_limit_store[phone_number]) >= MAX_VERIFICATION_ATTEMPTS:
-            raise ValueError(f"Too many verification attempts. Please wait {VERIFICATION_ATTEMPTS_WINDOW} minutes.")
+        result = self.rate_limiter.peek(
+            f"verification:{phone_number}",
+            settings.rate_limit.verification_limit,
+            settings.rate_limit.verification_window
+        )
+        if not result.allowed:
+            raise ValueError(f"Too many verification attempts. Please wait {math.ceil(result.retry_after / 60)} minutes.")
         
         return True
     
     def _update_rate_limit(self, phone_number: str) -> None:
-        """Update rate limit for phone number"""
-        current_time = datetime.utcnow()
-        
-        if phone_number not in self.rate_limit_store:
-            self.rate_limit_store[phone_number] = []
-        
-        self.rate_limit_store[phone_number].append(current_time)
+        """Count a code sent to phone number"""
+        self.rate_limiter.hit(
+            f"verification:{phone_number}",
+            settings.rate_limit.verification_limit,
+            settings.rate_limit.verification_window
+        )
     
-    def _send_sms_via_twilio_verify(self, phone: str) -> bool:
+    async def _send_sms_via_twilio_verify(self, phone: str) -> bool:
         """
-        Send SMS verification code via Twilio Verify
+        Send SMS verification code via the SMS provider (Twilio Verify)
         
         Args:
             phone: Phone number to send to
             
         Returns:
-            True if SMS sent successfully, False otherwise
+            True if SMS sent successfully, False if a local code is needed
         """
         if not TWILIO_READY:
-            logger.info(f"📱 Twilio not configured - running in demo mode for {phone}")
+            logger.info(f"📱 SMS provider not configured - running in demo mode for {phone}")
             return False
         
-        try:
-            # Send SMS using Twilio Verify API
-            verification = twilio_client.verify.v2.services(
-                TWILIO_VERIFY_SERVICE_SID
-            ).verifications.create(
-                to=phone,
-                channel='sms'
-            )
-            logger.info(f"✅ Twilio Verify SMS sent to {phone} - SID: {verification.sid}")
-            return True
-        except TwilioException as e:
-            logger.error(f"❌ Twilio Verify failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Unexpected error sending SMS: {e}")
-            return False
+        return await sms_gateway.send_code(phone)
     
-    def _verify_code_via_twilio_verify(self, phone: str, code: str) -> bool:
+    async def _verify_code_via_twilio_verify(self, phone: str, code: str) -> bool:
         """
-        Verify code via Twilio Verify
+        Verify code via the SMS provider (Twilio Verify)
         
         Args:
             phone: Phone number
@@ -582,31 +552,11 @@ class AuthService:
             True if code is valid, False otherwise
         """
         if not TWILIO_READY:
-            logger.info(f"📱 Twilio not configured - skipping Twilio verification for {phone}")
+            logger.info(f"📱 SMS provider not configured - skipping provider verification for {phone}")
             return False
         
-        try:
-            # Verify code using Twilio Verify API
-            logger.info(f"🔍 Checking code for {phone} with Twilio Verify...")
-            verification_check = twilio_client.verify.v2.services(
-                TWILIO_VERIFY_SERVICE_SID
-            ).verification_checks.create(
-                to=phone,
-                code=code
-            )
-            is_approved = verification_check.status == 'approved'
-            if is_approved:
-                logger.info(f"✅ Twilio Verify code APPROVED for {phone}")
-            else:
-                logger.warning(f"❌ Twilio Verify code REJECTED for {phone}: Status={verification_check.status}")
-            return is_approved
-        except TwilioException as e:
-            logger.error(f"❌ Twilio Verify check FAILED for {phone}: {type(e).__name__}: {e}")
-            # Important: return False, don't raise - let the caller handle it
-            return False
-        except Exception as e:
-            logger.error(f"❌ Unexpected error verifying code for {phone}: {type(e).__name__}: {e}")
-            return False
+        logger.info(f"🔍 Checking code for {phone} with {sms_gateway.name}...")
+        return await sms_gateway.check_code(phone, code)
 
 # Global service instance
 auth_service = AuthService()
@@ -0,0 +1,264 @@
+"""
+Checkout Pricing
+Batched cart pricing with discounts, per-market tax and shipping, and a short-lived quote cache
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+import hashlib
+import json
+import threading
+import time
+
+from ..core.config import settings
+from ..db.market_db import Market, MarketConfig
+from ..models.products.sku import SKU
+from ..models.products.product_filter import ProductDiscount
+
+
+def calculate_shipping_cost(subtotal: float, city: Optional[str] = None, market: Market = Market.KG) -> float:
+    """Calculate shipping cost based on order value and the market's shipping rules"""
+    market_config = MarketConfig.get_config(market)
+
+    # Free shipping above the market threshold (5000 KGS / 100 USD)
+    if subtotal >= market_config["free_shipping_threshold"]:
+        return 0.0
+
+    # Standard shipping cost
+    return market_config["standard_shipping_cost"]
+
+
+def apply_discount(unit_price: float, discount: Optional[ProductDiscount]) -> float:
+    """Unit price after a product discount ('percentage' or 'fixed')"""
+    if discount is None:
+        return unit_price
+    if discount.discount_type == "percentage":
+        return max(0.0, unit_price * (1 - discount.discount_value / 100))
+    if discount.discount_type == "fixed":
+        return max(0.0, unit_price - discount.discount_value)
+    return unit_price
+
+
+class CheckoutPricingService:
+    """
+    Prices a list of cart lines for checkout.
+
+    All SKUs, their products and active discounts are loaded in one query.
+    Quotes are cached in-process per (user, market, cart version, city)
+    for a short TTL so ``/orders/create`` charges exactly what
+    ``/orders/quote`` showed without pricing the cart again. The cart
+    version is a hash of the cart lines, so any cart change misses.
+    """
+
+    def __init__(self, ttl_seconds: int = 120, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._quotes: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cart_version(items: List[Dict[str, int]]) -> str:
+        """Stable hash of cart lines ({'sku_id', 'quantity'}), independent of line order"""
+        lines = sorted((item['sku_id'], item['quantity']) for item in items)
+        return hashlib.sha256(json.dumps(lines).encode("utf-8")).hexdigest()[:32]
+
+    # ==================== Pricing ====================
+
+    def load_skus(
+        self,
+        db: Session,
+        items: List[Dict[str, int]],
+        with_discounts: bool = True
+    ) -> Tuple[Dict[int, SKU], Dict[int, ProductDiscount]]:
+        """
+        Load and stock-check the SKUs of all lines in one query
+
+        Returns:
+            (sku_id -> SKU, product_id -> best active discount)
+
+        Raises:
+            HTTPException 404: SKU missing or inactive
+            HTTPException 400: SKU out of stock or not enough stock
+        """
+        sku_ids = {item['sku_id'] for item in items}
+        query = db.query(SKU).options(joinedload(SKU.product)).filter(
+            SKU.id.in_(sku_ids),
+            SKU.is_active == True
+        )
+
+        discounts: Dict[int, ProductDiscount] = {}
+        if with_discounts:
+            now = datetime.now(timezone.utc)
+            rows = query.add_entity(ProductDiscount).outerjoin(
+                ProductDiscount,
+                and_(
+                    ProductDiscount.product_id == SKU.product_id,
+                    ProductDiscount.is_active == True,
+                    or_(ProductDiscount.start_date.is_(None), ProductDiscount.start_date <= now),
+                    or_(ProductDiscount.end_date.is_(None), ProductDiscount.end_date >= now)
+                )
+            ).all()
+            skus = {}
+            for sku, discount in rows:
+                skus[sku.id] = sku
+                if discount is None:
+                    continue
+                # Several active discounts: the customer gets the best one
+                best = discounts.get(sku.product_id)
+                if best is None or apply_discount(sku.price, discount) < apply_discount(sku.price, best):
+                    discounts[sku.product_id] = discount
+        else:
+            skus = {sku.id: sku for sku in query.all()}
+
+        for item in items:
+            sku = skus.get(item['sku_id'])
+            if sku is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"SKU with id {item['sku_id']} not found"
+                )
+            if sku.stock <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Product '{sku.product.title}' (size: {sku.size}, color: {sku.color}) is out of stock"
+                )
+            if sku.stock < item['quantity']:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Not enough stock for '{sku.product.title}' (size: {sku.size}, color: {sku.color}). Available: {sku.stock}"
+                )
+
+        return skus, discounts
+
+    def build_quote(
+        self,
+        db: Session,
+        items: List[Dict[str, int]],
+        market: Market,
+        delivery_city: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[int, SKU]]:
+        """
+        Price cart lines: discounts, shipping and market tax
+
+        Returns:
+            (quote dict, sku_id -> SKU loaded for the lines)
+        """
+        skus, discounts = self.load_skus(db, items)
+        market_config = MarketConfig.get_config(market)
+
+        lines = []
+        subtotal = 0.0
+        discount_amount = 0.0
+        for item in items:
+            sku = skus[item['sku_id']]
+            unit_price = round(apply_discount(sku.price, discounts.get(sku.product_id)), 2)
+            line_subtotal = sku.price * item['quantity']
+            line_total = round(unit_price * item['quantity'], 2)
+            subtotal += line_subtotal
+            discount_amount += line_subtotal - line_total
+            lines.append({
+                'sku_id': sku.id,
+                'product_id': sku.product_id,
+                'product_name': sku.product.title,
+                'sku_code': sku.sku_code,
+                'size': sku.size,
+                'color': sku.color,
+                'quantity': item['quantity'],
+                'original_unit_price': sku.price,
+                'unit_price': unit_price,
+                'total_price': line_total
+            })
+
+        items_total = round(subtotal - discount_amount, 2)
+        shipping_cost = calculate_shipping_cost(items_total, delivery_city, market)
+
+        tax_rate = market_config["tax_rate"]
+        if market_config["tax_included"]:
+            # VAT is part of the shelf price: report the included amount
+            tax_amount = round(items_total - items_total / (1 + tax_rate), 2)
+            total_amount = items_total + shipping_cost
+        else:
+            tax_amount = round(items_total * tax_rate, 2)
+            total_amount = items_total + shipping_cost + tax_amount
+
+        quote = {
+            'cart_version': self.cart_version(items),
+            'market': market.value,
+            'delivery_city': delivery_city,
+            'currency': market_config["currency_code"],
+            'items': lines,
+            'subtotal': round(subtotal, 2),
+            'discount_amount': round(discount_amount, 2),
+            'shipping_cost': shipping_cost,
+            'tax_rate': tax_rate,
+            'tax_included': market_config["tax_included"],
+            'tax_amount': tax_amount,
+            'total_amount': round(total_amount, 2),
+        }
+        return quote, skus
+
+    # ==================== Quote cache ====================
+
+    def _cache_key(self, user_id: int, market: Market, cart_version: str, delivery_city: Optional[str]) -> Tuple:
+        return (user_id, market.value, cart_version, delivery_city or "")
+
+    def save_quote(self, user_id: int, market: Market, quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a quote and stamp it with its expiry"""
+        quote = dict(quote, expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds))
+        key = self._cache_key(user_id, market, quote['cart_version'], quote['delivery_city'])
+        with self._lock:
+            self._quotes[key] = (time.monotonic() + self.ttl_seconds, quote)
+            self._quotes.move_to_end(key)
+            while len(self._quotes) > self.max_entries:
+                self._quotes.popitem(last=False)
+        return quote
+
+    def get_quote(
+        self,
+        user_id: int,
+        market: Market,
+        cart_version: str,
+        delivery_city: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Cached quote for this exact cart, or None if missing or expired"""
+        key = self._cache_key(user_id, market, cart_version, delivery_city)
+        with self._lock:
+            entry = self._quotes.get(key)
+            if entry is None:
+                return None
+            expires, quote = entry
+            if expires <= time.monotonic():
+                del self._quotes[key]
+                return None
+            return quote
+
+    def invalidate(self, user_id: int, market: Market, cart_version: str, delivery_city: Optional[str] = None) -> None:
+        """Drop a quote once an order has been placed with it"""
+        with self._lock:
+            self._quotes.pop(self._cache_key(user_id, market, cart_version, delivery_city), None)
+
+    def quote(
+        self,
+        db: Session,
+        user_id: int,
+        items: List[Dict[str, int]],
+        market: Market,
+        delivery_city: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Cached quote for the cart, pricing it only on a cache miss"""
+        cached = self.get_quote(user_id, market, self.cart_version(items), delivery_city)
+        if cached is not None:
+            return cached
+        quote, _ = self.build_quote(db, items, market, delivery_city)
+        return self.save_quote(user_id, market, quote)
+
+
+# Global service instance
+checkout_pricing = CheckoutPricingService(
+    ttl_seconds=settings.checkout_quote.ttl_seconds,
+    max_entries=settings.checkout_quote.max_entries
+)
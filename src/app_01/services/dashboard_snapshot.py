@@ -0,0 +1,181 @@
+"""
+Dashboard Snapshot
+Admin dashboard metrics computed in one aggregate query and cached per market
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, time as dt_time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import Session
+import logging
+import threading
+import time
+
+from ..core.config import settings
+from ..db.market_db import Market, get_market_config
+from ..models.orders.order import Order, OrderStatus
+from ..models.products.product import Product
+from ..models.products.sku import SKU
+from ..models.users.user import User
+
+logger = logging.getLogger(__name__)
+
+METRIC_DEFAULTS = {
+    "orders_today": 0, "orders_week": 0, "orders_month": 0,
+    "revenue_today": 0.0, "revenue_week": 0.0, "revenue_month": 0.0,
+    "confirmed_revenue_month": 0.0, "avg_order_value": 0.0,
+    "orders_pending": 0, "orders_confirmed": 0, "orders_shipped": 0, "orders_delivered": 0,
+    "total_users": 0, "users_today": 0, "users_week": 0, "users_month": 0,
+    "total_products": 0, "out_of_stock_count": 0,
+}
+
+
+def _number(value: Any, default):
+    """Coerce an aggregate result (None, Decimal) to the metric's type"""
+    try:
+        return type(default)(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _rows(load: Callable[[], Any]) -> List[Any]:
+    try:
+        rows = load()
+    except Exception as e:
+        logger.warning(f"Dashboard list query failed: {e}")
+        return []
+    return rows if isinstance(rows, list) else []
+
+
+def period_starts(market: Market, now: Optional[datetime] = None) -> Tuple[datetime, datetime, datetime]:
+    """UTC instants of the market-local start of today, 7 days ago and 30 days ago"""
+    now = now or datetime.now(timezone.utc)
+    tz = ZoneInfo(get_market_config(market)["timezone"])
+    today_start = datetime.combine(now.astimezone(tz).date(), dt_time.min, tz).astimezone(timezone.utc)
+    return today_start, today_start - timedelta(days=7), today_start - timedelta(days=30)
+
+
+def metrics_statement(market: Market, now: Optional[datetime] = None):
+    """
+    Every dashboard counter in one round trip: three single-row aggregates
+    (orders, users, products/SKUs) using FILTER clauses over sargable
+    ``column >= instant`` ranges, cross joined into one row.
+    """
+    today_start, week_start, month_start = period_starts(market, now)
+    not_cancelled = Order.status != OrderStatus.CANCELLED
+
+    orders = select(
+        func.count(Order.id).filter(Order.order_date >= today_start).label("orders_today"),
+        func.count(Order.id).filter(Order.order_date >= week_start).label("orders_week"),
+        func.count(Order.id).filter(Order.order_date >= month_start).label("orders_month"),
+        func.sum(Order.total_amount).filter(Order.order_date >= today_start, not_cancelled).label("revenue_today"),
+        func.sum(Order.total_amount).filter(Order.order_date >= week_start, not_cancelled).label("revenue_week"),
+        func.sum(Order.total_amount).filter(Order.order_date >= month_start, not_cancelled).label("revenue_month"),
+        func.sum(Order.total_amount).filter(
+            Order.order_date >= month_start,
+            Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.DELIVERED])
+        ).label("confirmed_revenue_month"),
+        func.avg(Order.total_amount).filter(not_cancelled).label("avg_order_value"),
+        func.count(Order.id).filter(Order.status == OrderStatus.PENDING).label("orders_pending"),
+        func.count(Order.id).filter(Order.status == OrderStatus.CONFIRMED).label("orders_confirmed"),
+        func.count(Order.id).filter(Order.status == OrderStatus.SHIPPED).label("orders_shipped"),
+        func.count(Order.id).filter(Order.status == OrderStatus.DELIVERED).label("orders_delivered"),
+    ).subquery("order_metrics")
+
+    users = select(
+        func.count(User.id).label("total_users"),
+        func.count(User.id).filter(User.created_at >= today_start).label("users_today"),
+        func.count(User.id).filter(User.created_at >= week_start).label("users_week"),
+        func.count(User.id).filter(User.created_at >= month_start).label("users_month"),
+    ).subquery("user_metrics")
+
+    products = select(
+        func.count(Product.id).filter(Product.is_active == True).label("total_products"),
+    ).subquery("product_metrics")
+
+    skus = select(
+        func.count(distinct(SKU.product_id)).filter(SKU.stock == 0).label("out_of_stock_count"),
+    ).subquery("sku_metrics")
+
+    return select(orders, users, products, skus)
+
+
+def build_dashboard_snapshot(db: Session, market: Market, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Counters (one query) plus the dashboard's short lists, as plain values safe to cache"""
+    row = db.execute(metrics_statement(market, now)).one()
+    mapping = getattr(row, "_mapping", {})
+    snapshot: Dict[str, Any] = {
+        name: _number(mapping.get(name) if hasattr(mapping, "get") else None, default)
+        for name, default in METRIC_DEFAULTS.items()
+    }
+
+    snapshot["low_stock_products"] = _rows(lambda: db.query(
+        Product.id, Product.title, func.sum(SKU.stock).label("total_stock")
+    ).join(
+        SKU, Product.id == SKU.product_id
+    ).group_by(
+        Product.id, Product.title
+    ).having(
+        func.sum(SKU.stock) < 10
+    ).limit(10).all())
+    snapshot["low_stock_count"] = len(snapshot["low_stock_products"])
+
+    snapshot["popular_products"] = _rows(lambda: db.query(
+        Product.id, Product.title, Product.sold_count
+    ).filter(
+        Product.is_active == True
+    ).order_by(
+        Product.sold_count.desc()
+    ).limit(5).all())
+
+    snapshot["recent_orders"] = _rows(lambda: db.query(
+        Order.id, Order.order_number, Order.customer_name, Order.total_amount,
+        Order.currency, Order.status, Order.order_date
+    ).order_by(
+        Order.order_date.desc()
+    ).limit(10).all())
+
+    snapshot["generated_at"] = datetime.now(timezone.utc)
+    return snapshot
+
+
+class DashboardSnapshotCache:
+    """
+    Latest dashboard snapshot per market, rebuilt at most once per TTL.
+
+    Concurrent misses for the same market wait for the first loader
+    instead of all querying the database.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[Market, Tuple[float, Dict[str, Any]]] = {}
+        self._locks: Dict[Market, threading.Lock] = {market: threading.Lock() for market in Market}
+
+    def _fresh(self, market: Market) -> Optional[Dict[str, Any]]:
+        entry = self._snapshots.get(market)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def get(self, market: Market, load: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        snapshot = self._fresh(market)
+        if snapshot is not None:
+            return snapshot
+        with self._locks[market]:
+            snapshot = self._fresh(market)
+            if snapshot is None:
+                snapshot = load()
+                self._snapshots[market] = (time.monotonic(), snapshot)
+            return snapshot
+
+    def invalidate(self, market: Optional[Market] = None) -> None:
+        if market is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(market, None)
+
+
+# Global cache instance
+dashboard_snapshots = DashboardSnapshotCache(ttl_seconds=settings.admin_dashboard.snapshot_ttl_seconds)
@@ -0,0 +1,239 @@
+"""
+Data Export
+Streaming CSV / gzip-CSV / Parquet exports of stats, orders and order items
+"""
+
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+import csv
+import enum
+import io
+import zlib
+
+from ..core.config import settings
+from ..db.market_db import Market, get_market_config
+from ..models.orders.order import Order
+from ..models.orders.order_item import OrderItem
+from ..models.admins.order_management.order_admin_stats import OrderAdminStats
+
+# Parquet is optional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportColumn(NamedTuple):
+    header: str
+    expression: Any
+    kind: str  # int | float | str | datetime | date
+
+
+STATS_COLUMNS = [
+    ExportColumn("Date", OrderAdminStats.date, "date"),
+    ExportColumn("Orders", OrderAdminStats.today_orders_count, "int"),
+    ExportColumn("Pending", OrderAdminStats.today_orders_pending, "int"),
+    ExportColumn("Processing", OrderAdminStats.today_orders_processing, "int"),
+    ExportColumn("Shipped", OrderAdminStats.today_orders_shipped, "int"),
+    ExportColumn("Delivered", OrderAdminStats.today_orders_delivered, "int"),
+    ExportColumn("Cancelled", OrderAdminStats.today_orders_cancelled, "int"),
+    ExportColumn("Sales", OrderAdminStats.today_sales_total, "float"),
+    ExportColumn("Avg Order Value", OrderAdminStats.avg_order_value, "float"),
+    ExportColumn("Completion Rate", OrderAdminStats.completion_rate, "float"),
+]
+
+ORDER_COLUMNS = [
+    ExportColumn("order_id", Order.id, "int"),
+    ExportColumn("order_number", Order.order_number, "str"),
+    ExportColumn("status", Order.status, "str"),
+    ExportColumn("user_id", Order.user_id, "int"),
+    ExportColumn("customer_name", Order.customer_name, "str"),
+    ExportColumn("customer_phone", Order.customer_phone, "str"),
+    ExportColumn("delivery_city", Order.delivery_city, "str"),
+    ExportColumn("payment_method", Order.payment_method, "str"),
+    ExportColumn("subtotal", Order.subtotal, "float"),
+    ExportColumn("shipping_cost", Order.shipping_cost, "float"),
+    ExportColumn("discount_amount", Order.discount_amount, "float"),
+    ExportColumn("tax_amount", Order.tax_amount, "float"),
+    ExportColumn("total_amount", Order.total_amount, "float"),
+    ExportColumn("currency", Order.currency, "str"),
+    ExportColumn("order_date", Order.order_date, "datetime"),
+]
+
+ORDER_ITEM_COLUMNS = [
+    ExportColumn("order_item_id", OrderItem.id, "int"),
+    ExportColumn("order_id", OrderItem.order_id, "int"),
+    ExportColumn("order_number", Order.order_number, "str"),
+    ExportColumn("order_date", Order.order_date, "datetime"),
+    ExportColumn("status", Order.status, "str"),
+    ExportColumn("sku_id", OrderItem.sku_id, "int"),
+    ExportColumn("sku_code", OrderItem.sku_code, "str"),
+    ExportColumn("product_name", OrderItem.product_name, "str"),
+    ExportColumn("size", OrderItem.size, "str"),
+    ExportColumn("color", OrderItem.color, "str"),
+    ExportColumn("unit_price", OrderItem.unit_price, "float"),
+    ExportColumn("quantity", OrderItem.quantity, "int"),
+    ExportColumn("total_price", OrderItem.total_price, "float"),
+]
+
+
+def local_day_bounds(market: Market, start_date: Optional[date], end_date: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """[start, end) UTC instants of market-local days, for sargable order_date filters"""
+    tz = ZoneInfo(get_market_config(market)["timezone"])
+    start = datetime.combine(start_date, time.min, tz).astimezone(timezone.utc) if start_date else None
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tz).astimezone(timezone.utc) if end_date else None
+    return start, end
+
+
+def stats_statement(start_date: Optional[date], end_date: Optional[date]) -> Select:
+    statement = select(*[column.expression for column in STATS_COLUMNS])
+    if start_date:
+        statement = statement.where(OrderAdminStats.date >= start_date)
+    if end_date:
+        statement = statement.where(OrderAdminStats.date <= end_date)
+    return statement.order_by(OrderAdminStats.date)
+
+
+def orders_statement(market: Market, start_date: Optional[date], end_date: Optional[date]) -> Select:
+    start, end = local_day_bounds(market, start_date, end_date)
+    statement = select(*[column.expression for column in ORDER_COLUMNS])
+    if start:
+        statement = statement.where(Order.order_date >= start)
+    if end:
+        statement = statement.where(Order.order_date < end)
+    return statement.order_by(Order.order_date, Order.id)
+
+
+def order_items_statement(market: Market, start_date: Optional[date], end_date: Optional[date]) -> Select:
+    start, end = local_day_bounds(market, start_date, end_date)
+    statement = select(*[column.expression for column in ORDER_ITEM_COLUMNS]).join(Order, Order.id == OrderItem.order_id)
+    if start:
+        statement = statement.where(Order.order_date >= start)
+    if end:
+        statement = statement.where(Order.order_date < end)
+    return statement.order_by(Order.order_date, OrderItem.order_id, OrderItem.id)
+
+
+def iter_partitions(db: Session, statement: Select, chunk_size: int) -> Iterator[Sequence[Any]]:
+    """Rows in chunks through a server-side cursor (named cursor on PostgreSQL)"""
+    result = db.execute(statement.execution_options(stream_results=True, yield_per=chunk_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _csv_cell(value: Any) -> Any:
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(columns: List[ExportColumn], partitions: Iterator[Sequence[Any]], compress: bool = False) -> Iterator[bytes]:
+    """Header plus one encoded (optionally gzipped) chunk per partition"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow([column.header for column in columns])
+    yield drain()
+    for partition in partitions:
+        writer.writerows([_csv_cell(value) for value in row] for row in partition)
+        chunk = drain()
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file handing out what was written so far; tell() keeps counting for the Parquet footer"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_stream(columns: List[ExportColumn], partitions: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    """One Parquet row group per partition, flushed as it is written"""
+    arrow_types = {
+        "int": pa.int64(), "float": pa.float64(), "str": pa.string(),
+        "datetime": pa.timestamp("us", tz="UTC"), "date": pa.date32(),
+    }
+    schema = pa.schema([(column.header, arrow_types[column.kind]) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for partition in partitions:
+            arrays = [
+                pa.array([_plain(row[i]) for row in partition], type=schema.field(i).type)
+                for i in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_response(
+    db: Session,
+    columns: List[ExportColumn],
+    statement: Select,
+    export_format: str,
+    filename: str,
+    chunk_size: Optional[int] = None
+) -> StreamingResponse:
+    """StreamingResponse for the statement in csv, csv.gz or parquet (caller checks PARQUET_AVAILABLE)"""
+    media_type, extension = EXPORT_FORMATS[export_format]
+    partitions = iter_partitions(db, statement, chunk_size or settings.export.chunk_size)
+    if export_format == "parquet":
+        body = parquet_stream(columns, partitions)
+    else:
+        body = csv_stream(columns, partitions, compress=export_format == "csv.gz")
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
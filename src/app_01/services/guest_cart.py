@@ -0,0 +1,214 @@
+"""
+Guest Cart
+Anonymous cart kept in a signed cookie, hydrated in one query and merged into the DB cart at login
+"""
+
+from typing import Dict, NamedTuple, Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload
+import base64
+import hashlib
+import hmac
+import logging
+
+from ..core.config import settings
+from ..db.market_db import Market
+from ..models.orders.cart import Cart, CartItem
+from ..models.products.sku import SKU
+
+logger = logging.getLogger(__name__)
+
+COOKIE_VERSION = "v1"
+
+# sku_id -> quantity
+GuestCartLines = Dict[int, int]
+
+
+class GuestCart(NamedTuple):
+    """Decoded cookie: the market the cart was built in and its lines"""
+    market: Optional[Market]
+    lines: GuestCartLines
+
+    def lines_for(self, market: Market) -> GuestCartLines:
+        """The lines if the cart belongs to ``market``; SKU ids mean nothing in another market"""
+        if self.lines and self.market != market:
+            logger.info(f"Dropped guest cart of market {self.market} read in {market.value}")
+            return {}
+        return self.lines
+
+
+EMPTY_GUEST_CART = GuestCart(None, {})
+
+
+def session_market(db: Session) -> Market:
+    """Market a session reads from (sessions not opened through db_manager use the default market)"""
+    market = db.info.get("market")
+    if isinstance(market, Market):
+        return market
+    return Market(market) if market else Market.KG
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class GuestCartCodec:
+    """
+    Encodes cart lines as ``v1.<market>.<payload>.<signature>``.
+
+    The payload is ``sku:qty`` pairs joined by commas, base64url encoded;
+    the signature is a truncated HMAC-SHA256 over version, market and
+    payload. A cookie that fails verification or parsing reads as an empty
+    cart.
+    """
+
+    def __init__(self, secret_key: str, max_lines: int = 50, max_quantity: int = 99):
+        self._key = hashlib.sha256(f"guest-cart:{secret_key}".encode()).digest()
+        self.max_lines = max_lines
+        self.max_quantity = max_quantity
+
+    def _sign(self, market: str, payload: str) -> str:
+        digest = hmac.new(self._key, f"{COOKIE_VERSION}.{market}.{payload}".encode(), hashlib.sha256).digest()
+        return _b64encode(digest[:16])
+
+    def encode(self, lines: GuestCartLines, market: Market) -> str:
+        body = ",".join(f"{sku_id}:{quantity}" for sku_id, quantity in lines.items() if quantity > 0)
+        payload = _b64encode(body.encode())
+        return f"{COOKIE_VERSION}.{market.value}.{payload}.{self._sign(market.value, payload)}"
+
+    def decode(self, value: Optional[str]) -> GuestCart:
+        if not value:
+            return EMPTY_GUEST_CART
+        try:
+            version, market, payload, signature = value.split(".")
+            if version != COOKIE_VERSION or not hmac.compare_digest(signature, self._sign(market, payload)):
+                return EMPTY_GUEST_CART
+            lines: GuestCartLines = {}
+            body = _b64decode(payload).decode()
+            for pair in filter(None, body.split(",")):
+                sku_id, quantity = (int(part) for part in pair.split(":"))
+                if sku_id > 0 and quantity > 0:
+                    lines[sku_id] = min(quantity, self.max_quantity)
+            return GuestCart(Market(market), dict(list(lines.items())[:self.max_lines]))
+        except (ValueError, UnicodeDecodeError):
+            return EMPTY_GUEST_CART
+
+    def set_quantity(self, lines: GuestCartLines, sku_id: int, quantity: int) -> GuestCartLines:
+        """Return new lines with the SKU's quantity set (0 removes it)"""
+        if quantity < 0:
+            raise ValueError("Quantity must not be negative")
+        updated = dict(lines)
+        if quantity == 0:
+            updated.pop(sku_id, None)
+            return updated
+        if sku_id not in updated and len(updated) >= self.max_lines:
+            raise ValueError(f"Guest cart is limited to {self.max_lines} items")
+        updated[sku_id] = min(quantity, self.max_quantity)
+        return updated
+
+
+def hydrate_guest_cart(db: Session, cart: GuestCart) -> dict:
+    """
+    Current name, price, image and stock of the cart lines, in one query
+
+    A cart built in another market reads as empty. SKUs that no longer
+    exist are dropped; inactive or short SKUs are kept and flagged so the
+    client can show them as unavailable.
+    """
+    lines = cart.lines_for(session_market(db))
+    skus = {}
+    if lines:
+        skus = {
+            sku.id: sku
+            for sku in db.query(SKU).options(joinedload(SKU.product)).filter(SKU.id.in_(list(lines))).all()
+        }
+
+    items = []
+    total_price = 0.0
+    for sku_id, quantity in lines.items():
+        sku = skus.get(sku_id)
+        if sku is None:
+            continue
+        product = sku.product
+        stock = sku.stock or 0
+        available = bool(sku.is_active) and (product is None or product.is_active is not False) and stock >= quantity
+        items.append({
+            "sku_id": sku_id,
+            "quantity": quantity,
+            "name": product.title if product else sku.sku_code,
+            "price": sku.price,
+            "image": sku.variant_image or (product.main_image if product else None) or "",
+            "size": sku.size,
+            "color": sku.color,
+            "stock": stock,
+            "available": available,
+        })
+        if available:
+            total_price += sku.price * quantity
+
+    return {
+        "items": items,
+        "total_items": len(items),
+        "total_price": total_price,
+    }
+
+
+def merge_guest_cart(db: Session, user_id: int, cart: GuestCart) -> int:
+    """
+    Add the guest lines to the user's DB cart in one bulk upsert (no commit)
+
+    Quantities of SKUs already in the cart are summed. Returns the number
+    of lines merged; unknown SKUs are skipped, and a cart built in another
+    market is not merged.
+    """
+    lines = cart.lines_for(session_market(db))
+    if not lines:
+        return 0
+
+    existing_ids = {
+        row.id for row in db.query(SKU.id).filter(SKU.id.in_(list(lines))).all()
+    }
+    lines = {sku_id: quantity for sku_id, quantity in lines.items() if sku_id in existing_ids}
+    if not lines:
+        return 0
+
+    cart_id = db.query(Cart.id).filter(Cart.user_id == user_id).scalar()
+    if cart_id is None:
+        cart = Cart(user_id=user_id)
+        db.add(cart)
+        db.flush()
+        cart_id = cart.id
+
+    rows = [{"cart_id": cart_id, "sku_id": sku_id, "quantity": quantity} for sku_id, quantity in lines.items()]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert(CartItem).values(rows)
+        db.execute(insert.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.sku_id],
+            set_={"quantity": CartItem.quantity + insert.excluded.quantity}
+        ))
+    else:
+        current = {
+            item.sku_id: item
+            for item in db.query(CartItem).filter(CartItem.cart_id == cart_id, CartItem.sku_id.in_(list(lines))).all()
+        }
+        for row in rows:
+            if row["sku_id"] in current:
+                current[row["sku_id"]].quantity += row["quantity"]
+            else:
+                db.add(CartItem(**row))
+        db.flush()
+
+    return len(rows)
+
+
+# Global codec instance
+guest_cart_codec = GuestCartCodec(
+    settings.security.secret_key,
+    max_lines=settings.guest_cart.max_lines,
+    max_quantity=settings.guest_cart.max_quantity
+)
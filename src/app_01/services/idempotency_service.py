@@ -0,0 +1,240 @@
+"""
+Idempotency Service
+Replay-safe handling of mutating requests sent with an Idempotency-Key header
+"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import hashlib
+import json
+import logging
+import time
+
+from ..core.config import settings
+from ..models.orders.idempotency_key import IdempotencyKey, IdempotencyStatus
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+# Polling backoff while a concurrent duplicate waits for the first attempt
+POLL_INTERVAL_SECONDS = 0.05
+MAX_POLL_INTERVAL_SECONDS = 0.5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite returns naive datetimes for timezone-aware columns"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key store backed by the ``idempotency_keys`` table.
+
+    The first request with a key claims it (IN_PROGRESS row, committed
+    immediately). The caller stores its serialized response with
+    ``complete()`` inside its own transaction, so the response and the
+    business rows commit together. Duplicates arriving while the first
+    attempt runs wait for it instead of re-running the pipeline.
+    """
+
+    def __init__(
+        self,
+        ttl_hours: int = 24,
+        lock_timeout_seconds: int = 60,
+        wait_timeout_seconds: float = 10.0
+    ):
+        self.ttl = timedelta(hours=ttl_hours)
+        self.lock_timeout = timedelta(seconds=lock_timeout_seconds)
+        self.wait_timeout_seconds = wait_timeout_seconds
+
+    @staticmethod
+    def hash_request(payload: Any) -> str:
+        """SHA-256 of the canonical JSON form of a request payload"""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def begin(
+        self,
+        db: Session,
+        user_id: int,
+        scope: str,
+        key: str,
+        request_hash: str
+    ) -> IdempotencyKey:
+        """
+        Claim an idempotency key or return the completed record for a replay
+
+        Args:
+            db: Session of the market database the request writes to
+            user_id: Owner of the key (keys are namespaced per user)
+            scope: Endpoint scope, e.g. 'orders.create'
+            key: Client-supplied Idempotency-Key header value
+            request_hash: Hash of the request payload (see hash_request)
+
+        Returns:
+            IdempotencyKey record. ``record.is_completed`` means the caller
+            must replay the stored response; otherwise the caller owns the key.
+
+        Raises:
+            HTTPException 422: key is malformed or reused with a different payload
+            HTTPException 409: the first attempt is still running after the wait timeout
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+            )
+
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        poll_interval = POLL_INTERVAL_SECONDS
+
+        while True:
+            now = _utcnow()
+            record = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key
+            ).first()
+
+            if record is None:
+                claimed = self._insert_claim(db, user_id, scope, key, request_hash, now)
+                if claimed is not None:
+                    return claimed
+                continue  # Lost the insert race, re-read the winner's row
+
+            if _as_utc(record.expires_at) <= now:
+                # Expired keys are reusable, whatever their payload was
+                if self._take_over(db, record, request_hash, now):
+                    return record
+                continue
+
+            if record.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request body"
+                )
+
+            if record.is_completed:
+                logger.info(f"🔁 Idempotent replay: scope={scope}, user_id={user_id}, key={key}")
+                return record
+
+            locked_at = _as_utc(record.locked_at)
+            if locked_at is None or locked_at <= now - self.lock_timeout:
+                # The attempt holding the key died without completing or releasing it
+                if self._take_over(db, record, request_hash, now):
+                    logger.warning(f"⚠️ Took over stale idempotency key: scope={scope}, key={key}")
+                    return record
+                continue
+
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed"
+                )
+
+            # Wait for the first attempt, then re-read its row
+            db.rollback()
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL_SECONDS)
+            db.expire_all()
+
+    def complete(self, db: Session, record: IdempotencyKey, response_body: Dict[str, Any], response_status: int = 200) -> None:
+        """
+        Store the response for replays. Does not commit: call this before the
+        caller's own commit so the response is persisted atomically with it.
+        """
+        record.status = IdempotencyStatus.COMPLETED
+        record.response_status = response_status
+        record.response_body = json.dumps(response_body, default=str)
+        record.expires_at = _utcnow() + self.ttl
+
+    def abandon(self, db: Session, record: IdempotencyKey) -> None:
+        """Release a claim after a failed attempt so the client can retry"""
+        try:
+            db.rollback()
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == record.id,
+                IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to release idempotency key {record.key}: {e}")
+
+    @staticmethod
+    def load_response(record: IdempotencyKey) -> Dict[str, Any]:
+        """Deserialize the stored response body"""
+        return json.loads(record.response_body) if record.response_body else {}
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete expired keys. Returns the number of rows removed."""
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= _utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def _insert_claim(
+        self,
+        db: Session,
+        user_id: int,
+        scope: str,
+        key: str,
+        request_hash: str,
+        now: datetime
+    ) -> Optional[IdempotencyKey]:
+        """Insert an IN_PROGRESS row; None if another attempt inserted first"""
+        record = IdempotencyKey(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            status=IdempotencyStatus.IN_PROGRESS,
+            locked_at=now,
+            expires_at=now + self.ttl
+        )
+        db.add(record)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+        db.refresh(record)
+        return record
+
+    def _take_over(self, db: Session, record: IdempotencyKey, request_hash: str, now: datetime) -> bool:
+        """Re-claim an expired or stale row; the conditional update makes it race-safe"""
+        claimed = db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == record.id,
+            IdempotencyKey.expires_at == record.expires_at,
+            IdempotencyKey.status == record.status
+        ).update({
+            IdempotencyKey.request_hash: request_hash,
+            IdempotencyKey.status: IdempotencyStatus.IN_PROGRESS,
+            IdempotencyKey.response_status: None,
+            IdempotencyKey.response_body: None,
+            IdempotencyKey.locked_at: now,
+            IdempotencyKey.expires_at: now + self.ttl
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            db.refresh(record)
+        return bool(claimed)
+
+
+# Global service instance
+idempotency_service = IdempotencyService(
+    ttl_hours=settings.idempotency.ttl_hours,
+    lock_timeout_seconds=settings.idempotency.lock_timeout_seconds,
+    wait_timeout_seconds=settings.idempotency.wait_timeout_seconds
+)
@@ -0,0 +1,182 @@
+"""
+Image GC
+Mark-and-sweep cleanup of static/uploads: stored files that no catalog row references are deleted
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+from sqlalchemy.orm import Session
+import argparse
+import logging
+import os
+import time
+
+from ..db.market_db import db_manager, Market
+from ..models.products.product import Product
+from ..models.products.sku import SKU
+from ..models.products.product_asset import ProductAsset
+from ..models.products.category import Category, Subcategory
+from ..models.products.brand import Brand
+from ..models.banners.banner import Banner
+from ..utils.image_upload import DERIVED_NAME
+
+logger = logging.getLogger(__name__)
+
+# Columns holding upload URLs (additional_images is a JSON list of URLs)
+IMAGE_REFERENCES = (
+    Product.main_image,
+    Product.additional_images,
+    SKU.variant_image,
+    ProductAsset.url,
+    Banner.image_url,
+    Banner.mobile_image_url,
+    Category.image_url,
+    Subcategory.image_url,
+    Brand.logo_url,
+)
+
+
+def referenced_urls(db: Session) -> Iterator[str]:
+    """Every image URL stored in one market database"""
+    for column in IMAGE_REFERENCES:
+        for (value,) in db.query(column).filter(column.isnot(None)).yield_per(1000):
+            for url in value if isinstance(value, list) else [value]:
+                if isinstance(url, str):
+                    yield url
+
+
+def reference_key(relative_path: str) -> str:
+    """Stored image a file belongs to: path without extension and variant/size suffix"""
+    stem = os.path.splitext(relative_path)[0]
+    return DERIVED_NAME.sub("", stem)
+
+
+class ImageReferenceIndex:
+    """
+    Which stored images are in use, across all markets.
+
+    Files are content-addressed and shared between rows and markets, so a
+    file is live while any row in any market references it; a referenced
+    image keeps all of its variants and sizes.
+    """
+
+    def __init__(self):
+        self.keys = set()
+        self.references = 0
+
+    def add(self, url: str) -> None:
+        if url.startswith("/uploads/"):
+            self.keys.add(reference_key(url[len("/uploads/"):]))
+            self.references += 1
+
+    def is_referenced(self, relative_path: str) -> bool:
+        return reference_key(relative_path) in self.keys
+
+    @classmethod
+    def build(cls, markets: Optional[Iterable[Market]] = None) -> "ImageReferenceIndex":
+        """Mark phase. Raises if any market can't be read, so a sweep never runs on a partial index."""
+        index = cls()
+        for market in markets or Market:
+            db = next(db_manager.get_db_session(market))
+            try:
+                for url in referenced_urls(db):
+                    index.add(url)
+            finally:
+                db.close()
+        return index
+
+
+class ImageGC:
+    """
+    Incremental sweep of ``upload_dir``.
+
+    Each run checks at most ``batch_size`` files in path order, starting
+    after the path saved in the cursor file by the previous run, and wraps
+    around at the end. Files younger than ``min_age_seconds`` are kept: an
+    upload is written before the row that references it is committed.
+    """
+
+    CURSOR_FILE = ".gc_cursor"
+
+    def __init__(self, upload_dir: str = "static/uploads", min_age_seconds: float = 86400, batch_size: int = 1000):
+        self.upload_dir = Path(upload_dir)
+        self.min_age_seconds = min_age_seconds
+        self.batch_size = batch_size
+
+    @property
+    def cursor_path(self) -> Path:
+        return self.upload_dir / self.CURSOR_FILE
+
+    def _read_cursor(self) -> str:
+        try:
+            return self.cursor_path.read_text().strip()
+        except FileNotFoundError:
+            return ""
+
+    def _files_after(self, cursor: str) -> List[str]:
+        files = sorted(
+            path.relative_to(self.upload_dir).as_posix()
+            for path in self.upload_dir.rglob("*")
+            if path.is_file() and not path.is_symlink() and not path.name.startswith(".")
+        )
+        return [path for path in files if path > cursor][:self.batch_size]
+
+    def sweep(self, index: ImageReferenceIndex, delete: bool = False) -> dict:
+        """
+        Sweep one batch. Without ``delete`` only reports what would be removed.
+
+        Returns counts: checked, live, recent, unreferenced, reclaimed_bytes and
+        finished (the batch reached the end of the store).
+        """
+        batch = self._files_after(self._read_cursor())
+        report = {"checked": 0, "live": 0, "recent": 0, "unreferenced": 0, "reclaimed_bytes": 0, "finished": len(batch) < self.batch_size}
+        now = time.time()
+        for relative_path in batch:
+            report["checked"] += 1
+            if index.is_referenced(relative_path):
+                report["live"] += 1
+                continue
+            path = self.upload_dir / relative_path
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime < self.min_age_seconds:
+                report["recent"] += 1
+                continue
+            report["unreferenced"] += 1
+            report["reclaimed_bytes"] += stat.st_size
+            if delete:
+                path.unlink(missing_ok=True)
+                logger.info(f"🗑️ Deleted unreferenced image: {path}")
+
+        if delete:
+            self.cursor_path.write_text("" if report["finished"] else batch[-1])
+        return report
+
+
+def main():
+    """Standalone entry point: mark references in every market, then sweep one batch"""
+    parser = argparse.ArgumentParser(description="Delete uploaded images no catalog row references")
+    parser.add_argument("--upload-dir", default="static/uploads", help="Uploads root")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Files checked per run")
+    parser.add_argument("--min-age-hours", type=float, default=24, help="Keep files younger than this")
+    parser.add_argument("--delete", action="store_true", help="Delete files (default: report only)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = ImageReferenceIndex.build()
+    logger.info(f"Marked {len(index.keys)} stored images from {index.references} references")
+
+    gc = ImageGC(args.upload_dir, min_age_seconds=args.min_age_hours * 3600, batch_size=args.batch_size)
+    report = gc.sweep(index, delete=args.delete)
+    action = "Reclaimed" if args.delete else "Would reclaim"
+    logger.info(
+        f"{action} {report['reclaimed_bytes'] / (1024 * 1024):.1f}MB from {report['unreferenced']} files "
+        f"({report['checked']} checked, {report['live']} referenced, {report['recent']} too recent)"
+        + ("" if report["finished"] else " - run again to continue")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Image Jobs
+Background processing of admin image uploads: the admin row is saved at once,
+workers store the images and then write their URLs to the row
+"""
+
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+import argparse
+import asyncio
+import io
+import logging
+import uuid
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.products.product import Product
+from ..models.products.sku import SKU
+from ..models.products.image_job import ImageJob, ImageJobStatus
+from ..utils.image_upload import image_uploader
+
+logger = logging.getLogger(__name__)
+
+TARGETS = {"product": Product, "sku": SKU}
+# Fields holding a list of URLs; the others hold one URL
+LIST_FIELDS = {"additional_images"}
+# A job in one of these states is not processed again
+TERMINAL_STATUSES = (ImageJobStatus.DONE, ImageJobStatus.FAILED)
+# Product gallery images also get the responsive variant ladder
+VARIANT_FIELDS = {"main_image", "additional_images"}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_images(db: Session, target_type: str, target_id: int, field: str, files: Sequence[Tuple[str, bytes]]) -> List[ImageJob]:
+    """
+    Add jobs for the images of one field from one admin save (not committed here)
+
+    All jobs of a save share a batch: a list field ends up with the batch's
+    images in upload order, and a newer save of the same field supersedes
+    older batches still in flight.
+    """
+    batch = str(uuid.uuid4())
+    jobs = [
+        ImageJob(
+            target_type=target_type,
+            target_id=target_id,
+            field=field,
+            batch=batch,
+            position=position,
+            filename=filename,
+            source=content,
+            status=ImageJobStatus.PENDING,
+            attempts=0,
+            next_attempt_at=_utcnow()
+        )
+        for position, (filename, content) in enumerate(files)
+    ]
+    db.add_all(jobs)
+    return jobs
+
+
+class ImageJobQueue:
+    """
+    Workers for the ``image_jobs`` table.
+
+    Due jobs are claimed per market (status PROCESSING with a lease in
+    ``next_attempt_at``, so a crashed worker's jobs are picked up again) and
+    up to ``concurrency`` of them are processed at once through the image
+    processing pool. Invalid images fail at once; a busy pool is retried
+    with backoff up to ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval_seconds: float = 2.0,
+        max_attempts: int = 3,
+        lease_seconds: int = 120
+    ):
+        self.concurrency = concurrency
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self.lease = timedelta(seconds=lease_seconds)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ==================== Claiming ====================
+
+    def claim(self, market: Market) -> List[int]:
+        """Claim up to ``concurrency`` due jobs (pending, or processing with an expired lease)"""
+        db = next(db_manager.get_db_session(market))
+        try:
+            now = _utcnow()
+            query = db.query(ImageJob).filter(
+                or_(ImageJob.status == ImageJobStatus.PENDING, ImageJob.status == ImageJobStatus.PROCESSING),
+                ImageJob.next_attempt_at <= now
+            ).order_by(ImageJob.id).limit(self.concurrency)
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+
+            jobs = query.all()
+            for job in jobs:
+                job.status = ImageJobStatus.PROCESSING
+                job.next_attempt_at = now + self.lease
+            db.commit()
+            return [job.id for job in jobs]
+        finally:
+            db.close()
+
+    def _load(self, market: Market, job_id: int) -> Optional[Tuple[str, bytes, str]]:
+        db = next(db_manager.get_db_session(market))
+        try:
+            job = db.get(ImageJob, job_id)
+            if job is None or job.source is None:
+                return None
+            return job.filename or "image.jpg", job.source, job.field
+        finally:
+            db.close()
+
+    # ==================== Processing ====================
+
+    async def process(self, market: Market, job_id: int) -> bool:
+        """Store one claimed job's image and apply it to its row. Returns True on success."""
+        loaded = await run_in_threadpool(self._load, market, job_id)
+        if loaded is None:
+            await run_in_threadpool(self._finish, market, job_id, None, "Uploaded file is missing", False)
+            return False
+        filename, source, field = loaded
+
+        try:
+            url = await image_uploader.save_image(
+                UploadFile(filename=filename, file=io.BytesIO(source)),
+                category="product",
+                variants=field in VARIANT_FIELDS,
+                placeholder=True
+            )
+        except HTTPException as e:
+            # 503: processing pool busy, try again later; anything else is a bad upload
+            await run_in_threadpool(self._finish, market, job_id, None, str(e.detail), e.status_code == 503)
+            return False
+        except Exception as e:
+            await run_in_threadpool(self._finish, market, job_id, None, f"{type(e).__name__}: {e}", True)
+            return False
+
+        await run_in_threadpool(self._finish, market, job_id, url, None, False)
+        return True
+
+    def backoff_seconds(self, attempts: int) -> float:
+        return 2.0 ** attempts
+
+    def _finish(self, market: Market, job_id: int, url: Optional[str], error: Optional[str], retry: bool) -> None:
+        """
+        Record the outcome and, once the job is done or failed, update the
+        target row in the same transaction. If the row update fails the job
+        is retried like a failed attempt.
+        """
+        db = next(db_manager.get_db_session(market))
+        try:
+            job = db.get(ImageJob, job_id)
+            if job is None:
+                return
+            self._record(job, url, error, retry)
+            if job.status in TERMINAL_STATUSES:
+                try:
+                    # Write this job's status first: it takes the write lock, so the
+                    # batch's other jobs finishing at the same time are seen committed
+                    db.flush()
+                    self._apply(db, job)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    job = db.get(ImageJob, job_id)
+                    self._record(job, None, f"Updating {job.target_type} {job.target_id} failed: {type(e).__name__}: {e}", True)
+                    db.commit()
+                    return
+            else:
+                db.commit()
+
+            if job.status == ImageJobStatus.DONE:
+                logger.info(f"✅ Image job {job.id}: {job.target_type} {job.target_id} {job.field} = {url}")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record(self, job: ImageJob, url: Optional[str], error: Optional[str], retry: bool) -> None:
+        """Set the job's status for one attempt (not committed here)"""
+        job.attempts = (job.attempts or 0) + 1
+        if url is not None:
+            job.status = ImageJobStatus.DONE
+            job.result_url = url
+            job.last_error = None
+        else:
+            job.last_error = error[:1000] if error else None
+            if retry and job.attempts < self.max_attempts:
+                job.status = ImageJobStatus.PENDING
+                job.next_attempt_at = _utcnow() + timedelta(seconds=self.backoff_seconds(job.attempts))
+                logger.warning(f"⚠️ Image job {job.id} attempt {job.attempts} failed, retrying: {error}")
+                return
+            job.status = ImageJobStatus.FAILED
+            logger.error(f"❌ Image job {job.id} ({job.target_type} {job.target_id} {job.field}) failed: {error}")
+        job.source = None
+        job.finished_at = _utcnow()
+
+    def _apply(self, db: Session, job: ImageJob) -> None:
+        """
+        Write a finished job to the target row (not committed here), unless a
+        newer save superseded its batch. A list field is written once, by the
+        last job of the batch to finish, with the batch's images that are done.
+        """
+        if job.field not in LIST_FIELDS and job.status != ImageJobStatus.DONE:
+            return
+
+        model = TARGETS[job.target_type]
+        query = db.query(model).filter(model.id == job.target_id)
+        if db.get_bind().dialect.name == "postgresql":
+            # Jobs of one batch finish concurrently: the row lock makes the
+            # last one see the others' committed statuses
+            query = query.with_for_update()
+        row = query.first()
+        if row is None:
+            return
+
+        latest_batch = db.query(ImageJob.batch).filter(
+            ImageJob.target_type == job.target_type,
+            ImageJob.target_id == job.target_id,
+            ImageJob.field == job.field
+        ).order_by(ImageJob.id.desc()).limit(1).scalar()
+        if latest_batch != job.batch:
+            return
+
+        if job.field in LIST_FIELDS:
+            unfinished = db.query(ImageJob.id).filter(
+                ImageJob.batch == job.batch,
+                ImageJob.id != job.id,
+                ImageJob.status.notin_(TERMINAL_STATUSES)
+            ).count()
+            if unfinished:
+                return
+            urls = db.query(ImageJob.position, ImageJob.result_url).filter(
+                ImageJob.batch == job.batch,
+                ImageJob.id != job.id,
+                ImageJob.status == ImageJobStatus.DONE
+            ).all()
+            if job.status == ImageJobStatus.DONE:
+                urls.append((job.position, job.result_url))
+            setattr(row, job.field, [url for _, url in sorted(urls)])
+        else:
+            setattr(row, job.field, job.result_url)
+
+    async def run_market(self, market: Market) -> int:
+        """Claim and process one round of jobs in parallel. Returns the number claimed."""
+        job_ids = await run_in_threadpool(self.claim, market)
+        if job_ids:
+            await asyncio.gather(*(self.process(market, job_id) for job_id in job_ids))
+        return len(job_ids)
+
+    async def drain(self, market: Market) -> int:
+        """Process due jobs of one market until no full round remains"""
+        total = 0
+        while True:
+            claimed = await self.run_market(market)
+            total += claimed
+            if claimed < self.concurrency:
+                return total
+
+    # ==================== Background loop ====================
+
+    def notify(self) -> None:
+        """Wake the background loop now instead of waiting for the next poll"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        """Background loop: process every market on wakeup or poll interval"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            for market in Market:
+                try:
+                    await self.drain(market)
+                except Exception as e:
+                    logger.error(f"❌ Image jobs failed for {market.value.upper()}: {e}")
+
+    def start(self) -> None:
+        """Start the in-process workers (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Image job workers started ({self.concurrency} at once)")
+
+    async def stop(self) -> None:
+        """Stop the background loop. Unfinished jobs are picked up after their lease."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+            self._wakeup = None
+
+
+# Global queue instance
+image_job_queue = ImageJobQueue(
+    concurrency=settings.image_jobs.concurrency,
+    poll_interval_seconds=settings.image_jobs.poll_interval_seconds,
+    max_attempts=settings.image_jobs.max_attempts,
+    lease_seconds=settings.image_jobs.lease_seconds
+)
+
+
+def main():
+    """Standalone worker entry point: process due jobs once, or keep polling with --loop"""
+    parser = argparse.ArgumentParser(description="Process images uploaded in the admin")
+    parser.add_argument("--loop", action="store_true", help="Keep polling every interval")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        while True:
+            for market in Market:
+                try:
+                    await image_job_queue.drain(market)
+                except Exception as e:
+                    logger.error(f"❌ Image jobs failed for {market.value.upper()}: {e}")
+            if not args.loop:
+                break
+            await asyncio.sleep(image_job_queue.poll_interval_seconds)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
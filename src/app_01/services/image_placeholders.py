@@ -0,0 +1,69 @@
+"""
+Image Placeholder Backfill
+Computes the inline placeholder and dominant color for images already in static/uploads
+"""
+
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import logging
+import os
+
+from ..utils.image_upload import ImageUploader, image_uploader
+from ..utils.image_processing import save_placeholder
+from .image_variants import source_images
+
+logger = logging.getLogger(__name__)
+
+# Upload folders of product, SKU variant and banner images (admin and API names)
+PLACEHOLDER_CATEGORIES = ["product", "products", "banner", "banners"]
+
+
+def backfill(
+    uploader: ImageUploader = image_uploader,
+    categories: Optional[list] = None,
+    force: bool = False,
+    workers: int = 2
+) -> dict:
+    """Save missing placeholders. Returns counts of generated, skipped and failed images."""
+    counts = {"generated": 0, "skipped": 0, "failed": 0}
+    pending = []
+    for path in source_images(uploader.upload_dir, categories or PLACEHOLDER_CATEGORIES):
+        if not force and uploader.has_placeholder(path):
+            counts["skipped"] += 1
+        else:
+            pending.append(path)
+
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as executor:
+        # Workers open the files themselves: only paths cross the process boundary
+        futures = {executor.submit(save_placeholder, str(path), str(path)): path for path in pending}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                counts["failed"] += 1
+                logger.error(f"❌ Could not build placeholder for {futures[future]}: {e}")
+                continue
+            counts["generated"] += 1
+    return counts
+
+
+def main():
+    """Standalone entry point: backfill placeholders for existing uploads"""
+    parser = argparse.ArgumentParser(description="Generate image placeholders and dominant colors for existing uploads")
+    parser.add_argument("--upload-dir", default="static/uploads", help="Uploads root")
+    parser.add_argument(
+        "--category", action="append",
+        help=f"Only this upload folder (repeatable). Default: {', '.join(PLACEHOLDER_CATEGORIES)}"
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild placeholders that already exist")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = backfill(ImageUploader(args.upload_dir), args.category, args.force, args.workers)
+    logger.info(f"Placeholders: {counts['generated']} generated, {counts['skipped']} up to date, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Image Variant Backfill
+Regenerates the responsive variant ladder for images already in static/uploads
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import logging
+import os
+
+from ..utils.image_upload import ImageUploader, image_uploader, DERIVED_NAME
+from ..utils.image_processing import save_variant_ladder
+
+logger = logging.getLogger(__name__)
+
+
+def source_images(upload_dir: Path, categories: Optional[list] = None) -> Iterator[Path]:
+    """Uploaded originals under ``upload_dir`` (derived files are skipped)"""
+    folders = [upload_dir / category for category in categories] if categories else [upload_dir]
+    for folder in folders:
+        for path in sorted(folder.rglob("*")):
+            if (
+                path.is_file()
+                and path.suffix.lower() in ImageUploader.ALLOWED_EXTENSIONS
+                and not DERIVED_NAME.search(path.stem)
+            ):
+                yield path
+
+
+def backfill(
+    uploader: ImageUploader = image_uploader,
+    categories: Optional[list] = None,
+    force: bool = False,
+    workers: int = 2
+) -> dict:
+    """Generate missing variant ladders. Returns counts of generated, skipped and failed images."""
+    formats = uploader.variant_formats()
+    counts = {"generated": 0, "skipped": 0, "failed": 0}
+    pending = []
+    for path in source_images(uploader.upload_dir, categories):
+        if not force and uploader.has_variants(path):
+            counts["skipped"] += 1
+        else:
+            pending.append(path)
+
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as executor:
+        # A few chunks at a time so large stores are not read into memory at once
+        chunk = max(workers, 1) * 4
+        for start in range(0, len(pending), chunk):
+            futures = {
+                executor.submit(save_variant_ladder, path.read_bytes(), str(path), ImageUploader.VARIANT_WIDTHS, formats): path
+                for path in pending[start:start + chunk]
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    counts["failed"] += 1
+                    logger.error(f"❌ Could not build variants for {futures[future]}: {e}")
+                    continue
+                counts["generated"] += 1
+                logger.info(f"✅ Built variants for {futures[future]}")
+    return counts
+
+
+def main():
+    """Standalone entry point: backfill variants for existing uploads"""
+    parser = argparse.ArgumentParser(description="Generate responsive image variants for existing uploads")
+    parser.add_argument("--upload-dir", default="static/uploads", help="Uploads root")
+    parser.add_argument("--category", action="append", help="Only this upload folder (repeatable), e.g. product")
+    parser.add_argument("--force", action="store_true", help="Rebuild variants that already exist")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = backfill(ImageUploader(args.upload_dir), args.category, args.force, args.workers)
+    logger.info(f"Variants: {counts['generated']} generated, {counts['skipped']} up to date, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Order Events
+Outbox event types published by the order flow and their side-effect handlers
+"""
+
+from sqlalchemy.orm import Session
+import logging
+
+from .outbox_dispatcher import outbox_dispatcher
+from ..db.market_db import Market
+from ..models.orders.outbox_event import OutboxEvent
+from ..models.users.user_notification import UserNotification
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+
+# Handlers run inside the dispatcher's transaction and must not commit:
+# their writes commit together with the event being marked delivered.
+# Daily order stats are not a handler: services.order_stats updates them in
+# the order's own transaction.
+
+
+@outbox_dispatcher.handler(ORDER_CREATED)
+def send_order_created_notification(db: Session, event: OutboxEvent, market: Market) -> None:
+    """In-app notification for the customer (skipped if already sent)"""
+    payload = event.payload
+    order_id = payload["order_id"]
+
+    exists = db.query(UserNotification.id).filter(
+        UserNotification.order_id == order_id,
+        UserNotification.notification_type == "order"
+    ).first()
+    if exists:
+        return
+
+    db.add(UserNotification(
+        user_id=payload["user_id"],
+        notification_type="order",
+        title=f"Заказ {payload['order_number']} оформлен",
+        message=f"Сумма заказа: {payload['total_amount']} {payload.get('currency', '')}".strip(),
+        order_id=order_id,
+        metadata_json={"order_id": order_id}
+    ))
+
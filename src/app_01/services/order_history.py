@@ -0,0 +1,126 @@
+"""
+Order History
+Keyset-paginated order summaries (header, item count, first-item thumbnail)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+import base64
+
+from ..models.orders.order import Order, OrderStatus
+from ..models.orders.order_item import OrderItem
+from ..models.products.sku import SKU
+from ..models.products.product import Product
+
+
+def encode_cursor(order_date: datetime, order_id: int) -> str:
+    """Opaque cursor for the (order_date, id) position of an order"""
+    raw = f"{order_date.isoformat()}|{order_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor from encode_cursor(). Raises HTTPException 400 if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_date, order_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return datetime.fromisoformat(order_date), int(order_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def get_order_summaries(
+    db: Session,
+    user_id: int,
+    status_filter: Optional[OrderStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    One page of a user's orders, newest first, without loading order items
+
+    Item count and first-item thumbnail come from correlated subqueries, so
+    the page is a single query served by the (user_id, order_date) index.
+    Pages continue from ``cursor`` (keyset on order_date, id); ``offset`` is
+    only honoured when no cursor is given.
+
+    Returns:
+        {"orders": [...], "next_cursor": str | None, "has_more": bool}
+    """
+    items_count = select(func.count(OrderItem.id)).where(
+        OrderItem.order_id == Order.id
+    ).correlate(Order).scalar_subquery()
+
+    first_item_thumbnail = select(
+        func.coalesce(SKU.variant_image, Product.main_image)
+    ).select_from(OrderItem).join(
+        SKU, SKU.id == OrderItem.sku_id
+    ).join(
+        Product, Product.id == SKU.product_id
+    ).where(
+        OrderItem.order_id == Order.id
+    ).order_by(OrderItem.id).limit(1).correlate(Order).scalar_subquery()
+
+    first_item_name = select(OrderItem.product_name).where(
+        OrderItem.order_id == Order.id
+    ).order_by(OrderItem.id).limit(1).correlate(Order).scalar_subquery()
+
+    query = db.query(
+        Order.id,
+        Order.order_number,
+        Order.status,
+        Order.total_amount,
+        Order.currency,
+        Order.order_date,
+        Order.delivered_date,
+        Order.delivery_address,
+        items_count.label("items_count"),
+        first_item_name.label("first_item_name"),
+        first_item_thumbnail.label("first_item_thumbnail")
+    ).filter(Order.user_id == user_id)
+
+    if status_filter is not None:
+        query = query.filter(Order.status == status_filter)
+
+    if cursor:
+        order_date, order_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Order.order_date, Order.id) < tuple_(order_date, order_id))
+
+    query = query.order_by(Order.order_date.desc(), Order.id.desc())
+    if offset and not cursor:
+        query = query.offset(offset)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    orders: List[Dict[str, Any]] = [
+        {
+            "id": row.id,
+            "order_number": row.order_number,
+            "status": row.status.value if isinstance(row.status, OrderStatus) else row.status,
+            "total_amount": row.total_amount,
+            "currency": row.currency,
+            "order_date": row.order_date,
+            "delivery_date": row.delivered_date,
+            "delivery_address": row.delivery_address,
+            "items_count": row.items_count or 0,
+            "first_item_name": row.first_item_name,
+            "first_item_thumbnail": row.first_item_thumbnail,
+        }
+        for row in rows
+    ]
+
+    next_cursor = None
+    if has_more and rows and rows[-1].order_date is not None:
+        next_cursor = encode_cursor(rows[-1].order_date, rows[-1].id)
+
+    return {"orders": orders, "next_cursor": next_cursor, "has_more": has_more}
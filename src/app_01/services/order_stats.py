@@ -0,0 +1,247 @@
+"""
+Order Stats
+Incremental maintenance of the daily order_admin_stats rows, bucketed by market timezone
+"""
+
+from typing import Dict, Optional
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import argparse
+import logging
+
+from ..db.market_db import db_manager, Market, get_market_config
+from ..models.orders.order import Order, OrderStatus
+from ..models.admins.order_management.order_admin_stats import OrderAdminStats
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = (
+    "today_orders_count",
+    "today_orders_pending",
+    "today_orders_processing",
+    "today_orders_shipped",
+    "today_orders_delivered",
+    "today_orders_cancelled",
+    "today_sales_total",
+    "today_sales_count",
+)
+
+# Statuses without a column of their own (confirmed, returned) only count in today_orders_count
+STATUS_COLUMNS = {
+    OrderStatus.PENDING: "today_orders_pending",
+    OrderStatus.PROCESSING: "today_orders_processing",
+    OrderStatus.SHIPPED: "today_orders_shipped",
+    OrderStatus.DELIVERED: "today_orders_delivered",
+    OrderStatus.CANCELLED: "today_orders_cancelled",
+}
+
+# column -> delta
+StatsDelta = Dict[str, float]
+
+
+def _as_market(market) -> Market:
+    if isinstance(market, Market):
+        return market
+    # Sessions not opened through db_manager (scripts, tests) use the default market
+    return Market(market) if market else Market.KG
+
+
+def market_day(order_date: Optional[datetime], market: Market) -> date:
+    """Calendar day of an order in the market's local time (naive datetimes are UTC)"""
+    if order_date is None:
+        order_date = datetime.now(timezone.utc)
+    elif order_date.tzinfo is None:
+        order_date = order_date.replace(tzinfo=timezone.utc)
+    return order_date.astimezone(ZoneInfo(get_market_config(market)["timezone"])).date()
+
+
+def _status_delta(status: Optional[OrderStatus], total_amount: float, sign: int) -> StatsDelta:
+    """Counters contributed by one order in the given status"""
+    delta: StatsDelta = {}
+    column = STATUS_COLUMNS.get(status)
+    if column:
+        delta[column] = sign
+    if status == OrderStatus.DELIVERED:
+        delta["today_sales_total"] = sign * (total_amount or 0.0)
+        delta["today_sales_count"] = sign
+    return delta
+
+
+def order_created_delta(status: Optional[OrderStatus], total_amount: float) -> StatsDelta:
+    delta = _status_delta(status or OrderStatus.PENDING, total_amount, 1)
+    delta["today_orders_count"] = 1
+    return delta
+
+
+def status_changed_delta(old_status: Optional[OrderStatus], new_status: OrderStatus, total_amount: float) -> StatsDelta:
+    delta = _status_delta(old_status, total_amount, -1)
+    for column, value in _status_delta(new_status, total_amount, 1).items():
+        delta[column] = delta.get(column, 0) + value
+    return delta
+
+
+def _merge(target: Dict[date, StatsDelta], day: date, delta: StatsDelta) -> None:
+    bucket = target.setdefault(day, {})
+    for column, value in delta.items():
+        bucket[column] = bucket.get(column, 0) + value
+
+
+def _derived(values: Dict[str, object]) -> Dict[str, object]:
+    """avg_order_value / completion_rate as expressions over the given counters"""
+    return {
+        "avg_order_value": case(
+            (values["today_sales_count"] > 0, values["today_sales_total"] / values["today_sales_count"]),
+            else_=0.0
+        ),
+        "completion_rate": case(
+            (values["today_orders_count"] > 0, values["today_orders_delivered"] * 100.0 / values["today_orders_count"]),
+            else_=0.0
+        ),
+    }
+
+
+def upsert_daily_stats(connection, day: date, delta: StatsDelta, replace: bool = False) -> None:
+    """
+    Add ``delta`` to the day's row in one ``INSERT ... ON CONFLICT (date) DO UPDATE``
+
+    With ``replace`` the counters are overwritten instead (used by the backfill).
+    """
+    table = OrderAdminStats.__table__
+    counters = {column: delta.get(column, 0) for column in COUNTER_COLUMNS}
+    dialect = connection.dialect.name
+
+    if dialect not in ("postgresql", "sqlite"):
+        _update_daily_stats(connection, day, counters, replace)
+        return
+
+    insert = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+    sales_count = counters["today_sales_count"]
+    orders_count = counters["today_orders_count"]
+    insert = insert.values(
+        date=day,
+        avg_order_value=counters["today_sales_total"] / sales_count if sales_count > 0 else 0.0,
+        completion_rate=counters["today_orders_delivered"] * 100.0 / orders_count if orders_count > 0 else 0.0,
+        **counters
+    )
+
+    if replace:
+        new_values = {column: insert.excluded[column] for column in COUNTER_COLUMNS}
+    else:
+        new_values = {
+            column: func.coalesce(table.c[column], 0) + insert.excluded[column]
+            for column in COUNTER_COLUMNS
+        }
+    set_ = dict(new_values, last_updated=func.now(), **_derived(new_values))
+    connection.execute(insert.on_conflict_do_update(index_elements=[table.c.date], set_=set_))
+
+
+def _update_daily_stats(connection, day: date, counters: StatsDelta, replace: bool) -> None:
+    """Fallback for dialects without ON CONFLICT: update (or insert), then refresh the ratios"""
+    table = OrderAdminStats.__table__
+    if replace:
+        new_values = counters
+    else:
+        new_values = {column: func.coalesce(table.c[column], 0) + value for column, value in counters.items()}
+    result = connection.execute(table.update().where(table.c.date == day).values(**new_values))
+    if not result.rowcount:
+        connection.execute(table.insert().values(date=day, **counters))
+    connection.execute(table.update().where(table.c.date == day).values(
+        **_derived({column: table.c[column] for column in COUNTER_COLUMNS})
+    ))
+
+
+# ==================== Write hooks ====================
+
+@event.listens_for(Session, "after_flush")
+def _apply_order_stats(session: Session, flush_context) -> None:
+    """Apply created / status-changed / deleted orders to their day's row in the same transaction"""
+    orders = [obj for obj in session.new if isinstance(obj, Order)]
+    orders += [obj for obj in session.dirty if isinstance(obj, Order)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Order)]
+    if not orders and not deleted:
+        return
+
+    market = _as_market(session.info.get("market"))
+    deltas: Dict[date, StatsDelta] = {}
+    for order in orders:
+        if order in session.new:
+            # order_date is a server default: not loaded yet, but it is "now"
+            day = market_day(order.__dict__.get("order_date"), market)
+            _merge(deltas, day, order_created_delta(order.status, order.total_amount))
+            continue
+        history = inspect(order).attrs.status.history
+        if not history.added:
+            continue
+        old_status = history.deleted[0] if history.deleted else None
+        new_status = history.added[0]
+        if old_status == new_status:
+            continue
+        _merge(deltas, market_day(order.order_date, market), status_changed_delta(old_status, new_status, order.total_amount))
+    for order in deleted:
+        delta = {column: -value for column, value in order_created_delta(order.status, order.total_amount).items()}
+        _merge(deltas, market_day(order.order_date, market), delta)
+
+    connection = session.connection()
+    for day, delta in deltas.items():
+        if any(delta.values()):
+            upsert_daily_stats(connection, day, delta)
+
+
+# ==================== Backfill ====================
+
+def backfill_order_stats(db: Session, market: Market, since: Optional[date] = None, until: Optional[date] = None) -> int:
+    """
+    Recompute the daily rows of [since, until] from the orders table (no commit)
+
+    Orders are streamed and bucketed by market-local day; rows in the range
+    without any orders are removed. Returns the number of days written.
+    """
+    tz = ZoneInfo(get_market_config(market)["timezone"])
+    query = db.query(Order.order_date, Order.status, Order.total_amount)
+    if since is not None:
+        query = query.filter(Order.order_date >= datetime.combine(since, time.min, tz).astimezone(timezone.utc))
+    if until is not None:
+        query = query.filter(Order.order_date < datetime.combine(until + timedelta(days=1), time.min, tz).astimezone(timezone.utc))
+
+    totals: Dict[date, StatsDelta] = {}
+    for order_date, status, total_amount in query.yield_per(1000):
+        _merge(totals, market_day(order_date, market), order_created_delta(status, total_amount))
+
+    stale = db.query(OrderAdminStats)
+    if since is not None:
+        stale = stale.filter(OrderAdminStats.date >= since)
+    if until is not None:
+        stale = stale.filter(OrderAdminStats.date <= until)
+    if totals:
+        stale = stale.filter(OrderAdminStats.date.notin_(list(totals)))
+    stale.delete(synchronize_session=False)
+
+    connection = db.connection()
+    for day, counters in totals.items():
+        upsert_daily_stats(connection, day, counters, replace=True)
+    return len(totals)
+
+
+def main():
+    """Standalone entry point: rebuild order_admin_stats from order history"""
+    parser = argparse.ArgumentParser(description="Backfill order_admin_stats from the orders table")
+    parser.add_argument("--market", choices=[market.value for market in Market], help="Only this market (default: all)")
+    parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    markets = [Market(args.market)] if args.market else list(Market)
+    for market in markets:
+        session_factory = db_manager.get_session_factory(market)
+        with session_factory() as db:
+            days = backfill_order_stats(db, market, args.since, args.until)
+            db.commit()
+        logger.info(f"✅ Rebuilt {days} days of order stats for {market.value.upper()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Order Status Stream
+Order status history recording and Server-Sent Events fan-out to customers
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+from fastapi import Request
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.orders.order import Order, OrderStatus
+from ..models.orders.order_status_history import OrderStatusHistory
+
+logger = logging.getLogger(__name__)
+
+SESSION_EVENTS_KEY = "order_status_events"
+
+
+class StreamLimitExceeded(Exception):
+    """This worker already serves the maximum number of streams"""
+
+
+def _market_value(market: Any) -> Optional[str]:
+    return market.value if isinstance(market, Market) else market
+
+
+def format_sse(event_data: Dict[str, Any]) -> str:
+    """Serialize a status event as an SSE message (id = status history id)"""
+    return f"id: {event_data['id']}\nevent: order_status\ndata: {json.dumps(event_data, default=str)}\n\n"
+
+
+class OrderStatusBroker:
+    """
+    In-process pub/sub of order status events, keyed by (market, user_id).
+
+    Each stream owns a bounded asyncio.Queue. A stream whose queue is full
+    is closed instead of silently dropping events; the client reconnects
+    with Last-Event-ID and replays what it missed.
+    """
+
+    def __init__(self, max_streams: int = 1000, queue_size: int = 100):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._subscribers: Dict[Tuple[Optional[str], int], Set[asyncio.Queue]] = {}
+        self._active = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def active_streams(self) -> int:
+        return self._active
+
+    def subscribe(self, market: Any, user_id: int) -> asyncio.Queue:
+        """Register a stream (call from the event loop)"""
+        if self._active >= self.max_streams:
+            raise StreamLimitExceeded()
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault((_market_value(market), user_id), set()).add(queue)
+        self._active += 1
+        return queue
+
+    def unsubscribe(self, market: Any, user_id: int, queue: asyncio.Queue) -> None:
+        key = (_market_value(market), user_id)
+        queues = self._subscribers.get(key)
+        if queues and queue in queues:
+            queues.discard(queue)
+            self._active -= 1
+            if not queues:
+                del self._subscribers[key]
+
+    def publish(self, event_data: Dict[str, Any]) -> None:
+        """Fan an event out to the user's streams. Safe to call from any thread."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(event_data)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, event_data)
+
+    def _deliver(self, event_data: Dict[str, Any]) -> None:
+        key = (event_data.get("market"), event_data.get("user_id"))
+        for queue in list(self._subscribers.get(key, ())):
+            try:
+                queue.put_nowait(event_data)
+            except asyncio.QueueFull:
+                # Slow consumer: end its stream, it resumes from Last-Event-ID
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+# ==================== Status history recording ====================
+
+@event.listens_for(Order.status, "set", active_history=True)
+def _load_previous_status(target, value, oldvalue, initiator) -> None:
+    """active_history: load an expired status before it is replaced, so the
+    flush below knows the old status"""
+
+@event.listens_for(Session, "before_flush")
+def _record_status_changes(session: Session, flush_context, instances) -> None:
+    """Add an OrderStatusHistory row for every new order and status change"""
+    recorded = {
+        (id(obj.order) if obj.order is not None else obj.order_id, obj.new_status)
+        for obj in session.new if isinstance(obj, OrderStatusHistory)
+    }
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Order):
+            continue
+        if obj in session.new:
+            old_status, new_status = None, obj.status or OrderStatus.PENDING
+        else:
+            history = inspect(obj).attrs.status.history
+            if not history.added:
+                continue
+            new_status = history.added[0]
+            old_status = history.deleted[0] if history.deleted else None
+            if new_status == old_status:
+                continue
+        if (id(obj), new_status) in recorded or (obj.id, new_status) in recorded:
+            continue
+        session.add(OrderStatusHistory(order=obj, old_status=old_status, new_status=new_status))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_status_events(session: Session, flush_context) -> None:
+    """Queue stream events for flushed history rows; published on commit"""
+    histories = [obj for obj in session.new if isinstance(obj, OrderStatusHistory)]
+    if not histories:
+        return
+
+    market = _market_value(session.info.get("market"))
+    use_notify = (
+        settings.order_stream.pg_listen_enabled
+        and session.get_bind().dialect.name == "postgresql"
+    )
+    for history in histories:
+        order = history.order if history.order is not None else session.get(Order, history.order_id)
+        if order is None:
+            continue
+        event_data = {
+            "id": history.id,
+            "market": market,
+            "user_id": order.user_id,
+            "order_id": order.id,
+            "order_number": order.order_number,
+            "old_status": history.old_status.value if history.old_status else None,
+            "new_status": history.new_status.value,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if use_notify:
+            # NOTIFY is transactional: every worker's listener receives it on commit
+            session.connection().execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.order_stream.pg_channel, "payload": json.dumps(event_data)}
+            )
+        else:
+            session.info.setdefault(SESSION_EVENTS_KEY, []).append(event_data)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_status_events(session: Session) -> None:
+    for event_data in session.info.pop(SESSION_EVENTS_KEY, []):
+        order_status_broker.publish(event_data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_status_events(session: Session) -> None:
+    session.info.pop(SESSION_EVENTS_KEY, None)
+
+
+# ==================== Cross-worker bridge ====================
+
+class PgNotifyListener:
+    """
+    LISTENs on a channel of every PostgreSQL market database and hands the
+    JSON notifications to ``broker.publish`` (the order status broker, or
+    any object with that method). One daemon thread and one dedicated
+    connection per market.
+    """
+
+    def __init__(self, broker: Any, channel: str, poll_timeout: float = 5.0, label: str = "Order status"):
+        self.broker = broker
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.label = label
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        # Fresh stop flag per start: threads of a previous start keep their own (set) flag
+        self._stop = threading.Event()
+        for market in Market:
+            engine = db_manager.get_engine(market)
+            if engine.dialect.name != "postgresql":
+                continue
+            thread = threading.Thread(
+                target=self._listen, args=(market, engine, self._stop),
+                name=f"{self.label.lower().replace(' ', '-')}-listen-{market.value}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        if self._threads:
+            logger.info(f"✅ {self.label} LISTEN bridge started on '{self.channel}'")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._threads = []
+
+    def _listen(self, market: Market, engine, stop: threading.Event) -> None:
+        retry_delay = 1.0
+        while not stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                connection = raw.driver_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                retry_delay = 1.0
+
+                while not stop.is_set():
+                    if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        try:
+                            self.broker.publish(json.loads(notification.payload))
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed {self.label.lower()} notification: {notification.payload!r}")
+            except Exception as e:
+                logger.error(f"❌ {self.label} LISTEN failed for {market.value.upper()}: {e}")
+                stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 60.0)
+            finally:
+                if raw is not None:
+                    # Autocommit was switched on: never hand this connection back to the pool
+                    raw.invalidate()
+                    raw.close()
+
+
+# ==================== Streaming ====================
+
+def load_status_events_since(db: Session, market: Any, user_id: int, last_event_id: int, limit: int = 500) -> List[Dict[str, Any]]:
+    """Status events of the user's orders after last_event_id (for Last-Event-ID resume)"""
+    rows = db.query(OrderStatusHistory, Order.user_id, Order.order_number).join(
+        Order, Order.id == OrderStatusHistory.order_id
+    ).filter(
+        Order.user_id == user_id,
+        OrderStatusHistory.id > last_event_id
+    ).order_by(OrderStatusHistory.id).limit(limit).all()
+
+    return [
+        {
+            "id": history.id,
+            "market": _market_value(market),
+            "user_id": order_user_id,
+            "order_id": history.order_id,
+            "order_number": order_number,
+            "old_status": history.old_status.value if history.old_status else None,
+            "new_status": history.new_status.value,
+            "created_at": history.created_at.isoformat() if history.created_at else None,
+        }
+        for history, order_user_id, order_number in rows
+    ]
+
+
+async def stream_order_status(
+    request: Request,
+    queue: asyncio.Queue,
+    market: Market,
+    user_id: int,
+    replay: List[Dict[str, Any]],
+    heartbeat_seconds: float
+) -> AsyncIterator[str]:
+    """
+    SSE body: replayed events, then live events with periodic heartbeats
+
+    The queue must be subscribed before ``replay`` is loaded so no event
+    falls between the two; live events already replayed are skipped.
+    """
+    last_id = 0
+    try:
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+        for event_data in replay:
+            last_id = event_data["id"]
+            yield format_sse(event_data)
+
+        while True:
+            try:
+                event_data = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": heartbeat\n\n"
+                continue
+            if event_data is None:
+                break  # Dropped as a slow consumer
+            if event_data["id"] <= last_id:
+                continue
+            last_id = event_data["id"]
+            yield format_sse(event_data)
+    finally:
+        order_status_broker.unsubscribe(market, user_id, queue)
+
+
+# Global instances
+order_status_broker = OrderStatusBroker(
+    max_streams=settings.order_stream.max_streams_per_worker,
+    queue_size=settings.order_stream.queue_size
+)
+order_status_listener = PgNotifyListener(order_status_broker, settings.order_stream.pg_channel)
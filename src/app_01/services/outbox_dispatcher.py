@@ -0,0 +1,353 @@
+"""
+Outbox Dispatcher
+Asynchronous delivery of transactional outbox events to registered handlers
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import argparse
+import asyncio
+import logging
+import time
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.orders.outbox_event import OutboxEvent, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+# handler(db, event, market): raise to have the event retried with backoff
+OutboxHandler = Callable[[Session, OutboxEvent, Market], None]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite returns naive datetimes for timezone-aware columns"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def publish_event(
+    db: Session,
+    event_type: str,
+    payload: Dict[str, Any],
+    aggregate_type: Optional[str] = None,
+    aggregate_id: Optional[int] = None
+) -> OutboxEvent:
+    """
+    Add an outbox event to the caller's transaction (not committed here)
+
+    The event becomes visible to the dispatcher only if the caller's
+    transaction commits, so side effects never run for rolled-back changes.
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+        status=OutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=_utcnow()
+    )
+    db.add(event)
+    return event
+
+
+class OutboxDispatcher:
+    """
+    Delivers pending outbox events to handlers registered per event type.
+
+    Events are claimed in batches (status PROCESSING with a lease in
+    ``next_attempt_at``) so several dispatchers can share a database.
+    Failed events are retried with exponential backoff and marked FAILED
+    after ``max_attempts``. Delivery is at-least-once: handlers must be
+    idempotent. Delivered events older than ``delivered_retention_hours``
+    are purged every ``purge_interval_seconds``; failed events are kept
+    for inspection.
+    """
+
+    def __init__(
+        self,
+        poll_interval_seconds: float = 1.0,
+        batch_size: int = 100,
+        max_attempts: int = 8,
+        backoff_base_seconds: float = 2.0,
+        backoff_max_seconds: float = 600.0,
+        lease_seconds: int = 60,
+        delivered_retention_hours: float = 168.0,
+        purge_interval_seconds: float = 3600.0,
+        purge_batch_size: int = 1000
+    ):
+        self.poll_interval_seconds = poll_interval_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.delivered_retention = timedelta(hours=delivered_retention_hours)
+        self.purge_interval_seconds = purge_interval_seconds
+        self.purge_batch_size = purge_batch_size
+        self._last_purge: Optional[float] = None
+        self.handlers: Dict[str, List[OutboxHandler]] = {}
+        self.metrics: Dict[str, Any] = {
+            "batches": 0,
+            "delivered": 0,
+            "retried": 0,
+            "failed": 0,
+            "last_lag_seconds": None,
+            "max_lag_seconds": 0.0,
+            "purged": 0,
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ==================== Handler registry ====================
+
+    def register(self, event_type: str, handler: OutboxHandler) -> None:
+        """Register a handler for an event type"""
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def handler(self, event_type: str):
+        """Decorator form of register()"""
+        def decorator(func: OutboxHandler) -> OutboxHandler:
+            self.register(event_type, func)
+            return func
+        return decorator
+
+    # ==================== Delivery ====================
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """Exponential backoff delay before retry number ``attempts``"""
+        return min(self.backoff_base_seconds * (2 ** (attempts - 1)), self.backoff_max_seconds)
+
+    def claim_batch(self, db: Session) -> List[OutboxEvent]:
+        """Claim up to batch_size due events (pending, or processing with an expired lease)"""
+        now = _utcnow()
+        query = db.query(OutboxEvent).filter(
+            or_(
+                and_(OutboxEvent.status == OutboxStatus.PENDING, OutboxEvent.next_attempt_at <= now),
+                and_(OutboxEvent.status == OutboxStatus.PROCESSING, OutboxEvent.next_attempt_at <= now)
+            )
+        ).order_by(OutboxEvent.id).limit(self.batch_size)
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        events = query.all()
+        for event in events:
+            event.status = OutboxStatus.PROCESSING
+            event.next_attempt_at = now + self.lease
+        db.commit()
+        return events
+
+    def deliver(self, db: Session, event: OutboxEvent, market: Market) -> bool:
+        """Run all handlers for one claimed event and record the outcome"""
+        try:
+            for handler in self.handlers.get(event.event_type, []):
+                handler(db, event, market)
+        except Exception as e:
+            db.rollback()
+            event.attempts = (event.attempts or 0) + 1
+            event.last_error = f"{type(e).__name__}: {e}"[:1000]
+            if event.attempts >= self.max_attempts:
+                event.status = OutboxStatus.FAILED
+                self.metrics["failed"] += 1
+                logger.error(f"❌ Outbox event {event.id} ({event.event_type}) failed permanently: {e}")
+            else:
+                event.status = OutboxStatus.PENDING
+                event.next_attempt_at = _utcnow() + timedelta(seconds=self.backoff_seconds(event.attempts))
+                self.metrics["retried"] += 1
+                logger.warning(f"⚠️ Outbox event {event.id} ({event.event_type}) attempt {event.attempts} failed: {e}")
+            db.commit()
+            return False
+
+        now = _utcnow()
+        event.status = OutboxStatus.DELIVERED
+        event.delivered_at = now
+        db.commit()
+
+        created_at = _as_utc(event.created_at)
+        if created_at is not None:
+            lag = max((now - created_at).total_seconds(), 0.0)
+            self.metrics["last_lag_seconds"] = lag
+            self.metrics["max_lag_seconds"] = max(self.metrics["max_lag_seconds"], lag)
+        self.metrics["delivered"] += 1
+        return True
+
+    def dispatch_batch(self, db: Session, market: Market) -> int:
+        """Claim and deliver one batch. Returns the number of events claimed."""
+        events = self.claim_batch(db)
+        for event in events:
+            self.deliver(db, event, market)
+        if events:
+            self.metrics["batches"] += 1
+        return len(events)
+
+    def dispatch_market(self, market: Market) -> int:
+        """Deliver due events of one market until no full batch remains"""
+        session_factory = db_manager.get_session_factory(market)
+        total = 0
+        with session_factory() as db:
+            while True:
+                claimed = self.dispatch_batch(db, market)
+                total += claimed
+                if claimed < self.batch_size:
+                    return total
+
+    def get_backlog(self, db: Session) -> Dict[str, Any]:
+        """Pending event count and the age of the oldest pending event (queue lag)"""
+        pending = db.query(OutboxEvent).filter(
+            OutboxEvent.status.in_([OutboxStatus.PENDING, OutboxStatus.PROCESSING])
+        )
+        oldest = pending.order_by(OutboxEvent.id).first()
+        oldest_created = _as_utc(oldest.created_at) if oldest else None
+        return {
+            "pending": pending.count(),
+            "oldest_pending_age_seconds": (_utcnow() - oldest_created).total_seconds() if oldest_created else 0.0,
+        }
+
+    # ==================== Retention ====================
+
+    def purge_delivered(self, db: Session) -> int:
+        """
+        Delete delivered events older than the retention window, in batches
+        of purge_batch_size with a commit per batch so no single transaction
+        holds locks on a large part of the table. Returns the number of rows removed.
+        """
+        cutoff = _utcnow() - self.delivered_retention
+        total = 0
+        while True:
+            ids = [row.id for row in db.query(OutboxEvent.id).filter(
+                OutboxEvent.status == OutboxStatus.DELIVERED,
+                OutboxEvent.delivered_at < cutoff
+            ).order_by(OutboxEvent.id).limit(self.purge_batch_size)]
+            if not ids:
+                break
+            db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            total += len(ids)
+            if len(ids) < self.purge_batch_size:
+                break
+        self.metrics["purged"] += total
+        return total
+
+    def purge_market(self, market: Market) -> int:
+        """Purge old delivered events of one market"""
+        session_factory = db_manager.get_session_factory(market)
+        with session_factory() as db:
+            purged = self.purge_delivered(db)
+        if purged:
+            logger.info(f"🧹 Purged {purged} delivered outbox events for {market.value.upper()}")
+        return purged
+
+    def purge_due(self) -> bool:
+        """True once every purge_interval_seconds (and on the first call)"""
+        now = time.monotonic()
+        if self._last_purge is not None and now - self._last_purge < self.purge_interval_seconds:
+            return False
+        self._last_purge = now
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """In-process delivery counters and lag of this worker"""
+        return dict(self.metrics)
+
+    # ==================== Background loop ====================
+
+    def notify(self) -> None:
+        """Wake the background loop now instead of waiting for the next poll"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        """Background loop: dispatch every market on wakeup or poll interval"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            for market in Market:
+                try:
+                    await run_in_threadpool(self.dispatch_market, market)
+                except Exception as e:
+                    logger.error(f"❌ Outbox dispatch failed for {market.value.upper()}: {e}")
+            if self.purge_due():
+                for market in Market:
+                    try:
+                        await run_in_threadpool(self.purge_market, market)
+                    except Exception as e:
+                        logger.error(f"❌ Outbox purge failed for {market.value.upper()}: {e}")
+
+    def start(self) -> None:
+        """Start the in-process dispatcher (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Outbox dispatcher started (poll every {self.poll_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the background loop. Undelivered events stay in the outbox."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+            self._wakeup = None
+
+
+# Global dispatcher instance
+outbox_dispatcher = OutboxDispatcher(
+    poll_interval_seconds=settings.outbox.poll_interval_seconds,
+    batch_size=settings.outbox.batch_size,
+    max_attempts=settings.outbox.max_attempts,
+    backoff_base_seconds=settings.outbox.backoff_base_seconds,
+    backoff_max_seconds=settings.outbox.backoff_max_seconds,
+    lease_seconds=settings.outbox.lease_seconds,
+    delivered_retention_hours=settings.outbox.delivered_retention_hours,
+    purge_interval_seconds=settings.outbox.purge_interval_seconds,
+    purge_batch_size=settings.outbox.purge_batch_size
+)
+
+
+def main():
+    """Standalone worker entry point: dispatch (and purge) once, or keep polling with --loop"""
+    parser = argparse.ArgumentParser(description="Deliver transactional outbox events")
+    parser.add_argument("--loop", action="store_true", help="Keep polling every interval")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Register handlers
+    from . import order_events  # noqa: F401
+
+    while True:
+        for market in Market:
+            try:
+                outbox_dispatcher.dispatch_market(market)
+            except Exception as e:
+                logger.error(f"❌ Outbox dispatch failed for {market.value.upper()}: {e}")
+        if outbox_dispatcher.purge_due():
+            for market in Market:
+                try:
+                    outbox_dispatcher.purge_market(market)
+                except Exception as e:
+                    logger.error(f"❌ Outbox purge failed for {market.value.upper()}: {e}")
+        if not args.loop:
+            break
+        time.sleep(outbox_dispatcher.poll_interval_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+SMS Provider
+Async verification SMS behind a provider interface, with timeouts, bounded concurrency and a circuit breaker
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TWILIO_VERIFY_URL = "https://verify.twilio.com/v2/Services"
+
+
+class SMSProviderError(Exception):
+    """Provider unreachable or failing (counts against the circuit breaker)"""
+
+
+class TwilioVerifyProvider:
+    """
+    Twilio Verify over its REST API with an async HTTP client.
+
+    Twilio generates, sends and checks the codes. 5xx, 429 and network
+    errors raise SMSProviderError; requests Twilio rejects (bad number,
+    no pending verification) return False.
+    """
+
+    name = "Twilio Verify"
+
+    def __init__(self, account_sid: str, auth_token: str, service_sid: str, max_connections: int = 20):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.service_sid = service_sid
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # Connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                auth=(self.account_sid, self.auth_token),
+                limits=httpx.Limits(max_connections=self.max_connections)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def _post(self, path: str, data: dict) -> Optional[dict]:
+        """POST to the Verify service. Returns the JSON body, or None if Twilio rejected the request."""
+        try:
+            response = await self._http().post(f"{TWILIO_VERIFY_URL}/{self.service_sid}/{path}", data=data)
+        except httpx.HTTPError as e:
+            raise SMSProviderError(f"{type(e).__name__}: {e}") from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise SMSProviderError(f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            logger.warning(f"❌ Twilio Verify rejected {path}: HTTP {response.status_code} {response.text[:200]}")
+            return None
+        return response.json()
+
+    async def send_code(self, phone: str) -> bool:
+        body = await self._post("Verifications", {"To": phone, "Channel": "sms"})
+        if body is None:
+            return False
+        logger.info(f"✅ Twilio Verify SMS sent to {phone} - SID: {body.get('sid')}")
+        return True
+
+    async def check_code(self, phone: str, code: str) -> bool:
+        body = await self._post("VerificationCheck", {"To": phone, "Code": code})
+        if body is None:
+            return False
+        if body.get("status") != "approved":
+            logger.warning(f"❌ Twilio Verify code REJECTED for {phone}: Status={body.get('status')}")
+            return False
+        logger.info(f"✅ Twilio Verify code APPROVED for {phone}")
+        return True
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FakeSMSProvider:
+    """Provider that sends nothing and accepts one fixed code (tests and load runs)"""
+
+    name = "Fake"
+
+    def __init__(self, code: str = "123456", latency_seconds: float = 0.0, fail: bool = False):
+        self.code = code
+        self.latency_seconds = latency_seconds
+        self.fail = fail
+        self.sent: List[str] = []
+
+    async def send_code(self, phone: str) -> bool:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.fail:
+            raise SMSProviderError("Fake provider failure")
+        self.sent.append(phone)
+        return True
+
+    async def check_code(self, phone: str, code: str) -> bool:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.fail:
+            raise SMSProviderError("Fake provider failure")
+        return code == self.code
+
+    async def close(self) -> None:
+        pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider.
+
+    Opens after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout_seconds`` one trial call is let through (half-open),
+    which closes the circuit on success or re-opens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout_seconds:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"⚠️ SMS circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self._opened_at = self.clock()
+
+
+class SMSGateway:
+    """
+    Calls the provider without ever holding a request for long.
+
+    Each call is cut off after ``timeout_seconds``; calls beyond
+    ``max_concurrency`` and calls while the circuit is open are not made.
+    In every such case the result is False and the caller falls back to a
+    locally stored verification code.
+    """
+
+    def __init__(self, provider: Any = None, timeout_seconds: float = 3.0, max_concurrency: int = 20,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.provider = provider
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._in_flight = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether a provider is configured (otherwise codes are always local)"""
+        return self.provider is not None
+
+    @property
+    def name(self) -> str:
+        return self.provider.name if self.provider is not None else "Demo"
+
+    async def send_code(self, phone: str) -> bool:
+        """Send a verification code. False means the caller must issue a local code."""
+        return await self._call("send", self.provider.send_code, phone) if self.ready else False
+
+    async def check_code(self, phone: str, code: str) -> bool:
+        """Check a code sent by the provider"""
+        return await self._call("check", self.provider.check_code, phone, code) if self.ready else False
+
+    async def _call(self, action: str, func: Callable[..., Awaitable[bool]], *args) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            logger.warning(f"⚠️ SMS {action} skipped: {self._in_flight} provider calls in flight")
+            return False
+        if not self.breaker.allow():
+            logger.warning(f"⚠️ SMS {action} skipped: circuit open")
+            return False
+
+        self._in_flight += 1
+        try:
+            result = await asyncio.wait_for(func(*args), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            logger.error(f"❌ SMS {action} timed out after {self.timeout_seconds}s")
+            return False
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"❌ SMS {action} failed: {type(e).__name__}: {e}")
+            return False
+        finally:
+            self._in_flight -= 1
+        self.breaker.record_success()
+        return result
+
+    async def close(self) -> None:
+        if self.provider is not None:
+            await self.provider.close()
+
+
+def create_provider(config=None) -> Any:
+    """Provider selected by ``SMS_PROVIDER``; None (demo mode) if Twilio is not configured"""
+    config = config or settings.sms
+    if config.provider == "fake":
+        return FakeSMSProvider(config.fake_code)
+    if config.twilio_account_sid and config.twilio_auth_token and config.twilio_verify_service_sid:
+        return TwilioVerifyProvider(
+            config.twilio_account_sid, config.twilio_auth_token, config.twilio_verify_service_sid,
+            max_connections=config.max_concurrency
+        )
+    return None
+
+
+# Global instance
+sms_gateway = SMSGateway(
+    create_provider(),
+    timeout_seconds=settings.sms.timeout_seconds,
+    max_concurrency=settings.sms.max_concurrency,
+    breaker=CircuitBreaker(settings.sms.breaker_failure_threshold, settings.sms.breaker_reset_seconds)
+)
@@ -0,0 +1,165 @@
+"""
+Sold Count Aggregator
+Write-behind maintenance of products.sold_count from the product_sales_deltas log
+"""
+
+from typing import Dict, Optional
+from collections import defaultdict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import argparse
+import asyncio
+import logging
+import time
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.products.product import Product
+from ..models.products.product_sales_delta import ProductSalesDelta
+
+logger = logging.getLogger(__name__)
+
+
+class SoldCountAggregator:
+    """
+    Rolls pending sales deltas into ``products.sold_count`` in batches.
+
+    Checkout only appends ProductSalesDelta rows, so concurrent orders for
+    a best seller never contend on its product row. Each batch sums the
+    deltas per product, applies one UPDATE per product and deletes the
+    consumed rows in a single transaction. On PostgreSQL the batch is
+    claimed with ``FOR UPDATE SKIP LOCKED`` so several workers can run
+    the aggregator without double counting.
+    """
+
+    def __init__(self, interval_seconds: float = 5.0, batch_size: int = 1000):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def record_sale(db: Session, order_id: int, quantities: Dict[int, int]) -> None:
+        """
+        Append sales deltas for an order to the caller's transaction
+
+        Args:
+            db: Session of the checkout transaction (not committed here)
+            order_id: Order the sale belongs to
+            quantities: product_id -> quantity sold
+        """
+        for product_id, quantity in quantities.items():
+            if quantity:
+                db.add(ProductSalesDelta(product_id=product_id, order_id=order_id, quantity=quantity))
+
+    def flush(self, db: Session) -> int:
+        """
+        Apply one batch of pending deltas
+
+        Returns:
+            Number of delta rows consumed
+        """
+        query = db.query(
+            ProductSalesDelta.id, ProductSalesDelta.product_id, ProductSalesDelta.quantity
+        ).order_by(ProductSalesDelta.id).limit(self.batch_size)
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        rows = query.all()
+        if not rows:
+            return 0
+
+        totals: Dict[int, int] = defaultdict(int)
+        for _, product_id, quantity in rows:
+            totals[product_id] += quantity
+
+        try:
+            # Update in product id order so concurrent aggregators lock rows consistently
+            for product_id in sorted(totals):
+                if totals[product_id]:
+                    db.query(Product).filter(Product.id == product_id).update(
+                        {Product.sold_count: func.coalesce(Product.sold_count, 0) + totals[product_id]},
+                        synchronize_session=False
+                    )
+            db.query(ProductSalesDelta).filter(
+                ProductSalesDelta.id.in_([row.id for row in rows])
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return len(rows)
+
+    def drain(self, db: Session) -> int:
+        """Apply batches until the log is empty. Returns total rows consumed."""
+        total = 0
+        while True:
+            consumed = self.flush(db)
+            total += consumed
+            if consumed < self.batch_size:
+                return total
+
+    def drain_market(self, market: Market) -> int:
+        """Drain the delta log of one market database"""
+        session_factory = db_manager.get_session_factory(market)
+        with session_factory() as db:
+            consumed = self.drain(db)
+        if consumed:
+            logger.info(f"📈 Applied {consumed} sold_count deltas for {market.value.upper()}")
+        return consumed
+
+    async def _run(self) -> None:
+        """Background loop: drain every market each interval"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            for market in Market:
+                try:
+                    await run_in_threadpool(self.drain_market, market)
+                except Exception as e:
+                    logger.error(f"❌ sold_count aggregation failed for {market.value.upper()}: {e}")
+
+    def start(self) -> None:
+        """Start the in-process background loop (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ sold_count aggregator started (every {self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the background loop. Pending deltas stay in the log for the next run."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global aggregator instance
+sold_count_aggregator = SoldCountAggregator(
+    interval_seconds=settings.sold_count_aggregation.interval_seconds,
+    batch_size=settings.sold_count_aggregation.batch_size
+)
+
+
+def main():
+    """Standalone entry point: drain once, or keep draining with --loop"""
+    parser = argparse.ArgumentParser(description="Roll product sales deltas into products.sold_count")
+    parser.add_argument("--loop", action="store_true", help="Keep running every interval")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        for market in Market:
+            try:
+                sold_count_aggregator.drain_market(market)
+            except Exception as e:
+                logger.error(f"❌ sold_count aggregation failed for {market.value.upper()}: {e}")
+        if not args.loop:
+            break
+        time.sleep(sold_count_aggregator.interval_seconds)
+
+
+if __name__ == "__main__":
+    main()
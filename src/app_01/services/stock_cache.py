@@ -0,0 +1,169 @@
+"""
+Stock Cache
+In-memory per-market SKU stock map, updated on stock writes and reconciled with the DB
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import logging
+import threading
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.products.sku import SKU
+
+logger = logging.getLogger(__name__)
+
+SESSION_CHANGES_KEY = "stock_cache_changes"
+
+# sku_id -> (stock, is_active)
+StockEntry = Tuple[int, bool]
+
+
+def _as_market(market) -> Optional[Market]:
+    if isinstance(market, Market) or market is None:
+        return market
+    return Market(market)
+
+
+class StockCache:
+    """
+    SKU availability per market, answered from memory.
+
+    Committed ORM writes to ``SKU.stock`` / ``SKU.is_active`` are applied to
+    the map by the session hooks below; unknown SKUs are loaded on first
+    read in one batched query. A periodic reconcile rebuilds the map from
+    the DB to pick up bulk UPDATEs and writes made by other workers.
+    """
+
+    def __init__(self, reconcile_interval_seconds: float = 30.0):
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self._stock: Dict[Market, Dict[int, StockEntry]] = {market: {} for market in Market}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get_availability(self, db: Session, market: Market, sku_ids: Iterable[int]) -> Dict[int, StockEntry]:
+        """
+        Stock and active flag of the requested SKUs; unknown ids are omitted
+
+        Only SKUs missing from the map cost a (single) DB query.
+        """
+        sku_ids = list(dict.fromkeys(sku_ids))
+        with self._lock:
+            stock_map = self._stock[market]
+            found = {sku_id: stock_map[sku_id] for sku_id in sku_ids if sku_id in stock_map}
+        missing = [sku_id for sku_id in sku_ids if sku_id not in found]
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            rows = db.query(SKU.id, SKU.stock, SKU.is_active).filter(SKU.id.in_(missing)).all()
+            loaded = {row.id: (row.stock or 0, bool(row.is_active)) for row in rows}
+            with self._lock:
+                self._stock[market].update(loaded)
+            found.update(loaded)
+
+        return found
+
+    def apply(self, market: Market, changes: Dict[int, Optional[StockEntry]]) -> None:
+        """Apply committed changes; None drops the entry so the next read reloads it"""
+        with self._lock:
+            stock_map = self._stock[market]
+            for sku_id, entry in changes.items():
+                if entry is None:
+                    stock_map.pop(sku_id, None)
+                else:
+                    stock_map[sku_id] = entry
+
+    def reconcile(self, db: Session, market: Market) -> int:
+        """Rebuild the market's map from the DB. Returns the number of SKUs loaded."""
+        rows = db.query(SKU.id, SKU.stock, SKU.is_active).all()
+        fresh = {row.id: (row.stock or 0, bool(row.is_active)) for row in rows}
+        with self._lock:
+            self._stock[market] = fresh
+        return len(fresh)
+
+    def reconcile_market(self, market: Market) -> int:
+        session_factory = db_manager.get_session_factory(market)
+        with session_factory() as db:
+            return self.reconcile(db, market)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stock = {market: {} for market in Market}
+
+    async def _run(self) -> None:
+        """Background loop: reconcile every market each interval"""
+        while True:
+            await asyncio.sleep(self.reconcile_interval_seconds)
+            for market in Market:
+                try:
+                    await run_in_threadpool(self.reconcile_market, market)
+                except Exception as e:
+                    logger.error(f"❌ Stock cache reconcile failed for {market.value.upper()}: {e}")
+
+    def start(self) -> None:
+        """Start the reconcile loop (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Stock cache reconcile started (every {self.reconcile_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# ==================== Write hooks ====================
+
+@event.listens_for(Session, "after_flush")
+def _collect_stock_changes(session: Session, flush_context) -> None:
+    """Remember flushed stock changes; applied to the cache on commit"""
+    changes = session.info.setdefault(SESSION_CHANGES_KEY, {})
+    for obj in session.new:
+        if isinstance(obj, SKU):
+            changes[obj.id] = (obj.stock or 0, bool(obj.is_active)) if isinstance(obj.stock, int) else None
+    for obj in session.dirty:
+        if not isinstance(obj, SKU):
+            continue
+        state = inspect(obj)
+        if not (state.attrs.stock.history.has_changes() or state.attrs.is_active.history.has_changes()):
+            continue
+        stock = obj.__dict__.get("stock")
+        is_active = obj.__dict__.get("is_active")
+        # SQL expressions (SKU.stock - 1) or unloaded values: reload on next read
+        if isinstance(stock, int) and is_active is not None:
+            changes[obj.id] = (stock, bool(is_active))
+        else:
+            changes[obj.id] = None
+    for obj in session.deleted:
+        if isinstance(obj, SKU):
+            changes[obj.id] = None
+    if not changes:
+        session.info.pop(SESSION_CHANGES_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_stock_changes(session: Session) -> None:
+    changes = session.info.pop(SESSION_CHANGES_KEY, None)
+    market = _as_market(session.info.get("market"))
+    if changes and market is not None:
+        stock_cache.apply(market, changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stock_changes(session: Session) -> None:
+    session.info.pop(SESSION_CHANGES_KEY, None)
+
+
+# Global cache instance
+stock_cache = StockCache(reconcile_interval_seconds=settings.stock_cache.reconcile_interval_seconds)
@@ -0,0 +1,243 @@
+"""
+Token Verification
+Per-worker cache of verified customer access tokens and the revocation set that covers logout and deactivated users
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, inspect, or_, text
+from sqlalchemy.orm import Session
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from ..core.config import settings
+from ..db.market_db import db_manager, Market
+from ..models.users.user import User
+from ..models.users.market_user import UserKG, UserUS
+from ..schemas.auth import VerifyTokenResponse
+from .order_status_stream import PgNotifyListener
+
+logger = logging.getLogger(__name__)
+
+SESSION_REVOCATIONS_KEY = "token_revocations"
+
+# Market implied by the model, for sessions not opened through db_manager
+USER_MODEL_MARKETS = {UserKG: Market.KG, UserUS: Market.US}
+
+
+def _market_value(market: Any) -> Optional[str]:
+    return market.value if isinstance(market, Market) else market
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    """Epoch seconds of a DB timestamp (SQLite returns naive UTC datetimes)"""
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class VerifiedToken(NamedTuple):
+    """What a verified token grants, kept until the token expires"""
+    identity: VerifyTokenResponse
+    market: str
+    user_id: int
+    issued_at: float
+    expires_at: float
+
+
+class VerifiedTokenCache:
+    """
+    LRU of verified access tokens.
+
+    Tokens are signed and carry their own expiry, so a token verified once
+    stays valid until ``exp`` unless its user is revoked (checked on every
+    use, see TokenRevocations).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[VerifiedToken]:
+        with self._lock:
+            verified = self._entries.get(token)
+            if verified is None:
+                return None
+            if verified.expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return verified
+
+    def put(self, token: str, verified: VerifiedToken) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = verified
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenRevocations:
+    """
+    Users whose tokens issued before a point in time are no longer accepted,
+    keyed by (market, user_id).
+
+    Logout and deactivation set ``users.is_active`` to false: committed
+    changes revoke in this worker at once (session hooks below), reach other
+    workers through NOTIFY on PostgreSQL, and are re-read from every market
+    database every ``refresh_interval_seconds`` as a fallback. Entries are
+    dropped once every token issued before them has expired, which keeps
+    the set small.
+    """
+
+    def __init__(self, retention_seconds: float = 1800.0, refresh_interval_seconds: float = 30.0):
+        self.retention_seconds = retention_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._revoked: Dict[Tuple[str, int], float] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def revoke(self, market: Any, user_id: int, revoked_at: Optional[float] = None) -> None:
+        """Reject the user's tokens issued up to ``revoked_at`` (default now)"""
+        key = (_market_value(market), int(user_id))
+        revoked_at = time.time() if revoked_at is None else revoked_at
+        with self._lock:
+            self._revoked[key] = max(revoked_at, self._revoked.get(key, 0.0))
+
+    def is_revoked(self, market: Any, user_id: int, issued_at: float) -> bool:
+        with self._lock:
+            revoked_at = self._revoked.get((_market_value(market), int(user_id)))
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def publish(self, payload: Dict[str, Any]) -> None:
+        """Revocation notified by another worker (PgNotifyListener interface)"""
+        self.revoke(payload["market"], payload["user_id"], payload.get("revoked_at"))
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            for key in [key for key, revoked_at in self._revoked.items() if revoked_at < cutoff]:
+                del self._revoked[key]
+
+    def load(self, db: Session, market: Market) -> int:
+        """Revoke the market's users deactivated within the retention window. Returns how many."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention_seconds)
+        rows = db.query(User.id, User.updated_at).filter(
+            User.is_active == False,  # noqa: E712
+            or_(User.updated_at >= cutoff, User.last_login >= cutoff)
+        ).all()
+        for user_id, updated_at in rows:
+            self.revoke(market, user_id, _timestamp(updated_at))
+        return len(rows)
+
+    def refresh(self) -> None:
+        """Re-read deactivated users from every market and drop expired entries"""
+        for market in Market:
+            db = next(db_manager.get_db_session(market))
+            try:
+                self.load(db, market)
+            except Exception as e:
+                logger.error(f"❌ Token revocation refresh failed for {market.value.upper()}: {e}")
+            finally:
+                db.close()
+        self._prune()
+
+    async def _run(self) -> None:
+        """Background loop: refresh on an interval"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"❌ Token revocation refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval_seconds)
+
+    def start(self) -> None:
+        """Start the refresh loop (call from the app's event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Token revocation refresh started (every {self.refresh_interval_seconds:.0f}s)")
+
+    async def stop(self) -> None:
+        """Stop the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+
+
+# ==================== Write hooks ====================
+
+def _session_market(session: Session, obj: Any) -> Optional[str]:
+    market = USER_MODEL_MARKETS.get(type(obj)) or session.info.get("market")
+    return _market_value(market) or getattr(obj, "market", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_revocations(session: Session, flush_context) -> None:
+    """Users deactivated or deleted in this flush; revoked on commit"""
+    revoked: List[Dict[str, Any]] = []
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (User, UserKG, UserUS)):
+            continue
+        if obj not in session.deleted:
+            history = inspect(obj).attrs.is_active.history
+            if not history.added or history.added[0] is not False:
+                continue
+        market = _session_market(session, obj)
+        if market is None:
+            continue
+        revoked.append({"market": market, "user_id": obj.id, "revoked_at": time.time()})
+    if not revoked:
+        return
+
+    if settings.token_auth.pg_listen_enabled and session.get_bind().dialect.name == "postgresql":
+        # NOTIFY is transactional: other workers revoke only if this commits
+        for payload in revoked:
+            session.connection().execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.token_auth.pg_channel, "payload": json.dumps(payload)}
+            )
+    session.info.setdefault(SESSION_REVOCATIONS_KEY, []).extend(revoked)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session: Session) -> None:
+    for payload in session.info.pop(SESSION_REVOCATIONS_KEY, []):
+        token_revocations.publish(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session: Session) -> None:
+    session.info.pop(SESSION_REVOCATIONS_KEY, None)
+
+
+# Global instances
+verified_tokens = VerifiedTokenCache(max_entries=settings.token_auth.cache_size)
+token_revocations = TokenRevocations(
+    retention_seconds=settings.security.access_token_expire_minutes * 60,
+    refresh_interval_seconds=settings.token_auth.revocation_refresh_seconds
+)
+token_revocation_listener = PgNotifyListener(token_revocations, settings.token_auth.pg_channel, label="Token revocation")
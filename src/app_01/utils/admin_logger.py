@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Session
 from ..models.admins.admin_log import AdminLog
+from ..services.admin_log_writer import admin_log_writer
 
 # Configure logger
 logger = logging.getLogger("admin_logger")
@@ -53,7 +54,7 @@ class AdminLogger:
         Log admin action to database and file
         
         Args:
-            db: Database session
+            db: Database session (its market is where the entry is written)
             admin_id: ID of the admin performing the action
             action: Type of action (create, update, delete, etc.)
             entity_type: Type of entity affected (product, order, etc.)
@@ -63,8 +64,9 @@ class AdminLogger:
             user_agent: User agent string
         """
         try:
-            # Create log entry in database
-            log_entry = AdminLog(
+            # Queue log entry for the database (batched by the admin log writer)
+            admin_log_writer.write(
+                db,
                 admin_id=admin_id,
                 action=action,
                 entity_type=entity_type,
@@ -73,8 +75,6 @@ class AdminLogger:
                 ip_address=ip_address,
                 user_agent=user_agent
             )
-            db.add(log_entry)
-            db.commit()
             
             # Log to file
             log_message = f"Admin {admin_id} - {action}"
@@ -124,8 +124,9 @@ class AdminLogger:
             if context:
                 description = f"{context} - {description}"
             
-            # Log to database
-            log_entry = AdminLog(
+            # Log to database (batched by the admin log writer)
+            admin_log_writer.write(
+                db,
                 admin_id=admin_id,
                 action="error",
                 entity_type=entity_type,
@@ -133,8 +134,6 @@ class AdminLogger:
                 description=description[:1000],  # Truncate if too long
                 ip_address=ip_address
             )
-            db.add(log_entry)
-            db.commit()
             
             # Log to file with full traceback
             error_log_message = f"""
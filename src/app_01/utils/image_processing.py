@@ -0,0 +1,225 @@
+"""
+Image Processing
+
+Pillow work for uploads (verify, decode, resize, encode), kept free of app
+imports so it can run in the image processing pool's worker processes.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from PIL import Image
+import base64
+import io
+import json
+import os
+
+try:
+    import pillow_avif  # noqa: F401  Registers AVIF on Pillow builds without it
+except ImportError:
+    pass
+
+# Variant format -> (Pillow format, extension, save options)
+VARIANT_FORMATS = {
+    "avif": ("AVIF", ".avif", {"quality": 55}),
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+# Placeholder: longest side of the inline preview, and of the sample the dominant color is taken from
+PLACEHOLDER_SIZE = 20
+COLOR_SAMPLE_SIZE = 64
+
+
+# Upload bytes, or the path of an upload spooled to disk
+ImageSource = Union[bytes, str]
+
+
+def _open(source: ImageSource) -> Image.Image:
+    return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def probe_image(path: str) -> Tuple[str, int, int]:
+    """Format and size from the image header, without decoding pixel data"""
+    with Image.open(path) as image:
+        return image.format, image.width, image.height
+
+
+def verify_image(content: bytes) -> str:
+    """Check that the bytes are an intact image. Returns the Pillow format name."""
+    image = Image.open(io.BytesIO(content))
+    image.verify()
+    return image.format
+
+
+def _flatten_alpha(image: Image.Image) -> Image.Image:
+    """RGBA on a white background, for formats without transparency"""
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.split()[3])  # Use alpha channel as mask
+    return background
+
+
+def _save_resized(image: Image.Image, save_path: str, file_ext: str, target_size: Optional[Tuple[int, int]], optimize: bool) -> Tuple[int, int]:
+    # Convert RGBA to RGB if saving as JPEG
+    if image.mode == "RGBA" and file_ext in [".jpg", ".jpeg"]:
+        image = _flatten_alpha(image)
+
+    if target_size:
+        image.thumbnail(target_size, Image.Resampling.LANCZOS)
+
+    save_kwargs = {"quality": 85} if optimize else {}
+    if file_ext in [".jpg", ".jpeg"]:
+        save_kwargs["optimize"] = optimize
+
+    image.save(save_path, **save_kwargs)
+    return image.size
+
+
+def save_processed_image(
+    source: ImageSource,
+    save_path: str,
+    file_ext: str,
+    target_size: Optional[Tuple[int, int]] = None,
+    optimize: bool = True,
+    with_placeholder: bool = False
+) -> Tuple[int, int]:
+    """Decode, optionally shrink to fit ``target_size``, encode to ``save_path``. Returns the saved size."""
+    image = _open(source)
+    if with_placeholder:
+        image.load()
+        _save_placeholder(image, save_path)
+    return _save_resized(image, save_path, file_ext, target_size, optimize)
+
+
+def save_image_variants(content: bytes, save_paths: Dict[str, str], sizes: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    """Decode once and save one shrunk copy per size name. Returns the saved sizes."""
+    base_image = Image.open(io.BytesIO(content))
+    if base_image.mode == "RGBA":
+        base_image = _flatten_alpha(base_image)
+
+    saved = {}
+    for size_name, save_path in save_paths.items():
+        image = base_image.copy()
+        image.thumbnail(sizes[size_name], Image.Resampling.LANCZOS)
+        image.save(save_path, quality=85, optimize=True)
+        saved[size_name] = image.size
+    return saved
+
+
+def placeholder_path(base: str) -> str:
+    """Placeholder file next to the base file: ``<stem>_lqip.json`` (works for paths and URLs)"""
+    return f"{os.path.splitext(base)[0]}_lqip.json"
+
+
+def image_placeholder(image: Image.Image) -> Dict[str, str]:
+    """
+    Tiny preview of an image for rendering before it loads.
+
+    ``lqip`` is a data URI of a WebP at most PLACEHOLDER_SIZE px on its
+    longest side (a few hundred bytes, clients upscale it with a blur);
+    ``color`` is the most common color as ``#rrggbb``.
+    """
+    sample = image.copy()
+    sample.thumbnail((COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE), Image.Resampling.BOX)
+    if sample.mode in ("RGBA", "LA", "P"):
+        sample = _flatten_alpha(sample.convert("RGBA"))
+    else:
+        sample = sample.convert("RGB")
+
+    quantized = sample.quantize(colors=8)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    preview = sample.copy()
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    preview.save(buffer, format="WEBP", quality=40)
+    return {
+        "lqip": "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+    }
+
+
+def _save_placeholder(image: Image.Image, base_path: str) -> Dict[str, str]:
+    placeholder = image_placeholder(image)
+    with open(placeholder_path(base_path), "w") as file:
+        json.dump(placeholder, file)
+    return placeholder
+
+
+def save_placeholder(source: ImageSource, base_path: str) -> Dict[str, str]:
+    """Decode and save the placeholder next to ``base_path``. Returns it."""
+    return _save_placeholder(_open(source), base_path)
+
+
+def avif_supported() -> bool:
+    """Whether this Pillow build can encode AVIF"""
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+def variant_path(base: str, width: int, variant_format: str) -> str:
+    """Deterministic variant name next to the base file: ``<stem>_<width>w.<ext>`` (works for paths and URLs)"""
+    return f"{os.path.splitext(base)[0]}_{width}w{VARIANT_FORMATS[variant_format][1]}"
+
+
+def variant_manifest_path(base: str) -> str:
+    """Ladder manifest next to the base file: ``<stem>_variants.json`` (works for paths and URLs)"""
+    return f"{os.path.splitext(base)[0]}_variants.json"
+
+
+def ladder_widths(source_width: int, widths: Iterable[int]) -> List[int]:
+    """Rungs saved for a source: each width capped at the source's own, so nothing is upscaled"""
+    return sorted({min(width, source_width) for width in widths})
+
+
+def _save_ladder(image: Image.Image, base_path: str, widths: Iterable[int], formats: Iterable[str]) -> Dict[int, Tuple[int, int]]:
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    formats = list(formats)
+
+    saved = {}
+    # Largest first, each rung shrunk from the previous one
+    for width in reversed(ladder_widths(image.width, widths)):
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+        for variant_format in formats:
+            pillow_format, _, options = VARIANT_FORMATS[variant_format]
+            out = _flatten_alpha(image) if pillow_format == "JPEG" and image.mode == "RGBA" else image
+            out.save(variant_path(base_path, width, variant_format), format=pillow_format, **options)
+        saved[width] = image.size
+
+    # Written last, so its presence means the ladder is complete
+    with open(variant_manifest_path(base_path), "w") as file:
+        json.dump({"widths": sorted(saved), "formats": formats}, file)
+    return saved
+
+
+def save_variant_ladder(source: ImageSource, base_path: str, widths: Iterable[int], formats: Iterable[str]) -> Dict[int, Tuple[int, int]]:
+    """
+    Decode once and save every width in every format next to ``base_path``.
+
+    Widths are never upscaled: rungs wider than the source are replaced by
+    one rung at the source's own width. The saved widths and formats are
+    recorded in the ladder manifest. Returns the saved size per width.
+    """
+    return _save_ladder(_open(source), base_path, widths, formats)
+
+
+def save_upload(
+    source: ImageSource,
+    save_path: str,
+    file_ext: str,
+    target_size: Optional[Tuple[int, int]] = None,
+    optimize: bool = True,
+    widths: Iterable[int] = (),
+    formats: Iterable[str] = (),
+    with_placeholder: bool = False
+) -> Tuple[int, int]:
+    """The stored image, its variant ladder (if ``widths``) and placeholder from a single decode. Returns the saved size."""
+    image = _open(source)
+    image.load()  # Decode errors surface here, before anything is written
+    if with_placeholder:
+        _save_placeholder(image, save_path)
+    if widths:
+        _save_ladder(image, save_path, widths, formats)
+    return _save_resized(image, save_path, file_ext, target_size, optimize)
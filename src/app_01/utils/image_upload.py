@@ -4,18 +4,255 @@ Image Upload Utility
 Handles image uploads, validation, processing, and storage.
 """
 
+import hashlib
+import json
 import os
-import uuid
+import re
 from pathlib import Path
-from typing import Optional, Tuple
-from PIL import Image
-import io
-from fastapi import UploadFile, HTTPException
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from contextlib import aclosing
+import asyncio
 import logging
+import multiprocessing
+import tempfile
+import threading
+import time
+
+from ..core.config import settings
+from .image_processing import (
+    verify_image, save_processed_image, save_image_variants,
+    save_variant_ladder, save_upload, save_placeholder, probe_image, variant_path, placeholder_path,
+    variant_manifest_path, avif_supported, VARIANT_FORMATS
+)
 
 logger = logging.getLogger(__name__)
 
 
+class ImageProcessingBusy(Exception):
+    """The image processing pool's queue is full"""
+
+
+class ImageProcessingPool:
+    """
+    Bounded process pool for Pillow jobs (functions from utils.image_processing)
+
+    At most ``workers`` jobs run at once and ``max_queue`` more wait for a
+    worker; further jobs are refused with ImageProcessingBusy instead of
+    piling up. Awaiting a job never blocks the event loop. With
+    ``workers=0`` jobs run in the thread pool instead (no extra processes).
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 8):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers don't inherit the app's DB connections and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(*args)`` in a worker and await its result"""
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise ImageProcessingBusy(f"{self._in_flight} image jobs already running or queued")
+            self._in_flight += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            executor = self._get_executor()
+            try:
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+            except BrokenProcessPool:
+                # A worker died (e.g. killed while decoding a huge image): start a fresh pool next time
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global pool instance
+image_pool = ImageProcessingPool(
+    workers=settings.image_processing.workers,
+    max_queue=settings.image_processing.max_queue
+)
+
+BUSY_MESSAGE = "Сервер обрабатывает слишком много изображений. Попробуйте ещё раз через несколько секунд"
+
+
+# Files derived from a stored image: variant ladder rungs and manifest, save_multiple_sizes presets and the placeholder
+DERIVED_NAME = re.compile(r"_(\d+w|variants|thumbnail|small|medium|large|lqip)$")
+
+
+def stored_name(content_digest: str, *recipe: Any) -> str:
+    """
+    Content-addressed file name (without extension): SHA-256 of the upload's
+    digest and the processing options, so the same photo uploaded twice with
+    the same options maps to the same file
+    """
+    key = "|".join([content_digest, *(str(part) for part in recipe)])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class StoredImage(NamedTuple):
+    """Result of ImageUploader.save_upload (size and format of the original upload)"""
+    url: str
+    format: str
+    width: int
+    height: int
+    file_size: int
+
+
+class SpooledUpload(NamedTuple):
+    """Upload body copied to a temp file (see ImageUploader.receive_upload)"""
+    filename: str
+    path: str
+    size: int
+    digest: str  # SHA-256 of the content
+
+    def discard(self) -> None:
+        """Remove the temp file"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _MultipartSpool:
+    """
+    python-multipart callbacks for ImageUploader.receive_upload: text fields
+    are kept in memory, the first file part goes to a temp file, and both are
+    size-checked as the bytes arrive.
+    """
+
+    def __init__(self, file_field: str, max_file_size: int, max_fields_size: int):
+        self.file_field = file_field
+        self.max_file_size = max_file_size
+        self.max_fields_size = max_fields_size
+        self.fields: Dict[str, str] = {}
+        self.upload: Optional[SpooledUpload] = None
+        self._temp = None
+        self._digest = None
+        self._size = 0
+        self._fields_size = 0
+        self._filename: Optional[str] = None
+        self._name = ""
+        self._data = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._skip = False
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._data = bytearray()
+        self._filename = None
+        self._skip = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            return
+        if self._name != self.file_field or self._temp is not None:
+            self._skip = True  # Only one file is accepted
+            return
+        self._filename = options[b"filename"].decode("utf-8", "replace")
+        self._temp = tempfile.NamedTemporaryFile(prefix="upload-", suffix=Path(self._filename).suffix, delete=False)
+        self._digest = hashlib.sha256()
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if self._skip:
+            return
+        if self._filename is not None:
+            self._size += len(chunk)
+            if self._size > self.max_file_size:
+                raise HTTPException(status_code=413, detail="Файл слишком большой. Максимум: 10MB")
+            self._digest.update(chunk)
+            self._temp.write(chunk)
+            return
+        self._fields_size += len(chunk)
+        if self._fields_size > self.max_fields_size:
+            raise HTTPException(status_code=413, detail="Поля формы слишком большие")
+        self._data += chunk
+
+    def on_part_end(self) -> None:
+        if self._skip:
+            return
+        if self._filename is not None:
+            self._temp.close()
+            self.upload = SpooledUpload(self._filename, self._temp.name, self._size, self._digest.hexdigest())
+            self._filename = None
+        else:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
+
+    def discard(self) -> None:
+        """Remove the temp file after a failed read"""
+        if self._temp is not None:
+            self._temp.close()
+            SpooledUpload("", self._temp.name, 0, "").discard()
+
+
+class ImagePlaceholder(NamedTuple):
+    """Inline preview of a stored image (see image_processing.image_placeholder); empty when there is none"""
+    lqip: Optional[str] = None
+    color: Optional[str] = None
+
+
+NO_PLACEHOLDER = ImagePlaceholder()
+
+
 class ImageUploader:
     """
     Handle image uploads with validation and processing
@@ -33,6 +270,8 @@ class ImageUploader:
     
     # Size limits (in bytes)
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_FORM_FIELDS_SIZE = 64 * 1024  # Text fields and multipart framing next to the file
+    CHUNK_SIZE = 64 * 1024
     
     # Image size presets
     SIZES = {
@@ -42,6 +281,12 @@ class ImageUploader:
         "large": (1200, 1200)       # Full-size product images
     }
     
+    # Responsive variant ladder (widths in px), saved as <stem>_<width>w.<ext>
+    VARIANT_WIDTHS = (320, 640, 960, 1280)
+    
+    # Seconds an image without variants or placeholder is remembered as such
+    MISS_TTL_SECONDS = 60
+    
     def __init__(self, upload_dir: str = "static/uploads"):
         """
         Initialize uploader
@@ -50,6 +295,11 @@ class ImageUploader:
             upload_dir: Base directory for uploads (relative to project root)
         """
         self.upload_dir = Path(upload_dir)
+        self._variant_cache: Dict[str, Dict[str, Dict[int, str]]] = {}
+        self._placeholder_cache: Dict[str, ImagePlaceholder] = {}
+        # url -> monotonic time until which the miss is trusted
+        self._variant_misses: Dict[str, float] = {}
+        self._placeholder_misses: Dict[str, float] = {}
         self._ensure_upload_dirs()
     
     def _ensure_upload_dirs(self):
@@ -91,26 +341,28 @@ class ImageUploader:
             size_mb = len(content) / (1024 * 1024)
             return False, f"Файл слишком большой ({size_mb:.1f}MB). Максимум: 10MB"
         
-        # Try to open as image
+        # Try to open as image (in the image processing pool)
         try:
-            image = Image.open(io.BytesIO(content))
-            image.verify()
-            
-            # Check if format is supported
-            if image.format not in self.ALLOWED_FORMATS:
-                return False, f"Недопустимый формат изображения. Разрешены: {', '.join(self.ALLOWED_FORMATS)}"
-            
-            return True, ""
-        
+            image_format = await image_pool.run(verify_image, content)
+        except ImageProcessingBusy:
+            raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
         except Exception as e:
             return False, f"Не удалось обработать изображение: {str(e)}"
+        
+        # Check if format is supported
+        if image_format not in self.ALLOWED_FORMATS:
+            return False, f"Недопустимый формат изображения. Разрешены: {', '.join(self.ALLOWED_FORMATS)}"
+        
+        return True, ""
     
     async def save_image(
         self,
         file: UploadFile,
         category: str,
         resize_to: Optional[str] = "medium",
-        optimize: bool = True
+        optimize: bool = True,
+        variants: bool = False,
+        placeholder: bool = False
     ) -> str:
         """
         Save uploaded image with processing
@@ -120,6 +372,8 @@ class ImageUploader:
             category: Image category (categories, products, etc.)
             resize_to: Size preset to resize to (or None to keep original)
             optimize: Whether to optimize the image
+            variants: Also save the responsive variant ladder (from the original upload)
+            placeholder: Also save the inline placeholder and dominant color
             
         Returns:
             Relative URL path to saved image
@@ -132,9 +386,10 @@ class ImageUploader:
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_msg)
         
-        # Generate unique filename
+        # Read image and derive its content-addressed filename
+        content = await file.read()
         file_ext = Path(file.filename or "image.jpg").suffix.lower()
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        unique_filename = f"{stored_name(hashlib.sha256(content).hexdigest(), resize_to, optimize)}{file_ext}"
         
         # Determine save path
         save_dir = self.upload_dir / category
@@ -144,33 +399,31 @@ class ImageUploader:
         save_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"📁 Ensured directory exists: {save_dir}")
         
-        # Read and process image
-        content = await file.read()
-        image = Image.open(io.BytesIO(content))
+        # Process image (decode, resize, encode in the image processing pool) unless already stored
+        target_size = self.SIZES.get(resize_to) if resize_to else None
+        with_placeholder = placeholder and not self.has_placeholder(save_path)
+        if save_path.exists():
+            logger.info(f"♻️ Same image already stored: {save_path}")
+            self.touch_stored(save_path)
+            if with_placeholder:
+                await self.save_placeholder(content, str(save_path))
+        else:
+            try:
+                await image_pool.run(
+                    save_processed_image, content, str(save_path), file_ext, target_size, optimize, with_placeholder
+                )
+            except ImageProcessingBusy:
+                raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
+            if target_size:
+                logger.info(f"📐 Resized image to {resize_to}: {target_size}")
+            logger.info(f"✅ Saved image: {save_path}")
         
-        # Convert RGBA to RGB if saving as JPEG
-        if image.mode == "RGBA" and file_ext in [".jpg", ".jpeg"]:
-            # Create white background
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])  # Use alpha channel as mask
-            image = background
-        
-        # Resize if requested
-        if resize_to and resize_to in self.SIZES:
-            target_size = self.SIZES[resize_to]
-            image.thumbnail(target_size, Image.Resampling.LANCZOS)
-            logger.info(f"📐 Resized image to {resize_to}: {target_size}")
-        
-        # Save image
-        save_kwargs = {"quality": 85} if optimize else {}
-        if file_ext in [".jpg", ".jpeg"]:
-            save_kwargs["optimize"] = optimize
-        
-        image.save(save_path, **save_kwargs)
-        logger.info(f"✅ Saved image: {save_path}")
+        if variants and not self.has_variants(save_path):
+            await self.save_variants(content, str(save_path))
         
         # Return relative URL (without 'static/' prefix for serving)
         relative_url = f"/uploads/{category}/{unique_filename}"
+        self._forget_misses(relative_url)
         return relative_url
     
     async def save_multiple_sizes(
@@ -197,71 +450,349 @@ class ImageUploader:
         
         # Read image
         content = await file.read()
-        base_image = Image.open(io.BytesIO(content))
-        
-        # Convert RGBA to RGB if needed
-        if base_image.mode == "RGBA":
-            background = Image.new("RGB", base_image.size, (255, 255, 255))
-            background.paste(base_image, mask=base_image.split()[3])
-            base_image = background
         
-        # Generate filename base
+        # Generate content-addressed filename base
         file_ext = Path(file.filename or "image.jpg").suffix.lower()
-        base_name = str(uuid.uuid4())
+        base_name = stored_name(hashlib.sha256(content).hexdigest(), "sizes")
         
         save_dir = self.upload_dir / category
         
         result = {}
+        save_paths = {}
         
         for size_name in sizes:
             if size_name not in self.SIZES:
                 continue
-            
-            # Create copy for this size
-            image = base_image.copy()
-            
-            # Resize
-            target_size = self.SIZES[size_name]
-            image.thumbnail(target_size, Image.Resampling.LANCZOS)
-            
-            # Save
             filename = f"{base_name}_{size_name}{file_ext}"
-            save_path = save_dir / filename
-            image.save(save_path, quality=85, optimize=True)
-            
-            # Store URL
+            save_paths[size_name] = str(save_dir / filename)
             result[size_name] = f"/uploads/{category}/{filename}"
+        
+        # One pool job decodes once and encodes every size not stored yet
+        save_paths = {size_name: path for size_name, path in save_paths.items() if not os.path.exists(path)}
+        if save_paths:
+            save_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                await image_pool.run(save_image_variants, content, save_paths, self.SIZES)
+            except ImageProcessingBusy:
+                raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
+        for size_name, save_path in save_paths.items():
             logger.info(f"✅ Saved {size_name} variant: {save_path}")
         
         return result
     
-    def delete_image(self, url: str) -> bool:
+    def _check_extension(self, filename: Optional[str]) -> str:
+        file_ext = Path(filename or "").suffix.lower()
+        if file_ext not in self.ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Недопустимый формат файла. Разрешены: {', '.join(self.ALLOWED_EXTENSIONS)}"
+            )
+        return file_ext
+    
+    async def _spool(self, file: UploadFile) -> SpooledUpload:
+        """Copy the upload to a temp file in chunks, stopping at MAX_FILE_SIZE"""
+        too_large = HTTPException(status_code=413, detail="Файл слишком большой. Максимум: 10MB")
+        if file.size is not None and file.size > self.MAX_FILE_SIZE:
+            raise too_large
+        
+        size = 0
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(prefix="upload-", suffix=Path(file.filename or "").suffix, delete=False) as temp:
+            try:
+                while chunk := await file.read(self.CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.MAX_FILE_SIZE:
+                        raise too_large
+                    digest.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                temp.close()
+                os.unlink(temp.name)
+                raise
+        return SpooledUpload(file.filename or "", temp.name, size, digest.hexdigest())
+    
+    async def receive_upload(self, request: Request, file_field: str = "file") -> Tuple[Dict[str, str], SpooledUpload]:
+        """
+        Read a multipart/form-data request body straight into a temp file
+        
+        An ``UploadFile`` parameter is only handed over once Starlette has read
+        the whole body, so its size check comes too late. Here the limit is
+        enforced on ingress: a declared Content-Length over the limit is
+        refused before reading, and reading stops as soon as the file part
+        passes MAX_FILE_SIZE.
+        
+        Returns:
+            The text fields and the spooled file, which the caller passes to
+            save_spooled (or discards)
+        
+        Raises:
+            HTTPException: 400 malformed form or no file, 413 too large
+        """
+        max_body_size = self.MAX_FILE_SIZE + self.MAX_FORM_FIELDS_SIZE
+        too_large = HTTPException(status_code=413, detail="Файл слишком большой. Максимум: 10MB")
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_body_size:
+            raise too_large
+        
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Ожидается multipart/form-data")
+        
+        spool = _MultipartSpool(file_field, self.MAX_FILE_SIZE, self.MAX_FORM_FIELDS_SIZE)
+        parser = MultipartParser(params[b"boundary"], spool.callbacks())
+        received = 0
+        try:
+            async with aclosing(request.stream()) as stream:
+                async for chunk in stream:
+                    received += len(chunk)
+                    if received > max_body_size:
+                        raise too_large
+                    parser.write(chunk)
+            parser.finalize()
+        except MultipartParseError as e:
+            spool.discard()
+            raise HTTPException(status_code=400, detail=f"Некорректная форма: {e}")
+        except BaseException:
+            spool.discard()
+            raise
+        
+        if spool.upload is None:
+            raise HTTPException(status_code=400, detail=f"Файл не передан: поле '{file_field}'")
+        return spool.fields, spool.upload
+    
+    async def save_upload(
+        self,
+        file: UploadFile,
+        category: str,
+        resize_to: Optional[str] = "medium",
+        optimize: bool = True,
+        variants: bool = False,
+        placeholder: bool = False
+    ) -> StoredImage:
         """
-        Delete image by URL
+        Single-pass version of save_image for large uploads
+        
+        The body is streamed to a temp file with a hard size limit, then
+        stored by save_spooled.
+        
+        Raises:
+            HTTPException: 400 invalid image, 413 too large, 503 pool busy
+        """
+        self._check_extension(file.filename)
+        upload = await self._spool(file)
+        return await self.save_spooled(upload, category, resize_to, optimize, variants, placeholder)
+    
+    async def save_spooled(
+        self,
+        upload: SpooledUpload,
+        category: str,
+        resize_to: Optional[str] = "medium",
+        optimize: bool = True,
+        variants: bool = False,
+        placeholder: bool = False
+    ) -> StoredImage:
+        """
+        Store a spooled upload and remove its temp file
+        
+        Format and dimensions come from the image header, and one pool job
+        decodes the temp file once for the stored image and its variants.
+        
+        Raises:
+            HTTPException: 400 invalid image, 503 pool busy
+        """
+        temp_path = upload.path
+        try:
+            file_ext = self._check_extension(upload.filename)
+            try:
+                image_format, width, height = await run_in_threadpool(probe_image, temp_path)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {str(e)}")
+            if image_format not in self.ALLOWED_FORMATS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Недопустимый формат изображения. Разрешены: {', '.join(self.ALLOWED_FORMATS)}"
+                )
+            
+            unique_filename = f"{stored_name(upload.digest, resize_to, optimize)}{file_ext}"
+            save_dir = self.upload_dir / category
+            save_dir.mkdir(parents=True, exist_ok=True)
+            save_path = save_dir / unique_filename
+            
+            target_size = self.SIZES.get(resize_to) if resize_to else None
+            widths = self.VARIANT_WIDTHS if variants and not self.has_variants(save_path) else ()
+            with_placeholder = placeholder and not self.has_placeholder(save_path)
+            try:
+                if not save_path.exists():
+                    await image_pool.run(
+                        save_upload, temp_path, str(save_path), file_ext, target_size, optimize, widths,
+                        self.variant_formats(), with_placeholder
+                    )
+                else:
+                    self.touch_stored(save_path)
+                    if widths:
+                        await image_pool.run(save_variant_ladder, temp_path, str(save_path), widths, self.variant_formats())
+                    if with_placeholder:
+                        await image_pool.run(save_placeholder, temp_path, str(save_path))
+            except ImageProcessingBusy:
+                raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {str(e)}")
+        finally:
+            upload.discard()
+        
+        logger.info(f"✅ Saved image: {save_path} ({width}x{height} {image_format}, {upload.size} bytes)")
+        url = f"/uploads/{category}/{unique_filename}"
+        self._forget_misses(url)
+        return StoredImage(url, image_format, width, height, upload.size)
+    
+    def variant_formats(self) -> List[str]:
+        """Formats of the variant ladder: WebP, AVIF when available, JPEG fallback"""
+        formats = ["webp", "jpeg"]
+        if settings.image_processing.avif_variants and avif_supported():
+            formats.insert(0, "avif")
+        return formats
+    
+    async def save_variants(self, content: bytes, base_path: str) -> None:
+        """Save the variant ladder for ``content`` next to ``base_path`` (in the image processing pool)"""
+        try:
+            await image_pool.run(save_variant_ladder, content, base_path, self.VARIANT_WIDTHS, self.variant_formats())
+        except ImageProcessingBusy:
+            raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
+        logger.info(f"✅ Saved responsive variants for {base_path}")
+    
+    @staticmethod
+    def _read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+        """Ladder manifest of a stored image (widths and formats saved), None without a complete ladder"""
+        try:
+            with open(variant_manifest_path(str(path))) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+    
+    def has_variants(self, path: Path) -> bool:
+        """Whether the variant ladder of a stored image exists in every current format"""
+        manifest = self._read_manifest(path)
+        return manifest is not None and set(self.variant_formats()) <= set(manifest.get("formats", ()))
+    
+    async def save_placeholder(self, content: bytes, base_path: str) -> None:
+        """Save the placeholder for ``content`` next to ``base_path`` (in the image processing pool)"""
+        try:
+            await image_pool.run(save_placeholder, content, base_path)
+        except ImageProcessingBusy:
+            raise HTTPException(status_code=503, detail=BUSY_MESSAGE)
+    
+    def has_placeholder(self, path: Path) -> bool:
+        return os.path.exists(placeholder_path(str(path)))
+    
+    def touch_stored(self, path: Path) -> None:
+        """
+        Reset the age of a stored image reused by a new upload (with its variants
+        and placeholder), so the image GC's min-age guard covers the new row too
+        """
+        manifest = self._read_manifest(path) or {}
+        derived = [placeholder_path(str(path)), variant_manifest_path(str(path))] + [
+            variant_path(str(path), width, variant_format)
+            for width in manifest.get("widths", self.VARIANT_WIDTHS)
+            for variant_format in VARIANT_FORMATS
+        ]
+        for file_path in [str(path)] + derived:
+            try:
+                os.utime(file_path)
+            except FileNotFoundError:
+                pass
+    
+    def _path_for_url(self, url: str) -> Optional[Path]:
+        if url and url.startswith("/uploads/"):
+            return self.upload_dir / url[len("/uploads/"):]
+        return None
+    
+    def _missed(self, misses: Dict[str, float], url: str) -> bool:
+        return misses.get(url, 0.0) > time.monotonic()
+    
+    def _forget_misses(self, url: str) -> None:
+        """A new upload may have added variants or a placeholder to ``url``"""
+        self._variant_misses.pop(url, None)
+        self._placeholder_misses.pop(url, None)
+    
+    def variant_urls(self, url: Optional[str]) -> Optional[Dict[str, Dict[int, str]]]:
+        """
+        Variant URLs of an uploaded image: ``{format: {width: url}}``
+
+        Lists the widths and formats actually saved (from the ladder
+        manifest); None for images without variants (not backfilled yet,
+        external URLs). Stored ladders never change, so hits are cached;
+        misses are cached for MISS_TTL_SECONDS, as a backfill may add them.
+        """
+        if url in self._variant_cache:
+            return self._variant_cache[url]
+        path = self._path_for_url(url)
+        if path is None or self._missed(self._variant_misses, url):
+            return None
+        manifest = self._read_manifest(path)
+        if manifest is None:
+            self._variant_misses[url] = time.monotonic() + self.MISS_TTL_SECONDS
+            return None
+        variants = {
+            variant_format: {width: variant_path(url, width, variant_format) for width in manifest["widths"]}
+            for variant_format in VARIANT_FORMATS
+            if variant_format in manifest["formats"]
+        }
+        self._variant_cache[url] = variants
+        return variants
+    
+    def placeholder(self, url: Optional[str]) -> ImagePlaceholder:
+        """
+        Placeholder of an uploaded image, or NO_PLACEHOLDER (not backfilled
+        yet, external URLs). Stored images never change, so hits are cached;
+        misses are cached for MISS_TTL_SECONDS.
+        """
+        if url in self._placeholder_cache:
+            return self._placeholder_cache[url]
+        path = self._path_for_url(url)
+        if path is None or self._missed(self._placeholder_misses, url):
+            return NO_PLACEHOLDER
+        try:
+            with open(placeholder_path(str(path))) as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            self._placeholder_misses[url] = time.monotonic() + self.MISS_TTL_SECONDS
+            return NO_PLACEHOLDER
+        placeholder = ImagePlaceholder(stored.get("lqip"), stored.get("color"))
+        self._placeholder_cache[url] = placeholder
+        return placeholder
+    
+    def release_image(self, url: str) -> bool:
+        """
+        Drop an image no longer needed by the caller
+        
+        Stored files are content-addressed and shared by every row and market
+        that uploaded the same bytes, so nothing is unlinked here: the image GC
+        removes the file, its variants and placeholder once no row references it.
         
         Args:
             url: Image URL (e.g., /uploads/categories/abc123.jpg)
             
         Returns:
-            True if deleted, False if not found
+            True if the image exists, False if not found
         """
-        try:
-            # Convert URL to file path
-            # URL format: /uploads/category/filename.ext
-            if url.startswith("/uploads/"):
-                relative_path = url.replace("/uploads/", "")
-                file_path = self.upload_dir / relative_path
-                
-                if file_path.exists():
-                    file_path.unlink()
-                    logger.info(f"🗑️ Deleted image: {file_path}")
-                    return True
-            
+        path = self._path_for_url(url)
+        if path is None or not path.is_file():
             return False
         
-        except Exception as e:
-            logger.error(f"❌ Error deleting image {url}: {e}")
-            return False
+        self._variant_cache.pop(url, None)
+        self._placeholder_cache.pop(url, None)
+        self._forget_misses(url)
+        logger.info(f"🗑️ Released image (removed by image GC once unreferenced): {path}")
+        return True
+
+
+def srcset(variants: Optional[Dict[str, Dict[int, str]]], variant_format: str = "webp") -> Optional[str]:
+    """``srcset`` attribute value for one format of a variant map (widths as saved)"""
+    if not variants or variant_format not in variants:
+        return None
+    return ", ".join(f"{url} {width}w" for width, url in variants[variant_format].items())
 
 
 # Global uploader instance
@@ -0,0 +1,214 @@
+"""
+Static Files
+
+StaticFiles with long-lived caching for content-hashed uploads, precompressed
+CSS/JS, single byte ranges and optional X-Accel-Redirect hand-off to nginx.
+"""
+
+import os
+import re
+import stat
+from mimetypes import guess_type
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+from ..core.config import settings
+from .image_upload import DERIVED_NAME
+
+CONTENT_HASH = re.compile(r"[0-9a-f]{64}")
+
+# Served from <file>.br / <file>.gz when the client accepts it
+PRECOMPRESSED_SUFFIXES = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".html"}
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_hash_name(path: str) -> Optional[str]:
+    """Stem of a content-addressed file (see image_upload.stored_name), else None"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem if CONTENT_HASH.fullmatch(DERIVED_NAME.sub("", stem)) else None
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings from Accept-Encoding that aren't refused with q=0"""
+    codings = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First-last byte positions of a single ``bytes=`` range.
+
+    None means serve the whole file (malformed or multi-range header);
+    raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, dash, last = ranges.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class StaticFileResponse(FileResponse):
+    """FileResponse for the whole file or one byte range, using the server's zero-copy send when offered"""
+
+    def __init__(self, *args, byte_range: Optional[Tuple[int, int]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.byte_range = byte_range
+        if byte_range is not None:
+            start, end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{self.stat_result.st_size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start, end = self.byte_range or (0, self.stat_result.st_size - 1)
+        remaining = end - start + 1
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            # The server sends straight from the file descriptor (sendfile)
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send({"type": ZERO_COPY_EXTENSION, "file": file, "offset": start, "count": remaining, "more_body": False})
+            finally:
+                file.close()
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    remaining = remaining - len(chunk) if chunk else 0
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if self.background is not None:
+            await self.background()
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache headers for a CDN:
+
+    - content-hashed files (uploads) are immutable: one-year Cache-Control
+      and a strong ETag from the hash; other files are revalidated after
+      ``max_age``
+    - ``<file>.br`` / ``<file>.gz`` next to CSS/JS are served to clients
+      that accept them
+    - ``Range: bytes=`` requests get a 206 with just that range
+    - with ``accel_redirect`` set, the response only carries headers and
+      ``X-Accel-Redirect: <accel_redirect>/<path>``; nginx delivers the file
+    """
+
+    def __init__(
+        self,
+        *args,
+        immutable_max_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        accel_redirect: Optional[str] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        config = settings.static_files
+        self.immutable_max_age = config.immutable_max_age if immutable_max_age is None else immutable_max_age
+        self.max_age = config.max_age if max_age is None else max_age
+        self.accel_redirect = accel_redirect.rstrip("/") if accel_redirect else None
+
+    def _precompressed(self, full_path: str, request_headers: Headers) -> Optional[Tuple[str, str, os.stat_result]]:
+        if os.path.splitext(full_path)[1].lower() not in PRECOMPRESSED_SUFFIXES:
+            return None
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for coding, suffix in PRECOMPRESSED_ENCODINGS:
+            if coding not in accepted:
+                continue
+            try:
+                stat_result = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(stat_result.st_mode):
+                return coding, full_path + suffix, stat_result
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+
+        hash_name = content_hash_name(full_path)
+        if hash_name:
+            headers = {"cache-control": f"public, max-age={self.immutable_max_age}, immutable"}
+        else:
+            headers = {"cache-control": f"public, max-age={self.max_age}"}
+
+        if self.accel_redirect:
+            # nginx handles conditionals, ranges, compression and sendfile itself
+            headers["x-accel-redirect"] = f"{self.accel_redirect}/{quote(scope['path'].lstrip('/'))}"
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+        headers["accept-ranges"] = "bytes"
+        if os.path.splitext(full_path)[1].lower() in PRECOMPRESSED_SUFFIXES:
+            headers["vary"] = "Accept-Encoding"
+        suffix = ""
+        encoded = self._precompressed(full_path, request_headers)
+        if encoded:
+            coding, full_path, stat_result = encoded
+            headers["content-encoding"] = coding
+            suffix = f"-{coding}"
+        if hash_name:
+            headers["etag"] = f'"{hash_name}{suffix}"'
+
+        response = StaticFileResponse(
+            full_path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result, method=method
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if range_header and method == "GET" and status_code == 200:
+            if_range = request_headers.get("if-range")
+            if if_range and if_range not in (response.headers["etag"], response.headers["last-modified"]):
+                return response  # Changed since the client's copy: send it whole
+            try:
+                byte_range = parse_range(range_header, stat_result.st_size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={"content-range": f"bytes */{stat_result.st_size}", **headers})
+            if byte_range is not None:
+                return StaticFileResponse(
+                    full_path, headers=headers, media_type=media_type, stat_result=stat_result, method=method,
+                    byte_range=byte_range
+                )
+        return response
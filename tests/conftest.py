@@ -5,6 +5,7 @@ Shared test fixtures for all tests
 
 import pytest
 import sys
+from itertools import count
 from pathlib import Path
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
@@ -25,10 +26,32 @@ from src.app_01.main import app
 from src.app_01.models.banners.banner import Base as BannerBase
 # Import all models to ensure they are registered with their respective Base
 from src.app_01.models import *
+from src.app_01.models.orders.order import Order, OrderStatus
+from src.app_01.models.orders.order_item import OrderItem
 from src.app_01.services.auth_service import create_admin
+from src.app_01.services.admin_identity import admin_identities
+from src.app_01.services.token_verification import verified_tokens, token_revocations
 from typing import Generator, Tuple
 
 
+@pytest.fixture(autouse=True)
+def clear_admin_identities():
+    """Tests reuse session tokens for different admins: start each one with an empty identity cache"""
+    admin_identities.clear()
+    yield
+    admin_identities.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_tokens():
+    """Identical test tokens map to different users across tests: start each one with empty token caches"""
+    verified_tokens.clear()
+    token_revocations.clear()
+    yield
+    verified_tokens.clear()
+    token_revocations.clear()
+
+
 # New application-level fixture for complete test isolation
 @pytest.fixture(scope="function")
 def app_client() -> Generator[TestClient, None, None]:
@@ -331,6 +354,36 @@ def auth_headers(mock_jwt_token):
     }
 
 
+@pytest.fixture
+def make_order():
+    """
+    Factory for unsaved orders: tests pass only the fields they care about.
+    The n-th order of a test is numbered #100n unless a number is given;
+    quantity > 0 adds one order item priced so the item total equals the order total.
+    """
+    numbers = count(1001)
+
+    def factory(number=None, order_date=None, total=100.0, status=OrderStatus.PENDING, quantity=0, **fields):
+        generated = f"#{next(numbers)}"
+        values = dict(
+            order_number=number or generated, user_id=1, status=status,
+            customer_name="Test", customer_phone="+996555000000", delivery_address="Bishkek, Main st 1",
+            subtotal=total, total_amount=total
+        )
+        if order_date is not None:
+            values["order_date"] = order_date
+        values.update(fields)
+        order = Order(**values)
+        if quantity:
+            order.order_items.append(OrderItem(
+                sku_id=1, product_name="Shirt", sku_code="SKU-1", size="M", color="white",
+                unit_price=total / quantity, quantity=quantity, total_price=total
+            ))
+        return order
+
+    return factory
+
+
 # Market fixtures
 
 @pytest.fixture(params=[Market.KG, Market.US])
@@ -51,6 +51,30 @@ class TestCartAPI:
         # Should require auth
         assert response.status_code in [401, 403, 404]
 
+    def test_add_to_cart_replayed_with_idempotency_key(self, api_client, test_db, sample_kg_user, sample_sku):
+        """Test that a retried add with the same Idempotency-Key is applied once"""
+        from src.app_01.models.orders.cart import CartItem
+        
+        payload = {"user_id": sample_kg_user.id, "sku_id": sample_sku.id, "quantity": 2}
+        headers = {"Idempotency-Key": "cart-add-1"}
+        
+        first = api_client.post("/api/v1/cart/add", json=payload, headers=headers)
+        second = api_client.post("/api/v1/cart/add", json=payload, headers=headers)
+        
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert test_db.query(CartItem).one().quantity == 2
+    
+    def test_idempotency_key_reused_with_different_body(self, api_client, sample_kg_user, sample_sku):
+        """Test that reusing a key for a different request is rejected"""
+        headers = {"Idempotency-Key": "cart-add-2"}
+        
+        api_client.post("/api/v1/cart/add", json={"user_id": sample_kg_user.id, "sku_id": sample_sku.id, "quantity": 1}, headers=headers)
+        response = api_client.post("/api/v1/cart/add", json={"user_id": sample_kg_user.id, "sku_id": sample_sku.id, "quantity": 3}, headers=headers)
+        
+        assert response.status_code == 422
+
 
 @pytest.mark.integration
 class TestWishlistAPI:
@@ -141,3 +165,38 @@ class TestWishlistWithAuth:
         # Should work or return proper error
         assert response.status_code in [200, 201, 404, 422, 500]
 
+
+
+@pytest.mark.integration
+class TestGuestCartAPI:
+    """Test the cookie-backed anonymous cart"""
+
+    def test_add_update_and_remove_without_login(self, api_client, sample_sku):
+        response = api_client.post("/api/v1/cart/guest/items", json={"sku_id": sample_sku.id, "quantity": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_items"] == 1
+        assert data["items"][0]["quantity"] == 2
+        assert data["items"][0]["stock"] == 100
+        cookies = {"guest_cart": response.cookies["guest_cart"]}
+
+        response = api_client.put(f"/api/v1/cart/guest/items/{sample_sku.id}?quantity=3", cookies=cookies)
+        assert response.json()["items"][0]["quantity"] == 3
+        cookies = {"guest_cart": response.cookies["guest_cart"]}
+
+        response = api_client.get("/api/v1/cart/guest", cookies=cookies)
+        assert response.json()["total_price"] == pytest.approx(3 * 99.99)
+
+        response = api_client.delete(f"/api/v1/cart/guest/items/{sample_sku.id}", cookies=cookies)
+        assert response.json()["items"] == []
+
+    def test_add_unknown_sku_returns_404(self, api_client):
+        response = api_client.post("/api/v1/cart/guest/items", json={"sku_id": 999999})
+
+        assert response.status_code == 404
+
+    def test_tampered_cookie_reads_as_empty_cart(self, api_client, sample_sku):
+        response = api_client.get("/api/v1/cart/guest", cookies={"guest_cart": "v1.MTox.forged"})
+
+        assert response.status_code == 200
+        assert response.json()["items"] == []
@@ -166,3 +166,36 @@ class TestProductSorting:
         # Should accept valid sort options
         assert response.status_code in [200, 422]
 
+
+
+@pytest.mark.integration
+class TestSKUAvailabilityAPI:
+    """Test the multi-SKU availability endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def empty_stock_cache(self):
+        from src.app_01.services.stock_cache import stock_cache
+        stock_cache.clear()
+        yield
+        stock_cache.clear()
+
+    def test_returns_stock_and_not_found(self, api_client, sample_sku):
+        response = api_client.get(f"/api/v1/skus/availability?ids={sample_sku.id},999999")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"] == [{"sku_id": sample_sku.id, "stock": 100, "in_stock": True}]
+        assert data["not_found"] == [999999]
+
+    def test_second_read_is_served_from_cache(self, api_client, test_db, sample_sku):
+        from src.app_01.services.stock_cache import stock_cache
+
+        api_client.get(f"/api/v1/skus/availability?ids={sample_sku.id}")
+        hits = stock_cache.hits
+        api_client.get(f"/api/v1/skus/availability?ids={sample_sku.id}")
+
+        assert stock_cache.hits == hits + 1
+
+    def test_invalid_ids_are_rejected(self, api_client):
+        assert api_client.get("/api/v1/skus/availability?ids=1,abc").status_code == 400
+        assert api_client.get("/api/v1/skus/availability?ids=").status_code == 400
@@ -0,0 +1,120 @@
+"""
+Unit Tests for Admin Identity Cache
+Tests session-keyed caching, TTL, and invalidation from committed Admin changes
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.admin_identity import AdminIdentity, AdminIdentityCache, admin_identities
+from src.app_01.models.admins.admin import Admin
+from src.app_01.admin.multi_market_admin_views import MultiMarketAuthenticationBackend, ProductAdmin
+
+
+@pytest.fixture
+def admin(db_session: Session):
+    admin = Admin(
+        username="content", email="content@example.com", admin_role="website_content",
+        market="kg", is_active=True, is_super_admin=False, permissions="manage_products"
+    )
+    db_session.add(admin)
+    db_session.commit()
+    return admin
+
+
+@pytest.mark.unit
+class TestAdminIdentityCache:
+    """Test cache lookups"""
+
+    def test_hit_for_same_session_and_market(self, admin):
+        cache = AdminIdentityCache(ttl_seconds=30)
+        identity = AdminIdentity.from_admin(admin, Market.KG)
+        cache.put("token", identity)
+
+        assert cache.get("token", admin.id, Market.KG) == identity
+        assert cache.get("token", admin.id, Market.US) is None
+        assert cache.get("other-token", admin.id, Market.KG) is None
+        assert identity.has_permission("manage_products")
+        assert not identity.has_permission("delete_products")
+
+    def test_entries_expire(self, admin):
+        cache = AdminIdentityCache(ttl_seconds=30)
+        cache.put("token", AdminIdentity.from_admin(admin, Market.KG))
+
+        with patch("src.app_01.services.admin_identity.time.monotonic", return_value=10 ** 9):
+            assert cache.get("token", admin.id, Market.KG) is None
+
+    def test_zero_ttl_disables_cache(self, admin):
+        cache = AdminIdentityCache(ttl_seconds=0)
+        cache.put("token", AdminIdentity.from_admin(admin, Market.KG))
+
+        assert cache.get("token", admin.id, Market.KG) is None
+
+    def test_logout_drops_session(self, admin):
+        cache = AdminIdentityCache(ttl_seconds=30)
+        cache.put("token", AdminIdentity.from_admin(admin, Market.KG))
+        cache.invalidate_session("token")
+
+        assert cache.get("token", admin.id, Market.KG) is None
+
+
+@pytest.mark.unit
+class TestAdminIdentityInvalidation:
+    """Committed access changes drop cached identities at once"""
+
+    @pytest.mark.parametrize("column,value", [
+        ("is_active", False),
+        ("admin_role", "order_management"),
+        ("market", "us"),
+        ("permissions", None),
+    ])
+    def test_access_change_invalidates(self, db_session: Session, admin, column, value):
+        admin_identities.put("token", AdminIdentity.from_admin(admin, Market.KG))
+
+        setattr(admin, column, value)
+        db_session.commit()
+
+        assert admin_identities.get("token", admin.id, Market.KG) is None
+
+    def test_unrelated_change_keeps_entry(self, db_session: Session, admin):
+        admin_identities.put("token", AdminIdentity.from_admin(admin, Market.KG))
+
+        admin.full_name = "Content Admin"
+        db_session.commit()
+
+        assert admin_identities.get("token", admin.id, Market.KG) is not None
+
+    def test_rolled_back_change_keeps_entry(self, db_session: Session, admin):
+        admin_identities.put("token", AdminIdentity.from_admin(admin, Market.KG))
+
+        admin.is_active = False
+        db_session.flush()
+        db_session.rollback()
+
+        assert admin_identities.get("token", admin.id, Market.KG) is not None
+
+
+@pytest.mark.unit
+class TestCachedAdminChecks:
+    """authenticate + check_permissions share one lookup per session"""
+
+    @pytest.mark.asyncio
+    async def test_one_query_per_session(self, admin):
+        request = Mock()
+        request.session = {"token": "token", "admin_id": admin.id, "admin_market": "kg"}
+        db = Mock()
+        db.query.return_value.filter.return_value.first.return_value = admin
+
+        with patch("src.app_01.admin.multi_market_admin_views.db_manager") as db_manager:
+            db_manager.get_db_session.side_effect = lambda market: iter([db])
+            backend = MultiMarketAuthenticationBackend(secret_key="test-secret-key")
+
+            assert await backend.authenticate(request) is True
+            assert ProductAdmin().check_permissions(request, "create") is True
+            assert ProductAdmin().check_permissions(request, "delete") is False
+            assert await backend.authenticate(request) is True
+
+            db_manager.get_db_session.assert_called_once_with(Market.KG)
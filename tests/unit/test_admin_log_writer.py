@@ -0,0 +1,153 @@
+"""
+Unit Tests for Admin Log Writer
+Tests the synchronous fallback, batching on size / interval / shutdown and the bounded queue
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.admin_log_writer import AdminLogWriter
+from src.app_01.models.admins.admin import Admin
+from src.app_01.models.admins.admin_log import AdminLog
+
+
+@pytest.fixture
+def log_engine(tmp_path):
+    """File-backed SQLite so the writer's worker threads see the same database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'admin_logs.db'}", connect_args={"check_same_thread": False})
+    Admin.__table__.create(engine)
+    AdminLog.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def market_sessions(log_engine):
+    """Route db_manager sessions of every market to the test database"""
+    factory = sessionmaker(bind=log_engine)
+
+    def get_db_session(market):
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with patch("src.app_01.services.admin_log_writer.db_manager.get_db_session", side_effect=get_db_session):
+        yield factory
+
+
+def _log_count(factory) -> int:
+    with factory() as db:
+        return db.query(AdminLog).count()
+
+
+@pytest.mark.unit
+class TestSynchronousFallback:
+    """Without a running flush loop each write is inserted at once"""
+
+    def test_write_commits_through_callers_session(self, log_engine, market_sessions):
+        writer = AdminLogWriter()
+        with market_sessions() as db:
+            assert writer.write(db, Market.KG, admin_id=1, action="create", entity_type="product", entity_id=5)
+
+        assert _log_count(market_sessions) == 1
+        assert writer.written == 1
+        assert writer.pending() == 0
+
+    def test_write_without_session_opens_one(self, market_sessions):
+        writer = AdminLogWriter()
+
+        assert writer.write(None, Market.US, admin_id=1, action="login_success")
+        assert _log_count(market_sessions) == 1
+
+
+@pytest.mark.unit
+class TestBatchedWrites:
+    """Queued writes are bulk-inserted by the background task"""
+
+    @pytest.mark.asyncio
+    async def test_queued_until_shutdown(self, market_sessions):
+        writer = AdminLogWriter(batch_size=100, flush_interval_seconds=60)
+        writer.start()
+        for entity_id in range(3):
+            assert writer.write(None, Market.KG, admin_id=1, action="update", entity_id=entity_id)
+
+        assert writer.pending() == 3
+        assert _log_count(market_sessions) == 0
+
+        await writer.stop()
+
+        assert writer.pending() == 0
+        assert _log_count(market_sessions) == 3
+        with market_sessions() as db:
+            assert all(log.created_at is not None for log in db.query(AdminLog).all())
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_before_interval(self, market_sessions):
+        writer = AdminLogWriter(batch_size=2, flush_interval_seconds=60)
+        writer.start()
+        try:
+            writer.write(None, Market.KG, admin_id=1, action="create")
+            writer.write(None, Market.KG, admin_id=1, action="delete")
+            for _ in range(50):
+                if writer.written == 2:
+                    break
+                await asyncio.sleep(0.05)
+
+            assert _log_count(market_sessions) == 2
+        finally:
+            await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_interval_flush(self, market_sessions):
+        writer = AdminLogWriter(batch_size=100, flush_interval_seconds=0.05)
+        writer.start()
+        try:
+            writer.write(None, Market.KG, admin_id=1, action="create")
+            for _ in range(50):
+                if writer.written == 1:
+                    break
+                await asyncio.sleep(0.05)
+
+            assert _log_count(market_sessions) == 1
+        finally:
+            await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_one_insert_per_market_per_batch(self, log_engine, market_sessions):
+        statements = []
+
+        @event.listens_for(log_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO admin_logs"):
+                statements.append(statement)
+
+        writer = AdminLogWriter(batch_size=100, flush_interval_seconds=60)
+        writer.start()
+        for entity_id in range(5):
+            writer.write(None, Market.KG, admin_id=1, action="update", entity_id=entity_id)
+        writer.write(None, Market.US, admin_id=2, action="update", entity_id=9)
+        await writer.stop()
+
+        assert writer.written == 6
+        assert len(statements) == 2
+        assert _log_count(market_sessions) == 6
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_and_counts(self, market_sessions):
+        writer = AdminLogWriter(batch_size=100, flush_interval_seconds=60, max_queue=1)
+        writer.start()
+        try:
+            assert writer.write(None, Market.KG, admin_id=1, action="create")
+            assert not writer.write(None, Market.KG, admin_id=1, action="create")
+            assert writer.dropped == 1
+        finally:
+            await writer.stop()
+
+        assert _log_count(market_sessions) == 1
@@ -0,0 +1,119 @@
+"""
+Unit Tests for Analytics Rollup
+Tests the hourly rollup refresh, concurrent rebuilds and the analytics endpoints built on it
+"""
+
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+
+from src.app_01.services.analytics_rollup import HourlyRollupJob
+from src.app_01.services.order_stats import market_day
+from src.app_01.db.market_db import Market
+from src.app_01.models.orders.order import Order, OrderStatus
+from src.app_01.models.admins.order_management.order_hourly_rollup import OrderHourlyRollup
+from src.app_01.routers.admin_analytics_router import get_stats_range, get_trends
+
+
+@pytest.mark.unit
+class TestHourlyRollupJob:
+    """Test rollup maintenance"""
+
+    def test_first_refresh_builds_hour_buckets(self, db_session: Session, make_order):
+        db_session.add_all([
+            make_order(order_date=datetime(2026, 10, 19, 6, 10), total=100, quantity=2),
+            make_order(order_date=datetime(2026, 10, 19, 6, 50), total=300, status=OrderStatus.DELIVERED, quantity=1),
+            make_order(order_date=datetime(2026, 10, 19, 20, 5), total=50, status=OrderStatus.CANCELLED),
+        ])
+        db_session.commit()
+
+        HourlyRollupJob().refresh(db_session, Market.KG)
+        db_session.commit()
+
+        rows = {row.hour.hour: row for row in db_session.query(OrderHourlyRollup).all()}
+        assert set(rows) == {6, 20}
+        morning = rows[6]
+        assert (morning.orders_count, morning.items_count, morning.revenue) == (2, 3, 400)
+        assert (morning.delivered_count, morning.sales_total) == (1, 300)
+        assert morning.local_date == date(2026, 10, 19)
+        evening = rows[20]
+        assert (evening.cancelled_count, evening.revenue) == (1, 0)
+        assert evening.local_date == date(2026, 10, 20)  # 02:05 in Bishkek
+        assert evening.day_of_week == 1  # Tuesday
+
+    def test_refresh_rebuilds_hours_of_changed_orders(self, db_session: Session, make_order):
+        job = HourlyRollupJob(overlap_seconds=0)
+        order = make_order(order_date=datetime(2026, 10, 1, 9, 0), total=120)
+        db_session.add(order)
+        db_session.commit()
+        job.refresh(db_session, Market.KG)
+        db_session.commit()
+
+        order.status = OrderStatus.DELIVERED  # Bumps updated_at
+        db_session.commit()
+        job._watermarks[Market.KG] = datetime.now(timezone.utc) - timedelta(minutes=5)
+        job.refresh(db_session, Market.KG)
+        db_session.commit()
+
+        row = db_session.query(OrderHourlyRollup).one()
+        assert (row.delivered_count, row.sales_total) == (1, 120)
+
+
+    def test_concurrent_rebuilds_upsert_rows(self, db_session: Session, make_order):
+        db_session.add_all([make_order(order_date=datetime(2026, 10, 1, 9, 0)), make_order("#1002", order_date=datetime(2026, 10, 1, 11, 0))])
+        db_session.commit()
+        HourlyRollupJob().refresh(db_session, Market.KG)
+        db_session.commit()
+
+        # Another worker rebuilds the same hours: its rows land on the existing (market, hour) keys
+        db_session.delete(db_session.query(Order).filter(Order.order_number == "#1002").one())
+        db_session.commit()
+        HourlyRollupJob().rebuild_all(db_session, Market.KG)
+        db_session.commit()
+
+        rows = db_session.query(OrderHourlyRollup).all()
+        assert [(row.hour.hour, row.orders_count) for row in rows] == [(9, 1)]  # 11:00 has no orders left
+
+    def test_rebuilt_hours_are_upserted(self, db_session: Session, make_order):
+        job = HourlyRollupJob()
+        db_session.add(make_order(order_date=datetime(2026, 10, 1, 9, 0)))
+        db_session.commit()
+        job.refresh(db_session, Market.KG)
+        db_session.commit()
+        row_id = db_session.query(OrderHourlyRollup.id).scalar()
+
+        db_session.add(make_order(order_date=datetime(2026, 10, 1, 9, 30)))
+        db_session.commit()
+        job.rebuild_hours(db_session, Market.KG, [datetime(2026, 10, 1, 9, 0)], datetime.now(timezone.utc))
+        db_session.commit()
+
+        row = db_session.query(OrderHourlyRollup).one()
+        assert (row.id, row.orders_count) == (row_id, 2)
+
+@pytest.mark.unit
+class TestAnalyticsEndpoints:
+    """Test range and trend analysis over the rollups"""
+
+    def test_range_summary_and_trends(self, db_session: Session, make_order):
+        today = market_day(None, Market.KG)
+        noon = datetime(today.year, today.month, today.day, 6, 0)  # 12:00 in Bishkek
+        db_session.add_all([
+            make_order(order_date=noon - timedelta(days=20), total=100, status=OrderStatus.DELIVERED),
+            make_order(order_date=noon - timedelta(days=2), total=300, status=OrderStatus.DELIVERED),
+            make_order(order_date=noon - timedelta(days=2), total=50, status=OrderStatus.CANCELLED),
+        ])
+        db_session.commit()
+        HourlyRollupJob().refresh(db_session, Market.KG)
+        db_session.commit()
+
+        summary = get_stats_range(today - timedelta(days=7), today, db_session).summary
+        assert summary["total_orders"] == 2
+        assert summary["total_sales"] == 300
+        assert summary["total_cancelled"] == 1
+
+        trends = get_trends(30, db_session)
+        assert trends["overall"]["total_orders"] == 3
+        assert trends["overall"]["total_sales"] == 400
+        assert trends["growth"]["sales_growth_percentage"] == 200.0
+        weekday = (today - timedelta(days=2)).strftime("%A")
+        assert trends["day_of_week_performance"][weekday] == {"avg_orders": 2.0, "avg_sales": 300.0}
@@ -0,0 +1,146 @@
+"""
+Unit Tests for Checkout Pricing
+Tests batched cart pricing, discounts, market tax/shipping and the quote cache
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.checkout_pricing import CheckoutPricingService, calculate_shipping_cost
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.product_filter import ProductDiscount
+from src.app_01.models.products.sku import SKU
+
+
+@pytest.fixture
+def skus(db_session: Session):
+    """Two SKUs of different products: 1000 and 2000 per unit"""
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db_session.add_all([brand, category])
+    db_session.commit()
+    subcategory = Subcategory(name="Shirts", slug="shirts", category_id=category.id)
+    db_session.add(subcategory)
+    db_session.commit()
+
+    items = []
+    for i, price in enumerate([1000.0, 2000.0]):
+        product = Product(
+            title=f"Product {i}", slug=f"product-{i}", sku_code=f"P-{i}",
+            brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id
+        )
+        db_session.add(product)
+        db_session.flush()
+        items.append(SKU(
+            product_id=product.id, sku_code=f"SKU-{i}", size="M", color="black",
+            price=price, stock=10, is_active=True
+        ))
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+@pytest.fixture
+def service():
+    return CheckoutPricingService(ttl_seconds=60)
+
+
+@pytest.mark.unit
+class TestCheckoutPricing:
+    """Test quote computation"""
+
+    def test_shipping_rules_are_per_market(self):
+        assert calculate_shipping_cost(4999, market=Market.KG) == 150.0
+        assert calculate_shipping_cost(5000, market=Market.KG) == 0.0
+        assert calculate_shipping_cost(99, market=Market.US) == 10.0
+        assert calculate_shipping_cost(100, market=Market.US) == 0.0
+
+    def test_kg_quote_reports_included_vat(self, service, db_session: Session, skus):
+        items = [{'sku_id': skus[0].id, 'quantity': 2}, {'sku_id': skus[1].id, 'quantity': 1}]
+
+        quote, _ = service.build_quote(db_session, items, Market.KG)
+
+        assert quote['subtotal'] == 4000.0
+        assert quote['shipping_cost'] == 150.0
+        assert quote['tax_included'] is True
+        assert quote['tax_amount'] == round(4000 - 4000 / 1.12, 2)
+        assert quote['total_amount'] == 4150.0
+        assert quote['currency'] == "KGS"
+
+    def test_us_quote_adds_sales_tax(self, service, db_session: Session, skus):
+        quote, _ = service.build_quote(db_session, [{'sku_id': skus[0].id, 'quantity': 1}], Market.US)
+
+        assert quote['tax_amount'] == 80.0
+        assert quote['shipping_cost'] == 0.0
+        assert quote['total_amount'] == 1080.0
+
+    def test_best_active_discount_is_applied(self, service, db_session: Session, skus):
+        db_session.add_all([
+            ProductDiscount(product_id=skus[0].product_id, discount_type="percentage", discount_value=10, is_active=True),
+            ProductDiscount(product_id=skus[0].product_id, discount_type="fixed", discount_value=300, is_active=True),
+            ProductDiscount(product_id=skus[1].product_id, discount_type="percentage", discount_value=50, is_active=False),
+            ProductDiscount(
+                product_id=skus[1].product_id, discount_type="percentage", discount_value=50, is_active=True,
+                end_date=datetime.now() - timedelta(days=1)
+            ),
+        ])
+        db_session.commit()
+        items = [{'sku_id': skus[0].id, 'quantity': 2}, {'sku_id': skus[1].id, 'quantity': 1}]
+
+        quote, _ = service.build_quote(db_session, items, Market.KG)
+
+        lines = {line['sku_id']: line for line in quote['items']}
+        assert lines[skus[0].id]['unit_price'] == 700.0
+        assert lines[skus[1].id]['unit_price'] == 2000.0
+        assert quote['discount_amount'] == 600.0
+        assert quote['total_amount'] == 3400.0 + 150.0
+
+    def test_missing_and_short_stock_are_rejected(self, service, db_session: Session, skus):
+        with pytest.raises(HTTPException) as exc_info:
+            service.build_quote(db_session, [{'sku_id': 9999, 'quantity': 1}], Market.KG)
+        assert exc_info.value.status_code == 404
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.build_quote(db_session, [{'sku_id': skus[0].id, 'quantity': 11}], Market.KG)
+        assert exc_info.value.status_code == 400
+        assert "not enough stock" in exc_info.value.detail.lower()
+
+
+@pytest.mark.unit
+class TestQuoteCache:
+    """Test quote caching by cart version"""
+
+    def test_cart_version_ignores_line_order(self):
+        a = [{'sku_id': 1, 'quantity': 2}, {'sku_id': 2, 'quantity': 1}]
+        b = [{'sku_id': 2, 'quantity': 1}, {'sku_id': 1, 'quantity': 2}]
+
+        assert CheckoutPricingService.cart_version(a) == CheckoutPricingService.cart_version(b)
+        assert CheckoutPricingService.cart_version(a) != CheckoutPricingService.cart_version(a[:1])
+
+    def test_quote_is_cached_per_user_and_cart(self, service, db_session: Session, skus):
+        items = [{'sku_id': skus[0].id, 'quantity': 1}]
+        quote = service.quote(db_session, 1, items, Market.KG)
+
+        skus[0].price = 5.0
+        db_session.commit()
+
+        version = service.cart_version(items)
+        assert service.quote(db_session, 1, items, Market.KG)['total_amount'] == quote['total_amount']
+        assert service.get_quote(1, Market.KG, version) is not None
+        assert service.get_quote(2, Market.KG, version) is None
+        assert service.get_quote(1, Market.KG, version, "Ош") is None
+
+        service.invalidate(1, Market.KG, version)
+        assert service.get_quote(1, Market.KG, version) is None
+
+    def test_expired_quote_is_not_reused(self, db_session: Session, skus):
+        service = CheckoutPricingService(ttl_seconds=0)
+        items = [{'sku_id': skus[0].id, 'quantity': 1}]
+        service.quote(db_session, 1, items, Market.KG)
+
+        assert service.get_quote(1, Market.KG, service.cart_version(items)) is None
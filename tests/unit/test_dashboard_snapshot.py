@@ -0,0 +1,75 @@
+"""
+Unit Tests for Dashboard Snapshot
+Tests the single-query dashboard metrics and the per-market snapshot cache
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from src.app_01.services.dashboard_snapshot import (
+    DashboardSnapshotCache, build_dashboard_snapshot, metrics_statement, period_starts
+)
+from src.app_01.db.market_db import Market
+from src.app_01.models.orders.order import OrderStatus
+from src.app_01.models.users.user import User
+
+
+@pytest.mark.unit
+class TestDashboardSnapshot:
+    """Test dashboard metrics"""
+
+    def test_metrics_come_from_one_aggregate_query(self, db_session: Session, make_order):
+        now = datetime.now(timezone.utc)
+        today_start, week_start, month_start = period_starts(Market.KG, now)
+        db_session.add_all([
+            make_order("#1001", order_date=today_start + timedelta(minutes=1), total=100),
+            make_order("#1002", order_date=today_start + timedelta(minutes=2), total=50, status=OrderStatus.CANCELLED),
+            make_order(order_date=week_start + timedelta(hours=1), total=200, status=OrderStatus.DELIVERED),
+            make_order(order_date=month_start - timedelta(days=1), total=400, status=OrderStatus.CONFIRMED),
+        ])
+        db_session.add(User(phone_number="+996555000001", market="kg"))
+        db_session.commit()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            db_session.execute(metrics_statement(Market.KG, now)).one()
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+        assert len(statements) == 1
+
+        snapshot = build_dashboard_snapshot(db_session, Market.KG, now)
+        assert (snapshot["orders_today"], snapshot["orders_week"], snapshot["orders_month"]) == (2, 3, 3)
+        assert snapshot["revenue_today"] == 100
+        assert snapshot["revenue_month"] == 300
+        assert snapshot["confirmed_revenue_month"] == 200
+        assert snapshot["avg_order_value"] == pytest.approx(700 / 3)
+        assert (snapshot["orders_pending"], snapshot["orders_confirmed"], snapshot["orders_delivered"]) == (1, 1, 1)
+        assert snapshot["total_users"] == 1
+        assert [o.order_number for o in snapshot["recent_orders"]][0] in ("#1001", "#1002")
+
+    def test_postgres_sql_uses_filter_and_sargable_ranges(self):
+        sql = str(metrics_statement(Market.US).compile(dialect=postgresql.dialect()))
+
+        assert "FILTER (WHERE orders.order_date >=" in sql
+        assert "date(" not in sql.lower()
+
+    def test_cache_serves_snapshot_until_ttl(self, monkeypatch):
+        cache = DashboardSnapshotCache(ttl_seconds=30)
+        clock = [1000.0]
+        monkeypatch.setattr("src.app_01.services.dashboard_snapshot.time.monotonic", lambda: clock[0])
+        loads = []
+
+        def load():
+            loads.append(1)
+            return {"orders_today": len(loads)}
+
+        assert cache.get(Market.KG, load)["orders_today"] == 1
+        assert cache.get(Market.KG, load)["orders_today"] == 1
+        assert cache.get(Market.US, load)["orders_today"] == 2
+        clock[0] += 31
+        assert cache.get(Market.KG, load)["orders_today"] == 3
@@ -0,0 +1,112 @@
+"""
+Unit Tests for Data Export
+Tests streamed CSV / gzip-CSV exports of stats, orders and order items
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from starlette.middleware.sessions import SessionMiddleware
+
+from src.app_01.services.data_export import (
+    ORDER_COLUMNS, csv_stream, iter_partitions, orders_statement, local_day_bounds
+)
+from src.app_01.db.market_db import Market
+from src.app_01.models.orders.order import OrderStatus
+from src.app_01.routers import admin_analytics_router
+from src.app_01.routers.admin_analytics_router import export_order_items, export_stats
+
+
+def _body(response) -> bytes:
+    async def consume():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(consume())
+
+
+@pytest.fixture
+def orders(db_session: Session, make_order):
+    db_session.add_all([
+        make_order(order_date=datetime(2026, 10, 18, 17, 0), quantity=2),  # Oct 18 23:00 in Bishkek
+        make_order(  # Oct 19 01:00 in Bishkek
+            "#1002", order_date=datetime(2026, 10, 18, 19, 0), status=OrderStatus.DELIVERED,
+            customer_name="Test, Jr.", quantity=2
+        ),
+        make_order(order_date=datetime(2026, 10, 20, 5, 0), quantity=2),
+    ])
+    db_session.commit()
+
+
+@pytest.mark.unit
+class TestDataExport:
+    """Test streamed exports"""
+
+    def test_orders_csv_is_chunked_and_filtered_by_market_day(self, db_session: Session, orders):
+        statement = orders_statement(Market.KG, date(2026, 10, 19), date(2026, 10, 19))
+        chunks = list(csv_stream(ORDER_COLUMNS, iter_partitions(db_session, statement, chunk_size=1)))
+
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        assert rows[0][:3] == ["order_id", "order_number", "status"]
+        assert [(row[1], row[2]) for row in rows[1:]] == [("#1002", "delivered")]
+        assert rows[1][4] == "Test, Jr."
+
+    def test_chunk_per_partition(self, db_session: Session, orders):
+        chunks = list(csv_stream(ORDER_COLUMNS, iter_partitions(db_session, orders_statement(Market.KG, None, None), chunk_size=1)))
+
+        assert len(chunks) == 4  # Header + one per row
+
+    def test_order_items_gzip_endpoint(self, db_session: Session, orders):
+        db_session.connection()  # Body is read in a worker thread: keep this in-memory DB's connection
+        response = export_order_items(date(2026, 10, 18), date(2026, 10, 20), "csv.gz", db_session)
+
+        assert response.media_type == "application/gzip"
+        assert 'filename="order-items-kg-2026-10-18-2026-10-20.csv.gz"' in response.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(gzip.decompress(_body(response)).decode())))
+        assert len(rows) == 4
+        assert rows[1][rows[0].index("quantity")] == "2"
+
+    def test_invalid_requests(self, db_session: Session):
+        with pytest.raises(HTTPException) as exc_info:
+            export_stats(date(2026, 10, 2), date(2026, 10, 1), "csv", db_session)
+        assert exc_info.value.status_code == 400
+
+    def test_local_day_bounds(self):
+        start, end = local_day_bounds(Market.US, date(2026, 10, 19), date(2026, 10, 19))
+
+        assert start.isoformat() == "2026-10-19T04:00:00+00:00"
+        assert end.isoformat() == "2026-10-20T04:00:00+00:00"
+
+
+@pytest.mark.unit
+class TestExportAuth:
+    """Exports contain customer data: admin session required"""
+
+    def _client(self) -> TestClient:
+        app = FastAPI()
+        app.add_middleware(SessionMiddleware, secret_key="test-secret")
+        app.include_router(admin_analytics_router.router)
+        app.dependency_overrides[admin_analytics_router.get_db] = self._no_db
+        return TestClient(app)
+
+    @staticmethod
+    def _no_db():
+        raise AssertionError("DB queried before the admin check")
+
+    @pytest.mark.parametrize("path", ["/export/orders", "/export/order-items", "/export", "/today"])
+    def test_anonymous_request_is_rejected(self, path):
+        response = self._client().get(f"/api/v1/admin/analytics{path}")
+
+        assert response.status_code == 401
+
+    def test_admin_session_is_checked(self):
+        with patch.object(admin_analytics_router.admin_auth, "authenticate", AsyncMock(return_value=False)) as authenticate:
+            response = self._client().get("/api/v1/admin/analytics/export/orders")
+
+        assert response.status_code == 401
+        authenticate.assert_awaited_once()
@@ -0,0 +1,128 @@
+"""
+Unit Tests for Guest Cart
+Tests cookie signing, batched hydration, market checks and the bulk merge into the DB cart
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.guest_cart import GuestCart, GuestCartCodec, hydrate_guest_cart, merge_guest_cart
+from src.app_01.models.orders.cart import Cart, CartItem
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.sku import SKU
+
+
+@pytest.fixture
+def skus(db_session: Session):
+    """Two active SKUs with stock and one inactive SKU"""
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db_session.add_all([brand, category])
+    db_session.commit()
+    subcategory = Subcategory(name="Shirts", slug="shirts", category_id=category.id)
+    db_session.add(subcategory)
+    db_session.commit()
+    product = Product(
+        title="Shirt", slug="shirt", sku_code="P-1", main_image="/uploads/shirt.jpg",
+        brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id
+    )
+    db_session.add(product)
+    db_session.commit()
+    created = [
+        SKU(product_id=product.id, sku_code="SKU-1", size="M", color="white", price=100, stock=5),
+        SKU(product_id=product.id, sku_code="SKU-2", size="L", color="black", price=150, stock=1,
+            variant_image="/uploads/shirt-black.jpg"),
+        SKU(product_id=product.id, sku_code="SKU-3", size="S", color="red", price=90, stock=9, is_active=False),
+    ]
+    db_session.add_all(created)
+    db_session.commit()
+    return created
+
+
+@pytest.mark.unit
+class TestGuestCartCodec:
+    """Test the signed cookie format"""
+
+    def test_round_trip(self):
+        codec = GuestCartCodec("secret")
+
+        assert codec.decode(codec.encode({3: 1, 7: 2}, Market.US)) == GuestCart(Market.US, {3: 1, 7: 2})
+
+    def test_tampered_or_foreign_cookie_reads_as_empty(self):
+        codec = GuestCartCodec("secret")
+        value = codec.encode({3: 1}, Market.KG)
+        version, market, payload, signature = value.split(".")
+        forged = GuestCartCodec("secret").encode({3: 50}, Market.KG).split(".")[2]
+
+        assert codec.decode(f"{version}.{market}.{forged}.{signature}").lines == {}
+        assert codec.decode(f"{version}.us.{payload}.{signature}").lines == {}  # Market is signed too
+        assert codec.decode(GuestCartCodec("other-secret").encode({3: 1}, Market.KG)).lines == {}
+        assert codec.decode("garbage").lines == {}
+        assert codec.decode(None).lines == {}
+
+    def test_limits(self):
+        codec = GuestCartCodec("secret", max_lines=2, max_quantity=5)
+        lines = codec.set_quantity({}, 1, 10)
+        lines = codec.set_quantity(lines, 2, 1)
+
+        assert lines == {1: 5, 2: 1}
+        with pytest.raises(ValueError):
+            codec.set_quantity(lines, 3, 1)
+        assert codec.set_quantity(lines, 1, 0) == {2: 1}
+
+
+@pytest.mark.unit
+class TestGuestCartDatabase:
+    """Test hydration and merge"""
+
+    def test_hydration_uses_one_query(self, db_session: Session, skus):
+        ids = [sku.id for sku in skus]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            cart = hydrate_guest_cart(db_session, GuestCart(Market.KG, {ids[0]: 2, ids[1]: 2, ids[2]: 1, 999: 1}))
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        assert len(statements) == 1
+        by_sku = {item["sku_id"]: item for item in cart["items"]}
+        assert set(by_sku) == {skus[0].id, skus[1].id, skus[2].id}
+        assert by_sku[skus[0].id]["available"] is True
+        assert by_sku[skus[1].id]["available"] is False  # Only one in stock
+        assert by_sku[skus[1].id]["image"] == "/uploads/shirt-black.jpg"
+        assert by_sku[skus[2].id]["available"] is False  # Inactive
+        assert cart["total_price"] == 200
+
+    def test_merge_sums_existing_lines_and_skips_unknown_skus(self, db_session: Session, skus):
+        cart = Cart(user_id=1)
+        db_session.add(cart)
+        db_session.flush()
+        db_session.add(CartItem(cart_id=cart.id, sku_id=skus[0].id, quantity=1))
+        db_session.commit()
+
+        merged = merge_guest_cart(db_session, 1, GuestCart(Market.KG, {skus[0].id: 2, skus[1].id: 1, 999: 4}))
+        db_session.commit()
+
+        assert merged == 2
+        quantities = dict(db_session.query(CartItem.sku_id, CartItem.quantity).filter(CartItem.cart_id == cart.id).all())
+        assert quantities == {skus[0].id: 3, skus[1].id: 1}
+
+    def test_merge_creates_missing_cart(self, db_session: Session, skus):
+        merge_guest_cart(db_session, 2, GuestCart(Market.KG, {skus[0].id: 1}))
+        db_session.commit()
+
+        cart = db_session.query(Cart).filter(Cart.user_id == 2).one()
+        assert [(item.sku_id, item.quantity) for item in cart.items] == [(skus[0].id, 1)]
+
+    def test_cart_of_another_market_is_dropped(self, db_session: Session, skus):
+        us_cart = GuestCart(Market.US, {skus[0].id: 1})
+
+        assert hydrate_guest_cart(db_session, us_cart)["items"] == []
+        assert merge_guest_cart(db_session, 3, us_cart) == 0
+        db_session.commit()
+        assert db_session.query(Cart).filter(Cart.user_id == 3).count() == 0
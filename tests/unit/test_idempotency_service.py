@@ -0,0 +1,148 @@
+"""
+Unit Tests for Idempotency Service
+Tests Idempotency-Key claim, replay, conflict and expiry handling
+"""
+
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from src.app_01.services.idempotency_service import IdempotencyService
+from src.app_01.models.orders.idempotency_key import IdempotencyKey, IdempotencyStatus
+from src.app_01.models.orders.cart import Cart, CartItem
+from src.app_01.models.users.user import User
+from src.app_01.routers import cart_router
+from src.app_01.schemas.cart import ClearCartRequest
+
+
+@pytest.fixture
+def service():
+    return IdempotencyService(ttl_hours=1, lock_timeout_seconds=60, wait_timeout_seconds=0.2)
+
+
+@pytest.mark.unit
+class TestIdempotencyService:
+    """Test key lifecycle"""
+
+    def test_hash_request_is_order_independent(self, service):
+        assert service.hash_request({"a": 1, "b": 2}) == service.hash_request({"b": 2, "a": 1})
+        assert service.hash_request({"a": 1}) != service.hash_request({"a": 2})
+
+    def test_first_request_claims_key(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+
+        assert record.id is not None
+        assert record.status == IdempotencyStatus.IN_PROGRESS
+        assert not record.is_completed
+
+    def test_completed_key_is_replayed(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+        service.complete(db_session, record, {"id": 42, "order_number": "#1001"})
+        db_session.commit()
+
+        replay = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+
+        assert replay.is_completed
+        assert service.load_response(replay) == {"id": 42, "order_number": "#1001"}
+        assert db_session.query(IdempotencyKey).count() == 1
+
+    def test_key_reused_with_different_body_is_rejected(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash-a")
+        service.complete(db_session, record, {"id": 1})
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.begin(db_session, 1, "orders.create", "key-1", "hash-b")
+        assert exc_info.value.status_code == 422
+
+    def test_keys_are_namespaced_by_user_and_scope(self, service, db_session: Session):
+        first = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+        other_user = service.begin(db_session, 2, "orders.create", "key-1", "hash")
+        other_scope = service.begin(db_session, 1, "cart.add", "key-1", "hash")
+
+        assert len({first.id, other_user.id, other_scope.id}) == 3
+
+    def test_duplicate_waits_then_conflicts_while_first_attempt_runs(self, service, db_session: Session):
+        service.begin(db_session, 1, "orders.create", "key-1", "hash")
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.begin(db_session, 1, "orders.create", "key-1", "hash")
+        assert exc_info.value.status_code == 409
+
+    def test_abandoned_key_can_be_retried(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+        service.abandon(db_session, record)
+
+        retry = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+
+        assert retry.status == IdempotencyStatus.IN_PROGRESS
+        assert db_session.query(IdempotencyKey).count() == 1
+
+    def test_stale_claim_is_taken_over(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+        record.locked_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        db_session.commit()
+
+        retry = service.begin(db_session, 1, "orders.create", "key-1", "hash")
+
+        assert retry.id == record.id
+        assert retry.status == IdempotencyStatus.IN_PROGRESS
+
+    def test_expired_key_is_reusable_and_purged(self, service, db_session: Session):
+        record = service.begin(db_session, 1, "orders.create", "key-1", "hash-a")
+        service.complete(db_session, record, {"id": 1})
+        record.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.commit()
+
+        reused = service.begin(db_session, 1, "orders.create", "key-1", "hash-b")
+        assert reused.status == IdempotencyStatus.IN_PROGRESS
+        assert reused.request_hash == "hash-b"
+
+        reused.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.commit()
+        assert service.purge_expired(db_session) == 1
+
+    def test_invalid_key_is_rejected(self, service, db_session: Session):
+        with pytest.raises(HTTPException) as exc_info:
+            service.begin(db_session, 1, "orders.create", "x" * 300, "hash")
+        assert exc_info.value.status_code == 422
+
+
+
+@pytest.mark.unit
+class TestIdempotentCartMutation:
+    """Cart changes commit together with their idempotency record"""
+
+    def _cart_with_item(self, db_session: Session):
+        user = User(phone_number="+996555123456", market="kg", is_active=True)
+        db_session.add(user)
+        db_session.flush()
+        cart = Cart(user_id=user.id)
+        db_session.add(cart)
+        db_session.flush()
+        db_session.add(CartItem(cart_id=cart.id, sku_id=1, quantity=2))
+        db_session.commit()
+        return user, cart
+
+    def test_crash_before_commit_does_not_apply_change(self, service, db_session: Session):
+        user, cart = self._cart_with_item(db_session)
+        request = ClearCartRequest(user_id=user.id)
+
+        def clear():
+            return cart_router._clear_cart(request, db_session)
+
+        with patch.object(cart_router, "idempotency_service", service), \
+                patch.object(service, "complete", side_effect=RuntimeError("crash")):
+            with pytest.raises(RuntimeError):
+                cart_router.run_idempotent(db_session, user.id, "cart.clear", "key-1", request.dict(), clear)
+
+        assert db_session.query(CartItem).filter(CartItem.cart_id == cart.id).count() == 1
+        assert db_session.query(IdempotencyKey).count() == 0
+
+        with patch.object(cart_router, "idempotency_service", service):
+            result = cart_router.run_idempotent(db_session, user.id, "cart.clear", "key-1", request.dict(), clear)
+
+        assert result.total_items == 0
+        assert db_session.query(IdempotencyKey).one().status == IdempotencyStatus.COMPLETED
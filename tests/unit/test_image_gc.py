@@ -0,0 +1,121 @@
+"""
+Unit Tests for Image GC
+Tests the cross-market reference index and the incremental sweep of static/uploads
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.image_gc import ImageGC, ImageReferenceIndex
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.sku import SKU
+
+OLD = time.time() - 7 * 86400
+
+
+def _file(root, relative_path, size=100, mtime=OLD):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def catalog(db_session: Session):
+    brand = Brand(name="Brand", slug="brand", logo_url="/uploads/brands/logo.png")
+    category = Category(name="Men", slug="men", image_url="https://cdn.example.com/men.png")
+    db_session.add_all([brand, category])
+    db_session.flush()
+    subcategory = Subcategory(category_id=category.id, name="Shirts", slug="shirts")
+    db_session.add(subcategory)
+    db_session.flush()
+    product = Product(
+        brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id, title="Shirt", slug="shirt",
+        sku_code="SH-1", main_image="/uploads/product/main.jpg", additional_images=["/uploads/product/extra.jpg"]
+    )
+    db_session.add(product)
+    db_session.flush()
+    db_session.add(SKU(product_id=product.id, sku_code="SH-1-M", size="M", color="black", price=10,
+                       variant_image="/uploads/product/black.jpg"))
+    db_session.commit()
+
+    def get_db_session(market):
+        yield db_session
+
+    with patch("src.app_01.services.image_gc.db_manager.get_db_session", side_effect=get_db_session):
+        yield db_session
+
+
+@pytest.mark.unit
+class TestReferenceIndex:
+    """Mark phase"""
+
+    def test_collects_upload_references(self, catalog):
+        index = ImageReferenceIndex.build([Market.KG])
+
+        for relative_path in ["product/main.jpg", "product/extra.jpg", "product/black.jpg", "brands/logo.png"]:
+            assert index.is_referenced(relative_path)
+        assert not index.is_referenced("product/other.jpg")
+        assert index.references == 4  # External category URL is ignored
+
+    def test_variants_follow_their_image(self, catalog):
+        index = ImageReferenceIndex.build([Market.KG])
+
+        assert index.is_referenced("product/main_640w.webp")
+        assert index.is_referenced("product/main_thumbnail.jpg")
+        assert not index.is_referenced("product/other_640w.webp")
+
+
+@pytest.mark.unit
+class TestSweep:
+    """Sweep phase"""
+
+    def test_dry_run_reports_without_deleting(self, tmp_path, catalog):
+        _file(tmp_path, "product/main.jpg")
+        orphan = _file(tmp_path, "product/orphan.jpg", size=300)
+        gc = ImageGC(str(tmp_path))
+
+        report = gc.sweep(ImageReferenceIndex.build([Market.KG]))
+
+        assert (report["unreferenced"], report["reclaimed_bytes"], report["live"]) == (1, 300, 1)
+        assert orphan.exists()
+
+    def test_deletes_orphans_and_keeps_live_and_recent(self, tmp_path, catalog):
+        main = _file(tmp_path, "product/main.jpg")
+        variant = _file(tmp_path, "product/main_320w.webp")
+        orphan = _file(tmp_path, "product/orphan.jpg", size=250)
+        orphan_variant = _file(tmp_path, "product/orphan_320w.webp", size=50)
+        fresh = _file(tmp_path, "product/just-uploaded.jpg", mtime=time.time())
+        gc = ImageGC(str(tmp_path))
+
+        report = gc.sweep(ImageReferenceIndex.build([Market.KG]), delete=True)
+
+        assert report["reclaimed_bytes"] == 300
+        assert report["recent"] == 1
+        assert main.exists() and variant.exists() and fresh.exists()
+        assert not orphan.exists() and not orphan_variant.exists()
+
+    def test_incremental_batches_resume_from_cursor(self, tmp_path, catalog):
+        orphans = [_file(tmp_path, f"product/orphan{i}.jpg") for i in range(5)]
+        gc = ImageGC(str(tmp_path), batch_size=2)
+        index = ImageReferenceIndex.build([Market.KG])
+
+        reports = [gc.sweep(index, delete=True) for _ in range(3)]
+
+        assert [report["checked"] for report in reports] == [2, 2, 1]
+        assert [report["finished"] for report in reports] == [False, False, True]
+        assert not any(path.exists() for path in orphans)
+        assert gc._read_cursor() == ""
+
+    def test_unreadable_market_aborts_mark(self):
+        with patch("src.app_01.services.image_gc.db_manager.get_db_session", side_effect=RuntimeError("down")):
+            with pytest.raises(RuntimeError):
+                ImageReferenceIndex.build()
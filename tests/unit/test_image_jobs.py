@@ -0,0 +1,211 @@
+"""
+Unit Tests for Image Jobs
+Tests queuing admin uploads, background processing, ordering, superseded saves, batch completion and retries
+"""
+
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.app_01.db.market_db import Base, Market
+from src.app_01.services.image_jobs import ImageJobQueue, enqueue_images
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.sku import SKU
+from src.app_01.models.products.image_job import ImageJob, ImageJobStatus
+from src.app_01.utils import image_upload
+from src.app_01.utils.image_upload import ImageProcessingPool, ImageUploader
+
+
+def _jpeg(color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """File-backed database (workers use their own sessions from threads) and a thread-backed image pool"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db_session(market):
+        yield SessionLocal()
+
+    monkeypatch.setattr(image_upload, "image_pool", ImageProcessingPool(workers=0, max_queue=8))
+    uploader = ImageUploader(upload_dir=str(tmp_path / "uploads"))
+    with patch("src.app_01.services.image_jobs.db_manager.get_db_session", side_effect=get_db_session), \
+            patch("src.app_01.services.image_jobs.image_uploader", uploader):
+        yield SessionLocal
+    engine.dispose()
+
+
+@pytest.fixture
+def product(sessions):
+    db = sessions()
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db.add_all([brand, category])
+    db.flush()
+    subcategory = Subcategory(category_id=category.id, name="Shirts", slug="shirts")
+    db.add(subcategory)
+    db.flush()
+    product = Product(brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id,
+                      title="Shirt", slug="shirt", sku_code="SH-1", main_image="/uploads/product/old.jpg")
+    db.add(product)
+    db.flush()
+    db.add(SKU(product_id=product.id, sku_code="SH-1-M", size="M", color="black", price=10))
+    db.commit()
+    product_id = product.id
+    db.close()
+    return product_id
+
+
+def _queue(sessions, target_type, target_id, field, files):
+    db = sessions()
+    jobs = enqueue_images(db, target_type, target_id, field, files)
+    db.commit()
+    ids = [job.id for job in jobs]
+    db.close()
+    return ids
+
+
+@pytest.mark.unit
+class TestImageJobs:
+    """Admin uploads are processed in the background and written to their row"""
+
+    @pytest.mark.asyncio
+    async def test_main_image_is_applied_when_done(self, sessions, product):
+        _queue(sessions, "product", product, "main_image", [("photo.jpg", _jpeg())])
+        db = sessions()
+        assert db.get(Product, product).main_image == "/uploads/product/old.jpg"  # Row keeps its image meanwhile
+        db.close()
+
+        assert await ImageJobQueue(concurrency=4).drain(Market.KG) == 1
+
+        db = sessions()
+        job = db.query(ImageJob).one()
+        assert job.status == ImageJobStatus.DONE
+        assert job.source is None
+        assert db.get(Product, product).main_image == job.result_url
+        assert job.result_url.startswith("/uploads/product/")
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_additional_images_keep_upload_order(self, sessions, product):
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        _queue(sessions, "product", product, "additional_images", [(f"{i}.jpg", _jpeg(c)) for i, c in enumerate(colors)])
+
+        await ImageJobQueue(concurrency=4).drain(Market.KG)
+
+        db = sessions()
+        jobs = db.query(ImageJob).order_by(ImageJob.position).all()
+        assert db.get(Product, product).additional_images == [job.result_url for job in jobs]
+        assert len(set(job.result_url for job in jobs)) == 3
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_superseded_batch_is_not_applied(self, sessions, product):
+        older = _queue(sessions, "product", product, "main_image", [("first.jpg", _jpeg((1, 2, 3)))])
+        _queue(sessions, "product", product, "main_image", [("second.jpg", _jpeg((250, 250, 250)))])
+        queue = ImageJobQueue(concurrency=1)
+
+        await queue.process(Market.KG, older[0])
+
+        db = sessions()
+        assert db.get(Product, product).main_image == "/uploads/product/old.jpg"
+        db.close()
+        await queue.drain(Market.KG)
+        db = sessions()
+        latest = db.query(ImageJob).order_by(ImageJob.id.desc()).first()
+        assert db.get(Product, product).main_image == latest.result_url
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_sku_variant_image(self, sessions, product):
+        db = sessions()
+        sku_id = db.query(SKU.id).scalar()
+        db.close()
+        _queue(sessions, "sku", sku_id, "variant_image", [("black.jpg", _jpeg((0, 0, 0)))])
+
+        await ImageJobQueue().drain(Market.KG)
+
+        db = sessions()
+        assert db.get(SKU, sku_id).variant_image.startswith("/uploads/product/")
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_invalid_image_fails_with_error(self, sessions, product):
+        _queue(sessions, "product", product, "main_image", [("photo.jpg", b"not an image")])
+
+        await ImageJobQueue(max_attempts=3).drain(Market.KG)
+
+        db = sessions()
+        job = db.query(ImageJob).one()
+        assert job.status == ImageJobStatus.FAILED
+        assert job.attempts == 1
+        assert job.last_error
+        assert db.get(Product, product).main_image == "/uploads/product/old.jpg"
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_busy_pool_is_retried(self, sessions, product, monkeypatch):
+        busy = ImageProcessingPool(workers=0, max_queue=0)
+        busy._in_flight = busy.capacity
+        monkeypatch.setattr(image_upload, "image_pool", busy)
+        _queue(sessions, "product", product, "main_image", [("photo.jpg", _jpeg())])
+
+        await ImageJobQueue(max_attempts=3).drain(Market.KG)
+
+        db = sessions()
+        job = db.query(ImageJob).one()
+        assert job.status == ImageJobStatus.PENDING
+        assert job.attempts == 1
+        assert job.source is not None
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_list_field_is_written_once_the_batch_is_finished(self, sessions, product):
+        valid, invalid = _queue(
+            sessions, "product", product, "additional_images", [("0.jpg", _jpeg()), ("1.jpg", b"not an image")]
+        )
+        queue = ImageJobQueue()
+
+        await queue.process(Market.KG, valid)
+
+        db = sessions()
+        assert not db.get(Product, product).additional_images  # Second job still pending
+        db.close()
+        await queue.process(Market.KG, invalid)
+        db = sessions()
+        assert db.get(Product, product).additional_images == [db.get(ImageJob, valid).result_url]
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_row_update_is_retried(self, sessions, product):
+        job_id, = _queue(sessions, "product", product, "main_image", [("photo.jpg", _jpeg())])
+        queue = ImageJobQueue(max_attempts=3)
+
+        with patch.object(queue, "_apply", side_effect=RuntimeError("row locked")):
+            await queue.process(Market.KG, job_id)
+
+        db = sessions()
+        job = db.get(ImageJob, job_id)
+        assert (job.status, job.attempts, job.result_url) == (ImageJobStatus.PENDING, 1, None)
+        assert job.source is not None
+        assert db.get(Product, product).main_image == "/uploads/product/old.jpg"
+        db.close()
+
+        await queue.process(Market.KG, job_id)
+
+        db = sessions()
+        job = db.get(ImageJob, job_id)
+        assert job.status == ImageJobStatus.DONE
+        assert db.get(Product, product).main_image == job.result_url
+        db.close()
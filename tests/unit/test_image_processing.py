@@ -0,0 +1,482 @@
+"""
+Unit Tests for the Image Processing Pool
+Tests worker offload, the queue limit, uploads through the pool, streamed uploads, responsive variants and placeholders
+"""
+
+import asyncio
+import base64
+import glob
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+import pytest
+from fastapi import HTTPException, Request, UploadFile
+from PIL import Image
+
+from src.app_01.utils import image_upload
+from src.app_01.utils.image_upload import ImageProcessingBusy, ImageProcessingPool, ImageUploader, NO_PLACEHOLDER, srcset
+from src.app_01.services.image_variants import backfill
+from src.app_01.services import image_placeholders
+
+
+def _jpeg(size=(1600, 1200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _near_red(color: str) -> bool:
+    """JPEG shifts the (200, 30, 30) test color slightly"""
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return abs(r - 200) <= 4 and abs(g - 30) <= 4 and abs(b - 30) <= 4
+
+
+def _form_request(content: bytes, fields=None, chunk_size=64 * 1024, content_length=True):
+    """Multipart request whose body arrives in chunks; ``received`` counts the chunks read"""
+    boundary = "test-boundary"
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in (fields or {}).items()
+    )
+    body += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    headers = [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    received = []
+
+    async def receive():
+        received.append(chunks[len(received)])
+        return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(chunks)}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive), received
+
+
+@pytest.fixture
+def pool():
+    pool = ImageProcessingPool(workers=1, max_queue=0)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.unit
+class TestImageProcessingPool:
+    """Jobs run in worker processes and the pool is bounded"""
+
+    @pytest.mark.asyncio
+    async def test_jobs_run_in_a_worker_process(self, pool):
+        assert await pool.run(os.getpid) != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_during_a_job(self, pool):
+        await pool.run(os.getpid)  # Start the worker first
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await pool.run(time.sleep, 0.3)
+        task.cancel()
+
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_full_pool_refuses_jobs(self, pool):
+        slow = asyncio.create_task(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0)  # Let the slow job take the only slot
+
+        with pytest.raises(ImageProcessingBusy):
+            await pool.run(os.getpid)
+        await slow
+        assert await pool.run(os.getpid)
+
+    @pytest.mark.asyncio
+    async def test_zero_workers_runs_in_a_thread(self):
+        pool = ImageProcessingPool(workers=0, max_queue=2)
+
+        assert await pool.run(os.getpid) == os.getpid()
+
+
+@pytest.mark.unit
+class TestUploadsThroughPool:
+    """ImageUploader decodes, resizes and encodes in the pool"""
+
+    @pytest.mark.asyncio
+    async def test_save_image_resizes(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        url = await uploader.save_image(UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="products")
+
+        saved = Image.open(tmp_path / "products" / url.rsplit("/", 1)[1])
+        assert max(saved.size) == 500
+
+    @pytest.mark.asyncio
+    async def test_save_multiple_sizes(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        urls = await uploader.save_multiple_sizes(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="products", sizes=["small", "large"]
+        )
+
+        assert set(urls) == {"small", "large"}
+        sizes = {name: Image.open(tmp_path / "products" / url.rsplit("/", 1)[1]).size for name, url in urls.items()}
+        assert max(sizes["small"]) == 200
+        assert max(sizes["large"]) == 1200
+
+    @pytest.mark.asyncio
+    async def test_busy_pool_is_a_503(self, tmp_path, monkeypatch):
+        busy = ImageProcessingPool(workers=0, max_queue=0)
+        busy._in_flight = busy.capacity
+        monkeypatch.setattr(image_upload, "image_pool", busy)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.save_image(UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="products")
+        assert exc.value.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_invalid_image_is_rejected(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.save_image(UploadFile(filename="photo.jpg", file=io.BytesIO(b"not an image")), category="products")
+        assert exc.value.status_code == 400
+
+
+@pytest.mark.unit
+class TestContentAddressedNames:
+    """The same photo with the same options is stored once"""
+
+    @pytest.mark.asyncio
+    async def test_same_upload_reuses_file(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg()
+
+        first = await uploader.save_image(UploadFile(filename="a.jpg", file=io.BytesIO(content)), category="products")
+        second = await uploader.save_image(UploadFile(filename="b.jpg", file=io.BytesIO(content)), category="products")
+        streamed = await uploader.save_upload(UploadFile(filename="c.jpg", file=io.BytesIO(content)), category="products")
+        resized = await uploader.save_image(
+            UploadFile(filename="d.jpg", file=io.BytesIO(content)), category="products", resize_to="large"
+        )
+
+        assert first == second == streamed.url
+        assert resized != first
+        assert len(list((tmp_path / "products").iterdir())) == 2
+
+    @pytest.mark.asyncio
+    async def test_reused_file_gets_missing_variants(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg()
+
+        url = await uploader.save_image(UploadFile(filename="a.jpg", file=io.BytesIO(content)), category="product")
+        assert uploader.variant_urls(url) is None
+        assert await uploader.save_image(
+            UploadFile(filename="a.jpg", file=io.BytesIO(content)), category="product", variants=True
+        ) == url
+
+        assert uploader.variant_urls(url) is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method", ["save_image", "save_upload"])
+    async def test_reused_file_is_touched(self, tmp_path, pool, monkeypatch, method):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg((400, 300))
+        await getattr(uploader, method)(
+            UploadFile(filename="a.jpg", file=io.BytesIO(content)), category="product", variants=True, placeholder=True
+        )
+        old = time.time() - 7 * 86400
+        for path in (tmp_path / "product").iterdir():
+            os.utime(path, (old, old))
+
+        await getattr(uploader, method)(
+            UploadFile(filename="b.jpg", file=io.BytesIO(content)), category="product", variants=True, placeholder=True
+        )
+
+        # An orphan reused by a new upload is young again for the image GC
+        assert all(path.stat().st_mtime > old + 86400 for path in (tmp_path / "product").iterdir())
+
+
+@pytest.mark.unit
+class TestStreamedUpload:
+    """save_upload streams to a temp file with a size limit and decodes once"""
+
+    @staticmethod
+    def _temp_uploads():
+        return set(glob.glob(os.path.join(tempfile.gettempdir(), "upload-*")))
+
+    @pytest.mark.asyncio
+    async def test_header_dimensions_and_size(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg((1600, 1200))
+        before = self._temp_uploads()
+
+        stored = await uploader.save_upload(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(content)), category="products", resize_to="large", variants=True
+        )
+
+        assert (stored.format, stored.width, stored.height, stored.file_size) == ("JPEG", 1600, 1200, len(content))
+        assert Image.open(tmp_path / "products" / stored.url.rsplit("/", 1)[1]).size == (1200, 900)
+        assert uploader.variant_urls(stored.url)["webp"][640].endswith("_640w.webp")
+        assert self._temp_uploads() == before
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_is_a_413(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        uploader.MAX_FILE_SIZE = 1024
+        before = self._temp_uploads()
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.save_upload(UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="products")
+
+        assert exc.value.status_code == 413
+        assert self._temp_uploads() == before
+
+    @pytest.mark.asyncio
+    async def test_declared_size_is_checked_before_reading(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        upload = UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg()), size=uploader.MAX_FILE_SIZE + 1)
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.save_upload(upload, category="products")
+
+        assert exc.value.status_code == 413
+        assert upload.file.tell() == 0
+
+    @pytest.mark.asyncio
+    async def test_not_an_image_is_a_400(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.save_upload(UploadFile(filename="photo.jpg", file=io.BytesIO(b"not an image")), category="products")
+
+        assert exc.value.status_code == 400
+        assert list((tmp_path / "products").iterdir()) == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestReceiveUpload:
+    """receive_upload enforces the size limit while the body is received"""
+
+    async def test_fields_and_file(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg((400, 300))
+        request, _ = _form_request(content, {"product_id": "7", "alt_text": "Red"}, chunk_size=1000)
+
+        fields, upload = await uploader.receive_upload(request)
+        try:
+            assert fields == {"product_id": "7", "alt_text": "Red"}
+            assert (upload.filename, upload.size) == ("photo.jpg", len(content))
+            assert upload.digest == hashlib.sha256(content).hexdigest()
+            with open(upload.path, "rb") as f:
+                assert f.read() == content
+        finally:
+            upload.discard()
+
+    async def test_declared_length_is_refused_before_reading(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        uploader.MAX_FILE_SIZE = 1024
+        request, received = _form_request(os.urandom(128 * 1024))
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.receive_upload(request)
+
+        assert exc.value.status_code == 413
+        assert received == []
+
+    async def test_reading_stops_at_the_limit(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        uploader.MAX_FILE_SIZE = 4096
+        content = os.urandom(64 * 1024)
+        request, received = _form_request(content, chunk_size=1024, content_length=False)
+        before = TestStreamedUpload._temp_uploads()
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.receive_upload(request)
+
+        assert exc.value.status_code == 413
+        assert len(received) <= 6
+        assert TestStreamedUpload._temp_uploads() == before
+
+    async def test_missing_file_is_a_400(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        request = Request(
+            {"type": "http", "method": "POST", "headers": [(b"content-type", b"application/json")]},
+            None
+        )
+
+        with pytest.raises(HTTPException) as exc:
+            await uploader.receive_upload(request)
+
+        assert exc.value.status_code == 400
+
+
+@pytest.mark.unit
+class TestResponsiveVariants:
+    """Product uploads get a WebP/JPEG ladder under fixed names"""
+
+    @pytest.mark.asyncio
+    async def test_upload_saves_ladder(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        url = await uploader.save_image(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="product", variants=True
+        )
+
+        variants = uploader.variant_urls(url)
+        stem = url.rsplit(".", 1)[0]
+        assert set(variants) >= {"webp", "jpeg"}
+        assert variants["webp"][320] == f"{stem}_320w.webp"
+        assert variants["jpeg"][1280] == f"{stem}_1280w.jpg"
+        for width, variant_url in variants["webp"].items():
+            saved = Image.open(tmp_path / "product" / variant_url.rsplit("/", 1)[1])
+            assert saved.format == "WEBP"
+            assert saved.width == width
+        assert srcset(variants) == ", ".join(f"{stem}_{w}w.webp {w}w" for w in ImageUploader.VARIANT_WIDTHS)
+
+    @pytest.mark.asyncio
+    async def test_small_source_is_not_upscaled(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        url = await uploader.save_image(
+            UploadFile(filename="photo.png", file=io.BytesIO(_jpeg((400, 300)))), category="product", variants=True
+        )
+
+        variants = uploader.variant_urls(url)
+        stem = url.rsplit(".", 1)[0]
+        # Rungs wider than the source collapse into one at its own width
+        assert list(variants["jpeg"]) == [320, 400]
+        largest = Image.open(tmp_path / "product" / variants["jpeg"][400].rsplit("/", 1)[1])
+        assert largest.size == (400, 300)
+        assert srcset(variants) == f"{stem}_320w.webp 320w, {stem}_400w.webp 400w"
+        assert not (tmp_path / "product" / f"{stem.rsplit('/', 1)[1]}_640w.webp").exists()
+
+    def test_no_variants_for_plain_or_external_images(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        (tmp_path / "product").mkdir()
+        Image.new("RGB", (50, 50)).save(tmp_path / "product" / "old.jpg")
+
+        assert uploader.variant_urls("/uploads/product/old.jpg") is None
+        assert uploader.variant_urls("https://cdn.example.com/a.jpg") is None
+        assert uploader.variant_urls(None) is None
+        assert srcset(None) is None
+
+    def test_misses_are_cached_briefly(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        (tmp_path / "product").mkdir()
+        (tmp_path / "product" / "old.jpg").write_bytes(_jpeg())
+        url = "/uploads/product/old.jpg"
+        assert uploader.variant_urls(url) is None
+
+        backfill(uploader, workers=1)
+
+        assert uploader.variant_urls(url) is None  # Miss still trusted
+        uploader._variant_misses[url] = time.monotonic() - 1  # TTL expired
+        assert uploader.variant_urls(url)["webp"][1280] == "/uploads/product/old_1280w.webp"
+
+    @pytest.mark.asyncio
+    async def test_release_keeps_shared_files(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        url = await uploader.save_image(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="product", variants=True
+        )
+        files = sorted((tmp_path / "product").iterdir())
+
+        assert uploader.release_image(url)
+
+        # Other rows may use the same bytes: the image GC removes unreferenced files
+        assert sorted((tmp_path / "product").iterdir()) == files
+        assert not uploader.release_image("/uploads/product/missing.jpg")
+
+    def test_backfill_builds_missing_ladders(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        (tmp_path / "product").mkdir()
+        (tmp_path / "product" / "old.jpg").write_bytes(_jpeg())
+
+        assert backfill(uploader, workers=1) == {"generated": 1, "skipped": 0, "failed": 0}
+        assert uploader.variant_urls("/uploads/product/old.jpg")["webp"][640] == "/uploads/product/old_640w.webp"
+        # Second run finds the ladder in place and ignores the generated files
+        assert backfill(uploader, workers=1) == {"generated": 0, "skipped": 1, "failed": 0}
+
+
+@pytest.mark.unit
+class TestPlaceholders:
+    """Product, SKU and banner uploads get an inline preview and dominant color"""
+
+    @pytest.mark.asyncio
+    async def test_upload_saves_placeholder(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        url = await uploader.save_image(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="product", placeholder=True
+        )
+
+        placeholder = uploader.placeholder(url)
+        assert _near_red(placeholder.color)
+        assert placeholder.lqip.startswith("data:image/webp;base64,")
+        preview = Image.open(io.BytesIO(base64.b64decode(placeholder.lqip.split(",", 1)[1])))
+        assert preview.size == (20, 15)
+
+    @pytest.mark.asyncio
+    async def test_streamed_upload_saves_placeholder(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        stored = await uploader.save_upload(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(_jpeg())), category="product", placeholder=True
+        )
+
+        assert _near_red(uploader.placeholder(stored.url).color)
+
+    @pytest.mark.asyncio
+    async def test_reused_file_gets_missing_placeholder(self, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(image_upload, "image_pool", pool)
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        content = _jpeg()
+        url = await uploader.save_image(UploadFile(filename="photo.jpg", file=io.BytesIO(content)), category="banner")
+        assert uploader.placeholder(url) == NO_PLACEHOLDER
+
+        again = await uploader.save_image(
+            UploadFile(filename="photo.jpg", file=io.BytesIO(content)), category="banner", placeholder=True
+        )
+
+        assert again == url
+        assert uploader.placeholder(url).lqip
+
+    def test_no_placeholder_for_external_images(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+
+        assert uploader.placeholder("https://cdn.example.com/a.jpg") == NO_PLACEHOLDER
+        assert uploader.placeholder(None).color is None
+
+    def test_backfill_builds_missing_placeholders(self, tmp_path):
+        uploader = ImageUploader(upload_dir=str(tmp_path))
+        (tmp_path / "banner").mkdir()
+        (tmp_path / "banner" / "old.jpg").write_bytes(_jpeg())
+        (tmp_path / "brands" / "logo.jpg").write_bytes(_jpeg())
+
+        assert image_placeholders.backfill(uploader, workers=1) == {"generated": 1, "skipped": 0, "failed": 0}
+        assert _near_red(uploader.placeholder("/uploads/banner/old.jpg").color)
+        assert uploader.placeholder("/uploads/brands/logo.jpg") == NO_PLACEHOLDER
+        assert image_placeholders.backfill(uploader, workers=1) == {"generated": 0, "skipped": 1, "failed": 0}
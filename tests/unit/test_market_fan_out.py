@@ -0,0 +1,101 @@
+"""
+Unit tests for MarketDatabaseManager.run_in_markets / arun_in_markets
+"""
+
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.app_01.db.market_db import db_manager, Market
+
+
+@pytest.fixture
+def market_sessions(monkeypatch):
+    """In-memory SQLite session factory per market, tagged like the real ones"""
+    for market in Market:
+        engine = create_engine("sqlite:///:memory:")
+        factory = sessionmaker(bind=engine, info={"market": market})
+        monkeypatch.setitem(db_manager.session_factories, market, factory)
+
+
+class TestRunInMarkets:
+    def test_markets_run_concurrently(self, market_sessions):
+        barrier = threading.Barrier(len(Market), timeout=2)
+
+        def fn(db, market):
+            barrier.wait()  # Only passes if every market is in flight at once
+            return db.execute(text("SELECT 1")).scalar()
+
+        results = db_manager.run_in_markets(fn, timeout=5)
+
+        assert set(results) == set(Market)
+        assert all(result.ok and result.value == 1 for result in results.values())
+
+    def test_each_market_gets_its_own_session(self, market_sessions):
+        # Return the sessions themselves: ids of closed sessions can be reused
+        results = db_manager.run_in_markets(lambda db, market: db, timeout=5)
+        kg_db, us_db = results[Market.KG].value, results[Market.US].value
+
+        assert kg_db is not us_db
+        assert (kg_db.info["market"], us_db.info["market"]) == (Market.KG, Market.US)
+        assert kg_db.get_bind() is db_manager.session_factories[Market.KG].kw["bind"]
+        assert us_db.get_bind() is db_manager.session_factories[Market.US].kw["bind"]
+        assert kg_db.get_bind() is not us_db.get_bind()
+
+    def test_failure_in_one_market_keeps_the_other(self, market_sessions):
+        def fn(db, market):
+            if market == Market.US:
+                raise RuntimeError("US is down")
+            return "kg"
+
+        results = db_manager.run_in_markets(fn, timeout=5)
+
+        assert results[Market.KG].ok and results[Market.KG].value == "kg"
+        assert not results[Market.US].ok
+        assert isinstance(results[Market.US].error, RuntimeError)
+
+    def test_slow_market_times_out_with_partial_results(self, market_sessions):
+        def fn(db, market):
+            if market == Market.US:
+                time.sleep(1)
+            return market.value
+
+        started = time.monotonic()
+        results = db_manager.run_in_markets(fn, timeout=0.2)
+
+        assert time.monotonic() - started < 0.9
+        assert results[Market.KG].value == "kg"
+        assert isinstance(results[Market.US].error, TimeoutError)
+
+    def test_only_requested_markets(self, market_sessions):
+        results = db_manager.run_in_markets(lambda db, market: market, [Market.US], timeout=5)
+
+        assert list(results) == [Market.US]
+
+
+class TestArunInMarkets:
+    @pytest.mark.asyncio
+    async def test_slow_market_times_out_with_partial_results(self, market_sessions):
+        def fn(db, market):
+            if market == Market.KG:
+                time.sleep(1)
+            return market.value
+
+        started = time.monotonic()
+        results = await db_manager.arun_in_markets(fn, [Market.KG, Market.US], timeout=0.2)
+
+        assert time.monotonic() - started < 0.9
+        assert isinstance(results[Market.KG].error, TimeoutError)
+        assert results[Market.US].ok and results[Market.US].value == "us"
+
+    @pytest.mark.asyncio
+    async def test_errors_are_returned_not_raised(self, market_sessions):
+        def fn(db, market):
+            raise ValueError(market.value)
+
+        results = await db_manager.arun_in_markets(fn, timeout=5)
+
+        assert all(isinstance(result.error, ValueError) for result in results.values())
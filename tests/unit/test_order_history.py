@@ -0,0 +1,109 @@
+"""
+Unit Tests for Order History
+Tests keyset pagination and the summary projection of user orders
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from src.app_01.services.order_history import get_order_summaries, encode_cursor, decode_cursor
+from src.app_01.models.orders.order import Order, OrderStatus
+from src.app_01.models.orders.order_item import OrderItem
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.sku import SKU
+
+
+@pytest.fixture
+def orders(db_session: Session):
+    """Five orders of user 1 (two share a timestamp) and one of user 2"""
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db_session.add_all([brand, category])
+    db_session.commit()
+    subcategory = Subcategory(name="Shirts", slug="shirts", category_id=category.id)
+    db_session.add(subcategory)
+    db_session.commit()
+    product = Product(
+        title="Shirt", slug="shirt", sku_code="P-1", main_image="/uploads/shirt.jpg",
+        brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id
+    )
+    db_session.add(product)
+    db_session.commit()
+    plain = SKU(product_id=product.id, sku_code="SKU-1", size="M", color="white", price=100, stock=5)
+    variant = SKU(product_id=product.id, sku_code="SKU-2", size="L", color="black", price=100, stock=5,
+                  variant_image="/uploads/shirt-black.jpg")
+    db_session.add_all([plain, variant])
+    db_session.commit()
+
+    base = datetime(2026, 10, 1, 12, 0, 0)
+    dates = [base, base + timedelta(days=1), base + timedelta(days=2), base + timedelta(days=2), base + timedelta(days=3)]
+    created = []
+    for i, order_date in enumerate(dates):
+        order = Order(
+            order_number=f"#{1001 + i}", user_id=1,
+            status=OrderStatus.DELIVERED if i == 0 else OrderStatus.PENDING,
+            customer_name="Test", customer_phone="+996555000000", delivery_address="Bishkek, Main st 1",
+            subtotal=200, total_amount=200, order_date=order_date
+        )
+        db_session.add(order)
+        db_session.flush()
+        for sku in ([variant, plain] if i % 2 else [plain]):
+            db_session.add(OrderItem(
+                order_id=order.id, sku_id=sku.id, product_name=f"Shirt {sku.color}", sku_code=sku.sku_code,
+                size=sku.size, color=sku.color, unit_price=100, quantity=1, total_price=100
+            ))
+        created.append(order)
+    db_session.add(Order(
+        order_number="#2001", user_id=2, status=OrderStatus.PENDING, customer_name="Other",
+        customer_phone="+996555000001", delivery_address="Osh, Main st 2", subtotal=1, total_amount=1,
+        order_date=base
+    ))
+    db_session.commit()
+    return created
+
+
+@pytest.mark.unit
+class TestOrderHistory:
+    """Test order summaries"""
+
+    def test_cursor_pages_cover_all_orders_once(self, db_session: Session, orders):
+        seen = []
+        cursor = None
+        while True:
+            page = get_order_summaries(db_session, 1, cursor=cursor, limit=2)
+            seen.extend(order["id"] for order in page["orders"])
+            if not page["has_more"]:
+                break
+            cursor = page["next_cursor"]
+
+        expected = [o.id for o in sorted(orders, key=lambda o: (o.order_date, o.id), reverse=True)]
+        assert seen == expected
+
+    def test_summary_has_item_count_and_first_item_thumbnail(self, db_session: Session, orders):
+        page = get_order_summaries(db_session, 1, limit=10)
+        by_id = {order["id"]: order for order in page["orders"]}
+
+        assert by_id[orders[0].id]["items_count"] == 1
+        assert by_id[orders[0].id]["first_item_thumbnail"] == "/uploads/shirt.jpg"
+        assert by_id[orders[1].id]["items_count"] == 2
+        assert by_id[orders[1].id]["first_item_name"] == "Shirt black"
+        assert by_id[orders[1].id]["first_item_thumbnail"] == "/uploads/shirt-black.jpg"
+        assert page["next_cursor"] is None
+
+    def test_status_filter(self, db_session: Session, orders):
+        page = get_order_summaries(db_session, 1, OrderStatus.DELIVERED)
+
+        assert [order["id"] for order in page["orders"]] == [orders[0].id]
+        assert page["orders"][0]["status"] == "delivered"
+
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        order_date = datetime(2026, 10, 19, 8, 30)
+        assert decode_cursor(encode_cursor(order_date, 42)) == (order_date, 42)
+
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("not-a-cursor")
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,90 @@
+"""
+Unit Tests for Order Stats
+Tests incremental daily stats maintenance, market-day bucketing and the backfill
+"""
+
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy.orm import Session
+
+from src.app_01.services.order_stats import backfill_order_stats, market_day
+from src.app_01.db.market_db import Market
+from src.app_01.models.orders.order import OrderStatus
+from src.app_01.models.admins.order_management.order_admin_stats import OrderAdminStats
+
+
+def _stats(db_session: Session, day: date) -> OrderAdminStats:
+    db_session.expire_all()
+    return db_session.query(OrderAdminStats).filter(OrderAdminStats.date == day).one()
+
+
+@pytest.mark.unit
+class TestOrderStats:
+    """Test order_admin_stats maintenance"""
+
+    def test_market_day_uses_market_timezone(self):
+        late_utc = datetime(2026, 10, 19, 20, 0, tzinfo=timezone.utc)
+        early_utc = datetime(2026, 10, 19, 2, 0)  # Naive: UTC
+
+        assert market_day(late_utc, Market.KG) == date(2026, 10, 20)  # UTC+6
+        assert market_day(late_utc, Market.US) == date(2026, 10, 19)
+        assert market_day(early_utc, Market.US) == date(2026, 10, 18)  # UTC-4
+
+    def test_create_and_status_transitions_apply_deltas(self, db_session: Session, make_order):
+        day = date(2026, 10, 19)
+        first = make_order(order_date=datetime(2026, 10, 19, 6, 0), total=300)
+        second = make_order(order_date=datetime(2026, 10, 19, 7, 0), total=100)
+        db_session.add_all([first, second])
+        db_session.commit()
+
+        stats = _stats(db_session, day)
+        assert (stats.today_orders_count, stats.today_orders_pending) == (2, 2)
+
+        first.status = OrderStatus.DELIVERED
+        second.status = OrderStatus.CANCELLED
+        db_session.commit()
+
+        stats = _stats(db_session, day)
+        assert stats.today_orders_count == 2
+        assert stats.today_orders_pending == 0
+        assert stats.today_orders_delivered == 1
+        assert stats.today_orders_cancelled == 1
+        assert stats.today_sales_total == 300
+        assert stats.today_sales_count == 1
+        assert stats.avg_order_value == 300
+        assert stats.completion_rate == 50
+
+        first.status = OrderStatus.RETURNED
+        db_session.commit()
+
+        stats = _stats(db_session, day)
+        assert (stats.today_orders_delivered, stats.today_sales_total, stats.today_sales_count) == (0, 0, 0)
+
+    def test_rolled_back_order_is_not_counted(self, db_session: Session, make_order):
+        db_session.add(make_order(order_date=datetime(2026, 10, 19, 6, 0)))
+        db_session.flush()
+        db_session.rollback()
+
+        assert db_session.query(OrderAdminStats).count() == 0
+
+    def test_backfill_rebuilds_days(self, db_session: Session, make_order):
+        db_session.add_all([
+            make_order(order_date=datetime(2026, 10, 18, 19, 0), status=OrderStatus.DELIVERED, total=50),  # KG: Oct 19
+            make_order(order_date=datetime(2026, 10, 19, 6, 0)),
+        ])
+        db_session.commit()
+        # Drift: a stale row and wrong counters
+        db_session.add(OrderAdminStats(date=date(2026, 10, 1), today_orders_count=9))
+        stats = _stats(db_session, date(2026, 10, 19))
+        stats.today_orders_count = 42
+        db_session.commit()
+
+        days = backfill_order_stats(db_session, Market.KG)
+        db_session.commit()
+
+        assert days == 1
+        stats = _stats(db_session, date(2026, 10, 19))
+        assert stats.today_orders_count == 2
+        assert stats.today_orders_delivered == 1
+        assert stats.today_sales_total == 50
+        assert db_session.query(OrderAdminStats).count() == 1
@@ -0,0 +1,140 @@
+"""
+Unit Tests for Order Status Stream
+Tests status history recording, pub/sub fan-out, replay and SSE formatting
+"""
+
+import asyncio
+import json
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.services.order_status_stream import (
+    OrderStatusBroker, StreamLimitExceeded, SESSION_EVENTS_KEY,
+    format_sse, load_status_events_since, order_status_broker
+)
+from src.app_01.models.orders.order import OrderStatus
+from src.app_01.models.orders.order_status_history import OrderStatusHistory
+
+
+@pytest.mark.unit
+class TestStatusHistoryRecording:
+    """Test history rows and events produced by order writes"""
+
+    def test_new_order_and_status_change_are_recorded(self, db_session: Session, make_order):
+        order = make_order()
+        db_session.add(order)
+        db_session.commit()
+
+        order.status = OrderStatus.SHIPPED
+        db_session.commit()
+
+        rows = db_session.query(OrderStatusHistory).order_by(OrderStatusHistory.id).all()
+        assert [(r.old_status, r.new_status) for r in rows] == [
+            (None, OrderStatus.PENDING),
+            (OrderStatus.PENDING, OrderStatus.SHIPPED),
+        ]
+
+    def test_explicit_history_row_is_not_duplicated(self, db_session: Session, make_order):
+        order = make_order()
+        db_session.add(order)
+        db_session.commit()
+
+        order.status = OrderStatus.CANCELLED
+        db_session.add(OrderStatusHistory(order=order, old_status=OrderStatus.PENDING,
+                                          new_status=OrderStatus.CANCELLED, notes="by customer"))
+        db_session.commit()
+
+        assert db_session.query(OrderStatusHistory).filter(
+            OrderStatusHistory.new_status == OrderStatus.CANCELLED
+        ).count() == 1
+
+    def test_events_are_published_on_commit_only(self, db_session: Session, monkeypatch, make_order):
+        published = []
+        monkeypatch.setattr(order_status_broker, "publish", published.append)
+        db_session.info["market"] = "kg"
+
+        order = make_order(user_id=7)
+        db_session.add(order)
+        db_session.flush()
+        assert published == []
+        db_session.rollback()
+        assert SESSION_EVENTS_KEY not in db_session.info
+
+        db_session.add(make_order(user_id=7))
+        db_session.commit()
+
+        assert len(published) == 1
+        assert published[0]["user_id"] == 7
+        assert published[0]["market"] == "kg"
+        assert published[0]["new_status"] == "pending"
+
+    def test_replay_returns_only_users_events_after_id(self, db_session: Session, make_order):
+        mine, other = make_order(user_id=1), make_order(user_id=2)
+        db_session.add_all([mine, other])
+        db_session.commit()
+        first_id = db_session.query(OrderStatusHistory.id).filter(
+            OrderStatusHistory.order_id == mine.id
+        ).scalar()
+        mine.status = OrderStatus.CONFIRMED
+        db_session.commit()
+
+        events = load_status_events_since(db_session, "kg", 1, first_id)
+
+        assert [(e["order_id"], e["new_status"]) for e in events] == [(mine.id, "confirmed")]
+
+
+@pytest.mark.unit
+class TestOrderStatusBroker:
+    """Test in-process fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_events_reach_only_the_users_streams(self):
+        broker = OrderStatusBroker()
+        mine = broker.subscribe("kg", 1)
+        same_id_other_market = broker.subscribe("us", 1)
+
+        broker.publish({"id": 1, "market": "kg", "user_id": 1})
+
+        assert (await asyncio.wait_for(mine.get(), 1))["id"] == 1
+        assert same_id_other_market.empty()
+
+    @pytest.mark.asyncio
+    async def test_publish_from_another_thread(self):
+        broker = OrderStatusBroker()
+        queue = broker.subscribe("kg", 1)
+
+        await asyncio.get_running_loop().run_in_executor(
+            None, broker.publish, {"id": 5, "market": "kg", "user_id": 1}
+        )
+
+        assert (await asyncio.wait_for(queue.get(), 1))["id"] == 5
+
+    @pytest.mark.asyncio
+    async def test_stream_cap_and_unsubscribe(self):
+        broker = OrderStatusBroker(max_streams=1)
+        queue = broker.subscribe("kg", 1)
+        with pytest.raises(StreamLimitExceeded):
+            broker.subscribe("kg", 2)
+
+        broker.unsubscribe("kg", 1, queue)
+
+        assert broker.active_streams == 0
+        broker.subscribe("kg", 2)
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_disconnected(self):
+        broker = OrderStatusBroker(queue_size=2)
+        queue = broker.subscribe("kg", 1)
+        for i in range(3):
+            broker.publish({"id": i, "market": "kg", "user_id": 1})
+
+        assert queue.get_nowait() is None
+
+    def test_format_sse(self):
+        message = format_sse({"id": 12, "order_id": 3, "new_status": "shipped"})
+
+        lines = message.split("\n")
+        assert lines[0] == "id: 12"
+        assert lines[1] == "event: order_status"
+        assert json.loads(lines[2][len("data: "):])["new_status"] == "shipped"
+        assert message.endswith("\n\n")
@@ -0,0 +1,166 @@
+"""
+Unit Tests for Outbox Dispatcher
+Tests transactional outbox publishing, batched delivery, retries, retention and order handlers
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.outbox_dispatcher import OutboxDispatcher, publish_event, outbox_dispatcher
+from src.app_01.services.order_events import ORDER_CREATED
+from src.app_01.models.orders.outbox_event import OutboxEvent, OutboxStatus
+from src.app_01.models.users.user_notification import UserNotification
+
+
+@pytest.fixture
+def dispatcher():
+    return OutboxDispatcher(batch_size=10, max_attempts=3, backoff_base_seconds=2.0, backoff_max_seconds=5.0)
+
+
+@pytest.mark.unit
+class TestOutboxDispatcher:
+    """Test event publishing and delivery"""
+
+    def test_publish_is_part_of_callers_transaction(self, db_session: Session):
+        publish_event(db_session, "test.event", {"n": 1})
+        db_session.rollback()
+
+        assert db_session.query(OutboxEvent).count() == 0
+
+    def test_events_are_delivered_to_registered_handlers(self, db_session: Session, dispatcher):
+        received = []
+        dispatcher.register("test.event", lambda db, event, market: received.append(event.payload["n"]))
+        for n in range(3):
+            publish_event(db_session, "test.event", {"n": n})
+        db_session.commit()
+
+        assert dispatcher.dispatch_batch(db_session, Market.KG) == 3
+
+        assert received == [0, 1, 2]
+        statuses = {event.status for event in db_session.query(OutboxEvent).all()}
+        assert statuses == {OutboxStatus.DELIVERED}
+        metrics = dispatcher.get_metrics()
+        assert metrics["delivered"] == 3
+        assert metrics["last_lag_seconds"] is not None
+
+    def test_batch_size_limits_claim(self, db_session: Session):
+        dispatcher = OutboxDispatcher(batch_size=2)
+        for n in range(5):
+            publish_event(db_session, "test.event", {"n": n})
+        db_session.commit()
+
+        assert dispatcher.dispatch_batch(db_session, Market.KG) == 2
+        assert dispatcher.get_backlog(db_session)["pending"] == 3
+
+    def test_failed_handler_is_retried_with_backoff(self, db_session: Session, dispatcher):
+        def failing(db, event, market):
+            raise RuntimeError("boom")
+
+        dispatcher.register("test.event", failing)
+        event = publish_event(db_session, "test.event", {})
+        db_session.commit()
+
+        dispatcher.dispatch_batch(db_session, Market.KG)
+
+        db_session.refresh(event)
+        assert event.status == OutboxStatus.PENDING
+        assert event.attempts == 1
+        assert "boom" in event.last_error
+        # Not due again until the backoff has passed
+        assert dispatcher.dispatch_batch(db_session, Market.KG) == 0
+
+    def test_event_fails_after_max_attempts(self, db_session: Session, dispatcher):
+        dispatcher.register("test.event", lambda db, event, market: 1 / 0)
+        event = publish_event(db_session, "test.event", {})
+        db_session.commit()
+
+        for _ in range(3):
+            event.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+            db_session.commit()
+            dispatcher.dispatch_batch(db_session, Market.KG)
+
+        db_session.refresh(event)
+        assert event.status == OutboxStatus.FAILED
+        assert dispatcher.get_metrics()["failed"] == 1
+
+    def test_backoff_is_exponential_and_capped(self, dispatcher):
+        assert [dispatcher.backoff_seconds(n) for n in (1, 2, 3, 4)] == [2.0, 4.0, 5.0, 5.0]
+
+    def test_expired_lease_is_reclaimed(self, db_session: Session, dispatcher):
+        event = publish_event(db_session, "test.event", {})
+        event.status = OutboxStatus.PROCESSING
+        event.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.commit()
+
+        assert dispatcher.dispatch_batch(db_session, Market.KG) == 1
+
+    def test_purge_removes_only_old_delivered_events(self, db_session: Session):
+        dispatcher = OutboxDispatcher(delivered_retention_hours=24, purge_batch_size=2)
+        now = datetime.now(timezone.utc)
+        old_delivered = []
+        for _ in range(3):
+            event = publish_event(db_session, "test.event", {})
+            event.status = OutboxStatus.DELIVERED
+            event.delivered_at = now - timedelta(days=2)
+            old_delivered.append(event)
+        recent = publish_event(db_session, "test.event", {})
+        recent.status = OutboxStatus.DELIVERED
+        recent.delivered_at = now - timedelta(hours=1)
+        pending = publish_event(db_session, "test.event", {})
+        failed = publish_event(db_session, "test.event", {})
+        failed.status = OutboxStatus.FAILED
+        db_session.commit()
+        kept_ids = {recent.id, pending.id, failed.id}
+
+        assert dispatcher.purge_delivered(db_session) == 3
+
+        assert {event.id for event in db_session.query(OutboxEvent).all()} == kept_ids
+        assert dispatcher.get_metrics()["purged"] == 3
+
+    def test_purge_runs_once_per_interval(self):
+        dispatcher = OutboxDispatcher(purge_interval_seconds=3600)
+
+        assert dispatcher.purge_due() is True
+        assert dispatcher.purge_due() is False
+
+
+@pytest.mark.unit
+class TestOrderCreatedHandlers:
+    """Test order.created side effects"""
+
+    def _publish_order(self, db_session: Session, order_id: int = 1):
+        publish_event(db_session, ORDER_CREATED, {
+            "order_id": order_id,
+            "order_number": f"#100{order_id}",
+            "user_id": 7,
+            "market": "kg",
+            "status": "pending",
+            "total_amount": 2500.0,
+            "currency": "KGS",
+            "items_count": 2,
+            "order_date": "2026-10-19T10:00:00+00:00"
+        }, aggregate_type="order", aggregate_id=order_id)
+        db_session.commit()
+
+    def test_order_created_adds_notification(self, db_session: Session):
+        self._publish_order(db_session, 1)
+        self._publish_order(db_session, 2)
+
+        outbox_dispatcher.dispatch_batch(db_session, Market.KG)
+
+        notifications = db_session.query(UserNotification).filter(UserNotification.user_id == 7).all()
+        assert sorted(n.order_id for n in notifications) == [1, 2]
+
+    def test_notification_is_not_duplicated_on_redelivery(self, db_session: Session):
+        self._publish_order(db_session, 1)
+        outbox_dispatcher.dispatch_batch(db_session, Market.KG)
+        event = db_session.query(OutboxEvent).one()
+        event.status = OutboxStatus.PENDING
+        event.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.commit()
+
+        outbox_dispatcher.dispatch_batch(db_session, Market.KG)
+
+        assert db_session.query(UserNotification).count() == 1
@@ -0,0 +1,162 @@
+"""
+Unit Tests for Rate Limiting
+Tests the sliding window counter on the in-process and Redis backends, eviction and the middleware
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app_01.core.middleware import RateLimitMiddleware
+from src.app_01.core.rate_limit import (
+    LocalRedis, MemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+)
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request, clock):
+    if request.param == "memory":
+        backend = MemoryRateLimitBackend(clock=clock)
+    else:
+        backend = RedisRateLimitBackend(LocalRedis(clock=clock))
+    return RateLimiter(backend, clock=clock)
+
+
+@pytest.mark.unit
+class TestSlidingWindow:
+    """Both backends give the same answers"""
+
+    def test_limit_within_window(self, limiter, clock):
+        results = [limiter.hit("ip", 3, 60) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after > 0
+
+    def test_refused_requests_are_not_counted(self, limiter, clock):
+        clock.now = 1200.0  # Start of a window
+        for _ in range(10):
+            limiter.hit("ip", 2, 60)
+        clock.now += 60  # Next window: 2 counted requests still overlap it fully
+
+        assert not limiter.hit("ip", 2, 60).allowed
+        clock.now += 30  # Half of them have slid out
+
+        assert limiter.hit("ip", 2, 60).allowed
+
+    def test_previous_window_is_weighted(self, limiter, clock):
+        clock.now = 1200.0  # Start of a window
+        for _ in range(4):
+            limiter.hit("ip", 4, 60)
+        clock.now += 60 + 45  # 25% of the previous window overlaps: counts as 1
+
+        assert [limiter.hit("ip", 4, 60).allowed for _ in range(4)] == [True, True, True, False]
+
+    def test_retry_after_is_when_a_request_fits(self, limiter, clock):
+        clock.now = 1200.0
+        for _ in range(3):
+            limiter.hit("ip", 3, 60)
+
+        refused = limiter.hit("ip", 3, 60)
+        clock.now += refused.retry_after
+
+        assert limiter.hit("ip", 3, 60).allowed
+
+    def test_peek_does_not_count(self, limiter):
+        for _ in range(5):
+            assert limiter.peek("phone", 1, 900).allowed
+
+        limiter.hit("phone", 1, 900)
+
+        assert not limiter.peek("phone", 1, 900).allowed
+
+    def test_keys_are_independent(self, limiter):
+        limiter.hit("a", 1, 60)
+
+        assert limiter.hit("b", 1, 60).allowed
+
+
+@pytest.mark.unit
+class TestEviction:
+    """Keys do not outlive their windows"""
+
+    def test_memory_entries_are_swept(self, clock):
+        backend = MemoryRateLimitBackend(sweep_interval_seconds=10, clock=clock)
+        limiter = RateLimiter(backend, clock=clock)
+        for ip in range(100):
+            limiter.hit(f"ip-{ip}", 5, 60)
+        assert len(backend) == 100
+
+        clock.now += 121
+        limiter.hit("new", 5, 60)
+
+        assert len(backend) == 1
+
+    def test_redis_keys_expire(self, clock):
+        client = LocalRedis(clock=clock)
+        limiter = RateLimiter(RedisRateLimitBackend(client), clock=clock)
+        limiter.hit("ip", 5, 60)
+        assert len(client) == 1
+
+        clock.now += 121
+
+        assert len(client) == 0
+
+    def test_unavailable_store_fails_open(self, clock):
+        client = LocalRedis(clock=clock)
+        limiter = RateLimiter(RedisRateLimitBackend(client), clock=clock)
+
+        with patch.object(client, "pipeline", side_effect=ConnectionError("down")):
+            assert limiter.hit("ip", 1, 60).allowed
+
+
+@pytest.mark.unit
+class TestRateLimitMiddleware:
+    """Limits per client and endpoint group"""
+
+    def _client(self, limiter):
+        app = FastAPI()
+
+        @app.get("/api/v1/auth/ping")
+        def auth_ping():
+            return {"ok": True}
+
+        @app.get("/api/v1/products")
+        def products():
+            return {"ok": True}
+
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        return TestClient(app)
+
+    def test_refused_with_retry_after(self, clock):
+        limiter = RateLimiter(RedisRateLimitBackend(LocalRedis(clock=clock)), clock=clock)
+
+        with patch("src.app_01.core.middleware.get_settings") as get_settings:
+            get_settings.return_value.rate_limit.enabled = True
+            get_settings.return_value.rate_limit.auth_limit = 2
+            get_settings.return_value.rate_limit.auth_window = 300
+            get_settings.return_value.rate_limit.default_limit = 100
+            get_settings.return_value.rate_limit.default_window = 60
+            client = self._client(limiter)
+            codes = [client.get("/api/v1/auth/ping").status_code for _ in range(3)]
+            refused = client.get("/api/v1/auth/ping")
+            other_group = client.get("/api/v1/products")
+
+        assert codes == [200, 200, 429]
+        assert int(refused.headers["Retry-After"]) > 0
+        assert other_group.status_code == 200
@@ -0,0 +1,136 @@
+"""
+Unit Tests for SMS Provider
+Tests provider timeouts, bounded concurrency, the circuit breaker and the fallback to local verification codes
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from src.app_01.schemas.auth import PhoneLoginRequest
+from src.app_01.services import auth_service as auth_module
+from src.app_01.services.sms_provider import (
+    CircuitBreaker, FakeSMSProvider, SMSGateway, SMSProviderError, TwilioVerifyProvider
+)
+
+PHONE = "+996555123456"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSMSGateway:
+    """Provider calls never hold a request for long"""
+
+    async def test_sends_and_checks_codes(self):
+        provider = FakeSMSProvider(code="4321")
+        gateway = SMSGateway(provider)
+
+        assert await gateway.send_code(PHONE)
+        assert await gateway.check_code(PHONE, "4321")
+        assert not await gateway.check_code(PHONE, "0000")
+        assert provider.sent == [PHONE]
+
+    async def test_slow_provider_times_out(self):
+        gateway = SMSGateway(FakeSMSProvider(latency_seconds=1.0), timeout_seconds=0.05)
+
+        assert not await gateway.send_code(PHONE)
+        assert gateway.breaker.failures == 1
+
+    async def test_calls_beyond_concurrency_are_not_made(self):
+        provider = FakeSMSProvider(latency_seconds=0.05)
+        gateway = SMSGateway(provider, max_concurrency=1)
+
+        results = await asyncio.gather(gateway.send_code(PHONE), gateway.send_code(PHONE))
+
+        assert sorted(results) == [False, True]
+        assert len(provider.sent) == 1
+
+    async def test_circuit_opens_and_recovers(self):
+        clock = Clock()
+        provider = FakeSMSProvider(fail=True)
+        gateway = SMSGateway(provider, breaker=CircuitBreaker(failure_threshold=2, reset_timeout_seconds=30, clock=clock))
+        for _ in range(2):
+            assert not await gateway.send_code(PHONE)
+        assert gateway.breaker.state == CircuitBreaker.OPEN
+
+        provider.fail = False
+        assert not await gateway.send_code(PHONE)  # Still open: provider not called
+        assert provider.sent == []
+
+        clock.now += 30
+        assert await gateway.send_code(PHONE)  # Trial call closes the circuit
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+    async def test_failed_trial_reopens_circuit(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30, clock=clock)
+        gateway = SMSGateway(FakeSMSProvider(fail=True), breaker=breaker)
+        await gateway.send_code(PHONE)
+        clock.now += 30
+
+        assert not await gateway.send_code(PHONE)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestTwilioVerifyProvider:
+    """Twilio outages raise, rejected requests return False"""
+
+    def _provider(self, handler):
+        provider = TwilioVerifyProvider("AC123", "token", "VA123")
+        provider._http = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return provider
+
+    async def test_send_and_approve(self):
+        def handler(request):
+            if request.url.path.endswith("/Verifications"):
+                return httpx.Response(201, json={"sid": "VE1", "status": "pending"})
+            return httpx.Response(200, json={"status": "approved"})
+        provider = self._provider(handler)
+
+        assert await provider.send_code(PHONE)
+        assert await provider.check_code(PHONE, "123456")
+
+    async def test_rejected_code(self):
+        provider = self._provider(lambda request: httpx.Response(404, json={"message": "not found"}))
+
+        assert not await provider.check_code(PHONE, "123456")
+
+    async def test_outage_raises(self):
+        provider = self._provider(lambda request: httpx.Response(503))
+
+        with pytest.raises(SMSProviderError):
+            await provider.send_code(PHONE)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLocalFallback:
+    """A failing provider falls back to a local verification code"""
+
+    async def test_send_code_falls_back_when_provider_fails(self):
+        verification = MagicMock(verification_code="654321")
+        gateway = SMSGateway(FakeSMSProvider(fail=True))
+
+        with patch.object(auth_module, "TWILIO_READY", True), \
+                patch.object(auth_module, "sms_gateway", gateway), \
+                patch.object(auth_module.auth_service, "rate_limiter", MagicMock()), \
+                patch.object(auth_module.db_manager, "get_session_factory", return_value=MagicMock()), \
+                patch.object(auth_module, "get_user_model", return_value=MagicMock()), \
+                patch.object(auth_module, "create_verification_for_market", return_value=verification) as create:
+            response = await auth_module.auth_service.send_verification_code(PhoneLoginRequest(phone=PHONE))
+
+        assert response.success
+        create.assert_called_once()
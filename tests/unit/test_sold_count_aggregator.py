@@ -0,0 +1,93 @@
+"""
+Unit Tests for Sold Count Aggregator
+Tests write-behind rollup of product sales deltas into products.sold_count
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.services.sold_count_aggregator import SoldCountAggregator
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.product_sales_delta import ProductSalesDelta
+
+
+@pytest.fixture
+def products(db_session: Session):
+    """Two products with existing sold counts"""
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db_session.add_all([brand, category])
+    db_session.commit()
+    subcategory = Subcategory(name="Shirts", slug="shirts", category_id=category.id)
+    db_session.add(subcategory)
+    db_session.commit()
+
+    items = [
+        Product(
+            title=f"Product {i}", slug=f"product-{i}", sku_code=f"P-{i}",
+            brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id,
+            sold_count=10
+        )
+        for i in range(2)
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+@pytest.mark.unit
+class TestSoldCountAggregator:
+    """Test delta recording and batch rollup"""
+
+    def test_record_sale_appends_deltas_without_touching_product(self, db_session: Session, products):
+        SoldCountAggregator.record_sale(db_session, None, {products[0].id: 2, products[1].id: 0})
+        db_session.commit()
+
+        deltas = db_session.query(ProductSalesDelta).all()
+        assert [(d.product_id, d.quantity) for d in deltas] == [(products[0].id, 2)]
+        db_session.refresh(products[0])
+        assert products[0].sold_count == 10
+
+    def test_flush_rolls_deltas_into_sold_count(self, db_session: Session, products):
+        aggregator = SoldCountAggregator()
+        SoldCountAggregator.record_sale(db_session, None, {products[0].id: 2, products[1].id: 1})
+        SoldCountAggregator.record_sale(db_session, None, {products[0].id: 3})
+        db_session.commit()
+
+        consumed = aggregator.flush(db_session)
+
+        assert consumed == 3
+        assert db_session.query(ProductSalesDelta).count() == 0
+        db_session.refresh(products[0])
+        db_session.refresh(products[1])
+        assert products[0].sold_count == 15
+        assert products[1].sold_count == 11
+
+    def test_flush_respects_batch_size_and_drain_empties_log(self, db_session: Session, products):
+        aggregator = SoldCountAggregator(batch_size=2)
+        for _ in range(5):
+            SoldCountAggregator.record_sale(db_session, None, {products[0].id: 1})
+        db_session.commit()
+
+        assert aggregator.flush(db_session) == 2
+        assert db_session.query(ProductSalesDelta).count() == 3
+
+        assert aggregator.drain(db_session) == 3
+        assert db_session.query(ProductSalesDelta).count() == 0
+        db_session.refresh(products[0])
+        assert products[0].sold_count == 15
+
+    def test_negative_deltas_reduce_sold_count(self, db_session: Session, products):
+        aggregator = SoldCountAggregator()
+        SoldCountAggregator.record_sale(db_session, None, {products[1].id: -4})
+        db_session.commit()
+
+        aggregator.flush(db_session)
+
+        db_session.refresh(products[1])
+        assert products[1].sold_count == 6
+
+    def test_flush_with_empty_log(self, db_session: Session, products):
+        assert SoldCountAggregator().flush(db_session) == 0
@@ -0,0 +1,146 @@
+"""
+Unit Tests for Static File Serving
+Tests immutable caching of content-hashed uploads, precompressed assets, ranges and X-Accel-Redirect
+"""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app_01.utils.static_files import CachedStaticFiles, RangeNotSatisfiable, parse_range
+
+HASH = "ab" * 32
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "product").mkdir()
+    (tmp_path / "product" / f"{HASH}.jpg").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "product" / f"{HASH}_640w.webp").write_bytes(b"webp")
+    (tmp_path / "product" / "legacy-photo.jpg").write_bytes(b"legacy")
+    (tmp_path / "admin.css").write_text("body { color: red; }" * 50)
+    (tmp_path / "admin.css.gz").write_bytes(gzip.compress((tmp_path / "admin.css").read_bytes()))
+    return tmp_path
+
+
+def _client(static_dir, **options) -> TestClient:
+    app = FastAPI()
+    app.mount("/uploads", CachedStaticFiles(directory=str(static_dir), **options), name="uploads")
+    return TestClient(app)
+
+
+@pytest.mark.unit
+class TestCacheHeaders:
+    """Content-hashed files never change"""
+
+    def test_hashed_file_is_immutable(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}.jpg")
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.headers["etag"] == f'"{HASH}"'
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_variant_of_hashed_file_is_immutable(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}_640w.webp")
+
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["etag"] == f'"{HASH}_640w"'
+
+    def test_other_files_are_revalidated(self, static_dir):
+        response = _client(static_dir, max_age=60).get("/uploads/product/legacy-photo.jpg")
+
+        assert response.headers["cache-control"] == "public, max-age=60"
+        assert "immutable" not in response.headers["cache-control"]
+
+    def test_matching_etag_is_a_304(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}.jpg", headers={"If-None-Match": f'"{HASH}"'})
+
+        assert response.status_code == 304
+
+
+@pytest.mark.unit
+class TestPrecompressed:
+    """.gz / .br siblings of CSS/JS"""
+
+    def test_gzip_sibling_is_served(self, static_dir):
+        client = _client(static_dir)
+
+        response = client.get("/uploads/admin.css", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == (static_dir / "admin.css.gz").stat().st_size
+        assert response.text == (static_dir / "admin.css").read_text()
+
+    def test_identity_when_not_accepted(self, static_dir):
+        response = _client(static_dir).get("/uploads/admin.css", headers={"Accept-Encoding": "br, gzip;q=0"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == (static_dir / "admin.css").read_text()
+
+
+@pytest.mark.unit
+class TestRanges:
+    """Single byte ranges"""
+
+    def test_range_is_a_206(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}.jpg", headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 10-19/1024"
+        assert response.content == bytes(range(10, 20))
+
+    def test_suffix_range(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}.jpg", headers={"Range": "bytes=-4"})
+
+        assert response.content == bytes([252, 253, 254, 255])
+
+    def test_unsatisfiable_range_is_a_416(self, static_dir):
+        response = _client(static_dir).get(f"/uploads/product/{HASH}.jpg", headers={"Range": "bytes=5000-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */1024"
+
+    def test_stale_if_range_gets_whole_file(self, static_dir):
+        response = _client(static_dir).get(
+            f"/uploads/product/{HASH}.jpg", headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+        )
+
+        assert response.status_code == 200
+        assert len(response.content) == 1024
+
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-", (0, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=abc", None),
+    ])
+    def test_parse_range(self, header, expected):
+        assert parse_range(header, 100) == expected
+
+    def test_parse_range_outside_file(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=100-", 100)
+
+
+@pytest.mark.unit
+class TestAccelRedirect:
+    """nginx delivers the file"""
+
+    def test_headers_only_response(self, static_dir):
+        response = _client(static_dir, accel_redirect="/_static/uploads/").get(f"/uploads/product/{HASH}.jpg")
+
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == f"/_static/uploads/product/{HASH}.jpg"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content == b""
+
+    def test_missing_file_is_still_a_404(self, static_dir):
+        response = _client(static_dir, accel_redirect="/_static/uploads").get("/uploads/product/missing.jpg")
+
+        assert response.status_code == 404
@@ -0,0 +1,95 @@
+"""
+Unit Tests for Stock Cache
+Tests cache fill, write-through from committed SKU changes and reconcile
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.services.stock_cache import StockCache, stock_cache
+from src.app_01.models.products.brand import Brand
+from src.app_01.models.products.category import Category, Subcategory
+from src.app_01.models.products.product import Product
+from src.app_01.models.products.sku import SKU
+
+
+@pytest.fixture
+def skus(db_session: Session):
+    """Two SKUs, one inactive"""
+    brand = Brand(name="Brand", slug="brand")
+    category = Category(name="Men", slug="men")
+    db_session.add_all([brand, category])
+    db_session.commit()
+    subcategory = Subcategory(name="Shirts", slug="shirts", category_id=category.id)
+    db_session.add(subcategory)
+    db_session.commit()
+    product = Product(
+        title="Shirt", slug="shirt", sku_code="P-1",
+        brand_id=brand.id, category_id=category.id, subcategory_id=subcategory.id
+    )
+    db_session.add(product)
+    db_session.commit()
+    items = [
+        SKU(product_id=product.id, sku_code="SKU-1", size="M", color="white", price=100, stock=5, is_active=True),
+        SKU(product_id=product.id, sku_code="SKU-2", size="L", color="black", price=100, stock=3, is_active=False),
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+@pytest.fixture
+def global_cache():
+    stock_cache.clear()
+    yield stock_cache
+    stock_cache.clear()
+
+
+@pytest.mark.unit
+class TestStockCache:
+    """Test availability lookups"""
+
+    def test_misses_are_loaded_once_then_served_from_memory(self, db_session: Session, skus):
+        cache = StockCache()
+
+        first = cache.get_availability(db_session, Market.KG, [skus[0].id, skus[1].id, 999])
+        assert first == {skus[0].id: (5, True), skus[1].id: (3, False)}
+        assert cache.misses == 3
+
+        cache.get_availability(db_session, Market.KG, [skus[0].id])
+        assert cache.hits == 1
+
+    def test_markets_are_separate(self, db_session: Session, skus):
+        cache = StockCache()
+        cache.apply(Market.US, {skus[0].id: (42, True)})
+
+        assert cache.get_availability(db_session, Market.KG, [skus[0].id]) == {skus[0].id: (5, True)}
+
+    def test_reconcile_replaces_stale_entries(self, db_session: Session, skus):
+        cache = StockCache()
+        cache.apply(Market.KG, {skus[0].id: (1, True), 12345: (9, True)})
+
+        assert cache.reconcile(db_session, Market.KG) == 2
+        assert cache.get_availability(db_session, Market.KG, [skus[0].id, 12345]) == {skus[0].id: (5, True)}
+
+    def test_committed_stock_change_updates_cache(self, db_session: Session, skus, global_cache):
+        db_session.info["market"] = Market.KG
+        global_cache.get_availability(db_session, Market.KG, [skus[0].id])
+        misses = global_cache.misses
+
+        skus[0].stock -= 2
+        db_session.commit()
+
+        assert global_cache.get_availability(db_session, Market.KG, [skus[0].id]) == {skus[0].id: (3, True)}
+        assert global_cache.misses == misses
+
+    def test_rolled_back_change_is_ignored(self, db_session: Session, skus, global_cache):
+        db_session.info["market"] = Market.KG
+        global_cache.get_availability(db_session, Market.KG, [skus[0].id])
+
+        skus[0].stock = 0
+        db_session.flush()
+        db_session.rollback()
+
+        assert global_cache.get_availability(db_session, Market.KG, [skus[0].id]) == {skus[0].id: (5, True)}
@@ -0,0 +1,160 @@
+"""
+Unit Tests for Token Verification
+Tests access token verification, the verified token cache and revocation on logout/deactivation
+"""
+
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+from sqlalchemy.orm import Session
+
+from src.app_01.db.market_db import Market
+from src.app_01.models.users.user import User
+from src.app_01.services.auth_service import auth_service, SECRET_KEY, ALGORITHM
+from src.app_01.services.token_verification import (
+    TokenRevocations, VerifiedToken, VerifiedTokenCache, token_revocations, verified_tokens
+)
+
+PHONE = "+996555123456"
+
+
+def _no_db():
+    return patch(
+        "src.app_01.services.auth_service.db_manager.get_session_factory",
+        side_effect=AssertionError("verification must not query the database")
+    )
+
+
+def _users_db(db_session: Session):
+    """Load users from the test session (kept open for the rest of the test)"""
+    return patch(
+        "src.app_01.services.auth_service.db_manager.get_session_factory",
+        return_value=lambda: nullcontext(db_session)
+    )
+
+
+@pytest.fixture
+def user(db_session: Session) -> User:
+    user = User(phone_number=PHONE, market="kg", is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.mark.unit
+class TestVerifiedTokenCache:
+    """A token's user is loaded once per worker, then trusted for the token's lifetime"""
+
+    def test_token_carries_no_identity_claims(self):
+        payload = jwt.decode(auth_service._create_access_token(7, "kg"), SECRET_KEY, algorithms=[ALGORITHM])
+
+        assert set(payload) == {"sub", "market", "exp", "iat"}
+
+    def test_user_is_loaded_once_per_token(self, db_session: Session, user: User):
+        token = auth_service._create_access_token(user.id, "kg")
+
+        with _users_db(db_session):
+            identity = auth_service.verify_access_token(token)
+        with _no_db(), patch("src.app_01.services.auth_service.jwt.decode", side_effect=AssertionError("decoded again")):
+            assert auth_service.verify_access_token(token).user_id == user.id
+
+        assert identity.valid
+        assert (identity.user_id, identity.phone_number, identity.market.value) == (user.id, PHONE, "kg")
+        assert identity.currency == "сом"
+        assert identity.formatted_phone
+
+    def test_unknown_user_is_rejected(self, db_session: Session):
+        token = auth_service._create_access_token(999, "kg")
+
+        with _users_db(db_session), pytest.raises(ValueError, match="User not found"):
+            auth_service.verify_access_token(token)
+
+    def test_expired_token_is_rejected(self):
+        token = jwt.encode(
+            {"sub": "7", "market": "kg", "exp": datetime.utcnow() - timedelta(seconds=1)},
+            SECRET_KEY, algorithm=ALGORITHM
+        )
+
+        with pytest.raises(ValueError):
+            auth_service.verify_access_token(token)
+
+    def test_cached_token_expires(self):
+        cache = VerifiedTokenCache()
+        cache.put("token", VerifiedToken(None, "kg", 7, time.time() - 60, time.time() - 1))
+
+        assert cache.get("token") is None
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        entry = VerifiedToken(None, "kg", 7, time.time(), time.time() + 60)
+        cache.put("a", entry)
+        cache.put("b", entry)
+        cache.get("a")
+        cache.put("c", entry)
+
+        assert cache.get("a") and cache.get("c")
+        assert cache.get("b") is None
+
+
+@pytest.mark.unit
+class TestRevocation:
+    """Logout and deactivation reject tokens issued before them"""
+
+    def test_deactivation_revokes_on_commit(self, db_session: Session, user: User):
+        token = auth_service._create_access_token(user.id, "kg")
+        with _users_db(db_session):
+            auth_service.verify_access_token(token)
+
+        user.is_active = False
+        db_session.commit()
+
+        with pytest.raises(ValueError, match="revoked"):
+            auth_service.verify_access_token(token)
+        # Logging in again issues a newer token, which is accepted
+        with _users_db(db_session):
+            assert auth_service.verify_access_token(auth_service._create_access_token(user.id, "kg")).valid
+
+    def test_rolled_back_deactivation_does_not_revoke(self, db_session: Session):
+        user = User(phone_number=PHONE, market="kg", is_active=True)
+        db_session.add(user)
+        db_session.commit()
+
+        user.is_active = False
+        db_session.flush()
+        db_session.rollback()
+
+        assert len(token_revocations) == 0
+
+    def test_refresh_loads_recently_deactivated_users(self, db_session: Session):
+        revoked, active = User(phone_number=PHONE, market="kg"), User(phone_number="+996555000000", market="kg")
+        db_session.add_all([revoked, active])
+        db_session.commit()
+        revoked.is_active = False
+        db_session.commit()
+        revocations = TokenRevocations(retention_seconds=1800)
+
+        assert revocations.load(db_session, Market.KG) == 1
+        assert revocations.is_revoked("kg", revoked.id, time.time() - 3600)
+        assert not revocations.is_revoked("kg", active.id, time.time() - 3600)
+        assert not revocations.is_revoked("us", revoked.id, time.time() - 3600)
+
+    def test_notified_revocation(self):
+        revocations = TokenRevocations()
+
+        revocations.publish({"market": "us", "user_id": 3, "revoked_at": 1000.0})
+
+        assert revocations.is_revoked(Market.US, 3, 999.0)
+        assert not revocations.is_revoked(Market.US, 3, 1001.0)
+
+    def test_expired_entries_are_pruned(self):
+        revocations = TokenRevocations(retention_seconds=60)
+        revocations.revoke("kg", 1, time.time() - 120)
+        revocations.revoke("kg", 2)
+
+        revocations._prune()
+
+        assert len(revocations) == 1